@@ -0,0 +1,166 @@
+"""
+Búsqueda de Texto Completo (FTS5) - VentaPro
+============================================
+
+Define las tablas virtuales FTS5 de productos, clientes y proveedores y
+los triggers que las mantienen sincronizadas con sus tablas de origen.
+El tokenizador unicode61 con remove_diacritics permite buscar sin
+distinguir mayúsculas ni acentos, y los índices de prefijo hacen que las
+búsquedas mientras se escribe no recorran todo el vocabulario.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import sqlite3
+
+# Tokenizador y prefijos indexados comunes a todas las tablas FTS
+OPCIONES_FTS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+TABLAS_FTS = ['productos_fts', 'clientes_fts']
+
+TRIGGERS_FTS = [
+    'trg_fts_producto_insert', 'trg_fts_producto_update', 'trg_fts_producto_delete',
+    'trg_fts_categoria_update',
+    'trg_fts_cliente_insert', 'trg_fts_cliente_update', 'trg_fts_cliente_delete'
+]
+
+SQL_TABLAS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+        nombre, codigo, descripcion, categoria, codigo_barras,
+        {OPCIONES_FTS}
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+        nombre, apellidos, codigo, email, telefono, rfc,
+        {OPCIONES_FTS}
+    )
+    """
+]
+
+# Fila FTS de un producto; la categoría se resuelve por nombre
+_FILA_PRODUCTO = """
+    SELECT NEW.id, NEW.nombre, NEW.codigo, COALESCE(NEW.descripcion, ''),
+           COALESCE((SELECT nombre FROM categorias WHERE id = NEW.categoria_id), ''),
+           COALESCE(NEW.codigo_barras, '')
+"""
+
+_FILA_CLIENTE = """
+    SELECT NEW.id, NEW.nombre, COALESCE(NEW.apellidos, ''), COALESCE(NEW.codigo, ''),
+           COALESCE(NEW.email, ''), COALESCE(NEW.telefono, ''), COALESCE(NEW.rfc, '')
+"""
+
+SQL_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_producto_insert
+    AFTER INSERT ON productos
+    BEGIN
+        INSERT INTO productos_fts (rowid, nombre, codigo, descripcion, categoria, codigo_barras)
+        {_FILA_PRODUCTO};
+    END
+    """,
+    # Solo los campos indexados: los cambios de stock no tocan el índice
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_producto_update
+    AFTER UPDATE OF nombre, codigo, descripcion, categoria_id, codigo_barras ON productos
+    BEGIN
+        DELETE FROM productos_fts WHERE rowid = OLD.id;
+        INSERT INTO productos_fts (rowid, nombre, codigo, descripcion, categoria, codigo_barras)
+        {_FILA_PRODUCTO};
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_fts_producto_delete
+    AFTER DELETE ON productos
+    BEGIN
+        DELETE FROM productos_fts WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_fts_categoria_update
+    AFTER UPDATE OF nombre ON categorias
+    BEGIN
+        UPDATE productos_fts SET categoria = NEW.nombre
+        WHERE rowid IN (SELECT id FROM productos WHERE categoria_id = NEW.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_cliente_insert
+    AFTER INSERT ON clientes
+    BEGIN
+        INSERT INTO clientes_fts (rowid, nombre, apellidos, codigo, email, telefono, rfc)
+        {_FILA_CLIENTE};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_cliente_update
+    AFTER UPDATE OF nombre, apellidos, codigo, email, telefono, rfc ON clientes
+    BEGIN
+        DELETE FROM clientes_fts WHERE rowid = OLD.id;
+        INSERT INTO clientes_fts (rowid, nombre, apellidos, codigo, email, telefono, rfc)
+        {_FILA_CLIENTE};
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_fts_cliente_delete
+    AFTER DELETE ON clientes
+    BEGIN
+        DELETE FROM clientes_fts WHERE rowid = OLD.id;
+    END
+    """
+]
+
+# Índice de proveedores: el gestor de proveedores vive en memoria, por lo
+# que su tabla FTS se crea en una conexión propia y se alimenta desde Python
+SQL_PROVEEDORES = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS proveedores_fts USING fts5(
+        nombre, contacto_principal, email, categorias, rfc_nit,
+        {OPCIONES_FTS}
+    )
+"""
+
+# =================== CREACIÓN Y RECONSTRUCCIÓN ===================
+
+def crear_indices_busqueda(connection: sqlite3.Connection):
+    """Crea las tablas FTS de productos y clientes y sus triggers"""
+    for sql in SQL_TABLAS + SQL_TRIGGERS:
+        connection.execute(sql)
+
+def eliminar_indices_busqueda(connection: sqlite3.Connection):
+    """Elimina los triggers y las tablas FTS"""
+    for trigger in TRIGGERS_FTS:
+        connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for tabla in TABLAS_FTS:
+        connection.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+def reconstruir_indices_busqueda(connection: sqlite3.Connection):
+    """Repuebla (backfill) las tablas FTS desde productos y clientes
+
+    No hace commit: el llamador decide el alcance de la transacción.
+    """
+    connection.execute("DELETE FROM productos_fts")
+    connection.execute("""
+        INSERT INTO productos_fts (rowid, nombre, codigo, descripcion, categoria, codigo_barras)
+        SELECT p.id, p.nombre, p.codigo, COALESCE(p.descripcion, ''), COALESCE(c.nombre, ''),
+               COALESCE(p.codigo_barras, '')
+        FROM productos p
+        LEFT JOIN categorias c ON p.categoria_id = c.id
+    """)
+
+    connection.execute("DELETE FROM clientes_fts")
+    connection.execute("""
+        INSERT INTO clientes_fts (rowid, nombre, apellidos, codigo, email, telefono, rfc)
+        SELECT id, nombre, COALESCE(apellidos, ''), COALESCE(codigo, ''), COALESCE(email, ''),
+               COALESCE(telefono, ''), COALESCE(rfc, '')
+        FROM clientes
+    """)
+
+    # Compacta los segmentos del índice tras la carga masiva
+    connection.execute("INSERT INTO productos_fts (productos_fts) VALUES ('optimize')")
+    connection.execute("INSERT INTO clientes_fts (clientes_fts) VALUES ('optimize')")
+
+def crear_indice_proveedores(connection: sqlite3.Connection):
+    """Crea la tabla FTS de proveedores en la conexión indicada"""
+    connection.execute(SQL_PROVEEDORES)
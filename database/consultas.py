@@ -9,16 +9,48 @@ Autor: Sistema VentaPro
 Fecha: 2025-10-04
 """
 
-from typing import Dict, List, Any, Optional
+import re
+from typing import Dict, List, Any, Optional, Callable, NamedTuple
 from datetime import datetime, timedelta
 
+class ConsultaPreparada(NamedTuple):
+    """Texto SQL constante más sus parámetros de enlace"""
+    sql: str
+    parametros: tuple = ()
+
+# Registro de consultas disponibles por nombre
+REGISTRO_CONSULTAS: Dict[str, Callable[..., ConsultaPreparada]] = {}
+
+# Consultas que aceptan `cobertura` y leen los rollups cuando cubren el rango
+CONSULTAS_CON_ROLLUP = frozenset({
+    'ventas_por_dia', 'ventas_por_mes', 'resumen_ventas_hoy', 'estadisticas_generales',
+})
+
+def registrar_consulta(funcion: Callable[..., ConsultaPreparada]) -> Callable[..., ConsultaPreparada]:
+    """Registra una consulta en REGISTRO_CONSULTAS"""
+    REGISTRO_CONSULTAS[funcion.__name__] = funcion
+    return funcion
+
 class ConsultasSQL:
-    """Colección de consultas SQL complejas para VentaPro"""
+    """Colección de consultas SQL complejas para VentaPro
+    
+    Cada consulta retorna un texto SQL constante y sus parámetros por
+    separado, de modo que sqlite3 reutilice la sentencia preparada y
+    los valores nunca se interpolen en el SQL.
+    """
+    
+    @staticmethod
+    def obtener(nombre: str, *args, **kwargs) -> ConsultaPreparada:
+        """Obtiene una consulta registrada por nombre"""
+        if nombre not in REGISTRO_CONSULTAS:
+            raise KeyError(f"Consulta no registrada: {nombre}")
+        return REGISTRO_CONSULTAS[nombre](*args, **kwargs)
     
     @staticmethod
-    def productos_stock_bajo() -> str:
+    @registrar_consulta
+    def productos_stock_bajo() -> ConsultaPreparada:
         """Obtiene productos con stock bajo"""
-        return """
+        sql = """
         SELECT 
             p.id,
             p.codigo,
@@ -33,11 +65,13 @@ class ConsultasSQL:
         AND p.activo = 1
         ORDER BY (p.stock_minimo - p.stock_actual) DESC
         """
+        return ConsultaPreparada(sql)
     
     @staticmethod
-    def productos_mas_vendidos(limite: int = 10, dias: int = 30) -> str:
+    @registrar_consulta
+    def productos_mas_vendidos(limite: int = 10, dias: int = 30) -> ConsultaPreparada:
         """Obtiene los productos más vendidos en un período"""
-        return f"""
+        sql = """
         SELECT 
             p.id,
             p.codigo,
@@ -49,18 +83,41 @@ class ConsultasSQL:
         FROM productos p
         INNER JOIN detalle_ventas dv ON p.id = dv.producto_id
         INNER JOIN ventas v ON dv.venta_id = v.id
-        WHERE v.fecha_venta >= date('now', '-{dias} days')
+        WHERE v.fecha_venta >= date('now', ?)
         AND v.estado = 'completada'
         AND p.activo = 1
         GROUP BY p.id, p.codigo, p.nombre
         ORDER BY total_vendido DESC
-        LIMIT {limite}
+        LIMIT ?
         """
+        return ConsultaPreparada(sql, (
+            f"-{ParametrosConsulta.validar_entero(dias, 30, 1, 3650)} days",
+            ParametrosConsulta.validar_entero(limite, 10, 1, 1000)
+        ))
     
     @staticmethod
-    def ventas_por_dia(fecha_inicio: str, fecha_fin: str) -> str:
-        """Obtiene ventas agrupadas por día"""
-        return f"""
+    @registrar_consulta
+    def ventas_por_dia(fecha_inicio: str, fecha_fin: str, cobertura: Optional[str] = None) -> ConsultaPreparada:
+        """Obtiene ventas agrupadas por día (desde ventas_diarias si el rango está cubierto)"""
+        rango = ParametrosConsulta.rango_dias(fecha_inicio, fecha_fin)
+        if ParametrosConsulta.rango_cubierto(rango[0], cobertura):
+            sql = """
+            SELECT 
+                vd.fecha,
+                vd.num_ventas,
+                vd.total as total_vendido,
+                vd.subtotal,
+                vd.impuestos as total_impuestos,
+                CAST(vd.total AS REAL) / vd.num_ventas as venta_promedio
+            FROM ventas_diarias vd
+            WHERE vd.fecha >= ?
+            AND vd.fecha < ?
+            AND vd.num_ventas > 0
+            ORDER BY vd.fecha DESC
+            """
+            return ConsultaPreparada(sql, rango)
+        
+        sql = """
         SELECT 
             DATE(v.fecha_venta) as fecha,
             COUNT(*) as num_ventas,
@@ -69,41 +126,67 @@ class ConsultasSQL:
             SUM(v.impuestos) as total_impuestos,
             AVG(v.total) as venta_promedio
         FROM ventas v
-        WHERE DATE(v.fecha_venta) BETWEEN '{fecha_inicio}' AND '{fecha_fin}'
-        AND v.estado = 'completada'
+        WHERE v.estado = 'completada'
+        AND v.fecha_venta >= ?
+        AND v.fecha_venta < ?
         GROUP BY DATE(v.fecha_venta)
         ORDER BY fecha DESC
         """
+        # Rango semiabierto [inicio, fin + 1 día) para poder usar el índice por fecha
+        return ConsultaPreparada(sql, rango)
     
     @staticmethod
-    def ventas_por_mes(año: int) -> str:
-        """Obtiene ventas agrupadas por mes"""
-        return f"""
+    @registrar_consulta
+    def ventas_por_mes(año: int, cobertura: Optional[str] = None) -> ConsultaPreparada:
+        """Obtiene ventas agrupadas por mes (desde ventas_diarias si el año está cubierto)"""
+        año = ParametrosConsulta.validar_entero(año, datetime.now().year, 1900, 9998)
+        rango = (f"{año:04d}-01-01", f"{año + 1:04d}-01-01")
+        if ParametrosConsulta.rango_cubierto(rango[0], cobertura):
+            sql = """
+            SELECT 
+                substr(vd.fecha, 6, 2) as mes,
+                substr(vd.fecha, 1, 7) as año_mes,
+                SUM(vd.num_ventas) as num_ventas,
+                SUM(vd.total) as total_vendido,
+                CAST(SUM(vd.total) AS REAL) / SUM(vd.num_ventas) as venta_promedio,
+                SUM(vd.productos_vendidos) as productos_vendidos
+            FROM ventas_diarias vd
+            WHERE vd.fecha >= ?
+            AND vd.fecha < ?
+            AND vd.num_ventas > 0
+            GROUP BY substr(vd.fecha, 1, 7)
+            ORDER BY año_mes
+            """
+            return ConsultaPreparada(sql, rango)
+        
+        # Solo columnas agregadas sobre el rango semiabierto: búsqueda en
+        # idx_ventas_estado_fecha y cantidades por idx_detalle_venta_cantidad
+        sql = """
         SELECT 
             strftime('%m', v.fecha_venta) as mes,
             strftime('%Y-%m', v.fecha_venta) as año_mes,
             COUNT(*) as num_ventas,
             SUM(v.total) as total_vendido,
             AVG(v.total) as venta_promedio,
-            SUM(v.cantidad_productos) as productos_vendidos
-        FROM (
-            SELECT 
-                v.*,
-                SUM(dv.cantidad) as cantidad_productos
-            FROM ventas v
-            LEFT JOIN detalle_ventas dv ON v.id = dv.venta_id
-            WHERE strftime('%Y', v.fecha_venta) = '{año}'
-            AND v.estado = 'completada'
-            GROUP BY v.id
-        ) v
+            SUM((
+                SELECT SUM(dv.cantidad)
+                FROM detalle_ventas dv
+                WHERE dv.venta_id = v.id
+            )) as productos_vendidos
+        FROM ventas v
+        WHERE v.estado = 'completada'
+        AND v.fecha_venta >= ?
+        AND v.fecha_venta < ?
         GROUP BY strftime('%Y-%m', v.fecha_venta)
         ORDER BY año_mes
         """
+        return ConsultaPreparada(sql, rango)
     
     @staticmethod
-    def clientes_frecuentes(limite: int = 20, dias: int = 90) -> str:
+    @registrar_consulta
+    def clientes_frecuentes(limite: int = 20, dias: int = 90) -> ConsultaPreparada:
         """Obtiene los clientes más frecuentes"""
-        return f"""
+        sql = """
         SELECT 
             c.id,
             c.nombre,
@@ -117,19 +200,24 @@ class ConsultasSQL:
             MIN(v.fecha_venta) as primera_compra
         FROM clientes c
         INNER JOIN ventas v ON c.id = v.cliente_id
-        WHERE v.fecha_venta >= date('now', '-{dias} days')
+        WHERE v.fecha_venta >= date('now', ?)
         AND v.estado = 'completada'
         AND c.activo = 1
         GROUP BY c.id, c.nombre, c.apellidos, c.email, c.telefono
         HAVING COUNT(v.id) > 1
         ORDER BY num_compras DESC, total_comprado DESC
-        LIMIT {limite}
+        LIMIT ?
         """
+        return ConsultaPreparada(sql, (
+            f"-{ParametrosConsulta.validar_entero(dias, 90, 1, 3650)} days",
+            ParametrosConsulta.validar_entero(limite, 20, 1, 1000)
+        ))
     
     @staticmethod
-    def inventario_por_categoria() -> str:
+    @registrar_consulta
+    def inventario_por_categoria() -> ConsultaPreparada:
         """Obtiene el inventario agrupado por categoría"""
-        return """
+        sql = """
         SELECT 
             c.id,
             c.nombre as categoria,
@@ -146,34 +234,51 @@ class ConsultasSQL:
         GROUP BY c.id, c.nombre
         ORDER BY valor_inventario_venta DESC
         """
+        return ConsultaPreparada(sql)
     
     @staticmethod
-    def resumen_ventas_hoy() -> str:
+    @registrar_consulta
+    def resumen_ventas_hoy(cobertura: Optional[str] = None) -> ConsultaPreparada:
         """Obtiene el resumen de ventas del día actual"""
-        return """
+        if ParametrosConsulta.rango_cubierto(datetime.now().strftime('%Y-%m-%d'), cobertura):
+            sql = """
+            SELECT 
+                COALESCE(SUM(vd.num_ventas), 0) as num_ventas,
+                SUM(vd.total) as total_vendido,
+                CAST(SUM(vd.total) AS REAL) / SUM(vd.num_ventas) as venta_promedio,
+                SUM(vd.productos_vendidos) as productos_vendidos,
+                MAX(vd.venta_mayor) as venta_mayor,
+                MIN(vd.venta_menor) as venta_menor
+            FROM ventas_diarias vd
+            WHERE vd.fecha = DATE('now')
+            AND vd.num_ventas > 0
+            """
+            return ConsultaPreparada(sql)
+        
+        sql = """
         SELECT 
             COUNT(*) as num_ventas,
             SUM(v.total) as total_vendido,
             AVG(v.total) as venta_promedio,
-            SUM(dv_sum.cantidad_total) as productos_vendidos,
+            SUM((
+                SELECT SUM(dv.cantidad)
+                FROM detalle_ventas dv
+                WHERE dv.venta_id = v.id
+            )) as productos_vendidos,
             MAX(v.total) as venta_mayor,
             MIN(v.total) as venta_menor
         FROM ventas v
-        LEFT JOIN (
-            SELECT 
-                venta_id,
-                SUM(cantidad) as cantidad_total
-            FROM detalle_ventas
-            GROUP BY venta_id
-        ) dv_sum ON v.id = dv_sum.venta_id
-        WHERE DATE(v.fecha_venta) = DATE('now')
-        AND v.estado = 'completada'
+        WHERE v.estado = 'completada'
+        AND v.fecha_venta >= DATE('now')
+        AND v.fecha_venta < DATE('now', '+1 day')
         """
+        return ConsultaPreparada(sql)
     
     @staticmethod
-    def productos_sin_movimiento(dias: int = 30) -> str:
+    @registrar_consulta
+    def productos_sin_movimiento(dias: int = 30) -> ConsultaPreparada:
         """Obtiene productos sin movimiento en un período"""
-        return f"""
+        sql = """
         SELECT 
             p.id,
             p.codigo,
@@ -187,18 +292,22 @@ class ConsultasSQL:
         LEFT JOIN categorias c ON p.categoria_id = c.id
         LEFT JOIN detalle_ventas dv ON p.id = dv.producto_id
         LEFT JOIN ventas v ON dv.venta_id = v.id 
-            AND v.fecha_venta >= date('now', '-{dias} days')
+            AND v.fecha_venta >= date('now', ?)
             AND v.estado = 'completada'
         WHERE v.id IS NULL
         AND p.activo = 1
         AND p.stock_actual > 0
         ORDER BY p.stock_actual DESC, valor_inventario DESC
         """
+        return ConsultaPreparada(sql, (
+            f"-{ParametrosConsulta.validar_entero(dias, 30, 1, 3650)} days",
+        ))
     
     @staticmethod
-    def analisis_margenes() -> str:
+    @registrar_consulta
+    def analisis_margenes() -> ConsultaPreparada:
         """Análisis de márgenes de ganancia por producto"""
-        return """
+        sql = """
         SELECT 
             p.id,
             p.codigo,
@@ -220,11 +329,13 @@ class ConsultasSQL:
         AND p.precio_compra > 0
         ORDER BY margen_porcentaje DESC
         """
+        return ConsultaPreparada(sql)
     
     @staticmethod
-    def historico_ventas_cliente(cliente_id: int, limite: int = 50) -> str:
+    @registrar_consulta
+    def historico_ventas_cliente(cliente_id: int, limite: int = 50) -> ConsultaPreparada:
         """Obtiene el histórico de ventas de un cliente"""
-        return f"""
+        sql = """
         SELECT 
             v.id,
             v.folio,
@@ -236,16 +347,21 @@ class ConsultasSQL:
             SUM(dv.cantidad) as cantidad_productos
         FROM ventas v
         LEFT JOIN detalle_ventas dv ON v.id = dv.venta_id
-        WHERE v.cliente_id = {cliente_id}
+        WHERE v.cliente_id = ?
         GROUP BY v.id, v.folio, v.fecha_venta, v.total, v.metodo_pago, v.estado
         ORDER BY v.fecha_venta DESC
-        LIMIT {limite}
+        LIMIT ?
         """
+        return ConsultaPreparada(sql, (
+            ParametrosConsulta.validar_entero(cliente_id),
+            ParametrosConsulta.validar_entero(limite, 50, 1, 1000)
+        ))
     
     @staticmethod
-    def detalle_venta_completo(venta_id: int) -> str:
+    @registrar_consulta
+    def detalle_venta_completo(venta_id: int) -> ConsultaPreparada:
         """Obtiene el detalle completo de una venta"""
-        return f"""
+        sql = """
         SELECT 
             v.id as venta_id,
             v.folio,
@@ -269,14 +385,172 @@ class ConsultasSQL:
         LEFT JOIN clientes c ON v.cliente_id = c.id
         LEFT JOIN detalle_ventas dv ON v.id = dv.venta_id
         LEFT JOIN productos p ON dv.producto_id = p.id
-        WHERE v.id = {venta_id}
+        WHERE v.id = ?
         ORDER BY dv.id
         """
+        return ConsultaPreparada(sql, (ParametrosConsulta.validar_entero(venta_id),))
+    
+    @staticmethod
+    @registrar_consulta
+    def detalle_ventas_periodo(fecha_inicio: str, fecha_fin: str) -> ConsultaPreparada:
+        """Obtiene las líneas de venta de un período para exportación detallada"""
+        sql = """
+        SELECT 
+            v.folio,
+            v.fecha_venta,
+            v.metodo_pago,
+            c.nombre as cliente_nombre,
+            p.codigo as producto_codigo,
+            p.nombre as producto_nombre,
+            dv.cantidad,
+            dv.precio_unitario,
+            dv.descuento_linea,
+            dv.subtotal_linea
+        FROM ventas v
+        JOIN detalle_ventas dv ON v.id = dv.venta_id
+        JOIN productos p ON dv.producto_id = p.id
+        LEFT JOIN clientes c ON v.cliente_id = c.id
+        WHERE v.estado = 'completada'
+        AND v.fecha_venta >= ?
+        AND v.fecha_venta < ?
+        ORDER BY v.fecha_venta, dv.id
+        """
+        return ConsultaPreparada(sql, ParametrosConsulta.rango_dias(fecha_inicio, fecha_fin))
     
     @staticmethod
-    def estadisticas_generales() -> str:
+    @registrar_consulta
+    def buscar_productos_texto(termino: str, limite: int = 20, pagina: int = 1,
+                               categoria: Optional[str] = None) -> ConsultaPreparada:
+        """Búsqueda de productos por texto completo, ordenada por relevancia
+        
+        Con `categoria` el filtro se aplica en la consulta (productos sin
+        categoría cuentan como 'General'), antes de LIMIT.
+        """
+        sql = """
+        SELECT 
+            p.id,
+            p.codigo,
+            p.codigo_barras,
+            p.nombre,
+            p.precio_venta,
+            p.stock_actual,
+            productos_fts.categoria,
+            bm25(productos_fts, 10.0, 8.0, 1.0, 2.0, 8.0) as relevancia
+        FROM productos_fts
+        JOIN productos p ON p.id = productos_fts.rowid
+        WHERE productos_fts MATCH ?
+        AND p.activo = 1
+        ORDER BY relevancia
+        LIMIT ? OFFSET ?
+        """
+        sql_categoria = """
+        SELECT 
+            p.id,
+            p.codigo,
+            p.codigo_barras,
+            p.nombre,
+            p.precio_venta,
+            p.stock_actual,
+            productos_fts.categoria,
+            bm25(productos_fts, 10.0, 8.0, 1.0, 2.0, 8.0) as relevancia
+        FROM productos_fts
+        JOIN productos p ON p.id = productos_fts.rowid
+        WHERE productos_fts MATCH ?
+        AND p.activo = 1
+        AND COALESCE((SELECT nombre FROM categorias WHERE id = p.categoria_id), 'General') = ?
+        ORDER BY relevancia
+        LIMIT ? OFFSET ?
+        """
+        expresion = ParametrosConsulta.expresion_busqueda(termino)
+        limite, desplazamiento = ParametrosConsulta.paginar(limite, pagina)
+        if categoria is None:
+            return ConsultaPreparada(sql, (expresion, limite, desplazamiento))
+        return ConsultaPreparada(sql_categoria, (expresion, categoria, limite, desplazamiento))
+    
+    @staticmethod
+    @registrar_consulta
+    def buscar_clientes_texto(termino: str, limite: int = 20, pagina: int = 1) -> ConsultaPreparada:
+        """Búsqueda de clientes por texto completo, ordenada por relevancia"""
+        sql = """
+        SELECT 
+            c.id,
+            c.codigo,
+            c.nombre,
+            c.apellidos,
+            c.email,
+            c.telefono,
+            bm25(clientes_fts, 10.0, 8.0, 5.0, 3.0, 3.0, 3.0) as relevancia
+        FROM clientes_fts
+        JOIN clientes c ON c.id = clientes_fts.rowid
+        WHERE clientes_fts MATCH ?
+        AND c.activo = 1
+        ORDER BY relevancia
+        LIMIT ? OFFSET ?
+        """
+        limite, desplazamiento = ParametrosConsulta.paginar(limite, pagina)
+        return ConsultaPreparada(sql, (ParametrosConsulta.expresion_busqueda(termino), limite, desplazamiento))
+    
+    @staticmethod
+    @registrar_consulta
+    def buscar_proveedores_texto(termino: str, limite: int = 20, pagina: int = 1) -> ConsultaPreparada:
+        """Búsqueda de proveedores en su índice FTS, ordenada por relevancia"""
+        sql = """
+        SELECT 
+            rowid as id,
+            bm25(proveedores_fts, 10.0, 5.0, 3.0, 2.0, 5.0) as relevancia
+        FROM proveedores_fts
+        WHERE proveedores_fts MATCH ?
+        ORDER BY relevancia
+        LIMIT ? OFFSET ?
+        """
+        limite, desplazamiento = ParametrosConsulta.paginar(limite, pagina)
+        return ConsultaPreparada(sql, (ParametrosConsulta.expresion_busqueda(termino), limite, desplazamiento))
+    
+    @staticmethod
+    @registrar_consulta
+    def estadisticas_generales(cobertura: Optional[str] = None) -> ConsultaPreparada:
         """Obtiene estadísticas generales del sistema"""
-        return """
+        if ParametrosConsulta.rango_cubierto(datetime.now().strftime('%Y-%m-01'), cobertura):
+            # Métricas del mes desde el rollup diario
+            fuente_mes = """
+        SELECT 
+            'ventas_mes_actual' as metrica,
+            COALESCE(SUM(num_ventas), 0) as valor
+        FROM ventas_diarias 
+        WHERE fecha >= DATE('now', 'start of month')
+        AND fecha < DATE('now', 'start of month', '+1 month')
+        
+        UNION ALL
+        
+        SELECT 
+            'ingresos_mes_actual' as metrica,
+            ROUND(COALESCE(SUM(total), 0), 2) as valor
+        FROM ventas_diarias 
+        WHERE fecha >= DATE('now', 'start of month')
+        AND fecha < DATE('now', 'start of month', '+1 month')
+        """
+        else:
+            fuente_mes = """
+        SELECT 
+            'ventas_mes_actual' as metrica,
+            COUNT(*) as valor
+        FROM ventas 
+        WHERE estado = 'completada'
+        AND fecha_venta >= DATE('now', 'start of month')
+        AND fecha_venta < DATE('now', 'start of month', '+1 month')
+        
+        UNION ALL
+        
+        SELECT 
+            'ingresos_mes_actual' as metrica,
+            ROUND(COALESCE(SUM(total), 0), 2) as valor
+        FROM ventas 
+        WHERE estado = 'completada'
+        AND fecha_venta >= DATE('now', 'start of month')
+        AND fecha_venta < DATE('now', 'start of month', '+1 month')
+        """
+        
+        sql = """
         SELECT 
             'productos_activos' as metrica,
             COUNT(*) as valor
@@ -300,23 +574,8 @@ class ConsultasSQL:
         WHERE activo = 1
         
         UNION ALL
-        
-        SELECT 
-            'ventas_mes_actual' as metrica,
-            COUNT(*) as valor
-        FROM ventas 
-        WHERE strftime('%Y-%m', fecha_venta) = strftime('%Y-%m', 'now')
-        AND estado = 'completada'
-        
-        UNION ALL
-        
-        SELECT 
-            'ingresos_mes_actual' as metrica,
-            ROUND(COALESCE(SUM(total), 0), 2) as valor
-        FROM ventas 
-        WHERE strftime('%Y-%m', fecha_venta) = strftime('%Y-%m', 'now')
-        AND estado = 'completada'
-        """
+        """ + fuente_mes
+        return ConsultaPreparada(sql)
 
 class ParametrosConsulta:
     """Clase para validar y preparar parámetros de consultas"""
@@ -355,4 +614,35 @@ class ParametrosConsulta:
         else:
             fecha_fin = ParametrosConsulta.validar_fecha(fecha_fin)
         
-        return fecha_inicio, fecha_fin
\ No newline at end of file
+        return fecha_inicio, fecha_fin
+    
+    @staticmethod
+    def expresion_busqueda(termino: str) -> str:
+        """Convierte texto libre en una expresión FTS5 de prefijos (todas las palabras)
+        
+        Cada palabra se cita para neutralizar la sintaxis de FTS5 y se busca
+        como prefijo; un término vacío produce una expresión sin resultados.
+        """
+        palabras = re.findall(r'\w+', termino or '')
+        if not palabras:
+            return '""'
+        return ' '.join(f'"{palabra}"*' for palabra in palabras)
+    
+    @staticmethod
+    def paginar(limite: Any, pagina: Any) -> tuple:
+        """Convierte límite y número de página (desde 1) en LIMIT y OFFSET"""
+        limite = ParametrosConsulta.validar_entero(limite, 20, 1, 1000)
+        pagina = ParametrosConsulta.validar_entero(pagina, 1, 1, 1000000)
+        return limite, (pagina - 1) * limite
+    
+    @staticmethod
+    def rango_cubierto(inicio: str, cobertura: Optional[str]) -> bool:
+        """Indica si los rollups cubren un rango que empieza en la fecha dada"""
+        return cobertura is not None and inicio >= cobertura
+    
+    @staticmethod
+    def rango_dias(fecha_inicio: str, fecha_fin: str) -> tuple:
+        """Convierte un período inclusivo de días en un rango semiabierto [inicio, fin)"""
+        inicio = ParametrosConsulta.validar_fecha(fecha_inicio)
+        fin = datetime.strptime(ParametrosConsulta.validar_fecha(fecha_fin), '%Y-%m-%d') + timedelta(days=1)
+        return inicio, fin.strftime('%Y-%m-%d')
\ No newline at end of file
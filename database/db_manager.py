@@ -9,14 +9,20 @@ Autor: Sistema VentaPro
 Fecha: 2025-10-04
 """
 
+import logging
 import sqlite3
 import os
-import shutil
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from utils.logger import Logger
 from utils.config_manager import ConfigManager
+from database.pool_conexiones import PoolConexiones
+from database.modelos import Venta
+from database.consultas import ConsultaPreparada, ConsultasSQL, CONSULTAS_CON_ROLLUP
+from database.migraciones import MigrationManager
+from database import rollups, busqueda, respaldos, registro_logs, movimientos
 
 class DatabaseManager:
     """Gestor principal de la base de datos SQLite"""
@@ -31,6 +37,12 @@ class DatabaseManager:
         
         self.db_path = self.config.get('DATABASE', 'db_path', 'data/erp.db') if self.config else 'data/erp.db'
         self.connection: Optional[sqlite3.Connection] = None
+        self.pool: Optional[PoolConexiones] = None
+        
+        # Tamaño del pool de lectores y espera máxima de checkout
+        self.pool_lectores = self.config.getint('DATABASE', 'pool_readers', 4) if self.config else 4
+        self.pool_timeout = self.config.getfloat('DATABASE', 'pool_timeout', 5.0) if self.config else 5.0
+        self.cache_sentencias = self.config.getint('DATABASE', 'statement_cache_size', 128) if self.config else 128
         
         # Asegurar que el directorio existe
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
@@ -38,18 +50,18 @@ class DatabaseManager:
     def conectar(self) -> bool:
         """Establece conexión con la base de datos"""
         try:
-            self.connection = sqlite3.connect(
+            if self.pool and self.pool.abierto:
+                return True
+            
+            # Pool con un escritor WAL y lectores bajo demanda
+            self.pool = PoolConexiones(
                 self.db_path,
-                timeout=30.0,
-                check_same_thread=False
+                num_lectores=self.pool_lectores,
+                timeout_espera=self.pool_timeout,
+                timeout_sqlite=30.0,
+                tamano_cache=self.cache_sentencias
             )
-            self.connection.row_factory = sqlite3.Row  # Permite acceso por nombre de columna
-            
-            # Habilitar foreign keys
-            self.connection.execute("PRAGMA foreign_keys = ON")
-            
-            # Configurar WAL mode para mejor concurrencia
-            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection = self.pool.abrir()
             
             if self.logger:
                 self.logger.info("✅ Conexión establecida con la base de datos")
@@ -61,11 +73,18 @@ class DatabaseManager:
     
     def desconectar(self):
         """Cierra la conexión con la base de datos"""
-        if self.connection:
-            self.connection.close()
+        if self.pool:
+            self.pool.cerrar()
+            self.pool = None
             self.connection = None
             self.logger.info("🔌 Conexión cerrada con la base de datos")
     
+    def obtener_metricas_pool(self) -> Dict[str, Any]:
+        """Obtiene las métricas del pool de conexiones"""
+        if not self.pool:
+            return {}
+        return self.pool.obtener_metricas()
+    
     def inicializar_db(self) -> bool:
         """Inicializa la base de datos creando todas las tablas necesarias"""
         if not self.conectar():
@@ -74,24 +93,35 @@ class DatabaseManager:
         try:
             self.logger.info("🔧 Inicializando estructura de base de datos...")
             
-            # Crear todas las tablas
-            self._crear_tabla_categorias()
-            self._crear_tabla_productos()
-            self._crear_tabla_clientes()
-            self._crear_tabla_ventas()
-            self._crear_tabla_detalle_ventas()
-            self._crear_tabla_usuarios()
-            self._crear_tabla_configuracion()
-            self._crear_tabla_logs()
+            # Acceso exclusivo al escritor mientras se crea el esquema
+            with self.pool.escritor_conexion():
+                # Crear todas las tablas
+                self._crear_tabla_categorias()
+                self._crear_tabla_productos()
+                self._crear_tabla_clientes()
+                self._crear_tabla_ventas()
+                self._crear_tabla_detalle_ventas()
+                self._crear_tabla_usuarios()
+                self._crear_tabla_configuracion()
+                self._crear_tabla_logs()
+            
+                # Crear índices para optimizar consultas
+                self._crear_indices()
             
-            # Crear índices para optimizar consultas
-            self._crear_indices()
+                # Insertar datos iniciales
+                self._insertar_datos_iniciales()
             
-            # Insertar datos iniciales
-            self._insertar_datos_iniciales()
+                self.connection.commit()
+                
+                # Aplicar migraciones pendientes sobre el esquema base
+                if not MigrationManager(self.connection).ejecutar_migraciones_pendientes():
+                    return False
+                
+                self.logger.info("✅ Base de datos inicializada correctamente")
             
-            self.connection.commit()
-            self.logger.info("✅ Base de datos inicializada correctamente")
+            # El libro de movimientos parte del stock vigente de cada producto
+            self.conciliar_saldos_inventario()
+            self._conectar_logs_db()
             return True
             
         except sqlite3.Error as e:
@@ -278,42 +308,466 @@ class DatabaseManager:
     def ejecutar_consulta(self, sql: str, parametros: tuple = ()) -> Optional[List[sqlite3.Row]]:
         """Ejecuta una consulta SELECT y retorna los resultados"""
         try:
-            cursor = self.connection.execute(sql, parametros)
-            return cursor.fetchall()
+            with self.pool.lector() as conexion:
+                cursor = self.pool.ejecutar(conexion, sql, parametros)
+                return cursor.fetchall()
         except sqlite3.Error as e:
             self.logger.error(f"Error en consulta: {str(e)}")
             return None
     
+    def ejecutar_preparada(self, consulta: ConsultaPreparada) -> Optional[List[sqlite3.Row]]:
+        """Ejecuta una consulta de ConsultasSQL con sus parámetros de enlace"""
+        return self.ejecutar_consulta(consulta.sql, consulta.parametros)
+    
+    def iterar_consulta(self, consulta: ConsultaPreparada, tamano_lote: int = 500) -> Iterator[Dict[str, Any]]:
+        """Itera el resultado de una consulta leyendo el cursor por lotes con fetchmany
+        
+        La conexión de lectura se mantiene tomada mientras el generador está
+        abierto; conviene consumirlo por completo o cerrarlo. Los errores se
+        propagan para que el consumidor no dé por completa una salida parcial.
+        """
+        try:
+            with self.pool.lector() as conexion:
+                cursor = self.pool.ejecutar(conexion, consulta.sql, consulta.parametros)
+                columnas = [descripcion[0] for descripcion in cursor.description]
+                while True:
+                    lote = cursor.fetchmany(tamano_lote)
+                    if not lote:
+                        break
+                    for fila in lote:
+                        yield dict(zip(columnas, fila))
+        except sqlite3.Error as e:
+            self.logger.error(f"Error iterando consulta: {str(e)}")
+            raise
+    
+    def explicar_consulta(self, consulta: ConsultaPreparada) -> List[str]:
+        """Retorna el plan de ejecución (EXPLAIN QUERY PLAN) de una consulta"""
+        filas = self.ejecutar_consulta(f"EXPLAIN QUERY PLAN {consulta.sql}", consulta.parametros)
+        return [fila["detail"] for fila in filas] if filas else []
+    
     def ejecutar_comando(self, sql: str, parametros: tuple = ()) -> bool:
         """Ejecuta un comando INSERT, UPDATE o DELETE"""
         try:
-            self.connection.execute(sql, parametros)
-            self.connection.commit()
-            return True
+            with self.pool.escritor_conexion() as conexion:
+                try:
+                    self.pool.ejecutar(conexion, sql, parametros)
+                    conexion.commit()
+                    return True
+                except sqlite3.Error:
+                    conexion.rollback()
+                    raise
         except sqlite3.Error as e:
             self.logger.error(f"Error en comando: {str(e)}")
-            self.connection.rollback()
             return False
     
-    def crear_backup(self) -> bool:
-        """Crea un respaldo de la base de datos"""
+    def registrar_venta(self, venta: Venta) -> Optional[int]:
+        """Registra una venta completa (cabecera, detalle y stock) en una sola transacción"""
+        ids = self.registrar_ventas_lote([venta])
+        return ids[0] if ids else None
+    
+    def registrar_ventas_lote(self, ventas: List[Venta]) -> Optional[List[int]]:
+        """Registra varias ventas con un único commit (group commit para horas pico)
+        
+        Escribe las cabeceras, todas las líneas de detalle con executemany, los
+        descuentos de stock acumulados por producto y una salida por línea en
+        movimientos_inventario. Si algún producto no tiene stock suficiente
+        (y no se permite stock negativo) se revierte todo el lote y se
+        retorna None.
+        """
+        if not ventas:
+            return []
+        
+        sql_cabecera = """
+            INSERT INTO ventas (folio, cliente_id, subtotal, descuento, impuestos,
+                                total, metodo_pago, estado, fecha_venta)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        sql_detalle = """
+            INSERT INTO detalle_ventas (venta_id, producto_id, cantidad, precio_unitario,
+                                        descuento_linea, subtotal_linea)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """
+        sql_stock = """
+            UPDATE productos
+            SET stock_actual = stock_actual - ?, fecha_modificacion = CURRENT_TIMESTAMP
+            WHERE id = ? AND (stock_actual >= ? OR ?)
+        """
+        permitir_negativo = (
+            self.config.getboolean('INVENTORY', 'allow_negative_stock', False) if self.config else False
+        )
+        
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = f"data/backups/erp_backup_{timestamp}.db"
+            with self.pool.escritor_conexion() as conexion:
+                try:
+                    conexion.execute("BEGIN IMMEDIATE")
+                    ids_venta = []
+                    folios = []
+                    detalles = []
+                    salidas = []
+                    descuentos_stock: Dict[int, int] = {}
+                    
+                    for venta in ventas:
+                        folio = venta.folio or self._generar_folio(len(ids_venta))
+                        cursor = conexion.execute(sql_cabecera, (
+                            folio,
+                            venta.cliente_id,
+                            float(venta.subtotal),
+                            float(venta.descuento),
+                            float(venta.impuestos),
+                            float(venta.total),
+                            venta.metodo_pago,
+                            venta.estado,
+                            venta.fecha_venta.strftime('%Y-%m-%d %H:%M:%S')
+                        ))
+                        venta_id = cursor.lastrowid
+                        ids_venta.append(venta_id)
+                        folios.append(folio)
+                        
+                        fecha = venta.fecha_venta.strftime('%Y-%m-%d %H:%M:%S')
+                        for detalle in venta.detalles:
+                            salidas.append((detalle.producto_id, detalle.cantidad, folio, fecha))
+                            detalles.append((
+                                venta_id,
+                                detalle.producto_id,
+                                detalle.cantidad,
+                                float(detalle.precio_unitario),
+                                float(detalle.descuento_linea),
+                                float(detalle.subtotal_linea)
+                            ))
+                            descuentos_stock[detalle.producto_id] = (
+                                descuentos_stock.get(detalle.producto_id, 0) + detalle.cantidad
+                            )
+                    
+                    conexion.executemany(sql_detalle, detalles)
+                    
+                    if descuentos_stock:
+                        # Stock previo para el saldo de cada salida del libro de movimientos
+                        stock = {
+                            producto_id: (conexion.execute(
+                                "SELECT stock_actual FROM productos WHERE id = ?", (producto_id,)
+                            ).fetchone() or (0,))[0]
+                            for producto_id in descuentos_stock
+                        }
+                        cursor = conexion.executemany(sql_stock, [
+                            (cantidad, producto_id, cantidad, int(permitir_negativo))
+                            for producto_id, cantidad in descuentos_stock.items()
+                        ])
+                        if cursor.rowcount != len(descuentos_stock):
+                            raise sqlite3.IntegrityError("Stock insuficiente para uno o más productos")
+                        
+                        filas_movimiento = []
+                        for producto_id, cantidad, folio, fecha in salidas:
+                            anterior = stock[producto_id]
+                            stock[producto_id] = anterior - cantidad
+                            filas_movimiento.append(movimientos.fila_salida_venta(
+                                producto_id, cantidad, anterior, folio, fecha
+                            ))
+                        movimientos.insertar_movimientos(conexion, filas_movimiento)
+                    
+                    conexion.commit()
+                except sqlite3.Error:
+                    conexion.rollback()
+                    raise
             
-            # Asegurar que el directorio existe
-            os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+            # Solo tras el commit se asignan ids y folios a los modelos
+            for venta, venta_id, folio in zip(ventas, ids_venta, folios):
+                venta.id = venta_id
+                venta.folio = folio
+                for detalle in venta.detalles:
+                    detalle.venta_id = venta_id
+            return ids_venta
             
-            # Crear backup
-            shutil.copy2(self.db_path, backup_path)
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al registrar ventas: {str(e)}")
+            return None
+    
+    # =================== BÚSQUEDA DE TEXTO COMPLETO ===================
+    
+    def buscar_productos(self, termino: str, limite: int = 20, pagina: int = 1,
+                         categoria: Optional[str] = None) -> List[sqlite3.Row]:
+        """Busca productos activos por texto (prefijos, sin acentos) ordenados por relevancia"""
+        return self.ejecutar_preparada(
+            ConsultasSQL.buscar_productos_texto(termino, limite, pagina, categoria)
+        ) or []
+    
+    def buscar_clientes(self, termino: str, limite: int = 20, pagina: int = 1) -> List[sqlite3.Row]:
+        """Busca clientes activos por texto (prefijos, sin acentos) ordenados por relevancia"""
+        return self.ejecutar_preparada(ConsultasSQL.buscar_clientes_texto(termino, limite, pagina)) or []
+    
+    def _conectar_logs_db(self):
+        """Agrega al Logger el handler que persiste en la tabla logs (`log_to_db`)"""
+        if not self.config or not self.logger or not self.config.getboolean('LOGGING', 'log_to_db', True):
+            return
+        
+        manejador = registro_logs.ManejadorBaseDatos(
+            self.db_path,
+            nivel=getattr(logging, self.config.get('LOGGING', 'log_db_level', 'INFO').upper(), logging.INFO),
+            tamano_lote=self.config.getint('LOGGING', 'log_db_batch_size', 200),
+            intervalo_ms=self.config.getint('LOGGING', 'log_db_flush_ms', 1000),
+            dias_retencion=self.config.getint('LOGGING', 'log_retention_days', 30)
+        )
+        self.logger.agregar_handler(manejador)
+    
+    def consultar_logs(self, niveles: Optional[List[str]] = None, modulo: Optional[str] = None,
+                       desde: Optional[str] = None, hasta: Optional[str] = None,
+                       texto: Optional[str] = None, limite: int = 200, pagina: int = 1) -> List[sqlite3.Row]:
+        """Consulta los logs persistidos filtrando por nivel, módulo y rango de fechas"""
+        try:
+            with self.pool.lector() as conexion:
+                return registro_logs.consultar_logs(
+                    conexion, niveles, modulo, desde, hasta, texto, limite, pagina
+                )
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al consultar logs: {str(e)}")
+            return []
+    
+    def reconstruir_indices_busqueda(self) -> bool:
+        """Repuebla las tablas FTS desde productos y clientes"""
+        try:
+            with self.pool.escritor_conexion() as conexion:
+                try:
+                    conexion.execute("BEGIN IMMEDIATE")
+                    busqueda.reconstruir_indices_busqueda(conexion)
+                    conexion.commit()
+                except sqlite3.Error:
+                    conexion.rollback()
+                    raise
             
-            self.logger.info(f"✅ Backup creado: {backup_path}")
+            self.logger.info("✅ Índices de búsqueda reconstruidos")
             return True
             
-        except Exception as e:
-            self.logger.error(f"❌ Error al crear backup: {str(e)}")
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al reconstruir índices de búsqueda: {str(e)}")
+            return False
+    
+    def reconstruir_rollups(self, desde: Optional[str] = None) -> bool:
+        """Reconstruye las tablas de resumen de ventas (todo el histórico o desde una fecha)"""
+        try:
+            with self.pool.escritor_conexion() as conexion:
+                try:
+                    conexion.execute("BEGIN IMMEDIATE")
+                    rollups.reconstruir_rollups(conexion, desde)
+                    conexion.commit()
+                except (sqlite3.Error, ValueError):
+                    conexion.rollback()
+                    raise
+            
+            self.logger.info(f"✅ Rollups de ventas reconstruidos desde {desde or 'el inicio'}")
+            return True
+            
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.error(f"❌ Error al reconstruir rollups: {str(e)}")
+            return False
+    
+    def obtener_cobertura_rollups(self) -> Optional[str]:
+        """Fecha desde la cual los rollups de ventas están completos (None si no existen)"""
+        with self.pool.lector() as conexion:
+            return rollups.obtener_cobertura(conexion)
+    
+    def preparar_consulta(self, nombre: str, *args, **kwargs) -> ConsultaPreparada:
+        """Obtiene una consulta registrada; las de ventas usan los rollups si cubren el rango"""
+        if nombre in CONSULTAS_CON_ROLLUP and 'cobertura' not in kwargs:
+            kwargs['cobertura'] = self.obtener_cobertura_rollups()
+        return ConsultasSQL.obtener(nombre, *args, **kwargs)
+    
+    def consultar(self, nombre: str, *args, **kwargs) -> Optional[List[sqlite3.Row]]:
+        """Ejecuta una consulta registrada por nombre (ver preparar_consulta)"""
+        return self.ejecutar_preparada(self.preparar_consulta(nombre, *args, **kwargs))
+    
+    def registrar_movimientos_inventario(self, filas: List[tuple]) -> bool:
+        """Inserta movimientos de inventario y aplica su cantidad a productos.stock_actual
+        en una sola transacción (ver movimientos.COLUMNAS)"""
+        try:
+            with self.pool.escritor_conexion() as conexion:
+                try:
+                    conexion.execute("BEGIN IMMEDIATE")
+                    movimientos.insertar_movimientos(conexion, filas)
+                    movimientos.aplicar_a_productos(conexion, filas)
+                    conexion.commit()
+                except sqlite3.Error:
+                    conexion.rollback()
+                    raise
+            return True
+            
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al registrar movimientos de inventario: {str(e)}")
+            return False
+    
+    def guardar_configuraciones_stock(self, filas: List[tuple]) -> bool:
+        """Guarda configuraciones de stock (ver movimientos.COLUMNAS_CONFIGURACION)"""
+        try:
+            with self.pool.escritor_conexion() as conexion:
+                try:
+                    conexion.execute("BEGIN IMMEDIATE")
+                    movimientos.guardar_configuraciones(conexion, filas)
+                    conexion.commit()
+                except sqlite3.Error:
+                    conexion.rollback()
+                    raise
+            return True
+            
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al guardar configuraciones de stock: {str(e)}")
             return False
     
+    def conciliar_saldos_inventario(self) -> Optional[int]:
+        """Registra el saldo de apertura de los productos cuyo libro no suma su stock actual"""
+        try:
+            with self.pool.escritor_conexion() as conexion:
+                try:
+                    conexion.execute("BEGIN IMMEDIATE")
+                    registrados = movimientos.conciliar_saldos(conexion)
+                    conexion.commit()
+                except sqlite3.Error:
+                    conexion.rollback()
+                    raise
+            
+            if registrados:
+                self.logger.info(f"✅ Saldos de apertura registrados para {registrados} productos")
+            return registrados
+            
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al conciliar saldos de inventario: {str(e)}")
+            return None
+    
+    def crear_snapshots_stock(self, fecha_corte=None) -> Optional[int]:
+        """Registra cortes de stock para los productos con movimientos desde su último corte"""
+        try:
+            with self.pool.escritor_conexion() as conexion:
+                try:
+                    conexion.execute("BEGIN IMMEDIATE")
+                    productos = movimientos.crear_snapshots(conexion, fecha_corte)
+                    conexion.commit()
+                except sqlite3.Error:
+                    conexion.rollback()
+                    raise
+            
+            self.logger.info(f"✅ Cortes de stock registrados para {productos} productos")
+            return productos
+            
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al crear cortes de stock: {str(e)}")
+            return None
+    
+    def cargar_inventario(self, desde=None) -> Optional[Dict[str, Any]]:
+        """Estado inicial del inventario persistido
+        
+        Returns:
+            Optional[Dict[str, Any]]: 'stock' por producto, 'movimientos' desde
+            la fecha indicada, 'ultimo_id', 'sin_corte' (movimientos
+            posteriores al último corte), 'configuraciones' guardadas y
+            'sin_configuracion' (productos activos sin configuración)
+        """
+        try:
+            with self.pool.lector() as conexion:
+                return {
+                    'configuraciones': movimientos.consultar_configuraciones(conexion),
+                    'sin_configuracion': movimientos.productos_sin_configuracion(conexion),
+                    'stock': movimientos.stock_actual_productos(conexion),
+                    'movimientos': movimientos.consultar_movimientos(conexion, desde=desde),
+                    'ultimo_id': movimientos.ultimo_id(conexion),
+                    'sin_corte': movimientos.movimientos_desde_ultimo_corte(conexion),
+                }
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al cargar inventario: {str(e)}")
+            return None
+    
+    def stock_a_fecha(self, producto_id: int, fecha=None) -> Optional[float]:
+        """Stock de un producto a una fecha reproduciendo solo desde el último corte"""
+        try:
+            with self.pool.lector() as conexion:
+                return movimientos.stock_a_fecha(conexion, producto_id, fecha)
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al calcular stock a fecha: {str(e)}")
+            return None
+    
+    def demanda_por_producto(self, desde, hasta=None) -> Optional[List[tuple]]:
+        """Salidas agregadas por producto y día en un rango (ver movimientos.demanda_por_producto)"""
+        try:
+            with self.pool.lector() as conexion:
+                return movimientos.demanda_por_producto(conexion, desde, hasta)
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Error al agregar la demanda de productos: {str(e)}")
+            return None
+    
+    def _generar_folio(self, secuencia: int = 0) -> str:
+        """Genera un folio único para una venta"""
+        prefijo = self.config.get('INVOICE', 'invoice_prefix', 'F-') if self.config else 'F-'
+        return f"{prefijo}{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{secuencia}"
+    
+    def crear_backup(self, progreso=None, modo: Optional[str] = None,
+                     directorio: Optional[str] = None) -> Optional[str]:
+        """Crea un respaldo en línea de la base de datos
+        
+        Usa la API de backup de SQLite por pasos para no bloquear a los
+        escritores, lo comprime según `compress_backups` y aplica la
+        retención de `max_backups` sobre cadenas completo + diferenciales.
+        
+        Args:
+            progreso: Callback opcional (paginas_restantes, paginas_totales)
+            modo: 'completo' o 'diferencial'; por defecto `backup_mode`
+            directorio: Destino del respaldo; por defecto `backup_path`
+        
+        Returns:
+            Optional[str]: Ruta del respaldo creado, o None si falló
+        """
+        try:
+            if directorio is None:
+                directorio = self.config.get_backup_path() if self.config else 'data/backups/'
+            comprimir = self.config.compress_backups() if self.config else True
+            max_backups = self.config.get_max_backups() if self.config else 30
+            paginas_por_paso = self.config.getint('BACKUP', 'backup_pages_per_step', 256) if self.config else 256
+            pausa_ms = self.config.getint('BACKUP', 'backup_step_sleep_ms', 5) if self.config else 5
+            if modo is None:
+                modo = self.config.get('BACKUP', 'backup_mode', 'completo') if self.config else 'completo'
+            
+            # Asegurar que el directorio existe
+            os.makedirs(directorio, exist_ok=True)
+            opciones = {
+                'paginas_por_paso': paginas_por_paso,
+                'pausa': pausa_ms / 1000,
+                'progreso': progreso,
+                'tamano_pagina': self.config.getint('BACKUP', 'differential_page_kb', 64) * 1024
+                if self.config else respaldos.TAMANO_PAGINA_DEFAULT,
+            }
+            
+            inicio = time.perf_counter()
+            if modo == 'diferencial':
+                max_diferenciales = self.config.getint('BACKUP', 'max_differentials', 7) if self.config else 7
+                manifiesto = respaldos.crear_respaldo_diferencial(
+                    self.db_path, directorio, comprimir, max_diferenciales, **opciones
+                )
+            else:
+                manifiesto = respaldos.crear_respaldo_completo(self.db_path, directorio, comprimir, **opciones)
+            
+            eliminados = respaldos.aplicar_retencion(directorio, max_backups)
+            
+            detalle = (f"{manifiesto['paginas_cambiadas']}/{manifiesto['num_paginas']} páginas cambiadas"
+                       if manifiesto['tipo'] == 'diferencial' else f"{manifiesto['num_paginas']} páginas")
+            self.logger.info(
+                f"✅ Backup {manifiesto['tipo']} creado: {manifiesto['ruta']} ({detalle}, "
+                f"{time.perf_counter() - inicio:.1f}s, {len(eliminados)} archivos antiguos eliminados)"
+            )
+            return manifiesto['ruta']
+            
+        except (sqlite3.Error, OSError) as e:
+            self.logger.error(f"❌ Error al crear backup: {str(e)}")
+            return None
+    
+    def verificar_backups(self) -> Dict[str, Dict[str, Any]]:
+        """Verifica cada respaldo completo y diferencial restaurándolo a un temporal"""
+        directorio = self.config.get_backup_path() if self.config else 'data/backups/'
+        try:
+            resultados = respaldos.verificar_cadenas(directorio)
+        except OSError as e:
+            self.logger.error(f"❌ Error al verificar backups: {str(e)}")
+            return {}
+        
+        invalidos = [nombre for nombre, r in resultados.items() if not r['valido']]
+        if invalidos:
+            self.logger.error(f"❌ Backups inválidos: {', '.join(invalidos)}")
+        return resultados
+    
     def __enter__(self):
         """Context manager: entrada"""
         self.conectar()
@@ -13,6 +13,7 @@ from typing import List, Dict, Any
 from datetime import datetime
 import sqlite3
 from utils.logger import Logger
+from database import rollups, busqueda, registro_logs, movimientos
 
 class Migration:
     """Clase base para una migración"""
@@ -65,7 +66,13 @@ class MigrationManager:
             MigracionIndicesOptimizacion("1.0.1", "Índices para optimización de consultas"),
             MigracionCamposAdicionales("1.0.2", "Campos adicionales en productos y clientes"),
             MigracionTablaCategorias("1.0.3", "Mejoras en tabla de categorías"),
-            MigracionSistemaBackup("1.0.4", "Sistema de backup y auditoria")
+            MigracionSistemaBackup("1.0.4", "Sistema de backup y auditoria"),
+            MigracionIndicesCobertura("1.0.5", "Índices de cobertura para análisis de ventas"),
+            MigracionRollupsVentas("1.0.6", "Tablas de resumen diario y mensual de ventas"),
+            MigracionBusquedaTextoCompleto("1.0.7", "Índices FTS5 de productos y clientes"),
+            MigracionIndicesLogs("1.0.8", "Índices de consulta de logs por nivel y módulo"),
+            MigracionMovimientosInventario("1.0.9", "Movimientos de inventario y cortes de stock"),
+            MigracionConfiguracionStock("1.0.10", "Configuración de stock por producto")
         ]
     
     def ejecutar_migraciones_pendientes(self) -> bool:
@@ -329,4 +336,128 @@ class MigracionSistemaBackup(Migration):
             connection.execute("DROP TABLE IF EXISTS backup_config")
             return True
         except sqlite3.Error:
-            return False
\ No newline at end of file
+            return False
+
+class MigracionIndicesCobertura(Migration):
+    """Índices compuestos de cobertura para consultas de análisis de ventas"""
+    
+    INDICES = {
+        # Rangos por fecha de ventas completadas sin leer la tabla
+        "idx_ventas_estado_fecha": "ventas (estado, fecha_venta, total, subtotal, impuestos)",
+        # Compras por cliente en un período
+        "idx_ventas_cliente_estado_fecha": "ventas (cliente_id, estado, fecha_venta, total)",
+        # Agregados por producto desde el detalle
+        "idx_detalle_producto_venta": "detalle_ventas (producto_id, venta_id, cantidad, subtotal_linea)",
+        # Cantidades por venta (resúmenes diarios y mensuales)
+        "idx_detalle_venta_cantidad": "detalle_ventas (venta_id, cantidad)"
+    }
+    
+    def up(self, connection: sqlite3.Connection) -> bool:
+        try:
+            for nombre, definicion in self.INDICES.items():
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
+            
+            # Actualizar estadísticas para que el planificador elija los nuevos índices
+            connection.execute("ANALYZE")
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def down(self, connection: sqlite3.Connection) -> bool:
+        try:
+            for nombre in self.INDICES:
+                connection.execute(f"DROP INDEX IF EXISTS {nombre}")
+            return True
+        except sqlite3.Error:
+            return False
+
+class MigracionRollupsVentas(Migration):
+    """Tablas de resumen de ventas mantenidas por triggers"""
+    
+    def up(self, connection: sqlite3.Connection) -> bool:
+        try:
+            rollups.crear_rollups(connection)
+            
+            # Backfill del histórico existente
+            rollups.reconstruir_rollups(connection)
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def down(self, connection: sqlite3.Connection) -> bool:
+        try:
+            rollups.eliminar_rollups(connection)
+            return True
+        except sqlite3.Error:
+            return False
+
+class MigracionBusquedaTextoCompleto(Migration):
+    """Tablas FTS5 de productos y clientes mantenidas por triggers"""
+    
+    def up(self, connection: sqlite3.Connection) -> bool:
+        try:
+            busqueda.crear_indices_busqueda(connection)
+            
+            # Backfill de los registros existentes
+            busqueda.reconstruir_indices_busqueda(connection)
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def down(self, connection: sqlite3.Connection) -> bool:
+        try:
+            busqueda.eliminar_indices_busqueda(connection)
+            return True
+        except sqlite3.Error:
+            return False
+
+class MigracionIndicesLogs(Migration):
+    """Índices de la tabla logs para filtrar por nivel y módulo en un rango de fechas"""
+    
+    def up(self, connection: sqlite3.Connection) -> bool:
+        try:
+            registro_logs.crear_indices_logs(connection)
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def down(self, connection: sqlite3.Connection) -> bool:
+        try:
+            registro_logs.eliminar_indices_logs(connection)
+            return True
+        except sqlite3.Error:
+            return False
+
+class MigracionMovimientosInventario(Migration):
+    """Tabla persistente de movimientos de inventario y cortes de stock por producto"""
+    
+    def up(self, connection: sqlite3.Connection) -> bool:
+        try:
+            movimientos.crear_tablas_movimientos(connection)
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def down(self, connection: sqlite3.Connection) -> bool:
+        try:
+            movimientos.eliminar_tablas_movimientos(connection)
+            return True
+        except sqlite3.Error:
+            return False
+
+class MigracionConfiguracionStock(Migration):
+    """Niveles, alertas y reposición configurados por producto"""
+    
+    def up(self, connection: sqlite3.Connection) -> bool:
+        try:
+            movimientos.crear_tablas_configuracion(connection)
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def down(self, connection: sqlite3.Connection) -> bool:
+        try:
+            movimientos.eliminar_tablas_configuracion(connection)
+            return True
+        except sqlite3.Error:
+            return False
@@ -0,0 +1,372 @@
+"""
+Movimientos de Inventario - VentaPro
+====================================
+
+Define la tabla `movimientos_inventario` (forma de
+modelos_universales.MovimientoInventario) y la tabla de cortes de stock
+por producto `snapshots_stock`. La cantidad de cada movimiento se guarda
+con signo, de modo que el stock a una fecha es el del último corte
+anterior más la suma de los movimientos posteriores: solo se reproducen
+los movimientos desde el último corte.
+
+El stock vigente es `productos.stock_actual`; todo cambio sobre él
+(ventas, movimientos de inventario) escribe su movimiento en la misma
+transacción, y conciliar_saldos() registra el saldo de apertura de lo
+que aún no tiene historial para que el libro sume lo mismo.
+
+Las funciones no hacen commit; el llamador controla la transacción.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+TABLAS_MOVIMIENTOS = ['movimientos_inventario', 'snapshots_stock']
+TABLAS_CONFIGURACION = ['configuraciones_stock']
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+SQL_TABLAS = [
+    """
+    CREATE TABLE IF NOT EXISTS movimientos_inventario (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        producto_id INTEGER NOT NULL,
+        tipo_movimiento VARCHAR(30) NOT NULL,
+        motivo TEXT,
+        cantidad_anterior DECIMAL(12,3) NOT NULL DEFAULT 0,
+        cantidad_movimiento DECIMAL(12,3) NOT NULL,
+        cantidad_actual DECIMAL(12,3) NOT NULL DEFAULT 0,
+        referencia VARCHAR(50),
+        costo_unitario DECIMAL(10,2),
+        lote_afectado VARCHAR(50),
+        fecha_vencimiento DATE,
+        ubicacion_origen VARCHAR(100),
+        ubicacion_destino VARCHAR(100),
+        usuario VARCHAR(50),
+        observaciones TEXT,
+        fecha_movimiento TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS snapshots_stock (
+        producto_id INTEGER NOT NULL,
+        fecha_corte TIMESTAMP NOT NULL,
+        stock DECIMAL(12,3) NOT NULL,
+        num_movimientos INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (producto_id, fecha_corte)
+    )
+    """,
+    # Historial y reproducción por producto desde un corte
+    "CREATE INDEX IF NOT EXISTS idx_movimientos_inventario_producto_fecha "
+    "ON movimientos_inventario (producto_id, fecha_movimiento, cantidad_movimiento)",
+    # Reportes por rango de fechas
+    "CREATE INDEX IF NOT EXISTS idx_movimientos_inventario_fecha ON movimientos_inventario (fecha_movimiento)"
+]
+
+COLUMNAS = (
+    'id', 'producto_id', 'tipo_movimiento', 'motivo', 'cantidad_anterior', 'cantidad_movimiento',
+    'cantidad_actual', 'referencia', 'costo_unitario', 'lote_afectado', 'fecha_vencimiento',
+    'ubicacion_origen', 'ubicacion_destino', 'usuario', 'observaciones', 'fecha_movimiento'
+)
+
+SQL_CONFIGURACION = [
+    """
+    CREATE TABLE IF NOT EXISTS configuraciones_stock (
+        producto_id INTEGER PRIMARY KEY,
+        stock_minimo DECIMAL(12,3) NOT NULL DEFAULT 0,
+        stock_maximo DECIMAL(12,3) NOT NULL DEFAULT 999999,
+        stock_optimo DECIMAL(12,3) NOT NULL DEFAULT 0,
+        punto_reorden DECIMAL(12,3) NOT NULL DEFAULT 0,
+        alertar_stock_bajo BOOLEAN NOT NULL DEFAULT 1,
+        alertar_stock_critico BOOLEAN NOT NULL DEFAULT 1,
+        alertar_vencimiento BOOLEAN NOT NULL DEFAULT 0,
+        dias_alerta_vencimiento INTEGER NOT NULL DEFAULT 30,
+        usar_fifo BOOLEAN NOT NULL DEFAULT 1,
+        permitir_stock_negativo BOOLEAN NOT NULL DEFAULT 0,
+        demanda_diaria_promedio DECIMAL(12,3) NOT NULL DEFAULT 0,
+        dias_para_agotar INTEGER NOT NULL DEFAULT 0,
+        proveedor_id INTEGER,
+        dias_entrega INTEGER NOT NULL DEFAULT 7,
+        costo_unitario DECIMAL(10,2) NOT NULL DEFAULT 0,
+        fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+]
+
+# Columnas de configuraciones_stock en el orden de los campos de ConfiguracionStock
+COLUMNAS_CONFIGURACION = (
+    'producto_id', 'stock_minimo', 'stock_maximo', 'stock_optimo', 'punto_reorden',
+    'alertar_stock_bajo', 'alertar_stock_critico', 'alertar_vencimiento', 'dias_alerta_vencimiento',
+    'usar_fifo', 'permitir_stock_negativo', 'demanda_diaria_promedio', 'dias_para_agotar',
+    'proveedor_id', 'dias_entrega', 'costo_unitario'
+)
+
+SQL_INSERTAR = (
+    f"INSERT INTO movimientos_inventario ({', '.join(COLUMNAS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNAS)})"
+)
+
+
+def _fecha_limite(fecha) -> str:
+    """Normaliza una fecha a texto comparable; una fecha sola incluye todo el día"""
+    if isinstance(fecha, datetime):
+        return fecha.strftime(FORMATO_FECHA)
+    fecha = str(fecha)
+    return f"{fecha} 23:59:59" if len(fecha) == 10 else fecha
+
+
+# =================== ESQUEMA ===================
+
+def crear_tablas_movimientos(conexion: sqlite3.Connection):
+    """Crea las tablas e índices de movimientos y cortes"""
+    for sql in SQL_TABLAS:
+        conexion.execute(sql)
+
+
+def eliminar_tablas_movimientos(conexion: sqlite3.Connection):
+    """Elimina las tablas de movimientos y cortes"""
+    for tabla in TABLAS_MOVIMIENTOS:
+        conexion.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+
+def crear_tablas_configuracion(conexion: sqlite3.Connection):
+    """Crea la tabla de configuración de stock por producto"""
+    for sql in SQL_CONFIGURACION:
+        conexion.execute(sql)
+
+
+def eliminar_tablas_configuracion(conexion: sqlite3.Connection):
+    """Elimina la tabla de configuración de stock por producto"""
+    for tabla in TABLAS_CONFIGURACION:
+        conexion.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+
+# =================== ESCRITURA ===================
+
+def insertar_movimientos(conexion: sqlite3.Connection, filas: Sequence[Tuple]) -> int:
+    """Inserta movimientos (tuplas en el orden de COLUMNAS) con executemany
+
+    Los cortes posteriores a la fecha más antigua de cada producto dejan de
+    ser válidos (movimientos con fecha pasada) y se eliminan.
+    """
+    if not filas:
+        return 0
+    conexion.executemany(SQL_INSERTAR, filas)
+
+    indice_producto = COLUMNAS.index('producto_id')
+    indice_fecha = COLUMNAS.index('fecha_movimiento')
+    minimas: Dict[int, str] = {}
+    for fila in filas:
+        producto_id, fecha = fila[indice_producto], fila[indice_fecha]
+        if producto_id not in minimas or fecha < minimas[producto_id]:
+            minimas[producto_id] = fecha
+    conexion.executemany(
+        "DELETE FROM snapshots_stock WHERE producto_id = ? AND fecha_corte >= ?",
+        list(minimas.items())
+    )
+    return len(filas)
+
+
+def fila_salida_venta(producto_id: int, cantidad: float, stock_anterior: float,
+                      folio: str, fecha: str) -> Tuple:
+    """Fila (orden de COLUMNAS) de la salida que deja una línea de venta"""
+    return (None, producto_id, 'SALIDA', 'Venta', stock_anterior, -cantidad,
+            stock_anterior - cantidad, folio, None, None, None, None, None, None, None, fecha)
+
+
+def aplicar_a_productos(conexion: sqlite3.Connection, filas: Sequence[Tuple]) -> int:
+    """Suma a productos.stock_actual la cantidad con signo de los movimientos
+
+    Returns:
+        int: Productos actualizados
+    """
+    indice_producto = COLUMNAS.index('producto_id')
+    indice_cantidad = COLUMNAS.index('cantidad_movimiento')
+    deltas: Dict[int, float] = {}
+    for fila in filas:
+        deltas[fila[indice_producto]] = deltas.get(fila[indice_producto], 0) + fila[indice_cantidad]
+    cursor = conexion.executemany("""
+        UPDATE productos
+        SET stock_actual = stock_actual + ?, fecha_modificacion = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, [(delta, producto_id) for producto_id, delta in deltas.items() if delta])
+    return cursor.rowcount
+
+
+def conciliar_saldos(conexion: sqlite3.Connection, fecha=None) -> int:
+    """Registra un ajuste de apertura donde el libro no suma productos.stock_actual
+
+    Cubre los productos sin historial (alta con stock inicial) y el stock
+    anterior a que existiera la tabla de movimientos.
+
+    Returns:
+        int: Movimientos de apertura registrados
+    """
+    cursor = conexion.execute("""
+        INSERT INTO movimientos_inventario (producto_id, tipo_movimiento, motivo, cantidad_anterior,
+                                            cantidad_movimiento, cantidad_actual, usuario, fecha_movimiento)
+        SELECT id, 'AJUSTE', 'Saldo de apertura', libro, stock_actual - libro, stock_actual, 'Sistema', ?
+        FROM (
+            SELECT p.id, p.stock_actual,
+                   COALESCE((
+                       SELECT s.stock FROM snapshots_stock s
+                       WHERE s.producto_id = p.id
+                       ORDER BY s.fecha_corte DESC
+                       LIMIT 1
+                   ), 0) + COALESCE((
+                       SELECT SUM(m.cantidad_movimiento) FROM movimientos_inventario m
+                       WHERE m.producto_id = p.id
+                       AND m.fecha_movimiento > COALESCE((
+                           SELECT MAX(s.fecha_corte) FROM snapshots_stock s WHERE s.producto_id = p.id
+                       ), '')
+                   ), 0) AS libro
+            FROM productos p
+        )
+        WHERE ABS(stock_actual - libro) > 0.0005
+    """, (_fecha_limite(fecha or datetime.now()),))
+    return cursor.rowcount
+
+
+def crear_snapshots(conexion: sqlite3.Connection, fecha_corte=None) -> int:
+    """Registra un corte de stock para los productos con movimientos desde su último corte
+
+    Cada corte parte del corte anterior del producto y suma solo los
+    movimientos posteriores a él, de modo que el costo es proporcional a
+    lo registrado desde entonces.
+
+    Returns:
+        int: Productos con nuevo corte
+    """
+    corte = _fecha_limite(fecha_corte or datetime.now())
+    cursor = conexion.execute("""
+        INSERT OR REPLACE INTO snapshots_stock (producto_id, fecha_corte, stock, num_movimientos)
+        SELECT m.producto_id, :corte, COALESCE(s.stock, 0) + SUM(m.cantidad_movimiento), COUNT(*)
+        FROM movimientos_inventario m
+        LEFT JOIN (
+            SELECT producto_id, MAX(fecha_corte) AS fecha_corte
+            FROM snapshots_stock
+            WHERE fecha_corte <= :corte
+            GROUP BY producto_id
+        ) u ON u.producto_id = m.producto_id
+        LEFT JOIN snapshots_stock s ON s.producto_id = u.producto_id AND s.fecha_corte = u.fecha_corte
+        WHERE m.fecha_movimiento <= :corte
+        AND m.fecha_movimiento > COALESCE(u.fecha_corte, '')
+        GROUP BY m.producto_id
+    """, {'corte': corte})
+    return cursor.rowcount
+
+
+# =================== CONSULTA ===================
+
+def stock_a_fecha(conexion: sqlite3.Connection, producto_id: int, fecha=None) -> float:
+    """Stock de un producto a una fecha: último corte + movimientos posteriores"""
+    limite = _fecha_limite(fecha or datetime.now())
+    fila = conexion.execute("""
+        SELECT fecha_corte, stock FROM snapshots_stock
+        WHERE producto_id = ? AND fecha_corte <= ?
+        ORDER BY fecha_corte DESC
+        LIMIT 1
+    """, (producto_id, limite)).fetchone()
+    desde, base = (fila[0], fila[1]) if fila else ('', 0)
+
+    delta = conexion.execute("""
+        SELECT COALESCE(SUM(cantidad_movimiento), 0) FROM movimientos_inventario
+        WHERE producto_id = ? AND fecha_movimiento > ? AND fecha_movimiento <= ?
+    """, (producto_id, desde, limite)).fetchone()[0]
+    return float(base + delta)
+
+
+def stock_actual_productos(conexion: sqlite3.Connection) -> Dict[int, float]:
+    """Stock actual de todos los productos (productos.stock_actual)"""
+    filas = conexion.execute("SELECT id, stock_actual FROM productos").fetchall()
+    return {fila[0]: float(fila[1] or 0) for fila in filas}
+
+
+def consultar_movimientos(conexion: sqlite3.Connection, producto_id: Optional[int] = None,
+                          desde=None, hasta=None, limite: Optional[int] = None) -> List[sqlite3.Row]:
+    """Movimientos ordenados por fecha, filtrados por producto y rango"""
+    condiciones = []
+    parametros: List = []
+    if producto_id is not None:
+        condiciones.append("producto_id = ?")
+        parametros.append(producto_id)
+    if desde is not None:
+        condiciones.append("fecha_movimiento >= ?")
+        parametros.append(desde.strftime(FORMATO_FECHA) if isinstance(desde, datetime) else str(desde))
+    if hasta is not None:
+        condiciones.append("fecha_movimiento <= ?")
+        parametros.append(_fecha_limite(hasta))
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    sql = f"SELECT {', '.join(COLUMNAS)} FROM movimientos_inventario {where} ORDER BY fecha_movimiento, id"
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+    return conexion.execute(sql, parametros).fetchall()
+
+
+def demanda_por_producto(conexion: sqlite3.Connection, desde, hasta=None) -> List[Tuple[int, float, float]]:
+    """Agregados de salidas por producto en un rango: (producto_id, total, suma de cuadrados diarios)
+
+    Las salidas se suman por día y producto, de modo que el promedio y la
+    desviación de la demanda diaria se obtienen sin reproducir movimientos.
+    """
+    inicio = desde.strftime(FORMATO_FECHA) if isinstance(desde, datetime) else str(desde)
+    filas = conexion.execute("""
+        SELECT producto_id, SUM(total), SUM(total * total)
+        FROM (
+            SELECT producto_id, date(fecha_movimiento) AS dia, -SUM(cantidad_movimiento) AS total
+            FROM movimientos_inventario
+            WHERE tipo_movimiento = 'SALIDA'
+            AND fecha_movimiento >= ? AND fecha_movimiento <= ?
+            GROUP BY producto_id, dia
+        )
+        GROUP BY producto_id
+    """, (inicio, _fecha_limite(hasta or datetime.now()))).fetchall()
+    return [(fila[0], float(fila[1]), float(fila[2])) for fila in filas]
+
+
+def guardar_configuraciones(conexion: sqlite3.Connection, filas: Sequence[Tuple]) -> int:
+    """Inserta o reemplaza configuraciones (tuplas en el orden de COLUMNAS_CONFIGURACION)"""
+    if not filas:
+        return 0
+    conexion.executemany(
+        f"INSERT OR REPLACE INTO configuraciones_stock ({', '.join(COLUMNAS_CONFIGURACION)}) "
+        f"VALUES ({', '.join('?' for _ in COLUMNAS_CONFIGURACION)})",
+        filas
+    )
+    return len(filas)
+
+
+def consultar_configuraciones(conexion: sqlite3.Connection) -> List[sqlite3.Row]:
+    """Configuraciones de stock guardadas"""
+    return conexion.execute(
+        f"SELECT {', '.join(COLUMNAS_CONFIGURACION)} FROM configuraciones_stock ORDER BY producto_id"
+    ).fetchall()
+
+
+def productos_sin_configuracion(conexion: sqlite3.Connection) -> List[sqlite3.Row]:
+    """Productos activos sin configuración guardada, con su mínimo y costo de catálogo"""
+    return conexion.execute("""
+        SELECT p.id AS producto_id, p.stock_minimo, p.precio_compra
+        FROM productos p
+        WHERE p.activo = 1
+        AND NOT EXISTS (SELECT 1 FROM configuraciones_stock c WHERE c.producto_id = p.id)
+        ORDER BY p.id
+    """).fetchall()
+
+
+def ultimo_id(conexion: sqlite3.Connection) -> int:
+    """Mayor id registrado (0 si no hay movimientos)"""
+    return conexion.execute("SELECT COALESCE(MAX(id), 0) FROM movimientos_inventario").fetchone()[0]
+
+
+def movimientos_desde_ultimo_corte(conexion: sqlite3.Connection) -> int:
+    """Movimientos registrados después del corte más reciente"""
+    return conexion.execute("""
+        SELECT COUNT(*) FROM movimientos_inventario
+        WHERE fecha_movimiento > COALESCE((SELECT MAX(fecha_corte) FROM snapshots_stock), '')
+    """).fetchone()[0]
@@ -0,0 +1,282 @@
+"""
+Pool de Conexiones SQLite - VentaPro
+====================================
+
+Administra un pool de conexiones SQLite seguro para hilos: una única
+conexión de escritura en modo WAL y N conexiones de solo lectura.
+Cada hilo obtiene su conexión con checkout local y espera acotada,
+y el pool expone métricas de uso para diagnóstico. Cada conexión
+mantiene un caché LRU acotado de sentencias preparadas.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+
+class PoolAgotadoError(sqlite3.OperationalError):
+    """Se agotó el tiempo de espera para obtener una conexión del pool"""
+
+
+class CacheSentencias:
+    """Caché LRU de sentencias preparadas de una conexión
+    
+    sqlite3 reutiliza la sentencia preparada cuando el texto SQL coincide
+    con uno de sus cached_statements más recientes. Esta clase refleja ese
+    caché con la misma capacidad para contar aciertos y fallos.
+    """
+
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self._sentencias: "OrderedDict[str, None]" = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def registrar(self, sql: str) -> bool:
+        """Registra el uso de una sentencia y retorna True si estaba en caché"""
+        if sql in self._sentencias:
+            self._sentencias.move_to_end(sql)
+            self.aciertos += 1
+            return True
+
+        self.fallos += 1
+        self._sentencias[sql] = None
+        if len(self._sentencias) > self.capacidad:
+            self._sentencias.popitem(last=False)
+        return False
+
+    def __len__(self) -> int:
+        return len(self._sentencias)
+
+
+class PoolConexiones:
+    """Pool de conexiones SQLite con un escritor WAL y N lectores"""
+
+    def __init__(self, db_path: str, num_lectores: int = 4, timeout_espera: float = 5.0,
+                 timeout_sqlite: float = 30.0, tamano_cache: int = 128):
+        self.db_path = db_path
+        self.timeout_espera = timeout_espera
+        self.timeout_sqlite = timeout_sqlite
+        self.tamano_cache = max(1, tamano_cache)
+        self._caches: Dict[int, CacheSentencias] = {}
+
+        # Una base en memoria no se comparte entre conexiones: todo va al escritor
+        self.en_memoria = db_path == ':memory:' or db_path.startswith('file::memory:')
+        self.num_lectores = 0 if self.en_memoria else max(0, num_lectores)
+
+        self.escritor: Optional[sqlite3.Connection] = None
+        self._lock_escritor = threading.RLock()
+        self._lectores_libres: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lectores: List[sqlite3.Connection] = []
+        # Reentrante: protege lectores y cachés, y la creación de un lector
+        # registra su caché con el lock ya tomado
+        self._lock_creacion = threading.RLock()
+        self._local = threading.local()
+        self._abierto = False
+
+        # Métricas del pool
+        self._lock_metricas = threading.Lock()
+        self._metricas = {
+            'checkouts_lectura': 0,
+            'checkouts_escritura': 0,
+            'tiempo_espera_total': 0.0,
+            'tiempo_espera_max': 0.0,
+            'timeouts': 0,
+            'en_uso_lectura': 0,
+            'en_uso_escritura': 0,
+        }
+
+    # =================== CICLO DE VIDA ===================
+
+    def abrir(self) -> sqlite3.Connection:
+        """Abre la conexión de escritura; los lectores se crean bajo demanda"""
+        if self._abierto:
+            return self.escritor
+
+        self.escritor = self._crear_conexion(solo_lectura=False)
+        self.escritor.execute("PRAGMA journal_mode = WAL")
+        self._abierto = True
+        return self.escritor
+
+    def cerrar(self):
+        """Cierra todas las conexiones del pool"""
+        with self._lock_creacion:
+            for conexion in self._lectores:
+                try:
+                    conexion.close()
+                except sqlite3.Error:
+                    pass
+            self._lectores = []
+            self._lectores_libres = queue.LifoQueue()
+            self._caches = {}
+
+        with self._lock_escritor:
+            if self.escritor:
+                self.escritor.close()
+                self.escritor = None
+
+        self._abierto = False
+
+    @property
+    def abierto(self) -> bool:
+        """Indica si el pool tiene conexiones abiertas"""
+        return self._abierto
+
+    def _crear_conexion(self, solo_lectura: bool) -> sqlite3.Connection:
+        """Crea una conexión configurada para el pool"""
+        conexion = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout_sqlite,
+            check_same_thread=False,
+            cached_statements=self.tamano_cache
+        )
+        conexion.row_factory = sqlite3.Row
+        with self._lock_creacion:
+            self._caches[id(conexion)] = CacheSentencias(self.tamano_cache)
+        conexion.execute("PRAGMA foreign_keys = ON")
+        if solo_lectura:
+            conexion.execute("PRAGMA query_only = ON")
+        return conexion
+
+    def _crear_lector_si_hay_cupo(self) -> Optional[sqlite3.Connection]:
+        """Crea un nuevo lector si no se ha alcanzado el límite"""
+        with self._lock_creacion:
+            if len(self._lectores) >= self.num_lectores:
+                return None
+            conexion = self._crear_conexion(solo_lectura=True)
+            self._lectores.append(conexion)
+            return conexion
+
+    # =================== CHECKOUT ===================
+
+    @contextmanager
+    def lector(self) -> Iterator[sqlite3.Connection]:
+        """Obtiene una conexión de lectura para el hilo actual"""
+        if not self._abierto:
+            raise sqlite3.ProgrammingError("El pool de conexiones no está abierto")
+
+        # Sin lectores (o con el escritor ya tomado por este hilo) se lee del escritor
+        if self.num_lectores == 0 or getattr(self._local, 'profundidad_escritor', 0):
+            with self.escritor_conexion() as conexion:
+                yield conexion
+            return
+
+        # Checkout reentrante: el mismo hilo reutiliza su lector
+        conexion = getattr(self._local, 'lector', None)
+        if conexion is not None:
+            self._local.profundidad_lector += 1
+            try:
+                yield conexion
+            finally:
+                self._local.profundidad_lector -= 1
+            return
+
+        inicio = time.perf_counter()
+        try:
+            conexion = self._lectores_libres.get_nowait()
+        except queue.Empty:
+            conexion = self._crear_lector_si_hay_cupo()
+            if conexion is None:
+                try:
+                    conexion = self._lectores_libres.get(timeout=self.timeout_espera)
+                except queue.Empty:
+                    self._registrar_timeout()
+                    raise PoolAgotadoError(
+                        f"No hay conexiones de lectura libres tras {self.timeout_espera:.1f}s"
+                    )
+
+        self._registrar_checkout('lectura', time.perf_counter() - inicio)
+        self._local.lector = conexion
+        self._local.profundidad_lector = 1
+        try:
+            yield conexion
+        finally:
+            self._local.lector = None
+            self._local.profundidad_lector = 0
+            self._registrar_devolucion('lectura')
+            self._lectores_libres.put(conexion)
+
+    @contextmanager
+    def escritor_conexion(self) -> Iterator[sqlite3.Connection]:
+        """Obtiene la conexión de escritura con acceso exclusivo"""
+        if not self._abierto:
+            raise sqlite3.ProgrammingError("El pool de conexiones no está abierto")
+
+        inicio = time.perf_counter()
+        if not self._lock_escritor.acquire(timeout=self.timeout_espera):
+            self._registrar_timeout()
+            raise PoolAgotadoError(
+                f"La conexión de escritura sigue ocupada tras {self.timeout_espera:.1f}s"
+            )
+
+        profundidad = getattr(self._local, 'profundidad_escritor', 0)
+        if profundidad == 0:
+            self._registrar_checkout('escritura', time.perf_counter() - inicio)
+        self._local.profundidad_escritor = profundidad + 1
+        try:
+            yield self.escritor
+        finally:
+            self._local.profundidad_escritor -= 1
+            if self._local.profundidad_escritor == 0:
+                self._registrar_devolucion('escritura')
+            self._lock_escritor.release()
+
+    # =================== EJECUCIÓN ===================
+
+    def ejecutar(self, conexion: sqlite3.Connection, sql: str, parametros: tuple = ()) -> sqlite3.Cursor:
+        """Ejecuta una sentencia registrando su uso en el caché de la conexión"""
+        cache = self._caches.get(id(conexion))
+        if cache is not None:
+            cache.registrar(sql)
+        return conexion.execute(sql, parametros)
+
+    # =================== MÉTRICAS ===================
+
+    def _registrar_checkout(self, tipo: str, espera: float):
+        """Registra un checkout y su tiempo de espera"""
+        with self._lock_metricas:
+            self._metricas[f'checkouts_{tipo}'] += 1
+            self._metricas[f'en_uso_{tipo}'] += 1
+            self._metricas['tiempo_espera_total'] += espera
+            if espera > self._metricas['tiempo_espera_max']:
+                self._metricas['tiempo_espera_max'] = espera
+
+    def _registrar_devolucion(self, tipo: str):
+        """Registra la devolución de una conexión al pool"""
+        with self._lock_metricas:
+            self._metricas[f'en_uso_{tipo}'] -= 1
+
+    def _registrar_timeout(self):
+        """Registra un checkout que agotó el tiempo de espera"""
+        with self._lock_metricas:
+            self._metricas['timeouts'] += 1
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene una copia de las métricas del pool"""
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+
+        checkouts = metricas['checkouts_lectura'] + metricas['checkouts_escritura']
+        metricas['checkouts_total'] = checkouts
+        metricas['tiempo_espera_promedio'] = (
+            metricas['tiempo_espera_total'] / checkouts if checkouts else 0.0
+        )
+        with self._lock_creacion:
+            metricas['lectores_creados'] = len(self._lectores)
+            caches = list(self._caches.values())
+        metricas['lectores_maximos'] = self.num_lectores
+
+        aciertos = sum(cache.aciertos for cache in caches)
+        fallos = sum(cache.fallos for cache in caches)
+        metricas['cache_aciertos'] = aciertos
+        metricas['cache_fallos'] = fallos
+        metricas['cache_sentencias'] = sum(len(cache) for cache in caches)
+        metricas['cache_tasa_aciertos'] = aciertos / (aciertos + fallos) if aciertos + fallos else 0.0
+        return metricas
@@ -0,0 +1,286 @@
+"""
+Registro de Logs en Base de Datos - VentaPro
+============================================
+
+Persiste los registros del Logger en la tabla `logs`. El handler solo
+acumula en memoria; un hilo propio con su conexión dedicada inserta con
+executemany cada N registros o cada M milisegundos y poda por antigüedad
+en lotes pequeños para no retener el bloqueo de escritura. Incluye la
+consulta filtrada por nivel, módulo y rango de fechas para la pantalla
+de administración.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+INDICES_LOGS = {
+    # Filtros de la pantalla de administración
+    "idx_logs_nivel_fecha": "logs (nivel, fecha_creacion)",
+    "idx_logs_modulo_fecha": "logs (modulo, fecha_creacion)",
+}
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+SQL_INSERTAR = "INSERT INTO logs (nivel, modulo, mensaje, fecha_creacion) VALUES (?, ?, ?, ?)"
+
+
+# =================== ESQUEMA ===================
+
+def crear_indices_logs(conexion: sqlite3.Connection):
+    """Crea los índices de consulta de logs (no hace commit)"""
+    for nombre, definicion in INDICES_LOGS.items():
+        conexion.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
+
+
+def eliminar_indices_logs(conexion: sqlite3.Connection):
+    """Elimina los índices de consulta de logs (no hace commit)"""
+    for nombre in INDICES_LOGS:
+        conexion.execute(f"DROP INDEX IF EXISTS {nombre}")
+
+
+# =================== ESCRITURA Y RETENCIÓN ===================
+
+def insertar_registros(conexion: sqlite3.Connection, filas: Sequence[Tuple]) -> int:
+    """Inserta filas (nivel, modulo, mensaje, fecha) con executemany (no hace commit)"""
+    conexion.executemany(SQL_INSERTAR, filas)
+    return len(filas)
+
+
+def podar_logs(conexion: sqlite3.Connection, antes_de: str, tamano_lote: int = 500) -> int:
+    """Elimina un lote de logs anteriores a una fecha (no hace commit)
+
+    Returns:
+        int: Filas eliminadas; menor que tamano_lote cuando ya no quedan
+    """
+    cursor = conexion.execute("""
+        DELETE FROM logs
+        WHERE id IN (
+            SELECT id FROM logs
+            WHERE fecha_creacion < ?
+            ORDER BY fecha_creacion
+            LIMIT ?
+        )
+    """, (antes_de, tamano_lote))
+    return cursor.rowcount
+
+
+# =================== CONSULTA ===================
+
+def consultar_logs(conexion: sqlite3.Connection, niveles: Optional[Sequence[str]] = None,
+                   modulo: Optional[str] = None, desde: Optional[str] = None,
+                   hasta: Optional[str] = None, texto: Optional[str] = None,
+                   limite: int = 200, pagina: int = 1) -> List[sqlite3.Row]:
+    """Logs filtrados, del más reciente al más antiguo
+
+    Args:
+        niveles: Niveles a incluir ('ERROR', 'WARNING', ...)
+        modulo: Módulo funcional exacto ('VENTAS', 'SISTEMA', ...)
+        desde: Fecha/hora mínima inclusive ('YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS')
+        hasta: Fecha/hora máxima; una fecha sola incluye todo ese día
+        texto: Subcadena del mensaje
+        limite: Registros por página
+        pagina: Página (desde 1)
+    """
+    condiciones = []
+    parametros: List[Any] = []
+
+    if niveles:
+        condiciones.append(f"nivel IN ({', '.join('?' for _ in niveles)})")
+        parametros.extend(nivel.upper() for nivel in niveles)
+    if modulo:
+        condiciones.append("modulo = ?")
+        parametros.append(modulo)
+    if desde:
+        condiciones.append("fecha_creacion >= ?")
+        parametros.append(desde)
+    if hasta:
+        condiciones.append("fecha_creacion <= ?")
+        parametros.append(f"{hasta} 23:59:59" if len(hasta) == 10 else hasta)
+    if texto:
+        condiciones.append("mensaje LIKE ?")
+        parametros.append(f"%{texto}%")
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    parametros.extend([limite, (max(1, pagina) - 1) * limite])
+
+    return conexion.execute(f"""
+        SELECT id, nivel, modulo, mensaje, usuario_id, fecha_creacion
+        FROM logs
+        {where}
+        ORDER BY fecha_creacion DESC, id DESC
+        LIMIT ? OFFSET ?
+    """, parametros).fetchall()
+
+
+def modulos_registrados(conexion: sqlite3.Connection) -> List[str]:
+    """Módulos distintos presentes en los logs (para filtros de la interfaz)"""
+    filas = conexion.execute(
+        "SELECT DISTINCT modulo FROM logs WHERE modulo IS NOT NULL ORDER BY modulo"
+    ).fetchall()
+    return [fila[0] for fila in filas]
+
+
+# =================== HANDLER ===================
+
+class ManejadorBaseDatos(logging.Handler):
+    """Handler de logging que persiste en la tabla `logs` por lotes
+
+    emit() solo agrega a un buffer acotado; la inserción y la poda las
+    hace un hilo propio con su propia conexión.
+
+    Args:
+        db_path: Ruta de la base de datos
+        tamano_lote: Registros que disparan una inserción inmediata
+        intervalo_ms: Espera máxima antes de insertar lo acumulado
+        dias_retencion: Antigüedad máxima de los logs (0 = sin poda)
+        capacidad: Máximo de registros en memoria; al superarlo se
+            descartan los más antiguos
+    """
+
+    def __init__(self, db_path: str, nivel: int = logging.INFO, tamano_lote: int = 200,
+                 intervalo_ms: int = 1000, dias_retencion: int = 30, capacidad: int = 20000,
+                 lote_poda: int = 500, intervalo_poda: float = 3600.0):
+        super().__init__(nivel)
+        self.db_path = db_path
+        self.tamano_lote = max(1, tamano_lote)
+        self.intervalo = intervalo_ms / 1000
+        self.dias_retencion = dias_retencion
+        self.lote_poda = lote_poda
+        self.intervalo_poda = intervalo_poda
+
+        self._buffer: deque = deque(maxlen=capacidad)
+        self._lock_buffer = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._ultima_poda: Optional[float] = None
+
+        self._lock_metricas = threading.Lock()
+        self._metricas = {
+            'insertados': 0,
+            'lotes': 0,
+            'podados': 0,
+            'descartados': 0,
+            'errores': 0,
+        }
+
+        self._hilo = threading.Thread(target=self._bucle, name="logs-db", daemon=True)
+        self._hilo.start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            fila = (
+                record.levelname,
+                getattr(record, 'modulo', None),
+                record.getMessage(),
+                datetime.fromtimestamp(record.created).strftime(FORMATO_FECHA),
+            )
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._lock_buffer:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._contar('descartados')
+            self._buffer.append(fila)
+            lleno = len(self._buffer) >= self.tamano_lote
+        if lleno:
+            self._despertar.set()
+
+    def flush(self):
+        # Las inserciones las dispara el tamaño de lote o el intervalo, no cada flush
+        pass
+
+    def close(self):
+        """Inserta lo pendiente y detiene el hilo"""
+        if not self._detener.is_set():
+            self._detener.set()
+            self._despertar.set()
+            self._hilo.join(5.0)
+        super().close()
+
+    # =================== HILO ===================
+
+    def _bucle(self):
+        conexion = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            while not self._detener.is_set():
+                self._despertar.wait(self.intervalo)
+                self._despertar.clear()
+                self._insertar_pendientes(conexion)
+                self._podar_si_corresponde(conexion)
+            self._insertar_pendientes(conexion)
+        finally:
+            conexion.close()
+
+    def _tomar_pendientes(self) -> List[Tuple]:
+        with self._lock_buffer:
+            filas = list(self._buffer)
+            self._buffer.clear()
+        return filas
+
+    def _insertar_pendientes(self, conexion: sqlite3.Connection):
+        filas = self._tomar_pendientes()
+        if not filas:
+            return
+        try:
+            with conexion:
+                insertar_registros(conexion, filas)
+            with self._lock_metricas:
+                self._metricas['insertados'] += len(filas)
+                self._metricas['lotes'] += 1
+        except sqlite3.Error:
+            # No se registra por el propio logger para no realimentar el error
+            self._contar('errores')
+            with self._lock_buffer:
+                # Se devuelven al frente solo las que caben: extendleft sobre un
+                # deque lleno expulsaría por la derecha los registros más nuevos
+                libres = self._buffer.maxlen - len(self._buffer)
+                sobrantes = max(0, len(filas) - libres)
+                if libres > 0:
+                    self._buffer.extendleft(reversed(filas[sobrantes:]))
+            if sobrantes:
+                with self._lock_metricas:
+                    self._metricas['descartados'] += sobrantes
+
+    def _podar_si_corresponde(self, conexion: sqlite3.Connection):
+        """Poda por antigüedad en lotes cortos, cada `intervalo_poda` segundos"""
+        if self.dias_retencion <= 0:
+            return
+        if self._ultima_poda is not None and time.monotonic() - self._ultima_poda < self.intervalo_poda:
+            return
+        self._ultima_poda = time.monotonic()
+        limite = (datetime.now() - timedelta(days=self.dias_retencion)).strftime(FORMATO_FECHA)
+
+        try:
+            while not self._detener.is_set():
+                with conexion:
+                    eliminadas = podar_logs(conexion, limite, self.lote_poda)
+                with self._lock_metricas:
+                    self._metricas['podados'] += eliminadas
+                if eliminadas < self.lote_poda:
+                    break
+                # Entre lotes se ceden el bloqueo de escritura y los registros nuevos
+                self._insertar_pendientes(conexion)
+        except sqlite3.Error:
+            self._contar('errores')
+
+    # =================== MÉTRICAS ===================
+
+    def _contar(self, clave: str):
+        with self._lock_metricas:
+            self._metricas[clave] += 1
+
+    def obtener_metricas(self) -> Dict[str, int]:
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+        with self._lock_buffer:
+            metricas['pendientes'] = len(self._buffer)
+        return metricas
@@ -0,0 +1,487 @@
+"""
+Respaldos en Línea de la Base de Datos - VentaPro
+=================================================
+
+Copia la base de datos con la API de backup de SQLite mientras el punto
+de venta sigue escribiendo: la copia avanza por pasos de N páginas con
+pausas entre pasos, parte de un checkpoint pasivo del WAL y deja un
+archivo autónomo (modo de journal DELETE) opcionalmente comprimido con
+zstd o gzip. Incluye la retención por cantidad máxima de respaldos.
+
+Los respaldos diferenciales dividen la copia en páginas de tamaño fijo,
+comparan sus hashes con el manifiesto del último respaldo completo y
+guardan solo las páginas cambiadas. Restaurar una cadena es aplicar un
+diferencial sobre su respaldo completo base.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_DISPONIBLE = True
+except ImportError:
+    ZSTD_DISPONIBLE = False
+
+PREFIJO_RESPALDO = 'erp_backup_'
+PREFIJO_DIFERENCIAL = 'erp_delta_'
+SUFIJO_MANIFIESTO = '.manifest.json'
+SUFIJO_HASHES = '.hashes'
+EXTENSIONES_COMPRESION = {'zstd': '.zst', 'gzip': '.gz'}
+
+# Tamaño de bloque para comprimir y descomprimir en streaming
+TAMANO_BLOQUE = 1024 * 1024
+
+# Páginas de los respaldos diferenciales y su hash
+TAMANO_PAGINA_DEFAULT = 64 * 1024
+TAMANO_HASH = 16
+CABECERA_PAGINA = struct.Struct('<II')
+
+
+def formato_compresion(comprimir: bool) -> Optional[str]:
+    """Formato a usar: zstd si está instalado, si no gzip; None sin compresión"""
+    if not comprimir:
+        return None
+    return 'zstd' if ZSTD_DISPONIBLE else 'gzip'
+
+
+# =================== COPIA EN LÍNEA ===================
+
+def copiar_en_linea(db_path: str, ruta_destino: str, paginas_por_paso: int = 256,
+                    pausa: float = 0.005, max_reinicios: int = 5,
+                    progreso: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Copia la base de datos con sqlite3.Connection.backup por pasos
+
+    La copia usa una conexión propia en modo query_only. Si otra conexión
+    escribe entre pasos, SQLite reinicia la copia; tras `max_reinicios`
+    reinicios se completa en una sola pasada, que en modo WAL lee una
+    instantánea sin bloquear a los escritores.
+
+    Args:
+        db_path: Base de datos de origen
+        ruta_destino: Archivo de destino (se reemplaza si existe)
+        paginas_por_paso: Páginas copiadas por paso
+        pausa: Segundos de espera entre pasos para ceder el disco
+        max_reinicios: Reinicios tolerados antes de copiar en una pasada
+        progreso: Callback opcional (restantes, total)
+
+    Returns:
+        Dict[str, int]: pasos, paginas y reinicios
+    """
+    if os.path.exists(ruta_destino):
+        os.remove(ruta_destino)
+
+    estado = {'pasos': 0, 'paginas': 0, 'reinicios': 0, 'restantes_previas': None}
+
+    class _ReinicioExcesivo(Exception):
+        pass
+
+    def _al_avanzar(_estado_sqlite, restantes, total):
+        estado['pasos'] += 1
+        estado['paginas'] = total
+        previas = estado['restantes_previas']
+        if previas is not None and restantes > previas:
+            estado['reinicios'] += 1
+            if estado['reinicios'] > max_reinicios:
+                raise _ReinicioExcesivo()
+        estado['restantes_previas'] = restantes
+        if progreso:
+            progreso(restantes, total)
+        if restantes and pausa:
+            time.sleep(pausa)
+
+    # query_only y no mode=ro: el checkpoint necesita acceso de escritura al archivo
+    origen = sqlite3.connect(db_path)
+    destino = sqlite3.connect(ruta_destino)
+    try:
+        origen.execute("PRAGMA query_only = ON")
+        # Checkpoint pasivo: vuelca el WAL sin esperar a lectores ni escritores
+        origen.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        try:
+            origen.backup(destino, pages=paginas_por_paso, progress=_al_avanzar)
+        except _ReinicioExcesivo:
+            origen.backup(destino, pages=-1)
+            estado['pasos'] += 1
+
+        # Archivo autónomo: sin WAL asociado
+        destino.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        destino.close()
+        origen.close()
+
+    del estado['restantes_previas']
+    return estado
+
+
+def verificar_respaldo(ruta: str) -> bool:
+    """Ejecuta quick_check sobre un respaldo sin comprimir"""
+    conexion = sqlite3.connect(f"file:{Path(ruta).resolve().as_posix()}?mode=ro", uri=True)
+    try:
+        return conexion.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+    finally:
+        conexion.close()
+
+
+# =================== COMPRESIÓN ===================
+
+def _abrir_escritura(ruta: str, formato: Optional[str]):
+    """Abre un archivo para escritura binaria con la compresión indicada"""
+    if formato == 'zstd':
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(ruta, 'wb'), closefd=True)
+    if formato == 'gzip':
+        return gzip.open(ruta, 'wb', compresslevel=6)
+    return open(ruta, 'wb')
+
+
+def _abrir_lectura(ruta: str):
+    """Abre para lectura binaria un archivo .zst/.gz o sin comprimir"""
+    if ruta.endswith('.zst'):
+        if not ZSTD_DISPONIBLE:
+            raise RuntimeError("El respaldo está comprimido con zstd y el módulo zstandard no está instalado")
+        return zstandard.ZstdDecompressor().stream_reader(open(ruta, 'rb'), closefd=True)
+    if ruta.endswith('.gz'):
+        return gzip.open(ruta, 'rb')
+    return open(ruta, 'rb')
+
+
+def comprimir_archivo(ruta: str, formato: str, eliminar_original: bool = True) -> str:
+    """Comprime un archivo en streaming y retorna la ruta comprimida"""
+    ruta_salida = ruta + EXTENSIONES_COMPRESION[formato]
+
+    with open(ruta, 'rb') as entrada:
+        if formato == 'zstd':
+            compresor = zstandard.ZstdCompressor(level=3)
+            with open(ruta_salida, 'wb') as salida, compresor.stream_writer(salida) as escritor:
+                shutil.copyfileobj(entrada, escritor, TAMANO_BLOQUE)
+        else:
+            with gzip.open(ruta_salida, 'wb', compresslevel=6) as salida:
+                shutil.copyfileobj(entrada, salida, TAMANO_BLOQUE)
+
+    if eliminar_original:
+        os.remove(ruta)
+    return ruta_salida
+
+
+def descomprimir_archivo(ruta: str, ruta_destino: str) -> str:
+    """Descomprime un respaldo .zst/.gz (o copia uno sin comprimir)"""
+    if ruta.endswith('.zst'):
+        if not ZSTD_DISPONIBLE:
+            raise RuntimeError("El respaldo está comprimido con zstd y el módulo zstandard no está instalado")
+        with open(ruta, 'rb') as entrada, open(ruta_destino, 'wb') as salida:
+            zstandard.ZstdDecompressor().copy_stream(entrada, salida, TAMANO_BLOQUE)
+    elif ruta.endswith('.gz'):
+        with gzip.open(ruta, 'rb') as entrada, open(ruta_destino, 'wb') as salida:
+            shutil.copyfileobj(entrada, salida, TAMANO_BLOQUE)
+    else:
+        shutil.copyfile(ruta, ruta_destino)
+    return ruta_destino
+
+
+# =================== RESPALDOS CON MANIFIESTO ===================
+
+def _leer_json(ruta: str) -> Dict[str, Any]:
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir_json(ruta: str, datos: Dict[str, Any]):
+    """Escribe un manifiesto de forma atómica (archivo temporal + rename)"""
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+def _leer_hashes(ruta: str) -> List[bytes]:
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    return [datos[i:i + TAMANO_HASH] for i in range(0, len(datos), TAMANO_HASH)]
+
+
+def _hash_pagina(pagina: bytes) -> bytes:
+    return hashlib.blake2b(pagina, digest_size=TAMANO_HASH).digest()
+
+
+def _copia_temporal(db_path: str, directorio: str, **opciones_copia) -> Tuple[str, Dict[str, int]]:
+    """Instantánea en línea a un archivo temporal del directorio de respaldos"""
+    descriptor, temporal = tempfile.mkstemp(suffix='.db', dir=directorio)
+    os.close(descriptor)
+    try:
+        return temporal, copiar_en_linea(db_path, temporal, **opciones_copia)
+    except BaseException:
+        os.remove(temporal)
+        raise
+
+
+def crear_respaldo_completo(db_path: str, directorio: str, comprimir: bool = True,
+                            tamano_pagina: int = TAMANO_PAGINA_DEFAULT,
+                            **opciones_copia) -> Dict[str, Any]:
+    """Respaldo completo con manifiesto y hashes de página
+
+    La instantánea se hashea y comprime en una sola lectura. Los hashes
+    permiten generar diferenciales posteriores contra este respaldo.
+
+    Returns:
+        Dict[str, Any]: Manifiesto, con la ruta del respaldo en 'ruta'
+    """
+    ruta_db = nombre_respaldo(directorio)
+    base = os.path.basename(ruta_db)[:-len('.db')]
+    formato = formato_compresion(comprimir)
+    ruta_salida = ruta_db + (EXTENSIONES_COMPRESION[formato] if formato else '')
+
+    estado = copiar_en_linea(db_path, ruta_db, **opciones_copia)
+
+    total = hashlib.sha256()
+    num_paginas = 0
+    tamano = 0
+    with open(ruta_db, 'rb') as entrada, open(os.path.join(directorio, base + SUFIJO_HASHES), 'wb') as hashes:
+        salida = _abrir_escritura(ruta_salida, formato) if formato else None
+        try:
+            while True:
+                pagina = entrada.read(tamano_pagina)
+                if not pagina:
+                    break
+                total.update(pagina)
+                hashes.write(_hash_pagina(pagina))
+                if salida:
+                    salida.write(pagina)
+                num_paginas += 1
+                tamano += len(pagina)
+        finally:
+            if salida:
+                salida.close()
+    if formato:
+        os.remove(ruta_db)
+
+    manifiesto = {
+        'version': 1,
+        'tipo': 'completo',
+        'base': base,
+        'archivo': os.path.basename(ruta_salida),
+        'hashes': base + SUFIJO_HASHES,
+        'creado': datetime.now().isoformat(),
+        'tamano_pagina': tamano_pagina,
+        'tamano_archivo': tamano,
+        'num_paginas': num_paginas,
+        'sha256': total.hexdigest(),
+        'compresion': formato,
+        'paginas_sqlite': estado['paginas'],
+    }
+    _escribir_json(os.path.join(directorio, base + SUFIJO_MANIFIESTO), manifiesto)
+    manifiesto['ruta'] = ruta_salida
+    return manifiesto
+
+
+def ultimo_completo(directorio: str) -> Optional[Dict[str, Any]]:
+    """Manifiesto del respaldo completo más reciente"""
+    manifiestos = listar_manifiestos(directorio, PREFIJO_RESPALDO)
+    return _leer_json(manifiestos[-1]) if manifiestos else None
+
+
+def crear_respaldo_diferencial(db_path: str, directorio: str, comprimir: bool = True,
+                               max_diferenciales: int = 7,
+                               tamano_pagina: int = TAMANO_PAGINA_DEFAULT,
+                               **opciones_copia) -> Dict[str, Any]:
+    """Respaldo diferencial: solo las páginas que cambiaron desde el último completo
+
+    Se crea un completo si no hay ninguno, si el tamaño de página cambió o
+    si la cadena ya tiene `max_diferenciales` diferenciales.
+
+    Returns:
+        Dict[str, Any]: Manifiesto, con la ruta del archivo creado en 'ruta'
+    """
+    base = ultimo_completo(directorio)
+    if (base is None or base['tamano_pagina'] != tamano_pagina
+            or len(diferenciales_de(directorio, base['base'])) >= max_diferenciales):
+        return crear_respaldo_completo(db_path, directorio, comprimir, tamano_pagina, **opciones_copia)
+
+    hashes_base = _leer_hashes(os.path.join(directorio, base['hashes']))
+    nombre = nombre_respaldo(directorio, PREFIJO_DIFERENCIAL)[:-len('.db')]
+    formato = formato_compresion(comprimir)
+    ruta_salida = nombre + '.delta' + (EXTENSIONES_COMPRESION[formato] if formato else '')
+
+    temporal, estado = _copia_temporal(db_path, directorio, **opciones_copia)
+    try:
+        total = hashlib.sha256()
+        numero = 0
+        tamano = 0
+        cambiadas = 0
+        with open(temporal, 'rb') as entrada, _abrir_escritura(ruta_salida, formato) as salida:
+            while True:
+                pagina = entrada.read(tamano_pagina)
+                if not pagina:
+                    break
+                total.update(pagina)
+                if numero >= len(hashes_base) or _hash_pagina(pagina) != hashes_base[numero]:
+                    salida.write(CABECERA_PAGINA.pack(numero, len(pagina)))
+                    salida.write(pagina)
+                    cambiadas += 1
+                numero += 1
+                tamano += len(pagina)
+    finally:
+        os.remove(temporal)
+
+    manifiesto = {
+        'version': 1,
+        'tipo': 'diferencial',
+        'base': base['base'],
+        'archivo': os.path.basename(ruta_salida),
+        'creado': datetime.now().isoformat(),
+        'tamano_pagina': tamano_pagina,
+        'tamano_archivo': tamano,
+        'num_paginas': numero,
+        'paginas_cambiadas': cambiadas,
+        'sha256': total.hexdigest(),
+        'compresion': formato,
+        'paginas_sqlite': estado['paginas'],
+    }
+    _escribir_json(nombre + SUFIJO_MANIFIESTO, manifiesto)
+    manifiesto['ruta'] = ruta_salida
+    return manifiesto
+
+
+def restaurar_respaldo(ruta_manifiesto: str, ruta_destino: str, verificar: bool = True) -> str:
+    """Restaura un respaldo completo o una cadena completo + diferencial
+
+    Raises:
+        ValueError: Si el resultado no coincide con el sha256 del manifiesto
+    """
+    directorio = os.path.dirname(ruta_manifiesto)
+    manifiesto = _leer_json(ruta_manifiesto)
+
+    if manifiesto['tipo'] == 'diferencial':
+        base = _leer_json(os.path.join(directorio, manifiesto['base'] + SUFIJO_MANIFIESTO))
+        descomprimir_archivo(os.path.join(directorio, base['archivo']), ruta_destino)
+        with _abrir_lectura(os.path.join(directorio, manifiesto['archivo'])) as delta, \
+                open(ruta_destino, 'r+b') as destino:
+            while True:
+                cabecera = delta.read(CABECERA_PAGINA.size)
+                if not cabecera:
+                    break
+                numero, longitud = CABECERA_PAGINA.unpack(cabecera)
+                destino.seek(numero * manifiesto['tamano_pagina'])
+                destino.write(delta.read(longitud))
+            destino.truncate(manifiesto['tamano_archivo'])
+    else:
+        descomprimir_archivo(os.path.join(directorio, manifiesto['archivo']), ruta_destino)
+
+    if verificar:
+        digest = hashlib.sha256()
+        with open(ruta_destino, 'rb') as f:
+            for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+                digest.update(bloque)
+        if digest.hexdigest() != manifiesto['sha256']:
+            raise ValueError(f"El respaldo restaurado no coincide con {os.path.basename(ruta_manifiesto)}")
+    return ruta_destino
+
+
+def verificar_cadenas(directorio: str) -> Dict[str, Dict[str, Any]]:
+    """Restaura cada respaldo en un temporal y valida sha256 y quick_check
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Por manifiesto: {'valido', 'error'}
+    """
+    resultados = {}
+    for ruta in listar_manifiestos(directorio):
+        descriptor, temporal = tempfile.mkstemp(suffix='.db', dir=directorio)
+        os.close(descriptor)
+        try:
+            restaurar_respaldo(ruta, temporal)
+            valido = verificar_respaldo(temporal)
+            resultados[os.path.basename(ruta)] = {'valido': valido, 'error': None if valido else 'quick_check'}
+        except (OSError, ValueError, RuntimeError, KeyError, sqlite3.Error) as e:
+            resultados[os.path.basename(ruta)] = {'valido': False, 'error': str(e)}
+        finally:
+            os.remove(temporal)
+    return resultados
+
+
+# =================== RETENCIÓN ===================
+
+def listar_respaldos(directorio: str, prefijo: str = PREFIJO_RESPALDO) -> List[str]:
+    """Respaldos completos del directorio, del más antiguo al más reciente"""
+    if not os.path.isdir(directorio):
+        return []
+    nombres = sorted(
+        nombre for nombre in os.listdir(directorio)
+        if nombre.startswith(prefijo) and '.db' in nombre and not nombre.endswith('.tmp')
+    )
+    return [os.path.join(directorio, nombre) for nombre in nombres]
+
+
+def listar_manifiestos(directorio: str, prefijo: Optional[str] = None) -> List[str]:
+    """Manifiestos del directorio (completos y diferenciales), en orden cronológico"""
+    if not os.path.isdir(directorio):
+        return []
+    nombres = [
+        nombre for nombre in os.listdir(directorio)
+        if nombre.endswith(SUFIJO_MANIFIESTO) and (prefijo is None or nombre.startswith(prefijo))
+    ]
+    # La marca de tiempo sigue al prefijo: ordenar por ella intercala ambos tipos
+    nombres.sort(key=lambda nombre: nombre.split('_', 2)[-1])
+    return [os.path.join(directorio, nombre) for nombre in nombres]
+
+
+def diferenciales_de(directorio: str, base: str) -> List[Dict[str, Any]]:
+    """Manifiestos diferenciales que dependen del completo `base`"""
+    diferenciales = []
+    for ruta in listar_manifiestos(directorio, PREFIJO_DIFERENCIAL):
+        manifiesto = _leer_json(ruta)
+        if manifiesto.get('base') == base:
+            manifiesto['manifiesto'] = ruta
+            diferenciales.append(manifiesto)
+    return diferenciales
+
+
+def _eliminar_con_prefijo(directorio: str, prefijo: str) -> List[str]:
+    eliminados = []
+    for nombre in os.listdir(directorio):
+        if nombre.startswith(prefijo + '.'):
+            ruta = os.path.join(directorio, nombre)
+            os.remove(ruta)
+            eliminados.append(ruta)
+    return eliminados
+
+
+def aplicar_retencion(directorio: str, max_respaldos: int,
+                      prefijo: str = PREFIJO_RESPALDO) -> List[str]:
+    """Elimina los respaldos completos más antiguos por encima de max_respaldos
+
+    Con cada completo se eliminan su manifiesto, sus hashes y los
+    diferenciales que dependen de él (la cadena entera).
+
+    Returns:
+        List[str]: Rutas eliminadas
+    """
+    if max_respaldos <= 0:
+        return []
+    respaldos = listar_respaldos(directorio, prefijo)
+    antiguos = respaldos[:-max_respaldos] if len(respaldos) > max_respaldos else []
+
+    eliminados = []
+    for ruta in antiguos:
+        base = os.path.basename(ruta).split('.', 1)[0]
+        for diferencial in diferenciales_de(directorio, base):
+            nombre = os.path.basename(diferencial['manifiesto'])[:-len(SUFIJO_MANIFIESTO)]
+            eliminados.extend(_eliminar_con_prefijo(directorio, nombre))
+        eliminados.extend(_eliminar_con_prefijo(directorio, base))
+    return eliminados
+
+
+def nombre_respaldo(directorio: str, prefijo: str = PREFIJO_RESPALDO) -> str:
+    """Ruta de un nuevo respaldo con marca de tiempo ordenable"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return os.path.join(directorio, f"{prefijo}{timestamp}.db")
@@ -0,0 +1,288 @@
+"""
+Tablas de Resumen (Rollups) de Ventas - VentaPro
+================================================
+
+Define las tablas de resumen diario y mensual de ventas y los triggers
+que las mantienen al día en cada escritura. Las altas se acumulan de
+forma incremental; las modificaciones y bajas recalculan solo el día
+(o el mes del cliente) afectado usando los índices por fecha.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Optional
+
+TABLAS_ROLLUP = ['ventas_diarias', 'ventas_producto_diarias', 'ventas_cliente_mensuales']
+
+TRIGGERS_ROLLUP = [
+    'trg_rollup_venta_insert', 'trg_rollup_venta_update', 'trg_rollup_venta_delete',
+    'trg_rollup_detalle_insert', 'trg_rollup_detalle_update', 'trg_rollup_detalle_delete'
+]
+
+# Fecha mínima de cobertura cuando los rollups incluyen todo el histórico
+COBERTURA_TOTAL = '0000-01-01'
+
+SQL_TABLAS = [
+    """
+    CREATE TABLE IF NOT EXISTS ventas_diarias (
+        fecha DATE PRIMARY KEY,
+        num_ventas INTEGER NOT NULL DEFAULT 0,
+        total DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+        subtotal DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+        impuestos DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+        descuento DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+        productos_vendidos INTEGER NOT NULL DEFAULT 0,
+        venta_mayor DECIMAL(10,2),
+        venta_menor DECIMAL(10,2)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ventas_producto_diarias (
+        fecha DATE NOT NULL,
+        producto_id INTEGER NOT NULL,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+        ingresos DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+        num_ventas INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, producto_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ventas_cliente_mensuales (
+        cliente_id INTEGER NOT NULL,
+        año_mes VARCHAR(7) NOT NULL,
+        num_compras INTEGER NOT NULL DEFAULT 0,
+        total_comprado DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+        primera_compra TIMESTAMP,
+        ultima_compra TIMESTAMP,
+        PRIMARY KEY (cliente_id, año_mes)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollups_estado (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        cubre_desde DATE NOT NULL,
+        fecha_reconstruccion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_ventas_producto_diarias_producto ON ventas_producto_diarias (producto_id, fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_ventas_cliente_mensuales_mes ON ventas_cliente_mensuales (año_mes)"
+]
+
+# =================== RECÁLCULO POR DÍA / MES ===================
+
+def _recalcular_dia(fecha: str) -> str:
+    """SQL que recalcula los rollups diarios de la fecha (expresión SQL) indicada"""
+    return f"""
+        DELETE FROM ventas_diarias WHERE fecha = {fecha};
+        INSERT INTO ventas_diarias (fecha, num_ventas, total, subtotal, impuestos, descuento,
+                                    productos_vendidos, venta_mayor, venta_menor)
+        SELECT DATE(v.fecha_venta), COUNT(*), SUM(v.total), SUM(v.subtotal), SUM(v.impuestos),
+               SUM(v.descuento),
+               COALESCE(SUM((SELECT SUM(dv.cantidad) FROM detalle_ventas dv WHERE dv.venta_id = v.id)), 0),
+               MAX(v.total), MIN(v.total)
+        FROM ventas v
+        WHERE v.estado = 'completada'
+        AND v.fecha_venta >= {fecha}
+        AND v.fecha_venta < DATE({fecha}, '+1 day')
+        GROUP BY DATE(v.fecha_venta);
+        DELETE FROM ventas_producto_diarias WHERE fecha = {fecha};
+        INSERT INTO ventas_producto_diarias (fecha, producto_id, cantidad, ingresos, num_ventas)
+        SELECT DATE(v.fecha_venta), dv.producto_id, SUM(dv.cantidad), SUM(dv.subtotal_linea),
+               COUNT(DISTINCT v.id)
+        FROM ventas v
+        INNER JOIN detalle_ventas dv ON dv.venta_id = v.id
+        WHERE v.estado = 'completada'
+        AND v.fecha_venta >= {fecha}
+        AND v.fecha_venta < DATE({fecha}, '+1 day')
+        GROUP BY DATE(v.fecha_venta), dv.producto_id;
+    """
+
+def _recalcular_cliente_mes(cliente_id: str, fecha: str) -> str:
+    """SQL que recalcula el rollup mensual de un cliente para el mes de la fecha indicada"""
+    return f"""
+        DELETE FROM ventas_cliente_mensuales
+        WHERE cliente_id = {cliente_id} AND año_mes = strftime('%Y-%m', {fecha});
+        INSERT INTO ventas_cliente_mensuales (cliente_id, año_mes, num_compras, total_comprado,
+                                              primera_compra, ultima_compra)
+        SELECT v.cliente_id, strftime('%Y-%m', v.fecha_venta), COUNT(*), SUM(v.total),
+               MIN(v.fecha_venta), MAX(v.fecha_venta)
+        FROM ventas v
+        WHERE v.cliente_id = {cliente_id}
+        AND v.estado = 'completada'
+        AND v.fecha_venta >= DATE({fecha}, 'start of month')
+        AND v.fecha_venta < DATE({fecha}, 'start of month', '+1 month')
+        GROUP BY v.cliente_id, strftime('%Y-%m', v.fecha_venta);
+    """
+
+# =================== TRIGGERS ===================
+
+SQL_TRIGGERS = [
+    # Alta de venta: acumulación incremental
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_venta_insert
+    AFTER INSERT ON ventas
+    WHEN NEW.estado = 'completada'
+    BEGIN
+        INSERT INTO ventas_diarias (fecha, num_ventas, total, subtotal, impuestos, descuento,
+                                    venta_mayor, venta_menor)
+        VALUES (DATE(NEW.fecha_venta), 1, NEW.total, NEW.subtotal, NEW.impuestos, NEW.descuento,
+                NEW.total, NEW.total)
+        ON CONFLICT(fecha) DO UPDATE SET
+            num_ventas = num_ventas + 1,
+            total = total + excluded.total,
+            subtotal = subtotal + excluded.subtotal,
+            impuestos = impuestos + excluded.impuestos,
+            descuento = descuento + excluded.descuento,
+            venta_mayor = MAX(COALESCE(venta_mayor, excluded.venta_mayor), excluded.venta_mayor),
+            venta_menor = MIN(COALESCE(venta_menor, excluded.venta_menor), excluded.venta_menor);
+        INSERT INTO ventas_cliente_mensuales (cliente_id, año_mes, num_compras, total_comprado,
+                                              primera_compra, ultima_compra)
+        SELECT NEW.cliente_id, strftime('%Y-%m', NEW.fecha_venta), 1, NEW.total,
+               NEW.fecha_venta, NEW.fecha_venta
+        WHERE NEW.cliente_id IS NOT NULL
+        ON CONFLICT(cliente_id, año_mes) DO UPDATE SET
+            num_compras = num_compras + 1,
+            total_comprado = total_comprado + excluded.total_comprado,
+            primera_compra = MIN(primera_compra, excluded.primera_compra),
+            ultima_compra = MAX(ultima_compra, excluded.ultima_compra);
+    END
+    """,
+    # Cambio de estado, fecha o importes: recalcular los días y meses afectados
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_venta_update
+    AFTER UPDATE OF estado, fecha_venta, total, subtotal, impuestos, descuento, cliente_id ON ventas
+    BEGIN
+        {_recalcular_dia('DATE(OLD.fecha_venta)')}
+        {_recalcular_dia('DATE(NEW.fecha_venta)')}
+        {_recalcular_cliente_mes('OLD.cliente_id', 'OLD.fecha_venta')}
+        {_recalcular_cliente_mes('NEW.cliente_id', 'NEW.fecha_venta')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_venta_delete
+    AFTER DELETE ON ventas
+    BEGIN
+        {_recalcular_dia('DATE(OLD.fecha_venta)')}
+        {_recalcular_cliente_mes('OLD.cliente_id', 'OLD.fecha_venta')}
+    END
+    """,
+    # Alta de línea de detalle: acumulación incremental por producto
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_detalle_insert
+    AFTER INSERT ON detalle_ventas
+    WHEN (SELECT estado FROM ventas WHERE id = NEW.venta_id) = 'completada'
+    BEGIN
+        INSERT INTO ventas_producto_diarias (fecha, producto_id, cantidad, ingresos, num_ventas)
+        SELECT DATE(v.fecha_venta), NEW.producto_id, NEW.cantidad, NEW.subtotal_linea,
+               CASE WHEN (SELECT COUNT(*) FROM detalle_ventas
+                          WHERE venta_id = NEW.venta_id AND producto_id = NEW.producto_id) = 1
+                    THEN 1 ELSE 0 END
+        FROM ventas v
+        WHERE v.id = NEW.venta_id
+        ON CONFLICT(fecha, producto_id) DO UPDATE SET
+            cantidad = cantidad + excluded.cantidad,
+            ingresos = ingresos + excluded.ingresos,
+            num_ventas = num_ventas + excluded.num_ventas;
+        UPDATE ventas_diarias
+        SET productos_vendidos = productos_vendidos + NEW.cantidad
+        WHERE fecha = (SELECT DATE(fecha_venta) FROM ventas WHERE id = NEW.venta_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_detalle_update
+    AFTER UPDATE OF venta_id, producto_id, cantidad, subtotal_linea ON detalle_ventas
+    BEGIN
+        {_recalcular_dia('(SELECT DATE(fecha_venta) FROM ventas WHERE id = OLD.venta_id)')}
+        {_recalcular_dia('(SELECT DATE(fecha_venta) FROM ventas WHERE id = NEW.venta_id)')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_detalle_delete
+    AFTER DELETE ON detalle_ventas
+    WHEN EXISTS (SELECT 1 FROM ventas WHERE id = OLD.venta_id)
+    BEGIN
+        {_recalcular_dia('(SELECT DATE(fecha_venta) FROM ventas WHERE id = OLD.venta_id)')}
+    END
+    """
+]
+
+# =================== CREACIÓN Y RECONSTRUCCIÓN ===================
+
+def crear_rollups(connection: sqlite3.Connection):
+    """Crea las tablas de resumen y sus triggers"""
+    for sql in SQL_TABLAS + SQL_TRIGGERS:
+        connection.execute(sql)
+
+def eliminar_rollups(connection: sqlite3.Connection):
+    """Elimina los triggers y las tablas de resumen"""
+    for trigger in TRIGGERS_ROLLUP:
+        connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for tabla in TABLAS_ROLLUP + ['rollups_estado']:
+        connection.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+def reconstruir_rollups(connection: sqlite3.Connection, desde: Optional[str] = None):
+    """Reconstruye (backfill) los rollups desde una fecha o todo el histórico
+
+    No hace commit: el llamador decide el alcance de la transacción.
+    """
+    # Se reconstruye desde el inicio del mes para que los rollups mensuales queden completos
+    inicio = datetime.strptime(desde, '%Y-%m-%d').strftime('%Y-%m-01') if desde else COBERTURA_TOTAL
+
+    connection.execute("DELETE FROM ventas_diarias WHERE fecha >= ?", (inicio,))
+    connection.execute("""
+        INSERT INTO ventas_diarias (fecha, num_ventas, total, subtotal, impuestos, descuento,
+                                    productos_vendidos, venta_mayor, venta_menor)
+        SELECT DATE(v.fecha_venta), COUNT(*), SUM(v.total), SUM(v.subtotal), SUM(v.impuestos),
+               SUM(v.descuento),
+               COALESCE(SUM((SELECT SUM(dv.cantidad) FROM detalle_ventas dv WHERE dv.venta_id = v.id)), 0),
+               MAX(v.total), MIN(v.total)
+        FROM ventas v
+        WHERE v.estado = 'completada'
+        AND v.fecha_venta >= ?
+        GROUP BY DATE(v.fecha_venta)
+    """, (inicio,))
+
+    connection.execute("DELETE FROM ventas_producto_diarias WHERE fecha >= ?", (inicio,))
+    connection.execute("""
+        INSERT INTO ventas_producto_diarias (fecha, producto_id, cantidad, ingresos, num_ventas)
+        SELECT DATE(v.fecha_venta), dv.producto_id, SUM(dv.cantidad), SUM(dv.subtotal_linea),
+               COUNT(DISTINCT v.id)
+        FROM ventas v
+        INNER JOIN detalle_ventas dv ON dv.venta_id = v.id
+        WHERE v.estado = 'completada'
+        AND v.fecha_venta >= ?
+        GROUP BY DATE(v.fecha_venta), dv.producto_id
+    """, (inicio,))
+
+    connection.execute("DELETE FROM ventas_cliente_mensuales WHERE año_mes >= ?", (inicio[:7],))
+    connection.execute("""
+        INSERT INTO ventas_cliente_mensuales (cliente_id, año_mes, num_compras, total_comprado,
+                                              primera_compra, ultima_compra)
+        SELECT v.cliente_id, strftime('%Y-%m', v.fecha_venta), COUNT(*), SUM(v.total),
+               MIN(v.fecha_venta), MAX(v.fecha_venta)
+        FROM ventas v
+        WHERE v.estado = 'completada'
+        AND v.cliente_id IS NOT NULL
+        AND v.fecha_venta >= ?
+        GROUP BY v.cliente_id, strftime('%Y-%m', v.fecha_venta)
+    """, (inicio,))
+
+    # La cobertura solo se amplía: lo anterior a "desde" sigue siendo válido
+    connection.execute("""
+        INSERT INTO rollups_estado (id, cubre_desde, fecha_reconstruccion)
+        VALUES (1, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(id) DO UPDATE SET
+            cubre_desde = MIN(cubre_desde, excluded.cubre_desde),
+            fecha_reconstruccion = CURRENT_TIMESTAMP
+    """, (inicio,))
+
+def obtener_cobertura(connection: sqlite3.Connection) -> Optional[str]:
+    """Retorna la fecha desde la que los rollups son completos, o None si no existen"""
+    try:
+        fila = connection.execute("SELECT cubre_desde FROM rollups_estado WHERE id = 1").fetchone()
+    except sqlite3.Error:
+        return None
+    return fila[0] if fila else None
@@ -10,6 +10,12 @@ import json
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
+from utils.catalogo import CatalogoIndexado
+from utils.carrito import Carrito, EVENTO_AGREGADA, EVENTO_ACTUALIZADA
+from utils.programador_busqueda import ProgramadorBusqueda
+from utils.programador_respaldos import ProgramadorRespaldos
+from ui.lista_virtual import ListaVirtual
+
 # Configurar CustomTkinter
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")
@@ -17,6 +23,7 @@ ctk.set_default_color_theme("blue")
 # Importar dependencias de VentaPro
 try:
     from database.db_manager import DatabaseManager
+    from database.modelos import Venta, DetalleVenta
     from utils.logger import Logger
     from utils.backup_manager import BackupManager
     db_disponible = True
@@ -25,6 +32,8 @@ try:
 except ImportError as e:
     print(f"⚠️ Ejecutando sin algunas dependencias: {e}")
     DatabaseManager = None
+    Venta = None
+    DetalleVenta = None
     Logger = None
     BackupManager = None
     db_disponible = False
@@ -34,7 +43,12 @@ except ImportError as e:
 class VentaProUniversal:
     """Sistema Universal de Gestión Comercial VentaPro"""
     
-    def __init__(self):
+    def __init__(self, db_manager=None):
+        # Base de datos (None = modo simulado)
+        self.db = db_manager
+        # True si el catálogo viene de la BD; si no, productos y ventas simulados
+        self.catalogo_db = False
+        
         # Configuración del negocio (se puede personalizar)
         self.config_negocio = {
             'nombre': 'Mi Negocio',
@@ -56,10 +70,18 @@ class VentaProUniversal:
         self.root.title(f"VentaPro Universal - {self.config_negocio['nombre']}")
         self.root.geometry("1200x800")
         
+        # Búsquedas en tiempo real: debounce cancelable y consulta fuera del hilo de Tk
+        self.programador_busqueda = ProgramadorBusqueda(
+            self.root, self._consultar_productos, self._mostrar_resultados_busqueda
+        )
+        self.programador_pos = ProgramadorBusqueda(
+            self.root, self._consultar_productos_pos, self._mostrar_productos_pos
+        )
+        
         # Variables de estado
         self.modulo_actual = "dashboard"
-        self.carrito = []
-        self.total_carrito = 0.0
+        self.carrito = Carrito()
+        self.carrito.suscribir(self._al_cambiar_carrito)
         
         # Crear interfaz
         self._crear_interfaz()
@@ -75,6 +97,14 @@ class VentaProUniversal:
             print("💾 Sistema de backup automático inicializado")
         else:
             self.backup_manager = None
+        
+        # Respaldos programados de la base de datos en su propio hilo
+        # (se construye con el db_manager recibido, aunque el catálogo sea simulado)
+        self.programador_respaldos = None
+        self.respaldos_activos = False
+        if db_manager is not None:
+            self.programador_respaldos = ProgramadorRespaldos(db_manager)
+            self.respaldos_activos = self.programador_respaldos.iniciar()
     
     def _inicializar_datos(self):
         """Inicializar datos del sistema"""
@@ -104,6 +134,12 @@ class VentaProUniversal:
         # Categorías adaptables
         self.categorias = ["General", "Premium", "Especial", "Servicios", "Promoción", "Temporada"]
         
+        # Catálogo real si la base de datos tiene productos
+        self._cargar_productos_db()
+        
+        # Índices del catálogo para búsquedas y carrito
+        self.catalogo = CatalogoIndexado(self.productos)
+        
         # Estadísticas del día
         self.stats_dia = {
             'ventas_total': sum(v['total'] for v in self.ventas_hoy),
@@ -114,6 +150,39 @@ class VentaProUniversal:
             'stock_bajo': len([p for p in self.productos if p['stock'] < 10])
         }
     
+    def _cargar_productos_db(self):
+        """Cargar productos desde la base de datos, si existen"""
+        if not self.db:
+            return
+        
+        filas = self.db.ejecutar_consulta("""
+            SELECT p.id, p.codigo, p.codigo_barras, p.nombre, p.precio_venta, p.stock_actual,
+                   COALESCE(c.nombre, 'General') AS categoria
+            FROM productos p
+            LEFT JOIN categorias c ON p.categoria_id = c.id
+            WHERE p.activo = 1
+            ORDER BY p.nombre
+        """)
+        
+        if not filas:
+            # Sin catálogo en BD (instalación nueva): productos y ventas simulados,
+            # pero la base de datos sigue activa para respaldos, logs y búsquedas
+            return
+        
+        self.catalogo_db = True
+        self.productos = [
+            {
+                "id": fila["id"],
+                "nombre": fila["nombre"],
+                "precio": float(fila["precio_venta"]),
+                "stock": fila["stock_actual"],
+                "categoria": fila["categoria"],
+                "codigo": fila["codigo"],
+                "codigo_barras": fila["codigo_barras"]
+            }
+            for fila in filas
+        ]
+    
     def _crear_interfaz(self):
         """Crear interfaz principal CustomTkinter con sidebar"""
         self._crear_interfaz_con_sidebar()
@@ -592,6 +661,9 @@ class VentaProUniversal:
     
     def _limpiar_contenido(self):
         """Limpiar el área de contenido"""
+        # Ninguna búsqueda pendiente debe pintar sobre widgets destruidos
+        self.programador_busqueda.cancelar()
+        self.programador_pos.cancelar()
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
@@ -1075,37 +1147,17 @@ class VentaProUniversal:
         )
         self.pos_search.pack(pady=10)
         self.pos_search.bind("<Return>", self._buscar_producto_pos)
+        self.pos_search.bind("<KeyRelease>", self._busqueda_pos_en_tiempo_real)
         
-        # Lista de productos disponibles
-        productos_list_frame = ctk.CTkScrollableFrame(left_panel, height=400)
-        productos_list_frame.pack(fill="both", expand=True, padx=15, pady=15)
+        # Lista de productos disponibles (virtualizada: solo filas visibles)
+        self.productos_pos_lista = ListaVirtual(
+            left_panel, self._crear_producto_pos, self._vincular_producto_pos,
+            alto_fila=50, mensaje_vacio="🔍 Sin resultados", height=400
+        )
+        self.productos_pos_lista.pack(fill="both", expand=True, padx=15, pady=15)
         
-        for producto in self.productos:
-            if producto['stock'] > 0:  # Solo mostrar productos en stock
-                producto_item = ctk.CTkFrame(productos_list_frame)
-                producto_item.pack(fill="x", pady=5)
-                
-                # Info del producto
-                info_text = f"{producto['nombre']} - {self.config_negocio['moneda']}{producto['precio']:.2f}"
-                if producto['stock'] < 10:
-                    info_text += f" ⚠️ Stock: {producto['stock']}"
-                
-                producto_label = ctk.CTkLabel(
-                    producto_item,
-                    text=info_text,
-                    anchor="w"
-                )
-                producto_label.pack(side="left", padx=10, pady=8, fill="x", expand=True)
-                
-                # Botón agregar
-                btn_agregar = ctk.CTkButton(
-                    producto_item,
-                    text="➕",
-                    width=40,
-                    height=30,
-                    command=lambda p=producto: self._agregar_al_carrito(p)
-                )
-                btn_agregar.pack(side="right", padx=10, pady=5)
+        # Solo mostrar productos en stock
+        self.productos_pos_lista.establecer_datos(self.catalogo.filtrar(estado='con_stock'))
         
         # Panel derecho - Carrito
         right_panel = ctk.CTkFrame(pos_main_frame, width=350)
@@ -1120,8 +1172,11 @@ class VentaProUniversal:
         ).pack(pady=15)
         
         # Lista del carrito
-        self.carrito_frame = ctk.CTkScrollableFrame(right_panel, height=300)
-        self.carrito_frame.pack(fill="both", expand=True, padx=15, pady=10)
+        self.carrito_lista = ListaVirtual(
+            right_panel, self._crear_item_carrito, self._vincular_item_carrito,
+            alto_fila=60, mensaje_vacio="Carrito vacío", height=300
+        )
+        self.carrito_lista.pack(fill="both", expand=True, padx=15, pady=10)
         
         # Total
         self.total_frame = ctk.CTkFrame(right_panel)
@@ -1163,6 +1218,26 @@ class VentaProUniversal:
         # Actualizar vista del carrito
         self._actualizar_carrito()
     
+    def _crear_producto_pos(self, frame):
+        """Crear fila reciclable de la lista del punto de venta"""
+        producto_label = ctk.CTkLabel(frame, text="", anchor="w")
+        producto_label.pack(side="left", padx=10, pady=8, fill="x", expand=True)
+        
+        # Botón agregar
+        btn_agregar = ctk.CTkButton(frame, text="➕", width=40, height=30)
+        btn_agregar.pack(side="right", padx=10, pady=5)
+        
+        return {'label': producto_label, 'boton': btn_agregar}
+    
+    def _vincular_producto_pos(self, fila, producto, indice):
+        """Mostrar un producto en una fila reciclada del punto de venta"""
+        info_text = f"{producto['nombre']} - {self.config_negocio['moneda']}{producto['precio']:.2f}"
+        if producto['stock'] < 10:
+            info_text += f" ⚠️ Stock: {producto['stock']}"
+        
+        fila['label'].configure(text=info_text)
+        fila['boton'].configure(command=lambda p=producto: self._agregar_al_carrito(p))
+    
     def _mostrar_clientes(self):
         """Módulo universal de clientes"""
         self.modulo_actual = "clientes"
@@ -1427,73 +1502,63 @@ class VentaProUniversal:
     # Métodos auxiliares
     def _agregar_al_carrito(self, producto):
         """Agregar producto al carrito"""
-        # Verificar si ya existe en el carrito
-        for item in self.carrito:
-            if item['id'] == producto['id']:
-                if item['cantidad'] < producto['stock']:
-                    item['cantidad'] += 1
-                    item['subtotal'] = item['cantidad'] * item['precio']
-                else:
-                    messagebox.showwarning("Stock Insuficiente", f"No hay más stock disponible de {producto['nombre']}")
-                self._actualizar_carrito()
-                return
+        # Usar el producto vigente del catálogo (stock actualizado)
+        producto = self.catalogo.obtener(producto['id']) or producto
         
-        # Agregar nuevo producto al carrito
-        if producto['stock'] > 0:
-            item_carrito = {
-                'id': producto['id'],
-                'nombre': producto['nombre'],
-                'precio': producto['precio'],
-                'cantidad': 1,
-                'subtotal': producto['precio']
-            }
-            self.carrito.append(item_carrito)
-            self._actualizar_carrito()
+        if self.carrito.agregar(producto):
+            return
+        
+        if producto['id'] in self.carrito:
+            messagebox.showwarning("Stock Insuficiente", f"No hay más stock disponible de {producto['nombre']}")
         else:
             messagebox.showwarning("Sin Stock", f"No hay stock disponible de {producto['nombre']}")
     
+    def _al_cambiar_carrito(self, evento, linea, indice):
+        """Actualizar la vista del carrito tras un cambio del modelo"""
+        if hasattr(self, 'carrito_lista') and self.carrito_lista.winfo_exists():
+            if evento == EVENTO_ACTUALIZADA:
+                # Solo la fila que cambió
+                self.carrito_lista.actualizar_elemento(indice)
+            elif evento == EVENTO_AGREGADA:
+                # Las filas existentes conservan su índice: solo se vincula la nueva
+                self.carrito_lista.redibujar()
+                self.carrito_lista.desplazar_a(indice)
+            else:
+                self.carrito_lista.establecer_datos(self.carrito.lineas, mantener_posicion=True)
+        
+        self._actualizar_total_carrito()
+    
     def _actualizar_carrito(self):
         """Actualizar la vista del carrito"""
-        # Limpiar carrito frame
-        for widget in self.carrito_frame.winfo_children():
-            widget.destroy()
+        if hasattr(self, 'carrito_lista') and self.carrito_lista.winfo_exists():
+            self.carrito_lista.establecer_datos(self.carrito.lineas, mantener_posicion=True)
+        self._actualizar_total_carrito()
+    
+    def _actualizar_total_carrito(self):
+        """Actualizar el total mostrado con los acumulados del carrito"""
+        if hasattr(self, 'total_label'):
+            self.total_label.configure(text=f"Total: {self.config_negocio['moneda']}{self.carrito.total:.2f}")
+    
+    def _crear_item_carrito(self, frame):
+        """Crear fila reciclable del carrito"""
+        item_label = ctk.CTkLabel(frame, text="", justify="left", anchor="w")
+        item_label.pack(side="left", padx=10, pady=8, fill="x", expand=True)
         
-        self.total_carrito = 0
+        # Subtotal
+        subtotal_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(weight="bold"))
+        subtotal_label.pack(side="right", padx=10, pady=8)
         
-        for item in self.carrito:
-            item_frame = ctk.CTkFrame(self.carrito_frame)
-            item_frame.pack(fill="x", pady=3)
-            
-            # Información del item
-            info_text = f"{item['nombre']}\n{item['cantidad']} x {self.config_negocio['moneda']}{item['precio']:.2f}"
-            
-            item_label = ctk.CTkLabel(
-                item_frame,
-                text=info_text,
-                justify="left",
-                anchor="w"
-            )
-            item_label.pack(side="left", padx=10, pady=8, fill="x", expand=True)
-            
-            # Subtotal
-            subtotal_label = ctk.CTkLabel(
-                item_frame,
-                text=f"{self.config_negocio['moneda']}{item['subtotal']:.2f}",
-                font=ctk.CTkFont(weight="bold")
-            )
-            subtotal_label.pack(side="right", padx=10, pady=8)
-            
-            self.total_carrito += item['subtotal']
-        
-        # Actualizar total
-        if hasattr(self, 'total_label'):
-            self.total_label.configure(text=f"Total: {self.config_negocio['moneda']}{self.total_carrito:.2f}")
+        return {'info': item_label, 'subtotal': subtotal_label}
+    
+    def _vincular_item_carrito(self, fila, item, indice):
+        """Mostrar un item del carrito en una fila reciclada"""
+        moneda = self.config_negocio['moneda']
+        fila['info'].configure(text=f"{item['nombre']}\n{item['cantidad']} x {moneda}{item['precio']:.2f}")
+        fila['subtotal'].configure(text=f"{moneda}{item['subtotal']:.2f}")
     
     def _limpiar_carrito(self):
         """Limpiar el carrito de compras"""
-        self.carrito = []
-        self.total_carrito = 0
-        self._actualizar_carrito()
+        self.carrito.vaciar()
     
     def _ver_historial_ventas(self):
         """Ver historial completo de ventas"""
@@ -1566,24 +1631,48 @@ class VentaProUniversal:
             messagebox.showwarning("Carrito Vacío", "Agrega productos al carrito antes de procesar la venta")
             return
         
-        # Simular procesamiento de venta
+        # Cantidades vendidas por producto
+        cantidades = {item['id']: item['cantidad'] for item in self.carrito}
+        
+        # Registrar la venta en una sola transacción (cabecera, detalle y stock)
+        if self.catalogo_db:
+            venta_db = Venta(
+                subtotal=self.carrito.subtotal,
+                descuento=self.carrito.descuento,
+                impuestos=self.carrito.impuestos,
+                total=self.carrito.total,
+                metodo_pago='efectivo',
+                detalles=[
+                    DetalleVenta(
+                        producto_id=item['id'],
+                        cantidad=item['cantidad'],
+                        precio_unitario=item['precio'],
+                        descuento_linea=item['descuento'],
+                        subtotal_linea=item['subtotal']
+                    )
+                    for item in self.carrito
+                ]
+            )
+            if self.db.registrar_venta(venta_db) is None:
+                messagebox.showerror("Error", "No se pudo registrar la venta. Verifique el stock disponible.")
+                return
+        
         venta_id = len(self.ventas_hoy) + 1
         nueva_venta = {
             'id': venta_id,
-            'total': self.total_carrito,
-            'items': sum(item['cantidad'] for item in self.carrito),
+            'total': self.carrito.total,
+            'items': self.carrito.articulos,
             'hora': datetime.now().strftime('%H:%M'),
             'cliente': 'Mostrador'
         }
         
         self.ventas_hoy.append(nueva_venta)
         
-        # Actualizar stock (simulado)
-        for item in self.carrito:
-            for producto in self.productos:
-                if producto['id'] == item['id']:
-                    producto['stock'] -= item['cantidad']
-                    break
+        # Actualizar stock en memoria con acceso directo por id
+        for producto_id, cantidad in cantidades.items():
+            producto = self.catalogo.obtener(producto_id)
+            if producto:
+                self.catalogo.actualizar_stock(producto_id, producto['stock'] - cantidad)
         
         # 💾 BACKUP AUTOMÁTICO - Registrar venta procesada
         if self.backup_manager:
@@ -1605,7 +1694,7 @@ class VentaProUniversal:
                 print(f"⚠️ Error en backup de venta: {e}")
         
         # Actualizar estadísticas
-        self.stats_dia['ventas_total'] += self.total_carrito
+        self.stats_dia['ventas_total'] += self.carrito.total
         self.stats_dia['num_ventas'] += 1
         self.stats_dia['items_vendidos'] += nueva_venta['items']
         self.stats_dia['stock_bajo'] = len([p for p in self.productos if p['stock'] < 10])
@@ -1613,7 +1702,7 @@ class VentaProUniversal:
         messagebox.showinfo("Venta Procesada", 
                            f"✅ Venta procesada exitosamente\n\n"
                            f"🧾 Número: {venta_id:03d}\n"
-                           f"💰 Total: {self.config_negocio['moneda']}{self.total_carrito:.2f}\n"
+                           f"💰 Total: {self.config_negocio['moneda']}{self.carrito.total:.2f}\n"
                            f"📦 Items: {nueva_venta['items']}\n"
                            f"💾 Backup automático creado\n\n"
                            f"¡Gracias por su compra!")
@@ -1931,6 +2020,7 @@ class VentaProUniversal:
                 cantidad = int(cantidad_entry.get())
                 if cantidad > 0:
                     producto['stock'] += cantidad
+                    self.catalogo.actualizar_stock(producto['id'])
                     messagebox.showinfo("Éxito", f"Stock actualizado: {producto['stock']}")
                     dialog.destroy()
                     self._mostrar_stock_bajo()
@@ -2013,49 +2103,62 @@ class VentaProUniversal:
             self.categoria_filtro.set("Todas")
         
         # Área de resultados
-        self.resultados_frame = ctk.CTkScrollableFrame(self.content_frame)
-        self.resultados_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        self.resultados_conteo = ctk.CTkLabel(
+            self.content_frame, text="",
+            font=ctk.CTkFont(size=14, weight="bold")
+        )
+        self.resultados_conteo.pack(pady=(10, 0))
+        
+        self.resultados_lista = ListaVirtual(
+            self.content_frame, self._crear_card_resultado, self._vincular_card_resultado,
+            alto_fila=86, mensaje_vacio="🔍 No se encontraron productos"
+        )
+        self.resultados_lista.pack(fill="both", expand=True, padx=20, pady=(10, 20))
         
         # Mostrar todos inicialmente
         self._mostrar_resultados_busqueda(self.productos)
     
     def _busqueda_en_tiempo_real(self, event):
         """Búsqueda mientras se escribe"""
-        # Pequeño delay para evitar muchas búsquedas
-        self.root.after(300, self._ejecutar_busqueda)
+        # Cada tecla reprograma la búsqueda; solo se ejecuta al dejar de escribir
+        self.programador_busqueda.programar(*self._criterios_busqueda())
     
     def _ejecutar_busqueda(self):
         """Ejecutar búsqueda con filtros"""
-        termino = self.search_entry.get().lower().strip()
-        resultados = self.productos.copy()
-        
-        # Filtrar por término de búsqueda
-        if termino:
-            resultados = [
-                p for p in resultados
-                if (termino in p['nombre'].lower() or
-                    termino in p['codigo'].lower() or
-                    termino in p['categoria'].lower())
-            ]
+        self.programador_busqueda.ejecutar_ahora(*self._criterios_busqueda())
+    
+    def _criterios_busqueda(self):
+        """Leer término y categoría desde los widgets (hilo de Tk)"""
+        termino = self.search_entry.get()
         
         # Aplicar filtro de categoría si existe
-        if hasattr(self, 'categoria_filtro'):
+        categoria = None
+        if hasattr(self, 'categoria_filtro') and self.categoria_filtro.get() != "Todas":
             categoria = self.categoria_filtro.get()
-            if categoria != "Todas":
-                resultados = [p for p in resultados if p['categoria'] == categoria]
         
-        self._mostrar_resultados_busqueda(resultados)
+        return termino, categoria
+    
+    def _consultar_productos(self, termino, categoria=None):
+        """Consultar productos (se ejecuta fuera del hilo de Tk)"""
+        if self.catalogo_db and termino.strip():
+            # Búsqueda FTS5 con ranking y categoría filtrada en SQL antes del
+            # límite; el catálogo aporta el estado vigente
+            resultados = []
+            for fila in self.db.buscar_productos(termino, limite=200, categoria=categoria):
+                producto = self.catalogo.obtener(fila['id'])
+                if producto:
+                    resultados.append(producto)
+            return resultados
+        
+        # Sin base de datos: prefijo de palabras sobre el índice del catálogo
+        return self.catalogo.buscar(termino, categoria=categoria)
     
     def _filtro_rapido(self, tipo):
         """Aplicar filtros rápidos"""
         if tipo == "todos":
-            resultados = self.productos
-        elif tipo == "con_stock":
-            resultados = [p for p in self.productos if p['stock'] > 0]
-        elif tipo == "sin_stock":
-            resultados = [p for p in self.productos if p['stock'] == 0]
-        elif tipo == "stock_bajo":
-            resultados = [p for p in self.productos if p['stock'] <= 10]
+            resultados = self.catalogo.filtrar()
+        else:
+            resultados = self.catalogo.filtrar(estado=tipo)
         
         self._mostrar_resultados_busqueda(resultados)
     
@@ -2065,44 +2168,14 @@ class VentaProUniversal:
     
     def _mostrar_resultados_busqueda(self, productos):
         """Mostrar resultados en grid"""
-        # Limpiar resultados
-        for widget in self.resultados_frame.winfo_children():
-            widget.destroy()
-        
-        if not productos:
-            ctk.CTkLabel(
-                self.resultados_frame,
-                text="🔍 No se encontraron productos",
-                font=ctk.CTkFont(size=16), text_color="gray"
-            ).pack(pady=50)
-            return
-        
         # Header con conteo
-        header = ctk.CTkFrame(self.resultados_frame)
-        header.pack(fill="x", pady=(0, 15))
-        
-        ctk.CTkLabel(
-            header,
-            text=f"📋 {len(productos)} productos encontrados",
-            font=ctk.CTkFont(size=14, weight="bold")
-        ).pack(pady=10)
-        
-        # Grid de productos
-        for i, producto in enumerate(productos[:20]):  # Máximo 20
-            self._crear_card_resultado(producto)
-        
-        if len(productos) > 20:
-            ctk.CTkLabel(
-                self.resultados_frame,
-                text=f"... y {len(productos) - 20} más. Refina tu búsqueda.",
-                text_color="gray"
-            ).pack(pady=15)
+        self.resultados_conteo.configure(
+            text=f"📋 {len(productos)} productos encontrados" if productos else ""
+        )
+        self.resultados_lista.establecer_datos(productos)
     
-    def _crear_card_resultado(self, producto):
-        """Crear card de resultado de búsqueda"""
-        card = ctk.CTkFrame(self.resultados_frame)
-        card.pack(fill="x", pady=5, padx=5)
-        
+    def _crear_card_resultado(self, card):
+        """Crear card reciclable de resultado de búsqueda"""
         content = ctk.CTkFrame(card, fg_color="transparent")
         content.pack(fill="x", padx=15, pady=12)
         
@@ -2111,18 +2184,13 @@ class VentaProUniversal:
         info_frame.pack(side="left", fill="x", expand=True)
         
         nombre_label = ctk.CTkLabel(
-            info_frame,
-            text=f"📦 {producto['nombre']}",
+            info_frame, text="",
             font=ctk.CTkFont(size=14, weight="bold"),
             anchor="w"
         )
         nombre_label.pack(fill="x")
         
-        detalles_label = ctk.CTkLabel(
-            info_frame,
-            text=f"📋 {producto['codigo']} | 📂 {producto['categoria']} | 📦 Stock: {producto['stock']}",
-            text_color="gray", anchor="w"
-        )
+        detalles_label = ctk.CTkLabel(info_frame, text="", text_color="gray", anchor="w")
         detalles_label.pack(fill="x")
         
         # Precio y acciones
@@ -2130,8 +2198,7 @@ class VentaProUniversal:
         precio_actions.pack(side="right")
         
         precio_label = ctk.CTkLabel(
-            precio_actions,
-            text=f"{self.config_negocio['moneda']}{producto['precio']:.2f}",
+            precio_actions, text="",
             font=ctk.CTkFont(size=16, weight="bold"),
             text_color="#007bff"
         )
@@ -2141,50 +2208,63 @@ class VentaProUniversal:
         buttons = ctk.CTkFrame(precio_actions, fg_color="transparent")
         buttons.pack(pady=(5, 0))
         
-        ctk.CTkButton(
-            buttons, text="✏️", width=30, height=25,
-            command=lambda p=producto: self._editar_producto(p)
-        ).pack(side="left", padx=2)
+        btn_editar = ctk.CTkButton(buttons, text="✏️", width=30, height=25)
+        btn_editar.pack(side="left", padx=2)
         
-        ctk.CTkButton(
-            buttons, text="🛒", width=30, height=25,
-            command=lambda p=producto: self._agregar_al_carrito(p)
-        ).pack(side="left", padx=2)
+        btn_carrito = ctk.CTkButton(buttons, text="🛒", width=30, height=25)
+        btn_carrito.pack(side="left", padx=2)
+        
+        return {
+            'nombre': nombre_label, 'detalles': detalles_label, 'precio': precio_label,
+            'editar': btn_editar, 'carrito': btn_carrito
+        }
+    
+    def _vincular_card_resultado(self, card, producto, indice):
+        """Mostrar un producto en una card reciclada"""
+        card['nombre'].configure(text=f"📦 {producto['nombre']}")
+        card['detalles'].configure(
+            text=f"📋 {producto['codigo']} | 📂 {producto['categoria']} | 📦 Stock: {producto['stock']}"
+        )
+        card['precio'].configure(text=f"{self.config_negocio['moneda']}{producto['precio']:.2f}")
+        card['editar'].configure(command=lambda p=producto: self._editar_producto(p))
+        card['carrito'].configure(command=lambda p=producto: self._agregar_al_carrito(p))
     
     def _buscar_producto_pos(self, event=None):
-        """Búsqueda en tiempo real para POS"""
-        if not hasattr(self, 'pos_search_entry'):
+        """Búsqueda inmediata para POS (Enter o lector de código de barras)"""
+        if not hasattr(self, 'pos_search'):
             return
         
-        termino = self.pos_search_entry.get().lower().strip()
+        termino = self.pos_search.get().strip()
         
-        # Limpiar productos mostrados
-        for widget in self.productos_pos_frame.winfo_children():
-            widget.destroy()
+        # Código de barras o código exacto (lector): agregar directo al carrito
+        if termino and event is not None:
+            producto = self.catalogo.buscar_exacto(termino)
+            if producto:
+                self.programador_pos.cancelar()
+                self._agregar_al_carrito(producto)
+                self.pos_search.delete(0, "end")
+                self._mostrar_productos_pos(self._consultar_productos_pos(""))
+                return
         
-        if not termino:
-            # Mostrar productos por defecto
-            for producto in self.productos[:12]:
-                self._crear_producto_pos(producto)
+        self.programador_pos.ejecutar_ahora(termino)
+    
+    def _busqueda_pos_en_tiempo_real(self, event):
+        """Búsqueda en tiempo real para POS"""
+        # Enter se atiende en _buscar_producto_pos
+        if event.keysym in ("Return", "KP_Enter"):
             return
-        
-        # Buscar productos
-        resultados = [
-            p for p in self.productos
-            if (termino in p['nombre'].lower() or
-                termino in p['codigo'].lower() or
-                termino in str(p['precio']))
-        ][:12]
-        
-        if resultados:
-            for producto in resultados:
-                self._crear_producto_pos(producto)
-        else:
-            ctk.CTkLabel(
-                self.productos_pos_frame,
-                text="🔍 Sin resultados",
-                text_color="gray"
-            ).pack(pady=20)
+        self.programador_pos.programar(self.pos_search.get().strip())
+    
+    def _consultar_productos_pos(self, termino):
+        """Consultar productos para POS (se ejecuta fuera del hilo de Tk)"""
+        if not termino:
+            # Productos por defecto
+            return self.catalogo.filtrar(estado='con_stock')
+        return self.catalogo.buscar(termino, limite=500)
+    
+    def _mostrar_productos_pos(self, resultados):
+        """Mostrar productos del POS"""
+        self.productos_pos_lista.establecer_datos(resultados)
     
     def _editar_producto(self, producto):
         """Editor completo de productos"""
@@ -2259,6 +2339,7 @@ class VentaProUniversal:
                 producto['categoria'] = campos['categoria'].get()
                 producto['precio'] = float(campos['precio'].get())
                 producto['stock'] = int(campos['stock'].get())
+                self.catalogo.actualizar(producto)
                 
                 messagebox.showinfo("Éxito", "✅ Producto actualizado correctamente")
                 dialog.destroy()
@@ -2350,6 +2431,7 @@ class VentaProUniversal:
                     producto['stock'] = max(0, producto['stock'] - cantidad)
                 elif tipo == "Ajuste a cantidad exacta":
                     producto['stock'] = cantidad
+                self.catalogo.actualizar_stock(producto['id'])
                 
                 messagebox.showinfo(
                     "Ajuste Completado",
@@ -3104,6 +3186,7 @@ class VentaProUniversal:
             }
             
             self.productos.append(nuevo_producto)
+            self.catalogo.agregar(nuevo_producto)
             
             # 💾 BACKUP AUTOMÁTICO - Registrar nuevo producto
             if self.backup_manager:
@@ -3229,6 +3312,7 @@ class VentaProUniversal:
                     'activo': True
                 }
                 self.productos.append(nuevo_producto)
+                self.catalogo.agregar(nuevo_producto)
                 messagebox.showinfo("✅ Éxito", "Producto guardado correctamente")
                 ventana.destroy()
             else:
@@ -3437,6 +3521,11 @@ class VentaProUniversal:
         if messagebox.askyesno("Salir", "¿Está seguro de que desea salir del sistema?"):
             if logger_disponible and hasattr(self, 'logger'):
                 self.logger.info("🔴 Sistema cerrado por el usuario")
+            self.programador_busqueda.cerrar()
+            self.programador_pos.cerrar()
+            if self.backup_manager:
+                # Escribir los backups aún en cola antes de salir
+                self.backup_manager.cerrar()
             self.root.quit()
             self.nuevo_proveedor_nombre.delete(0, 'end')
             self.nuevo_proveedor_contacto.delete(0, 'end')
@@ -3504,7 +3593,7 @@ class VentaProUniversal:
                     
                     ctk.CTkLabel(
                         card,
-                        text=f"JSON: {data['archivos_json']}",
+                        text=f"Registros: {data['registros']}",
                         font=ctk.CTkFont(size=11),
                         text_color="white"
                     ).pack()
@@ -3519,6 +3608,24 @@ class VentaProUniversal:
             for i in range(4):
                 grid_frame.grid_columnconfigure(i, weight=1)
             
+            # Estado del programador de respaldos de la base de datos
+            if self.programador_respaldos:
+                estado = self.programador_respaldos.obtener_estado()
+                proximos = ", ".join(f"{nombre}: {fecha}" for nombre, fecha in estado['proximos'].items())
+                texto_estado = (
+                    f"🗄️ Base de datos: {estado['estado']} · Último: {estado['ultimo_respaldo'] or 'nunca'}"
+                    f" · Próximo: {proximos or 'pendiente'}"
+                )
+                if estado['ultimo_error']:
+                    texto_estado += f"\n⚠️ {estado['ultimo_error']}"
+                
+                ctk.CTkLabel(
+                    stats_frame,
+                    text=texto_estado,
+                    font=ctk.CTkFont(size=11),
+                    justify="left"
+                ).pack(pady=(0, 10))
+            
             # Lista de archivos de backup más recientes
             archivos_frame = ctk.CTkScrollableFrame(ventana, height=300)
             archivos_frame.pack(fill="both", expand=True, padx=20, pady=20)
@@ -3531,62 +3638,53 @@ class VentaProUniversal:
             
             backup_dir = "data/backups"
             
-            # Listar archivos por categoría
+            # Listar registros por categoría desde el índice del diario
             for tipo in tipos_backup:
-                tipo_dir = f"{backup_dir}/{tipo}"
-                if os.path.exists(tipo_dir):
-                    archivos = [f for f in os.listdir(tipo_dir) if f.endswith('.json')]
-                    archivos.sort(reverse=True)  # Más recientes primero
+                entradas = self.backup_manager.listar_backups_por_tipo(tipo)  # Más recientes primero
+                
+                if entradas:
+                    # Título de la categoría
+                    cat_frame = ctk.CTkFrame(archivos_frame, fg_color="#f8f9fa")
+                    cat_frame.pack(fill="x", pady=5, padx=10)
                     
-                    if archivos:
-                        # Título de la categoría
-                        cat_frame = ctk.CTkFrame(archivos_frame, fg_color="#f8f9fa")
-                        cat_frame.pack(fill="x", pady=5, padx=10)
+                    ctk.CTkLabel(
+                        cat_frame,
+                        text=f"📁 {tipo.upper()} ({len(entradas)} registros)",
+                        font=ctk.CTkFont(size=12, weight="bold"),
+                        anchor="w"
+                    ).pack(pady=8, padx=15)
+                    
+                    # Mostrar hasta 3 registros más recientes
+                    for entrada in entradas[:3]:
+                        archivo_frame = ctk.CTkFrame(archivos_frame)
+                        archivo_frame.pack(fill="x", pady=2, padx=20)
                         
-                        ctk.CTkLabel(
-                            cat_frame,
-                            text=f"📁 {tipo.upper()} ({len(archivos)} archivos)",
-                            font=ctk.CTkFont(size=12, weight="bold"),
-                            anchor="w"
-                        ).pack(pady=8, padx=15)
+                        fecha_formateada = datetime.fromtimestamp(entrada.timestamp).strftime("%Y%m%d %H:%M:%S")
+                        info_text = f"📄 {entrada.tipo} ({entrada.referencia})\n📅 {fecha_formateada}"
                         
-                        # Mostrar hasta 3 archivos más recientes
-                        for archivo in archivos[:3]:
-                            archivo_frame = ctk.CTkFrame(archivos_frame)
-                            archivo_frame.pack(fill="x", pady=2, padx=20)
-                            
-                            # Extraer timestamp del nombre
-                            timestamp = archivo.split('_')[-1].replace('.json', '')
-                            if len(timestamp) >= 15:
-                                fecha_formateada = f"{timestamp[:8]} {timestamp[9:11]}:{timestamp[11:13]}:{timestamp[13:15]}"
-                            else:
-                                fecha_formateada = "Fecha no disponible"
-                            
-                            info_text = f"📄 {archivo}\n📅 {fecha_formateada}"
-                            
-                            ctk.CTkLabel(
-                                archivo_frame,
-                                text=info_text,
-                                anchor="w",
-                                justify="left"
-                            ).pack(side="left", padx=15, pady=8)
-                            
-                            # Botón para abrir archivo
-                            ctk.CTkButton(
-                                archivo_frame,
-                                text="👁️ Ver",
-                                width=60,
-                                height=30,
-                                command=lambda f=f"{tipo_dir}/{archivo}": self._abrir_backup(f)
-                            ).pack(side="right", padx=15, pady=5)
+                        ctk.CTkLabel(
+                            archivo_frame,
+                            text=info_text,
+                            anchor="w",
+                            justify="left"
+                        ).pack(side="left", padx=15, pady=8)
                         
-                        if len(archivos) > 3:
-                            ctk.CTkLabel(
-                                archivos_frame,
-                                text=f"... y {len(archivos) - 3} archivos más",
-                                text_color="gray",
-                                font=ctk.CTkFont(size=10)
-                            ).pack(pady=2)
+                        # Botón para abrir registro
+                        ctk.CTkButton(
+                            archivo_frame,
+                            text="👁️ Ver",
+                            width=60,
+                            height=30,
+                            command=lambda e=entrada: self._abrir_backup(e)
+                        ).pack(side="right", padx=15, pady=5)
+                    
+                    if len(entradas) > 3:
+                        ctk.CTkLabel(
+                            archivos_frame,
+                            text=f"... y {len(entradas) - 3} registros más",
+                            text_color="gray",
+                            font=ctk.CTkFont(size=10)
+                        ).pack(pady=2)
             
             # Botones de acción
             buttons_frame = ctk.CTkFrame(ventana, fg_color="transparent")
@@ -3599,6 +3697,15 @@ class VentaProUniversal:
                 width=200
             ).pack(side="left", padx=10)
             
+            # Solo con el hilo en marcha: si iniciar() falló nadie atendería la solicitud
+            if self.respaldos_activos:
+                ctk.CTkButton(
+                    buttons_frame,
+                    text="🗄️ Respaldar BD ahora",
+                    command=self.programador_respaldos.solicitar_respaldo,
+                    width=180
+                ).pack(side="left", padx=10)
+            
             ctk.CTkButton(
                 buttons_frame,
                 text="🔄 Actualizar",
@@ -3617,16 +3724,14 @@ class VentaProUniversal:
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar backups: {str(e)}")
     
-    def _abrir_backup(self, archivo_path):
-        """Abrir archivo de backup en el visor"""
+    def _abrir_backup(self, entrada):
+        """Abrir registro del diario de backups en el visor"""
         try:
-            import json
-            with open(archivo_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self.backup_manager.leer_backup(entrada)
             
             # Crear ventana para mostrar contenido
             visor = ctk.CTkToplevel(self.root)
-            visor.title(f"📄 {os.path.basename(archivo_path)}")
+            visor.title(f"📄 {entrada.tipo} ({entrada.referencia})")
             visor.geometry("700x500")
             
             # Área de texto con scroll
@@ -3634,7 +3739,7 @@ class VentaProUniversal:
             texto_frame.pack(fill="both", expand=True, padx=20, pady=20)
             
             # Mostrar información formateada
-            info_text = f"📁 Archivo: {os.path.basename(archivo_path)}\n"
+            info_text = f"📁 Registro: {entrada.referencia}\n"
             info_text += f"📅 Fecha: {data.get('fecha_legible', 'No disponible')}\n"
             info_text += f"🔧 Acción: {data.get('accion', 'No disponible')}\n"
             info_text += f"📊 Tipo: {data.get('tipo', 'No disponible')}\n\n"
@@ -3657,7 +3762,7 @@ class VentaProUniversal:
             ).pack(pady=10)
             
         except Exception as e:
-            messagebox.showerror("Error", f"No se pudo abrir el archivo: {str(e)}")
+            messagebox.showerror("Error", f"No se pudo abrir el registro: {str(e)}")
 
 def main():
     """Función principal"""
@@ -3666,15 +3771,17 @@ def main():
         print("🌍 Iniciando VentaPro Universal - Sistema para TODO tipo de negocio...")
         
         # Inicializar base de datos si está disponible
+        db = None
         if db_disponible:
             db = DatabaseManager()
             if db.inicializar_db():
                 print("✅ Base de datos inicializada correctamente")
             else:
                 print("⚠️ Ejecutando con datos simulados")
+                db = None
         
         # Crear y ejecutar aplicación
-        app = VentaProUniversal()
+        app = VentaProUniversal(db)
         
         print("🚀 VentaPro Universal iniciado exitosamente")
         print("🎯 Sistema adaptable a cualquier tipo de negocio")
@@ -3682,6 +3789,10 @@ def main():
         
         app.ejecutar()
         
+        # Respaldo de salida (backup_on_exit) ya fuera del mainloop
+        if app.programador_respaldos:
+            app.programador_respaldos.cerrar()
+        
     except Exception as e:
         print(f"❌ Error crítico: {e}")
         import traceback
@@ -3713,17 +3824,19 @@ def mostrar_proveedores_avanzado(root, config_negocio):
             "• Historial de transacciones\n"
             "• Análisis de rendimiento")
 
-def mostrar_inventario_avanzado(root, productos, config_negocio):
-    """Lanzar módulo avanzado de inventario"""
+def mostrar_inventario_avanzado(root, productos, config_negocio, db_manager=None):
+    """Lanzar módulo avanzado de inventario sobre la base de datos de la aplicación"""
     try:
         import sys
         import os
         sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        from modules.inventario import InterfazInventario
+        from modules.inventario import InterfazInventario, crear_gestor_inventario
         
         # Crear ventana del módulo de inventario
         inventario_window = ctk.CTkToplevel(root)
-        inventario_app = InterfazInventario(inventario_window, productos, config_negocio)
+        gestor = crear_gestor_inventario(db_manager)
+        inventario_app = InterfazInventario(inventario_window, gestor, productos)
+        inventario_app.mostrar_inventario()
         
     except ImportError:
         messagebox.showinfo("Módulo Avanzado", 
@@ -20,13 +20,28 @@ Fecha: 2025-01-04
 
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, ttk, filedialog
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict, Tuple
+from dataclasses import dataclass, asdict, fields
+from typing import Callable, Iterable, List, Optional, Dict, Tuple
 from enum import Enum
+from collections import deque
+import csv
 import json
 import math
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from ui.lista_virtual import ListaVirtual
+
+# Cálculo de diferencias por columnas (NumPy si está disponible)
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    np = None
+    NUMPY_DISPONIBLE = False
 
 class TipoMovimiento(Enum):
     """Tipos de movimientos de inventario"""
@@ -109,6 +124,11 @@ class ConfiguracionStock:
     # Proyecciones
     demanda_diaria_promedio: float = 0.0
     dias_para_agotar: int = 0
+    
+    # Reposición
+    proveedor_id: Optional[int] = None
+    dias_entrega: int = 7
+    costo_unitario: float = 0.0
 
 @dataclass
 class AlertaInventario:
@@ -122,17 +142,402 @@ class AlertaInventario:
     activa: bool = True
     fecha_resolucion: Optional[datetime] = None
 
+class LibroMovimientos:
+    """Libro de movimientos indexado por producto
+    
+    Por cada producto mantiene los movimientos ordenados por fecha junto a
+    un arreglo paralelo de fechas para consultas por ventana con bisect, y
+    un mapa con el stock actual (stock_nuevo del movimiento más reciente)
+    que se actualiza en cada alta. Un bloqueo propio protege altas y
+    lecturas: las conciliaciones agregan movimientos desde un hilo de
+    trabajo mientras la interfaz consulta desde el hilo de Tk.
+    """
+    
+    def __init__(self, movimientos: Optional[List[MovimientoStock]] = None,
+                 stock_base: Optional[Dict[int, float]] = None, ultimo_id: int = 0):
+        self._todos: List[MovimientoStock] = []
+        self._por_producto: Dict[int, List[MovimientoStock]] = {}
+        self._fechas: Dict[int, List[datetime]] = {}
+        self._stock: Dict[int, float] = {}
+        self._ultimo_id = ultimo_id
+        self._lock = threading.RLock()
+        
+        for movimiento in movimientos or []:
+            self.agregar(movimiento)
+        # El stock vigente (p. ej. productos.stock_actual) prevalece sobre el saldo de los movimientos cargados
+        self._stock.update(stock_base or {})
+    
+    def agregar(self, movimiento: MovimientoStock):
+        """Agrega un movimiento manteniendo el orden por fecha del producto"""
+        producto_id = movimiento.producto_id
+        with self._lock:
+            lista = self._por_producto.setdefault(producto_id, [])
+            fechas = self._fechas.setdefault(producto_id, [])
+            
+            if not fechas or movimiento.fecha >= fechas[-1]:
+                # Caso habitual: el movimiento es el más reciente
+                lista.append(movimiento)
+                fechas.append(movimiento.fecha)
+            else:
+                # A igual fecha queda después de los ya registrados
+                posicion = bisect_right(fechas, movimiento.fecha)
+                lista.insert(posicion, movimiento)
+                fechas.insert(posicion, movimiento.fecha)
+            
+            self._stock[producto_id] = lista[-1].stock_nuevo
+            self._ultimo_id = max(self._ultimo_id, movimiento.id)
+            self._todos.append(movimiento)
+    
+    @property
+    def todos(self) -> List[MovimientoStock]:
+        """Copia de todos los movimientos en orden de registro"""
+        with self._lock:
+            return list(self._todos)
+    
+    def stock_actual(self, producto_id: int) -> float:
+        """Stock actual del producto en O(1)"""
+        with self._lock:
+            return self._stock.get(producto_id, 0.0)
+    
+    def ventana(self, producto_id: int, desde: Optional[datetime] = None,
+                hasta: Optional[datetime] = None) -> List[MovimientoStock]:
+        """Movimientos del producto con desde <= fecha <= hasta, ordenados por fecha"""
+        with self._lock:
+            lista = self._por_producto.get(producto_id)
+            if not lista:
+                return []
+            fechas = self._fechas[producto_id]
+            inicio = bisect_left(fechas, desde) if desde is not None else 0
+            fin = bisect_right(fechas, hasta) if hasta is not None else len(fechas)
+            return lista[inicio:fin]
+    
+    def productos(self) -> List[int]:
+        """Ids de productos con movimientos"""
+        with self._lock:
+            return list(self._por_producto)
+    
+    def siguiente_id(self) -> int:
+        """Id disponible para un nuevo movimiento"""
+        with self._lock:
+            return self._ultimo_id + 1
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._todos)
+
+# Tipos de alerta de stock y eventos emitidos a los suscriptores: (evento, alerta)
+ALERTA_STOCK_CRITICO = "Stock Crítico"
+ALERTA_STOCK_BAJO = "Stock Bajo"
+TIPOS_ALERTA_STOCK = (ALERTA_STOCK_CRITICO, ALERTA_STOCK_BAJO)
+
+EVENTO_ALERTA_CREADA = 'creada'
+EVENTO_ALERTA_RESUELTA = 'resuelta'
+
+class MotorAlertas:
+    """Alertas de inventario indexadas por (producto_id, tipo)
+    
+    Las alertas activas viven en un diccionario por clave y las resueltas
+    pasan a un historial acotado, de modo que crear, deduplicar, resolver y
+    listar activas no depende de cuántas alertas hubo antes. Solo se
+    evalúan los productos que recibe evaluar() (los tocados por un lote de
+    movimientos). Los suscriptores se notifican fuera del bloqueo y en el
+    hilo que registró los movimientos; la interfaz debe pasar a su hilo
+    con after().
+    
+    Args:
+        capacidad_historial: Máximo de alertas resueltas conservadas
+    """
+    
+    def __init__(self, capacidad_historial: int = 1000):
+        self.activas: Dict[Tuple[int, str], AlertaInventario] = {}
+        self.historial: deque = deque(maxlen=capacidad_historial)
+        self._claves: Dict[int, Tuple[int, str]] = {}
+        self._por_nivel: Dict[NivelAlerta, int] = {}
+        self._ultimo_id = 0
+        self._lock = threading.Lock()
+        self._suscriptores: List[Callable[[str, AlertaInventario], None]] = []
+    
+    # =================== EVALUACIÓN ===================
+    
+    def evaluar(self, lecturas: Iterable[Tuple[ConfiguracionStock, float]]) -> List[Tuple[str, AlertaInventario]]:
+        """Evalúa umbrales de stock de los productos indicados
+        
+        Por cada (configuración, stock actual) crea la alerta que
+        corresponda y resuelve la de stock que ya no aplica (p. ej. la de
+        stock crítico tras una entrada).
+        
+        Returns:
+            List[Tuple[str, AlertaInventario]]: Eventos emitidos
+        """
+        eventos = []
+        with self._lock:
+            for config, stock in lecturas:
+                tipo, nivel, mensaje = self._clasificar(config, stock)
+                for tipo_stock in TIPOS_ALERTA_STOCK:
+                    if tipo_stock != tipo:
+                        alerta = self.activas.get((config.producto_id, tipo_stock))
+                        if alerta:
+                            eventos.append((EVENTO_ALERTA_RESUELTA, self._resolver(alerta)))
+                if tipo and (config.producto_id, tipo) not in self.activas:
+                    eventos.append((EVENTO_ALERTA_CREADA, self._activar(config.producto_id, tipo, nivel, mensaje)))
+        self._notificar(eventos)
+        return eventos
+    
+    @staticmethod
+    def _clasificar(config: ConfiguracionStock, stock: float) -> Tuple[Optional[str], Optional[NivelAlerta], str]:
+        if stock <= 0 and config.alertar_stock_critico:
+            return ALERTA_STOCK_CRITICO, NivelAlerta.CRITICO, "Stock agotado"
+        if stock <= config.stock_minimo and config.alertar_stock_bajo:
+            return ALERTA_STOCK_BAJO, NivelAlerta.BAJO, f"Stock por debajo del mínimo ({stock} < {config.stock_minimo})"
+        return None, None, ""
+    
+    # =================== ALTA Y RESOLUCIÓN ===================
+    
+    def crear(self, producto_id: int, tipo: str, nivel: NivelAlerta, mensaje: str) -> Optional[AlertaInventario]:
+        """Crea una alerta si no hay otra activa del mismo (producto_id, tipo)"""
+        with self._lock:
+            if (producto_id, tipo) in self.activas:
+                return None
+            alerta = self._activar(producto_id, tipo, nivel, mensaje)
+        self._notificar([(EVENTO_ALERTA_CREADA, alerta)])
+        return alerta
+    
+    def cargar(self, alertas: Iterable[AlertaInventario]):
+        """Incorpora alertas existentes conservando sus ids (sin notificar)"""
+        with self._lock:
+            for alerta in alertas:
+                self._ultimo_id = max(self._ultimo_id, alerta.id)
+                if alerta.activa:
+                    self._indexar(alerta)
+                else:
+                    self.historial.append(alerta)
+    
+    def resolver(self, alerta_id: int) -> bool:
+        """Marca como resuelta una alerta activa por id"""
+        with self._lock:
+            clave = self._claves.get(alerta_id)
+            if clave is None:
+                return False
+            alerta = self._resolver(self.activas[clave])
+        self._notificar([(EVENTO_ALERTA_RESUELTA, alerta)])
+        return True
+    
+    def _activar(self, producto_id: int, tipo: str, nivel: NivelAlerta, mensaje: str) -> AlertaInventario:
+        self._ultimo_id += 1
+        alerta = AlertaInventario(
+            id=self._ultimo_id,
+            producto_id=producto_id,
+            tipo=tipo,
+            nivel=nivel,
+            mensaje=mensaje,
+            fecha_creacion=datetime.now()
+        )
+        self._indexar(alerta)
+        return alerta
+    
+    def _indexar(self, alerta: AlertaInventario):
+        clave = (alerta.producto_id, alerta.tipo)
+        self.activas[clave] = alerta
+        self._claves[alerta.id] = clave
+        self._por_nivel[alerta.nivel] = self._por_nivel.get(alerta.nivel, 0) + 1
+    
+    def _resolver(self, alerta: AlertaInventario) -> AlertaInventario:
+        del self.activas[(alerta.producto_id, alerta.tipo)]
+        del self._claves[alerta.id]
+        self._por_nivel[alerta.nivel] -= 1
+        alerta.activa = False
+        alerta.fecha_resolucion = datetime.now()
+        self.historial.append(alerta)
+        return alerta
+    
+    # =================== CONSULTA ===================
+    
+    def obtener_activas(self) -> List[AlertaInventario]:
+        """Alertas activas en orden de creación"""
+        with self._lock:
+            return list(self.activas.values())
+    
+    def contar_por_nivel(self) -> Dict[NivelAlerta, int]:
+        """Cantidad de alertas activas por nivel (mantenida en cada cambio)"""
+        with self._lock:
+            return {nivel: total for nivel, total in self._por_nivel.items() if total}
+    
+    # =================== EVENTOS ===================
+    
+    def suscribir(self, callback: Callable[[str, AlertaInventario], None]):
+        """Registra un callback (evento, alerta) para cada alta o resolución"""
+        self._suscriptores.append(callback)
+    
+    def desuscribir(self, callback: Callable[[str, AlertaInventario], None]):
+        """Quita un callback registrado"""
+        if callback in self._suscriptores:
+            self._suscriptores.remove(callback)
+    
+    def _notificar(self, eventos: List[Tuple[str, AlertaInventario]]):
+        for evento, alerta in eventos:
+            for callback in list(self._suscriptores):
+                callback(evento, alerta)
+
+def _movimiento_a_fila(movimiento: MovimientoStock) -> tuple:
+    """Fila de movimientos_inventario (orden de movimientos.COLUMNAS) con cantidad con signo"""
+    return (
+        movimiento.id,
+        movimiento.producto_id,
+        movimiento.tipo.name,
+        movimiento.motivo,
+        movimiento.stock_anterior,
+        movimiento.stock_nuevo - movimiento.stock_anterior,
+        movimiento.stock_nuevo,
+        movimiento.referencia,
+        movimiento.costo_unitario,
+        movimiento.lote or None,
+        movimiento.fecha_vencimiento.strftime('%Y-%m-%d') if movimiento.fecha_vencimiento else None,
+        movimiento.ubicacion or None,
+        None,
+        movimiento.usuario,
+        movimiento.notas or None,
+        movimiento.fecha.strftime('%Y-%m-%d %H:%M:%S'),
+    )
+
+def _configuracion_a_fila(config: ConfiguracionStock) -> tuple:
+    """Fila de configuraciones_stock (orden de movimientos.COLUMNAS_CONFIGURACION)"""
+    return tuple(getattr(config, campo.name) for campo in fields(ConfiguracionStock))
+
+def _fila_a_configuracion(fila) -> ConfiguracionStock:
+    """ConfiguracionStock desde una fila de configuraciones_stock"""
+    valores = {}
+    for campo in fields(ConfiguracionStock):
+        valor = fila[campo.name]
+        if campo.type is bool:
+            valor = bool(valor)
+        valores[campo.name] = valor
+    return ConfiguracionStock(**valores)
+
+def _configuracion_por_defecto(fila) -> ConfiguracionStock:
+    """Configuración de un producto sin guardar: mínimo y costo de su ficha"""
+    minimo = float(fila['stock_minimo'] or 0)
+    return ConfiguracionStock(
+        producto_id=fila['producto_id'],
+        stock_minimo=minimo,
+        punto_reorden=minimo,
+        costo_unitario=float(fila['precio_compra'] or 0)
+    )
+
+def _fila_a_movimiento(fila) -> MovimientoStock:
+    """MovimientoStock desde una fila de movimientos_inventario"""
+    delta = fila['cantidad_movimiento']
+    try:
+        tipo = TipoMovimiento[fila['tipo_movimiento']]
+    except KeyError:
+        # Tipos genéricos de otros orígenes ('AJUSTE', ...): se deduce por el signo
+        tipo = TipoMovimiento.AJUSTE_POSITIVO if delta >= 0 else TipoMovimiento.AJUSTE_NEGATIVO
+    
+    return MovimientoStock(
+        id=fila['id'],
+        producto_id=fila['producto_id'],
+        fecha=datetime.fromisoformat(fila['fecha_movimiento']),
+        tipo=tipo,
+        cantidad=abs(delta),
+        stock_anterior=fila['cantidad_anterior'],
+        stock_nuevo=fila['cantidad_actual'],
+        referencia=fila['referencia'] or "",
+        usuario=fila['usuario'] or "Sistema",
+        motivo=fila['motivo'] or "",
+        costo_unitario=fila['costo_unitario'] or 0.0,
+        ubicacion=fila['ubicacion_origen'] or "",
+        lote=fila['lote_afectado'] or "",
+        fecha_vencimiento=datetime.fromisoformat(fila['fecha_vencimiento']) if fila['fecha_vencimiento'] else None,
+        notas=fila['observaciones'] or ""
+    )
+
+def leer_conteos(origen) -> Iterable[Tuple[int, float]]:
+    """Líneas de conteo físico como (producto_id, cantidad)
+    
+    Args:
+        origen: Ruta de un CSV con columnas producto_id y stock_fisico
+            (o cantidad), o un iterable de diccionarios con esas claves o
+            de tuplas (producto_id, cantidad)
+    
+    Las líneas ilegibles se entregan como None para que el llamador las
+    cuente sin detener la lectura.
+    """
+    if isinstance(origen, str) or hasattr(origen, '__fspath__'):
+        with open(origen, newline='', encoding='utf-8-sig') as archivo:
+            yield from leer_conteos(csv.DictReader(archivo))
+        return
+    
+    for linea in origen:
+        try:
+            if isinstance(linea, dict):
+                cantidad = linea.get('stock_fisico', linea.get('cantidad'))
+                yield int(linea['producto_id']), float(cantidad)
+            else:
+                yield int(linea[0]), float(linea[1])
+        except (KeyError, IndexError, TypeError, ValueError):
+            yield None
+
 class GestorInventario:
-    """Gestor avanzado de inventario"""
+    """Gestor avanzado de inventario
     
-    def __init__(self, productos_callback=None):
-        self.movimientos: List[MovimientoStock] = []
+    Con db_manager los movimientos se persisten en movimientos_inventario
+    y su cantidad se aplica a productos.stock_actual, la única fuente del
+    stock vigente; en memoria se mantienen solo los de los últimos
+    `dias_en_memoria` días y el stock actual de todos los productos. Cada
+    `snapshot_cada` movimientos se registra un corte de stock por producto.
+    """
+    
+    def __init__(self, productos_callback=None, db_manager=None, dias_en_memoria: int = 90,
+                 snapshot_cada: int = 5000):
+        self.libro = LibroMovimientos()
         self.configuraciones: Dict[int, ConfiguracionStock] = {}
-        self.alertas: List[AlertaInventario] = []
+        self.motor_alertas = MotorAlertas()
         self.productos_callback = productos_callback  # Para obtener productos del sistema principal
         
-        # Demo data
-        self._inicializar_datos_demo()
+        self.db = db_manager
+        self.dias_en_memoria = dias_en_memoria
+        self.snapshot_cada = snapshot_cada
+        self._sin_corte = 0
+        # Serializa altas de movimientos entre la interfaz y las conciliaciones en segundo plano
+        self._lock_registro = threading.RLock()
+        
+        if self.db is None or not self._cargar_desde_db():
+            # Demo data
+            self._inicializar_datos_demo()
+    
+    def _cargar_desde_db(self) -> bool:
+        """Carga configuraciones, stock actual y movimientos recientes persistidos
+        
+        Los productos sin configuración guardada toman el mínimo y el costo
+        de su ficha, de modo que las alertas y la reposición funcionan
+        desde la primera apertura.
+        """
+        # Productos dados de alta con stock desde el último arranque
+        self.db.conciliar_saldos_inventario()
+        estado = self.db.cargar_inventario(desde=datetime.now() - timedelta(days=self.dias_en_memoria))
+        if estado is None:
+            return False
+        
+        self.libro = LibroMovimientos(
+            [_fila_a_movimiento(fila) for fila in estado['movimientos']],
+            stock_base=estado['stock'],
+            ultimo_id=estado['ultimo_id']
+        )
+        self._sin_corte = estado['sin_corte']
+        
+        self.configuraciones = {fila['producto_id']: _configuracion_por_defecto(fila)
+                                for fila in estado['sin_configuracion']}
+        self.configuraciones.update((fila['producto_id'], _fila_a_configuracion(fila))
+                                    for fila in estado['configuraciones'])
+        self._verificar_alertas(list(self.configuraciones))
+        return True
+    
+    def guardar_configuracion(self, config: ConfiguracionStock) -> bool:
+        """Guarda la configuración de stock de un producto y reevalúa sus alertas"""
+        if self.db is not None and not self.db.guardar_configuraciones_stock([_configuracion_a_fila(config)]):
+            return False
+        self.configuraciones[config.producto_id] = config
+        self._verificar_alertas([config.producto_id])
+        return True
     
     def _inicializar_datos_demo(self):
         """Datos de demostración"""
@@ -144,7 +549,9 @@ class GestorInventario:
                 stock_maximo=100,
                 stock_optimo=50,
                 punto_reorden=15,
-                demanda_diaria_promedio=3.5
+                demanda_diaria_promedio=3.5,
+                proveedor_id=1,
+                costo_unitario=15.00
             ),
             2: ConfiguracionStock(
                 producto_id=2,
@@ -152,13 +559,15 @@ class GestorInventario:
                 stock_maximo=200,
                 stock_optimo=100,
                 punto_reorden=30,
-                demanda_diaria_promedio=8.2
+                demanda_diaria_promedio=8.2,
+                proveedor_id=1,
+                costo_unitario=8.75
             )
         }
         
         # Movimientos de ejemplo
         base_date = datetime.now() - timedelta(days=30)
-        self.movimientos = [
+        movimientos_demo = [
             MovimientoStock(
                 id=1,
                 producto_id=1,
@@ -194,17 +603,18 @@ class GestorInventario:
                 motivo="Producto dañado"
             )
         ]
+        self.libro = LibroMovimientos(movimientos_demo)
         
         # Generar alertas
         self._generar_alertas_demo()
     
     def _generar_alertas_demo(self):
         """Generar alertas de demostración"""
-        self.alertas = [
+        self.motor_alertas.cargar([
             AlertaInventario(
                 id=1,
                 producto_id=1,
-                tipo="Stock Bajo",
+                tipo=ALERTA_STOCK_BAJO,
                 nivel=NivelAlerta.BAJO,
                 mensaje="Stock por debajo del mínimo (35 < 40)",
                 fecha_creacion=datetime.now() - timedelta(hours=2)
@@ -212,29 +622,70 @@ class GestorInventario:
             AlertaInventario(
                 id=2,
                 producto_id=3,
-                tipo="Stock Crítico",
+                tipo=ALERTA_STOCK_CRITICO,
                 nivel=NivelAlerta.CRITICO,
                 mensaje="Stock agotado (0 unidades)",
                 fecha_creacion=datetime.now() - timedelta(hours=1)
             )
-        ]
+        ])
+    
+    @property
+    def movimientos(self) -> List[MovimientoStock]:
+        """Todos los movimientos en orden de registro"""
+        return self.libro.todos
+    
+    @property
+    def alertas(self) -> List[AlertaInventario]:
+        """Historial de alertas resueltas seguido de las activas"""
+        return list(self.motor_alertas.historial) + self.motor_alertas.obtener_activas()
     
     def registrar_movimiento(self, movimiento: MovimientoStock) -> bool:
         """Registrar nuevo movimiento de inventario"""
+        return self.registrar_movimientos([movimiento]) == 1
+    
+    def registrar_movimientos(self, movimientos: List[MovimientoStock]) -> int:
+        """Registrar un lote de movimientos en una sola transacción
+        
+        Returns:
+            int: Movimientos registrados (los inválidos se omiten)
+        """
         try:
-            # Validar movimiento
-            if not self._validar_movimiento(movimiento):
-                return False
+            # Validar movimientos
+            validos = [m for m in movimientos if self._validar_movimiento(m)]
+            if not validos:
+                return 0
             
-            self.movimientos.append(movimiento)
+            with self._lock_registro:
+                if self.db is not None:
+                    if not self.db.registrar_movimientos_inventario([_movimiento_a_fila(m) for m in validos]):
+                        return 0
+                    self._registrar_corte_si_corresponde(len(validos))
+                
+                for movimiento in validos:
+                    self.libro.agregar(movimiento)
             
-            # Generar alertas si es necesario
-            self._verificar_alertas(movimiento.producto_id)
+            # Alertas solo de los productos tocados por el lote
+            self._verificar_alertas(dict.fromkeys(m.producto_id for m in validos))
             
-            return True
+            return len(validos)
         except Exception as e:
             print(f"Error al registrar movimiento: {e}")
-            return False
+            return 0
+    
+    def _registrar_corte_si_corresponde(self, nuevos: int):
+        """Registra cortes de stock cada `snapshot_cada` movimientos persistidos"""
+        self._sin_corte += nuevos
+        if self._sin_corte >= self.snapshot_cada and self.db.crear_snapshots_stock() is not None:
+            self._sin_corte = 0
+    
+    def obtener_stock_a_fecha(self, producto_id: int, fecha: datetime) -> float:
+        """Stock de un producto a una fecha (último corte + movimientos posteriores)"""
+        if self.db is not None:
+            stock = self.db.stock_a_fecha(producto_id, fecha)
+            if stock is not None:
+                return stock
+        anteriores = self.libro.ventana(producto_id, hasta=fecha)
+        return anteriores[-1].stock_nuevo if anteriores else 0.0
     
     def _validar_movimiento(self, movimiento: MovimientoStock) -> bool:
         """Validar que el movimiento sea válido"""
@@ -251,21 +702,13 @@ class GestorInventario:
     
     def obtener_stock_actual(self, producto_id: int) -> float:
         """Obtener stock actual de un producto"""
-        movimientos_producto = [m for m in self.movimientos if m.producto_id == producto_id]
-        if not movimientos_producto:
-            return 0.0
-        
-        # Último movimiento tiene el stock actual
-        ultimo_movimiento = max(movimientos_producto, key=lambda x: x.fecha)
-        return ultimo_movimiento.stock_nuevo
+        # Mantenido por el libro: stock_nuevo del movimiento más reciente
+        return self.libro.stock_actual(producto_id)
     
     def obtener_historial_producto(self, producto_id: int, dias: int = 30) -> List[MovimientoStock]:
         """Obtener historial de movimientos de un producto"""
         fecha_limite = datetime.now() - timedelta(days=dias)
-        return [
-            m for m in self.movimientos 
-            if m.producto_id == producto_id and m.fecha >= fecha_limite
-        ]
+        return self.libro.ventana(producto_id, desde=fecha_limite)
     
     def calcular_rotacion_inventario(self, producto_id: int, dias: int = 30) -> Dict:
         """Calcular métricas de rotación"""
@@ -292,63 +735,48 @@ class GestorInventario:
             "rotacion": ventas / stock_promedio if stock_promedio > 0 else 0
         }
     
-    def _verificar_alertas(self, producto_id: int):
-        """Verificar y generar alertas para un producto"""
-        config = self.configuraciones.get(producto_id)
-        if not config:
-            return
-        
-        stock_actual = self.obtener_stock_actual(producto_id)
-        
-        # Alerta de stock crítico
-        if stock_actual <= 0 and config.alertar_stock_critico:
-            self._crear_alerta(
-                producto_id=producto_id,
-                tipo="Stock Crítico",
-                nivel=NivelAlerta.CRITICO,
-                mensaje="Stock agotado"
-            )
-        
-        # Alerta de stock bajo
-        elif stock_actual <= config.stock_minimo and config.alertar_stock_bajo:
-            self._crear_alerta(
-                producto_id=producto_id,
-                tipo="Stock Bajo",
-                nivel=NivelAlerta.BAJO,
-                mensaje=f"Stock por debajo del mínimo ({stock_actual} < {config.stock_minimo})"
-            )
+    def agregados_demanda(self, dias: int = 90) -> Dict[int, Tuple[float, float]]:
+        """Salidas de los últimos días por producto: (total, suma de cuadrados de los totales diarios)"""
+        desde = datetime.now() - timedelta(days=dias)
+        if self.db is not None:
+            filas = self.db.demanda_por_producto(desde)
+            if filas is not None:
+                return {producto_id: (total, cuadrados) for producto_id, total, cuadrados in filas}
+        
+        # Sin base de datos: una pasada sobre los movimientos en memoria
+        por_dia: Dict[Tuple[int, object], float] = {}
+        for movimiento in self.libro.todos:
+            if movimiento.tipo == TipoMovimiento.SALIDA and movimiento.fecha >= desde:
+                clave = (movimiento.producto_id, movimiento.fecha.date())
+                por_dia[clave] = por_dia.get(clave, 0.0) + movimiento.cantidad
+        
+        agregados: Dict[int, Tuple[float, float]] = {}
+        for (producto_id, _), total in por_dia.items():
+            suma, cuadrados = agregados.get(producto_id, (0.0, 0.0))
+            agregados[producto_id] = (suma + total, cuadrados + total * total)
+        return agregados
+    
+    def _verificar_alertas(self, productos_ids: Iterable[int]):
+        """Evaluar umbrales de stock de los productos indicados"""
+        lecturas = []
+        for producto_id in productos_ids:
+            config = self.configuraciones.get(producto_id)
+            if config:
+                lecturas.append((config, self.obtener_stock_actual(producto_id)))
+        if lecturas:
+            self.motor_alertas.evaluar(lecturas)
     
     def _crear_alerta(self, producto_id: int, tipo: str, nivel: NivelAlerta, mensaje: str):
         """Crear nueva alerta"""
-        # Verificar si ya existe una alerta activa del mismo tipo
-        alerta_existente = next(
-            (a for a in self.alertas 
-             if a.producto_id == producto_id and a.tipo == tipo and a.activa),
-            None
-        )
-        
-        if not alerta_existente:
-            nueva_alerta = AlertaInventario(
-                id=len(self.alertas) + 1,
-                producto_id=producto_id,
-                tipo=tipo,
-                nivel=nivel,
-                mensaje=mensaje,
-                fecha_creacion=datetime.now()
-            )
-            self.alertas.append(nueva_alerta)
+        return self.motor_alertas.crear(producto_id, tipo, nivel, mensaje)
     
     def obtener_alertas_activas(self) -> List[AlertaInventario]:
         """Obtener alertas activas"""
-        return [a for a in self.alertas if a.activa]
+        return self.motor_alertas.obtener_activas()
     
-    def resolver_alerta(self, alerta_id: int):
+    def resolver_alerta(self, alerta_id: int) -> bool:
         """Marcar alerta como resuelta"""
-        for alerta in self.alertas:
-            if alerta.id == alerta_id and alerta.activa:
-                alerta.activa = False
-                alerta.fecha_resolucion = datetime.now()
-                break
+        return self.motor_alertas.resolver(alerta_id)
     
     def obtener_productos_criticos(self) -> List[Dict]:
         """Obtener productos con stock crítico"""
@@ -396,35 +824,138 @@ class GestorInventario:
     
     def realizar_inventario_fisico(self, inventario_data: List[Dict]) -> List[MovimientoStock]:
         """Realizar inventario físico y generar ajustes"""
-        movimientos_ajuste = []
+        # Si un producto se repite prevalece el último conteo
+        contados = {item["producto_id"]: item["stock_fisico"] for item in inventario_data}
+        
+        with self._lock_registro:
+            ajustes, _ = self._calcular_ajustes(contados, datetime.now(), "INV-FISICO", "Inventario", 0.01)
+            # Todos los ajustes en una sola transacción
+            self.registrar_movimientos(ajustes)
+        return ajustes
+    
+    def conciliar_inventario_fisico(self, conteos, acumular: bool = True, tolerancia: float = 0.01,
+                                    referencia: str = "INV-FISICO", usuario: str = "Inventario",
+                                    max_diferencias: int = 20) -> Dict:
+        """Conciliar un conteo físico masivo contra el stock del sistema
+        
+        Agrupa las líneas por producto, calcula todas las diferencias contra
+        una foto del stock en una sola pasada y registra los ajustes en una
+        sola transacción (y una sola evaluación de alertas).
+        
+        Args:
+            conteos: Ruta de CSV o iterable de líneas (ver leer_conteos)
+            acumular: Suma las líneas repetidas de un producto (conteos por
+                ubicación); si es False prevalece la última
+            tolerancia: Diferencia mínima que genera ajuste
+            max_diferencias: Mayores diferencias incluidas en el reporte
+        
+        Returns:
+            Dict: Resumen de diferencias y ajustes registrados
+        """
+        inicio = time.perf_counter()
+        lineas = invalidas = 0
+        contados: Dict[int, float] = {}
+        for conteo in leer_conteos(conteos):
+            lineas += 1
+            if conteo is None:
+                invalidas += 1
+                continue
+            producto_id, cantidad = conteo
+            contados[producto_id] = contados.get(producto_id, 0.0) + cantidad if acumular else cantidad
+        
+        # La foto del stock y el registro de ajustes no se intercalan con otros movimientos
+        with self._lock_registro:
+            ajustes, resumen = self._calcular_ajustes(contados, datetime.now(), referencia, usuario,
+                                                      tolerancia, max_diferencias)
+            registrados = self.registrar_movimientos(ajustes) if ajustes else 0
+            no_contados = sum(
+                1 for producto_id in self.libro.productos()
+                if producto_id not in contados and self.libro.stock_actual(producto_id) != 0
+            )
         
-        for item in inventario_data:
-            producto_id = item["producto_id"]
-            stock_fisico = item["stock_fisico"]
-            stock_sistema = self.obtener_stock_actual(producto_id)
-            
-            diferencia = stock_fisico - stock_sistema
-            
-            if abs(diferencia) >= 0.01:  # Si hay diferencia significativa
-                tipo_movimiento = TipoMovimiento.AJUSTE_POSITIVO if diferencia > 0 else TipoMovimiento.AJUSTE_NEGATIVO
-                
-                movimiento = MovimientoStock(
-                    id=len(self.movimientos) + len(movimientos_ajuste) + 1,
-                    producto_id=producto_id,
-                    fecha=datetime.now(),
-                    tipo=tipo_movimiento,
-                    cantidad=abs(diferencia),
-                    stock_anterior=stock_sistema,
-                    stock_nuevo=stock_fisico,
-                    referencia="INV-FISICO",
-                    motivo="Ajuste por inventario físico",
-                    usuario="Inventario"
-                )
-                
-                movimientos_ajuste.append(movimiento)
-                self.registrar_movimiento(movimiento)
+        resumen.update({
+            "fecha": datetime.now().isoformat(),
+            "lineas": lineas,
+            "lineas_invalidas": invalidas,
+            "productos_contados": len(contados),
+            "productos_no_contados_con_stock": no_contados,
+            "ajustes_generados": len(ajustes),
+            "ajustes_registrados": registrados,
+            "exactitud": round(100 * (1 - len(ajustes) / len(contados)), 2) if contados else 100.0,
+            "duracion_segundos": round(time.perf_counter() - inicio, 3),
+        })
+        return resumen
+    
+    def conciliar_en_segundo_plano(self, conteos, al_terminar: Callable[[Dict], None], **opciones) -> threading.Thread:
+        """Ejecutar conciliar_inventario_fisico en un hilo propio
+        
+        al_terminar recibe el reporte (o {'error': ...}) desde ese hilo; la
+        interfaz debe pasar a su hilo con after().
+        """
+        def conciliar():
+            try:
+                reporte = self.conciliar_inventario_fisico(conteos, **opciones)
+            except (OSError, csv.Error) as e:
+                reporte = {"error": str(e)}
+            al_terminar(reporte)
+        
+        hilo = threading.Thread(target=conciliar, name="conciliacion-inventario", daemon=True)
+        hilo.start()
+        return hilo
+    
+    def _calcular_ajustes(self, contados: Dict[int, float], fecha: datetime, referencia: str,
+                          usuario: str, tolerancia: float, max_diferencias: int = 0) -> Tuple[List[MovimientoStock], Dict]:
+        """Movimientos de ajuste y totales de diferencias de un conteo agrupado por producto"""
+        ids = list(contados)
+        if NUMPY_DISPONIBLE:
+            fisico = np.fromiter(contados.values(), dtype='float64', count=len(ids))
+            sistema = np.fromiter(map(self.libro.stock_actual, ids), dtype='float64', count=len(ids))
+            diferencias = fisico - sistema
+            con_diferencia = np.flatnonzero(np.abs(diferencias) >= tolerancia).tolist()
+            sobrante = float(diferencias[diferencias > 0].sum())
+            faltante = abs(float(diferencias[diferencias < 0].sum()))
+            fisico, sistema, diferencias = fisico.tolist(), sistema.tolist(), diferencias.tolist()
+        else:
+            fisico = list(contados.values())
+            sistema = [float(self.libro.stock_actual(producto_id)) for producto_id in ids]
+            diferencias = [f - s for f, s in zip(fisico, sistema)]
+            con_diferencia = [i for i, d in enumerate(diferencias) if abs(d) >= tolerancia]
+            sobrante = sum((d for d in diferencias if d > 0), 0.0)
+            faltante = abs(sum((d for d in diferencias if d < 0), 0.0))
+        
+        primer_id = self.libro.siguiente_id()
+        ajustes = [
+            MovimientoStock(
+                id=primer_id + n,
+                producto_id=ids[i],
+                fecha=fecha,
+                tipo=TipoMovimiento.AJUSTE_POSITIVO if diferencias[i] > 0 else TipoMovimiento.AJUSTE_NEGATIVO,
+                cantidad=abs(diferencias[i]),
+                stock_anterior=sistema[i],
+                stock_nuevo=fisico[i],
+                referencia=referencia,
+                motivo="Ajuste por inventario físico",
+                usuario=usuario
+            )
+            for n, i in enumerate(con_diferencia)
+        ]
         
-        return movimientos_ajuste
+        mayores = sorted(con_diferencia, key=lambda i: abs(diferencias[i]), reverse=True)[:max_diferencias]
+        resumen = {
+            "unidades_sobrantes": round(sobrante, 3),
+            "unidades_faltantes": round(faltante, 3),
+            "diferencia_neta": round(sobrante - faltante, 3),
+            "mayores_diferencias": [
+                {
+                    "producto_id": ids[i],
+                    "stock_sistema": sistema[i],
+                    "stock_fisico": fisico[i],
+                    "diferencia": round(diferencias[i], 3),
+                }
+                for i in mayores
+            ],
+        }
+        return ajustes, resumen
     
     def exportar_reporte_inventario(self) -> str:
         """Exportar reporte completo del inventario"""
@@ -446,6 +977,12 @@ class InterfazInventario:
         self.gestor = gestor
         self.productos = productos or []
         
+        # Panel de alertas actualizado por eventos del motor de alertas
+        self._alertas_frame = None
+        self._labels_alertas: Dict[str, ctk.CTkLabel] = {}
+        self._items_alerta: Dict[int, ctk.CTkFrame] = {}
+        self.gestor.motor_alertas.suscribir(self._al_cambiar_alerta)
+        
     def mostrar_inventario(self):
         """Mostrar interfaz principal de inventario"""
         # Limpiar frame
@@ -660,21 +1197,9 @@ class InterfazInventario:
         )
         btn_filtrar.pack(side="left", padx=20)
         
-        # Lista de movimientos
-        self.movimientos_frame = ctk.CTkScrollableFrame(parent)
-        self.movimientos_frame.pack(fill="both", expand=True, padx=15, pady=15)
-        
-        self._cargar_movimientos()
-    
-    def _cargar_movimientos(self):
-        """Cargar y mostrar movimientos"""
-        # Limpiar frame
-        for widget in self.movimientos_frame.winfo_children():
-            widget.destroy()
-        
         # Headers
-        headers_frame = ctk.CTkFrame(self.movimientos_frame)
-        headers_frame.pack(fill="x", pady=(0, 10))
+        headers_frame = ctk.CTkFrame(parent)
+        headers_frame.pack(fill="x", padx=15, pady=(15, 0))
         
         headers = ["Fecha", "Producto", "Tipo", "Cantidad", "Stock", "Referencia"]
         
@@ -686,21 +1211,37 @@ class InterfazInventario:
             )
             label.grid(row=0, column=i, padx=10, pady=8, sticky="w")
         
-        # Movimientos recientes
+        # Lista de movimientos (virtualizada: solo filas visibles)
+        self.movimientos_lista = ListaVirtual(
+            parent, self._crear_fila_movimiento, self._vincular_fila_movimiento,
+            alto_fila=34, mensaje_vacio="Sin movimientos registrados"
+        )
+        self.movimientos_lista.pack(fill="both", expand=True, padx=15, pady=15)
+        
+        self._cargar_movimientos()
+    
+    def _cargar_movimientos(self):
+        """Cargar y mostrar movimientos"""
+        # Movimientos más recientes primero
         movimientos_recientes = sorted(
             self.gestor.movimientos,
             key=lambda x: x.fecha,
             reverse=True
-        )[:20]  # Últimos 20 movimientos
+        )
         
-        for movimiento in movimientos_recientes:
-            self._crear_fila_movimiento(movimiento)
+        self.movimientos_lista.establecer_datos(movimientos_recientes)
     
-    def _crear_fila_movimiento(self, movimiento: MovimientoStock):
-        """Crear fila para un movimiento"""
-        frame = ctk.CTkFrame(self.movimientos_frame)
-        frame.pack(fill="x", pady=1)
-        
+    def _crear_fila_movimiento(self, frame):
+        """Crear fila reciclable de movimiento"""
+        labels = []
+        for i in range(6):
+            label = ctk.CTkLabel(frame, text="")
+            label.grid(row=0, column=i, padx=10, pady=5, sticky="w")
+            labels.append(label)
+        return labels
+    
+    def _vincular_fila_movimiento(self, labels, movimiento: MovimientoStock, indice):
+        """Mostrar un movimiento en una fila reciclada"""
         # Color según tipo de movimiento
         tipo_colors = {
             TipoMovimiento.ENTRADA: "#28a745",
@@ -721,14 +1262,9 @@ class InterfazInventario:
             movimiento.referencia
         ]
         
-        for i, data in enumerate(cols_data):
-            color = tipo_color if i == 2 else None
-            label = ctk.CTkLabel(
-                frame,
-                text=data,
-                text_color=color
-            )
-            label.grid(row=0, column=i, padx=10, pady=5, sticky="w")
+        for label, data in zip(labels, cols_data):
+            label.configure(text=data)
+        labels[2].configure(text_color=tipo_color)
     
     def _mostrar_panel_alertas(self, parent):
         """Mostrar panel de alertas"""
@@ -740,14 +1276,16 @@ class InterfazInventario:
         stats_container.pack(fill="x", padx=10, pady=10)
         
         alertas_activas = self.gestor.obtener_alertas_activas()
+        self._labels_alertas = {}
+        self._items_alerta = {}
         
         stats_data = [
-            ("Total Alertas", str(len(alertas_activas)), "#007bff"),
-            ("Críticas", str(len([a for a in alertas_activas if a.nivel == NivelAlerta.CRITICO])), "#dc3545"),
-            ("Stock Bajo", str(len([a for a in alertas_activas if a.nivel == NivelAlerta.BAJO])), "#ffc107"),
+            ("Total Alertas", "#007bff"),
+            ("Críticas", "#dc3545"),
+            ("Stock Bajo", "#ffc107"),
         ]
         
-        for label, value, color in stats_data:
+        for label, color in stats_data:
             stat_frame = ctk.CTkFrame(stats_container)
             stat_frame.pack(side="left", fill="both", expand=True, padx=10)
             
@@ -756,23 +1294,61 @@ class InterfazInventario:
             
             stat_value = ctk.CTkLabel(
                 stat_frame,
-                text=value,
+                text="0",
                 font=ctk.CTkFont(size=20, weight="bold"),
                 text_color=color
             )
             stat_value.pack(pady=(0, 10))
+            self._labels_alertas[label] = stat_value
+        
+        self._actualizar_conteo_alertas()
         
         # Lista de alertas
-        alertas_frame = ctk.CTkScrollableFrame(parent)
-        alertas_frame.pack(fill="both", expand=True, padx=15, pady=15)
+        self._alertas_frame = ctk.CTkScrollableFrame(parent)
+        self._alertas_frame.pack(fill="both", expand=True, padx=15, pady=15)
         
         for alerta in alertas_activas:
-            self._crear_item_alerta(alertas_frame, alerta)
+            self._crear_item_alerta(self._alertas_frame, alerta)
+    
+    def _actualizar_conteo_alertas(self):
+        """Actualizar contadores del panel con los conteos del motor de alertas"""
+        conteo = self.gestor.motor_alertas.contar_por_nivel()
+        valores = {
+            "Total Alertas": sum(conteo.values()),
+            "Críticas": conteo.get(NivelAlerta.CRITICO, 0),
+            "Stock Bajo": conteo.get(NivelAlerta.BAJO, 0),
+        }
+        for label, valor in valores.items():
+            if label in self._labels_alertas:
+                self._labels_alertas[label].configure(text=str(valor))
+    
+    def _al_cambiar_alerta(self, evento: str, alerta: AlertaInventario):
+        """Suscriptor del motor de alertas: puede llamarse desde otro hilo"""
+        if self._alertas_frame is None:
+            return
+        try:
+            self._alertas_frame.after(0, lambda: self._aplicar_cambio_alerta(evento, alerta))
+        except (RuntimeError, tk.TclError):
+            # Ventana cerrada o mainloop detenido
+            self._alertas_frame = None
+    
+    def _aplicar_cambio_alerta(self, evento: str, alerta: AlertaInventario):
+        """Agregar o quitar solo el item de la alerta que cambió"""
+        if self._alertas_frame is None or not self._alertas_frame.winfo_exists():
+            return
+        if evento == EVENTO_ALERTA_CREADA:
+            self._crear_item_alerta(self._alertas_frame, alerta)
+        elif evento == EVENTO_ALERTA_RESUELTA:
+            item = self._items_alerta.pop(alerta.id, None)
+            if item is not None:
+                item.destroy()
+        self._actualizar_conteo_alertas()
     
     def _crear_item_alerta(self, parent, alerta: AlertaInventario):
         """Crear item visual para alerta"""
         frame = ctk.CTkFrame(parent)
         frame.pack(fill="x", pady=5, padx=5)
+        self._items_alerta[alerta.id] = frame
         
         # Color según nivel
         nivel_colors = {
@@ -983,8 +1559,35 @@ class InterfazInventario:
         messagebox.showinfo("Ajustar Stock", "🚧 Formulario de ajuste de stock en desarrollo")
     
     def _inventario_fisico(self):
-        """Iniciar proceso de inventario físico"""
-        messagebox.showinfo("Inventario Físico", "🚧 Proceso de inventario físico en desarrollo")
+        """Importar un conteo físico (CSV) y conciliarlo en segundo plano"""
+        archivo = filedialog.askopenfilename(
+            title="Conteo de inventario físico",
+            filetypes=[("CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        if not archivo:
+            return
+        
+        self.gestor.conciliar_en_segundo_plano(
+            archivo,
+            lambda reporte: self.parent_frame.after(0, lambda: self._mostrar_conciliacion(reporte))
+        )
+        messagebox.showinfo("Inventario Físico", "⏳ Conciliando el conteo en segundo plano...")
+    
+    def _mostrar_conciliacion(self, reporte: Dict):
+        """Mostrar resumen de diferencias del inventario físico"""
+        if "error" in reporte:
+            messagebox.showerror("Inventario Físico", f"❌ No se pudo leer el conteo:\n{reporte['error']}")
+            return
+        
+        messagebox.showinfo(
+            "Inventario Físico",
+            f"✅ Conciliación terminada en {reporte['duracion_segundos']} s\n\n"
+            f"📋 Líneas: {reporte['lineas']} ({reporte['lineas_invalidas']} inválidas)\n"
+            f"📦 Productos contados: {reporte['productos_contados']}\n"
+            f"⚖️ Ajustes registrados: {reporte['ajustes_registrados']} de {reporte['ajustes_generados']}\n"
+            f"➕ Sobrantes: {reporte['unidades_sobrantes']} | ➖ Faltantes: {reporte['unidades_faltantes']}\n"
+            f"🎯 Exactitud: {reporte['exactitud']}%"
+        )
     
     def _mostrar_alertas(self):
         """Mostrar ventana de alertas"""
@@ -1009,8 +1612,8 @@ class InterfazInventario:
     
     def _resolver_alerta(self, alerta_id):
         """Resolver alerta específica"""
+        # El item se quita del panel con el evento de resolución
         self.gestor.resolver_alerta(alerta_id)
-        # Refrescar vista de alertas
         messagebox.showinfo("Resuelto", "✅ Alerta marcada como resuelta")
     
     def _crear_orden_sugerida(self, producto_critico):
@@ -1018,9 +1621,15 @@ class InterfazInventario:
         messagebox.showinfo("Orden", f"🚧 Crear orden para producto {producto_critico['producto_id']} en desarrollo")
 
 # Funciones de utilidad
-def crear_gestor_inventario():
-    """Crear instancia del gestor de inventario"""
-    return GestorInventario()
+def crear_gestor_inventario(db_manager=None, productos_callback=None):
+    """Crear instancia del gestor de inventario
+
+    Args:
+        db_manager: DatabaseManager de la aplicación; sin él el gestor
+            trabaja con datos de demostración en memoria
+        productos_callback: Función que obtiene los productos del sistema principal
+    """
+    return GestorInventario(productos_callback=productos_callback, db_manager=db_manager)
 
 def integrar_con_sistema_principal(main_app, gestor_inventario):
     """Integrar gestión de inventario con el sistema principal"""
@@ -22,10 +22,16 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 from datetime import datetime, timedelta
 import json
+import sqlite3
+import threading
 from dataclasses import dataclass, asdict
 from typing import List, Optional, Dict
 from enum import Enum
 
+from database.busqueda import crear_indice_proveedores
+from database.consultas import ConsultasSQL
+from utils.programador_busqueda import ProgramadorBusqueda
+
 class TipoProveedor(Enum):
     """Tipos de proveedores"""
     MAYORISTA = "Mayorista"
@@ -118,7 +124,17 @@ class GestorProveedores:
     def __init__(self):
         self.proveedores: List[Proveedor] = []
         self.ordenes: List[OrdenCompra] = []
+        self._por_id: Dict[int, Proveedor] = {}
+        
+        # Índice FTS5 en memoria para búsquedas por texto; las búsquedas
+        # llegan desde el hilo del programador de búsquedas
+        self._indice = sqlite3.connect(':memory:', check_same_thread=False)
+        self._lock_indice = threading.Lock()
+        crear_indice_proveedores(self._indice)
+        
         self._inicializar_datos_demo()
+        for proveedor in self.proveedores:
+            self._indexar_proveedor(proveedor)
     
     def _inicializar_datos_demo(self):
         """Datos de demostración"""
@@ -188,27 +204,49 @@ class GestorProveedores:
         """Agregar nuevo proveedor"""
         try:
             # Validar que no exista
-            if any(p.id == proveedor.id for p in self.proveedores):
+            if proveedor.id in self._por_id:
                 return False
             
             self.proveedores.append(proveedor)
+            self._indexar_proveedor(proveedor)
             return True
         except Exception:
             return False
     
+    def actualizar_indice_proveedor(self, proveedor: Proveedor):
+        """Reindexar un proveedor tras editar sus datos"""
+        self._indexar_proveedor(proveedor)
+    
+    def _indexar_proveedor(self, proveedor: Proveedor):
+        """Registrar (o reemplazar) un proveedor en el índice de búsqueda"""
+        self._por_id[proveedor.id] = proveedor
+        with self._lock_indice, self._indice:
+            self._indice.execute("DELETE FROM proveedores_fts WHERE rowid = ?", (proveedor.id,))
+            self._indice.execute(
+                "INSERT INTO proveedores_fts (rowid, nombre, contacto_principal, email, categorias, rfc_nit) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (proveedor.id, proveedor.nombre, proveedor.contacto_principal, proveedor.email,
+                 ' '.join(proveedor.categoria_productos), proveedor.rfc_nit)
+            )
+    
     def obtener_proveedor(self, proveedor_id: int) -> Optional[Proveedor]:
         """Obtener proveedor por ID"""
-        return next((p for p in self.proveedores if p.id == proveedor_id), None)
+        return self._por_id.get(proveedor_id)
     
-    def buscar_proveedores(self, termino: str) -> List[Proveedor]:
-        """Buscar proveedores por nombre o contacto"""
-        termino = termino.lower()
-        return [
-            p for p in self.proveedores 
-            if termino in p.nombre.lower() or 
-               termino in p.contacto_principal.lower() or
-               termino in p.email.lower()
-        ]
+    def buscar_proveedores(self, termino: str, limite: int = 50, pagina: int = 1) -> List[Proveedor]:
+        """Buscar proveedores por nombre, contacto, email, categorías o RFC
+        
+        Usa el índice FTS5: coincidencia por prefijo de cada palabra, sin
+        distinguir acentos, ordenada por relevancia.
+        """
+        consulta = ConsultasSQL.buscar_proveedores_texto(termino, limite, pagina)
+        try:
+            with self._lock_indice:
+                filas = self._indice.execute(consulta.sql, consulta.parametros).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error en búsqueda de proveedores: {e}")
+            return []
+        return [self._por_id[fila[0]] for fila in filas if fila[0] in self._por_id]
     
     def obtener_proveedores_por_categoria(self, categoria: str) -> List[Proveedor]:
         """Obtener proveedores por categoría de productos"""
@@ -266,8 +304,15 @@ class InterfazProveedores:
         self.gestor = gestor
         self.proveedor_seleccionado = None
         
+        # Búsqueda con debounce; la consulta FTS corre fuera del hilo de Tk
+        self.programador_busqueda = ProgramadorBusqueda(
+            parent_frame, self._consultar_proveedores, self._mostrar_resultados_busqueda
+        )
+        
     def mostrar_proveedores(self):
         """Mostrar interfaz principal de proveedores"""
+        self.programador_busqueda.cancelar()
+        
         # Limpiar frame
         for widget in self.parent_frame.winfo_children():
             widget.destroy()
@@ -328,6 +373,7 @@ class InterfazProveedores:
         )
         self.search_entry.pack(side="left", padx=(0, 5))
         self.search_entry.bind("<Return>", self._buscar_proveedores)
+        self.search_entry.bind("<KeyRelease>", self._busqueda_en_tiempo_real)
         
         btn_buscar = ctk.CTkButton(
             search_frame,
@@ -613,11 +659,26 @@ class InterfazProveedores:
         """Buscar proveedores"""
         termino = self.search_entry.get().strip()
         if termino:
-            resultados = self.gestor.buscar_proveedores(termino)
-            self._mostrar_resultados_busqueda(resultados)
+            self.programador_busqueda.ejecutar_ahora(termino)
+        else:
+            self.programador_busqueda.cancelar()
+            self._actualizar_lista_proveedores()
+    
+    def _busqueda_en_tiempo_real(self, event):
+        """Búsqueda mientras se escribe"""
+        if event.keysym in ("Return", "KP_Enter"):
+            return
+        termino = self.search_entry.get().strip()
+        if termino:
+            self.programador_busqueda.programar(termino)
         else:
+            self.programador_busqueda.cancelar()
             self._actualizar_lista_proveedores()
     
+    def _consultar_proveedores(self, termino):
+        """Consultar proveedores (se ejecuta fuera del hilo de Tk)"""
+        return self.gestor.buscar_proveedores(termino)
+    
     def _mostrar_resultados_busqueda(self, resultados):
         """Mostrar resultados de búsqueda"""
         # Limpiar lista
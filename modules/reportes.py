@@ -25,11 +25,16 @@ from tkinter import messagebox, ttk, filedialog
 from datetime import datetime, timedelta
 import json
 import csv
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional, Tuple
+import gzip
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Callable, Sequence
 from enum import Enum
 import math
 import statistics
+from bisect import bisect_left, bisect_right
+from utils.logger import get_logger
 
 # Importaciones para gráficos (simuladas para demo)
 try:
@@ -41,6 +46,14 @@ except ImportError:
     GRAFICOS_DISPONIBLES = False
     print("📊 Matplotlib no disponible - usando gráficos simulados")
 
+# Motor analítico columnar (NumPy si está disponible)
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    np = None
+    NUMPY_DISPONIBLE = False
+
 class TipoReporte(Enum):
     """Tipos de reportes disponibles"""
     VENTAS_DIARIAS = "Ventas Diarias"
@@ -62,8 +75,55 @@ class FormatoExporte(Enum):
     EXCEL = "Excel"
     CSV = "CSV"
     JSON = "JSON"
+    NDJSON = "NDJSON"
     IMAGEN = "Imagen"
 
+class FormatoColumna(Enum):
+    """Formatos de presentación de columnas y KPIs"""
+    TEXTO = "texto"
+    ENTERO = "entero"
+    DECIMAL = "decimal"
+    MONEDA = "moneda"
+    PORCENTAJE = "porcentaje"
+    VARIACION = "variacion"
+    FECHA = "fecha"
+
+def _valor_escalar(valor):
+    """Convierte escalares de NumPy a tipos nativos de Python"""
+    return valor.item() if hasattr(valor, 'item') else valor
+
+def _fecha_de_valor(valor):
+    """Obtiene una fecha a partir de un día ordinal, date o datetime"""
+    if isinstance(valor, (int, float)):
+        return datetime.fromordinal(int(valor)).date()
+    return valor
+
+def formatear_valor(valor, formato: FormatoColumna) -> str:
+    """Formatea un valor crudo para mostrarlo al usuario"""
+    valor = _valor_escalar(valor)
+    if valor is None:
+        return "-"
+    if formato == FormatoColumna.MONEDA:
+        return f"${valor:,.2f}"
+    if formato == FormatoColumna.ENTERO:
+        return f"{int(valor):,}"
+    if formato == FormatoColumna.DECIMAL:
+        return f"{valor:,.1f}"
+    if formato == FormatoColumna.PORCENTAJE:
+        return f"{valor:.1f}%"
+    if formato == FormatoColumna.VARIACION:
+        return f"{valor:+.1f}%"
+    if formato == FormatoColumna.FECHA:
+        return _fecha_de_valor(valor).strftime('%d/%m/%Y')
+    return str(valor)
+
+def valor_exportable(valor, formato: FormatoColumna):
+    """Convierte un valor crudo a un tipo legible por máquina (fechas en ISO)"""
+    valor = _valor_escalar(valor)
+    if formato == FormatoColumna.FECHA and valor is not None:
+        return _fecha_de_valor(valor).isoformat()
+    return valor
+
 @dataclass
 class ConfiguracionReporte:
     """Configuración para generar reportes"""
@@ -102,11 +162,14 @@ class DatosReporte:
     periodo: str
     fecha_generacion: datetime
     
-    # Datos principales
+    # Datos principales (valores crudos; el formato se aplica al mostrar)
     resumen: Dict
-    datos_tabla: List[Dict]
+    columnas: Dict[str, Sequence]
     metricas_kpi: Dict
     
+    # Esquema de formato por nombre de columna o KPI (TEXTO si no aparece)
+    formatos: Dict[str, FormatoColumna] = None
+    
     # Comparativas
     comparativo_anterior: Optional[Dict] = None
     tendencia: Optional[str] = None
@@ -116,8 +179,229 @@ class DatosReporte:
     filtros_aplicados: List[str] = None
     
     def __post_init__(self):
+        if self.formatos is None:
+            self.formatos = {}
         if self.filtros_aplicados is None:
             self.filtros_aplicados = []
+    
+    @property
+    def num_filas(self) -> int:
+        """Número de filas de la tabla"""
+        return max((len(valores) for valores in self.columnas.values()), default=0)
+    
+    def formato(self, nombre: str) -> FormatoColumna:
+        """Formato declarado para una columna o KPI"""
+        return self.formatos.get(nombre, FormatoColumna.TEXTO)
+    
+    def iterar_filas(self, formatear: bool = False, limite: Optional[int] = None) -> Iterator[Dict]:
+        """Genera las filas de la tabla, formateadas para UI o crudas para exportar"""
+        convertir = formatear_valor if formatear else valor_exportable
+        nombres = list(self.columnas)
+        formatos = [self.formato(nombre) for nombre in nombres]
+        total = self.num_filas if limite is None else min(limite, self.num_filas)
+        for i in range(total):
+            yield {
+                nombre: convertir(self.columnas[nombre][i], formato)
+                for nombre, formato in zip(nombres, formatos)
+            }
+    
+    def kpis_formateados(self) -> Dict[str, str]:
+        """KPIs con su formato de presentación"""
+        return {kpi: formatear_valor(valor, self.formato(kpi)) for kpi, valor in self.metricas_kpi.items()}
+
+class MotorAnaliticoVentas:
+    """Motor analítico columnar para el histórico de ventas y productos
+    
+    Las ventas se guardan en columnas ordenadas por día: fechas como días
+    ordinales int64, totales float64 y transacciones int32. Los rangos se
+    seleccionan con búsqueda binaria y las agregaciones son vectorizadas.
+    Sin NumPy se usan listas con bisect y el mismo API.
+    """
+    
+    def __init__(self):
+        self.dias = self._columna([], 'int64')
+        self.totales = self._columna([], 'float64')
+        self.transacciones = self._columna([], 'int32')
+        
+        self.productos_nombres: List[str] = []
+        self.productos_vendidos = self._columna([], 'int64')
+        self.productos_ingresos = self._columna([], 'float64')
+        self.productos_margen = self._columna([], 'float64')
+        
+        self.clientes_nombres: List[str] = []
+        self.clientes_compras = self._columna([], 'int64')
+        self.clientes_total = self._columna([], 'float64')
+    
+    @staticmethod
+    def _columna(valores, tipo: str):
+        """Crea una columna con el tipo indicado"""
+        if NUMPY_DISPONIBLE:
+            return np.asarray(valores, dtype=tipo)
+        return list(valores)
+    
+    @staticmethod
+    def dia_ordinal(fecha) -> int:
+        """Convierte una fecha o datetime a día ordinal"""
+        return fecha.toordinal()
+    
+    @staticmethod
+    def fecha_desde_dia(dia: int) -> datetime:
+        """Convierte un día ordinal a datetime"""
+        return datetime.fromordinal(int(dia))
+    
+    # =================== CARGA ===================
+    
+    def cargar_ventas(self, ventas: List[Dict]):
+        """Carga ventas diarias ({'fecha', 'total', 'transacciones'}) ordenadas por día"""
+        registros = sorted(
+            (self.dia_ordinal(v['fecha']), v['total'], v['transacciones']) for v in ventas
+        )
+        self.dias = self._columna([r[0] for r in registros], 'int64')
+        self.totales = self._columna([r[1] for r in registros], 'float64')
+        self.transacciones = self._columna([r[2] for r in registros], 'int32')
+    
+    def cargar_productos(self, productos: List[Dict]):
+        """Carga las columnas de productos ({'nombre', 'vendidos', 'ingresos', 'margen'})"""
+        self.productos_nombres = [p['nombre'] for p in productos]
+        self.productos_vendidos = self._columna([p['vendidos'] for p in productos], 'int64')
+        self.productos_ingresos = self._columna([p['ingresos'] for p in productos], 'float64')
+        self.productos_margen = self._columna([p['margen'] for p in productos], 'float64')
+    
+    def cargar_clientes(self, clientes: List[Dict]):
+        """Carga las columnas de clientes ({'nombre', 'compras', 'total'})"""
+        self.clientes_nombres = [c['nombre'] for c in clientes]
+        self.clientes_compras = self._columna([c['compras'] for c in clientes], 'int64')
+        self.clientes_total = self._columna([c['total'] for c in clientes], 'float64')
+    
+    # =================== VENTAS ===================
+    
+    def indices_rango(self, fecha_inicio, fecha_fin) -> Tuple[int, int]:
+        """Índices [i, j) de los días dentro del rango inclusivo de fechas"""
+        inicio = self.dia_ordinal(fecha_inicio)
+        fin = self.dia_ordinal(fecha_fin)
+        if NUMPY_DISPONIBLE:
+            return (int(np.searchsorted(self.dias, inicio, side='left')),
+                    int(np.searchsorted(self.dias, fin, side='right')))
+        return bisect_left(self.dias, inicio), bisect_right(self.dias, fin)
+    
+    def agregar_rango(self, fecha_inicio, fecha_fin) -> Dict:
+        """Agrega totales, transacciones y extremos de un rango de fechas"""
+        i, j = self.indices_rango(fecha_inicio, fecha_fin)
+        resultado = {'registros': j - i, 'total': 0.0, 'transacciones': 0,
+                     'dia_max': None, 'total_max': 0.0, 'dia_min': None, 'total_min': 0.0}
+        if j <= i:
+            return resultado
+        
+        totales = self.totales[i:j]
+        if NUMPY_DISPONIBLE:
+            idx_max = int(np.argmax(totales))
+            idx_min = int(np.argmin(totales))
+            resultado['total'] = float(totales.sum())
+            resultado['transacciones'] = int(self.transacciones[i:j].sum(dtype=np.int64))
+        else:
+            idx_max = max(range(len(totales)), key=totales.__getitem__)
+            idx_min = min(range(len(totales)), key=totales.__getitem__)
+            resultado['total'] = float(sum(totales))
+            resultado['transacciones'] = int(sum(self.transacciones[i:j]))
+        
+        resultado['dia_max'] = self.fecha_desde_dia(self.dias[i + idx_max])
+        resultado['total_max'] = float(totales[idx_max])
+        resultado['dia_min'] = self.fecha_desde_dia(self.dias[i + idx_min])
+        resultado['total_min'] = float(totales[idx_min])
+        return resultado
+    
+    def serie_rango(self, fecha_inicio, fecha_fin) -> Tuple:
+        """Columnas (días, totales, transacciones) del rango sin copiar datos"""
+        i, j = self.indices_rango(fecha_inicio, fecha_fin)
+        return self.dias[i:j], self.totales[i:j], self.transacciones[i:j]
+    
+    def promedios_mitades(self, fecha_inicio, fecha_fin) -> Tuple[int, float, float]:
+        """Número de días y promedio de ventas de la primera y segunda mitad del rango"""
+        _, totales, _ = self.serie_rango(fecha_inicio, fecha_fin)
+        n = len(totales)
+        mitad = n // 2
+        if mitad == 0:
+            return n, 0.0, 0.0
+        if NUMPY_DISPONIBLE:
+            return n, float(totales[:mitad].mean()), float(totales[mitad:].mean())
+        return n, statistics.mean(totales[:mitad]), statistics.mean(totales[mitad:])
+    
+    # =================== PRODUCTOS ===================
+    
+    def totales_productos(self) -> Dict:
+        """Totales de ingresos, unidades, costo estimado y margen promedio"""
+        if not self.productos_nombres:
+            return {'ingresos': 0.0, 'unidades': 0, 'costo': 0.0, 'margen_promedio': 0.0}
+        costos = self.costos_productos()
+        if NUMPY_DISPONIBLE:
+            return {
+                'ingresos': float(self.productos_ingresos.sum()),
+                'unidades': int(self.productos_vendidos.sum()),
+                'costo': float(costos.sum()),
+                'margen_promedio': float(self.productos_margen.mean())
+            }
+        return {
+            'ingresos': float(sum(self.productos_ingresos)),
+            'unidades': int(sum(self.productos_vendidos)),
+            'costo': float(sum(costos)),
+            'margen_promedio': statistics.mean(self.productos_margen)
+        }
+    
+    def costos_productos(self):
+        """Costo estimado por producto a partir de ingresos y margen"""
+        if NUMPY_DISPONIBLE:
+            return self.productos_ingresos * (100.0 - self.productos_margen) / 100.0
+        return [i * (100.0 - m) / 100.0 for i, m in zip(self.productos_ingresos, self.productos_margen)]
+    
+    def participacion_productos(self):
+        """Porcentaje de ingresos de cada producto sobre el total"""
+        total = self.totales_productos()['ingresos']
+        if NUMPY_DISPONIBLE:
+            return self.productos_ingresos / total * 100.0 if total else np.zeros_like(self.productos_ingresos)
+        return [i / total * 100.0 if total else 0.0 for i in self.productos_ingresos]
+    
+    # =================== CLIENTES ===================
+    
+    def totales_clientes(self) -> Dict:
+        """Totales de facturación y compras de los clientes"""
+        if NUMPY_DISPONIBLE:
+            return {'total': float(self.clientes_total.sum()),
+                    'compras': int(self.clientes_compras.sum())}
+        return {'total': float(sum(self.clientes_total)),
+                'compras': int(sum(self.clientes_compras))}
+    
+    # =================== UTILIDADES ===================
+    
+    @staticmethod
+    def cociente(numerador, denominador, escala: float = 1.0):
+        """División elemento a elemento de columnas (o escalar entre columna)"""
+        if NUMPY_DISPONIBLE:
+            return np.asarray(numerador, dtype='float64') * escala / np.asarray(denominador)
+        if not isinstance(numerador, list):
+            numerador = [numerador] * len(denominador)
+        return [n * escala / d for n, d in zip(numerador, denominador)]
+    
+    @staticmethod
+    def diferencia(minuendo, sustraendo):
+        """Resta elemento a elemento de dos columnas"""
+        if NUMPY_DISPONIBLE:
+            return np.asarray(minuendo) - np.asarray(sustraendo)
+        return [a - b for a, b in zip(minuendo, sustraendo)]
+    
+    @staticmethod
+    def suma(valores) -> float:
+        """Suma vectorizada de una columna o rebanada"""
+        if NUMPY_DISPONIBLE:
+            return float(np.sum(valores))
+        return float(sum(valores))
+    
+    def indice_extremo(self, columna: str, mayor: bool = True) -> int:
+        """Índice del valor mayor (o menor) de una columna, p. ej. 'productos_margen'"""
+        valores = getattr(self, columna)
+        if NUMPY_DISPONIBLE:
+            return int(np.argmax(valores) if mayor else np.argmin(valores))
+        funcion = max if mayor else min
+        return funcion(range(len(valores)), key=valores.__getitem__)
 
 class GeneradorReportes:
     """Generador avanzado de reportes y analytics"""
@@ -128,6 +412,12 @@ class GeneradorReportes:
         
         # Datos de demostración
         self._inicializar_datos_demo()
+        
+        # Motor analítico columnar sobre el histórico
+        self.motor = MotorAnaliticoVentas()
+        self.motor.cargar_ventas(self.ventas_demo)
+        self.motor.cargar_productos(self.productos_demo)
+        self.motor.cargar_clientes(self.clientes_demo)
     
     def _inicializar_datos_demo(self):
         """Datos de demostración para reportes"""
@@ -187,15 +477,10 @@ class GeneradorReportes:
     
     def _generar_reporte_ventas_diarias(self, config: ConfiguracionReporte) -> DatosReporte:
         """Generar reporte de ventas diarias"""
-        # Filtrar ventas por rango de fechas
-        ventas_periodo = [
-            v for v in self.ventas_demo
-            if config.fecha_inicio <= v['fecha'] <= config.fecha_fin
-        ]
-        
-        # Calcular métricas
-        total_ventas = sum(v['total'] for v in ventas_periodo)
-        total_transacciones = sum(v['transacciones'] for v in ventas_periodo)
+        # Agregar el período con búsqueda binaria sobre las columnas
+        periodo = self.motor.agregar_rango(config.fecha_inicio, config.fecha_fin)
+        total_ventas = periodo['total']
+        total_transacciones = periodo['transacciones']
         ticket_promedio = total_ventas / total_transacciones if total_transacciones > 0 else 0
         
         # Comparar con período anterior
@@ -203,38 +488,42 @@ class GeneradorReportes:
         fecha_anterior_inicio = config.fecha_inicio - timedelta(days=dias_periodo)
         fecha_anterior_fin = config.fecha_inicio - timedelta(days=1)
         
-        ventas_anterior = [
-            v for v in self.ventas_demo
-            if fecha_anterior_inicio <= v['fecha'] <= fecha_anterior_fin
-        ]
-        
-        total_anterior = sum(v['total'] for v in ventas_anterior)
+        total_anterior = self.motor.agregar_rango(fecha_anterior_inicio, fecha_anterior_fin)['total']
         crecimiento = ((total_ventas - total_anterior) / total_anterior * 100) if total_anterior > 0 else 0
         
-        # Preparar datos de la tabla
-        datos_tabla = []
-        for venta in ventas_periodo:
-            datos_tabla.append({
-                'Fecha': venta['fecha'].strftime('%d/%m/%Y'),
-                'Total Ventas': f"${venta['total']:,.2f}",
-                'Transacciones': venta['transacciones'],
-                'Ticket Promedio': f"${venta['ticket_promedio']:,.2f}"
-            })
+        # Columnas de la tabla (vistas de las columnas del motor)
+        dias, totales, transacciones = self.motor.serie_rango(config.fecha_inicio, config.fecha_fin)
+        columnas = {
+            'Fecha': dias,
+            'Total Ventas': totales,
+            'Transacciones': transacciones,
+            'Ticket Promedio': self.motor.cociente(totales, transacciones)
+        }
         
         # KPIs principales
         kpis = {
-            'Total Ventas': f"${total_ventas:,.2f}",
-            'Transacciones': f"{total_transacciones:,}",
-            'Ticket Promedio': f"${ticket_promedio:.2f}",
-            'Crecimiento': f"{crecimiento:+.1f}%",
-            'Ventas/Día': f"${total_ventas/dias_periodo:,.2f}",
-            'Trans/Día': f"{total_transacciones/dias_periodo:.1f}"
+            'Total Ventas': total_ventas,
+            'Transacciones': total_transacciones,
+            'Ticket Promedio': ticket_promedio,
+            'Crecimiento': crecimiento,
+            'Ventas/Día': total_ventas/dias_periodo,
+            'Trans/Día': total_transacciones/dias_periodo
+        }
+        
+        formatos = {
+            'Fecha': FormatoColumna.FECHA,
+            'Total Ventas': FormatoColumna.MONEDA,
+            'Transacciones': FormatoColumna.ENTERO,
+            'Ticket Promedio': FormatoColumna.MONEDA,
+            'Crecimiento': FormatoColumna.VARIACION,
+            'Ventas/Día': FormatoColumna.MONEDA,
+            'Trans/Día': FormatoColumna.DECIMAL
         }
         
         resumen = {
             'periodo_dias': dias_periodo,
-            'mejor_dia': max(ventas_periodo, key=lambda x: x['total'])['fecha'].strftime('%d/%m/%Y'),
-            'peor_dia': min(ventas_periodo, key=lambda x: x['total'])['fecha'].strftime('%d/%m/%Y'),
+            'mejor_dia': periodo['dia_max'].strftime('%d/%m/%Y') if periodo['dia_max'] else '-',
+            'peor_dia': periodo['dia_min'].strftime('%d/%m/%Y') if periodo['dia_min'] else '-',
             'tendencia': 'Creciente' if crecimiento > 0 else 'Decreciente'
         }
         
@@ -243,44 +532,59 @@ class GeneradorReportes:
             periodo=f"{config.fecha_inicio.strftime('%d/%m/%Y')} - {config.fecha_fin.strftime('%d/%m/%Y')}",
             fecha_generacion=datetime.now(),
             resumen=resumen,
-            datos_tabla=datos_tabla,
+            columnas=columnas,
             metricas_kpi=kpis,
+            formatos=formatos,
             comparativo_anterior={'total': total_anterior, 'crecimiento': crecimiento},
             tendencia='Positiva' if crecimiento > 0 else 'Negativa',
-            total_registros=len(datos_tabla)
+            total_registros=len(dias)
         )
     
     def _generar_reporte_productos_top(self, config: ConfiguracionReporte) -> DatosReporte:
         """Generar reporte de productos más vendidos"""
-        # Datos de la tabla
-        datos_tabla = []
-        for i, producto in enumerate(self.productos_demo[:10]):  # Top 10
-            datos_tabla.append({
-                'Ranking': i + 1,
-                'Producto': producto['nombre'],
-                'Unidades': f"{producto['vendidos']:,}",
-                'Ingresos': f"${producto['ingresos']:,.2f}",
-                'Margen %': f"{producto['margen']:.1f}%",
-                'Participación': f"{(producto['ingresos'] / sum(p['ingresos'] for p in self.productos_demo) * 100):.1f}%"
-            })
+        motor = self.motor
+        participacion = motor.participacion_productos()
+        top = min(10, len(motor.productos_nombres))  # Top 10
+        
+        # Columnas de la tabla
+        columnas = {
+            'Ranking': list(range(1, top + 1)),
+            'Producto': motor.productos_nombres[:top],
+            'Unidades': motor.productos_vendidos[:top],
+            'Ingresos': motor.productos_ingresos[:top],
+            'Margen %': motor.productos_margen[:top],
+            'Participación': participacion[:top]
+        }
         
         # KPIs
-        total_ingresos = sum(p['ingresos'] for p in self.productos_demo)
-        total_unidades = sum(p['vendidos'] for p in self.productos_demo)
-        margen_promedio = statistics.mean(p['margen'] for p in self.productos_demo)
+        totales = motor.totales_productos()
+        concentracion_top5 = motor.suma(participacion[:5])
         
         kpis = {
-            'Total Productos': len(self.productos_demo),
-            'Total Ingresos': f"${total_ingresos:,.2f}",
-            'Total Unidades': f"{total_unidades:,}",
-            'Margen Promedio': f"{margen_promedio:.1f}%",
-            'Top 5 Participación': f"{sum(p['ingresos'] for p in self.productos_demo[:5]) / total_ingresos * 100:.1f}%"
+            'Total Productos': len(motor.productos_nombres),
+            'Total Ingresos': totales['ingresos'],
+            'Total Unidades': totales['unidades'],
+            'Margen Promedio': totales['margen_promedio'],
+            'Top 5 Participación': concentracion_top5
+        }
+        
+        formatos = {
+            'Ranking': FormatoColumna.ENTERO,
+            'Unidades': FormatoColumna.ENTERO,
+            'Ingresos': FormatoColumna.MONEDA,
+            'Margen %': FormatoColumna.PORCENTAJE,
+            'Participación': FormatoColumna.PORCENTAJE,
+            'Total Productos': FormatoColumna.ENTERO,
+            'Total Ingresos': FormatoColumna.MONEDA,
+            'Total Unidades': FormatoColumna.ENTERO,
+            'Margen Promedio': FormatoColumna.PORCENTAJE,
+            'Top 5 Participación': FormatoColumna.PORCENTAJE
         }
         
         resumen = {
-            'producto_estrella': self.productos_demo[0]['nombre'],
-            'mejor_margen': max(self.productos_demo, key=lambda x: x['margen'])['nombre'],
-            'concentracion_top5': sum(p['ingresos'] for p in self.productos_demo[:5]) / total_ingresos * 100
+            'producto_estrella': motor.productos_nombres[0],
+            'mejor_margen': motor.productos_nombres[motor.indice_extremo('productos_margen')],
+            'concentracion_top5': concentracion_top5
         }
         
         return DatosReporte(
@@ -288,42 +592,55 @@ class GeneradorReportes:
             periodo=f"{config.fecha_inicio.strftime('%d/%m/%Y')} - {config.fecha_fin.strftime('%d/%m/%Y')}",
             fecha_generacion=datetime.now(),
             resumen=resumen,
-            datos_tabla=datos_tabla,
+            columnas=columnas,
             metricas_kpi=kpis,
-            total_registros=len(datos_tabla)
+            formatos=formatos,
+            total_registros=top
         )
     
     def _generar_reporte_clientes_top(self, config: ConfiguracionReporte) -> DatosReporte:
         """Generar reporte de mejores clientes"""
-        # Datos de la tabla
-        datos_tabla = []
-        for i, cliente in enumerate(self.clientes_demo):
-            promedio_compra = cliente['total'] / cliente['compras']
-            datos_tabla.append({
-                'Ranking': i + 1,
-                'Cliente': cliente['nombre'],
-                'Compras': cliente['compras'],
-                'Total': f"${cliente['total']:,.2f}",
-                'Promedio/Compra': f"${promedio_compra:.2f}",
-                'Frecuencia': f"Cada {90 // cliente['compras']} días"
-            })
+        motor = self.motor
+        num_clientes = len(motor.clientes_nombres)
+        
+        # Columnas de la tabla
+        columnas = {
+            'Ranking': list(range(1, num_clientes + 1)),
+            'Cliente': motor.clientes_nombres,
+            'Compras': motor.clientes_compras,
+            'Total': motor.clientes_total,
+            'Promedio/Compra': motor.cociente(motor.clientes_total, motor.clientes_compras),
+            'Frecuencia (días)': motor.cociente(90, motor.clientes_compras)
+        }
         
         # KPIs
-        total_clientes = len(self.clientes_demo)
-        total_facturado = sum(c['total'] for c in self.clientes_demo)
-        compras_totales = sum(c['compras'] for c in self.clientes_demo)
+        totales = motor.totales_clientes()
+        total_facturado = totales['total']
         
         kpis = {
-            'Total Clientes': total_clientes,
-            'Total Facturado': f"${total_facturado:,.2f}",
-            'Promedio por Cliente': f"${total_facturado/total_clientes:.2f}",
-            'Compras Totales': compras_totales,
-            'Cliente Top %': f"{(self.clientes_demo[0]['total']/total_facturado*100):.1f}%"
+            'Total Clientes': num_clientes,
+            'Total Facturado': total_facturado,
+            'Promedio por Cliente': total_facturado/num_clientes,
+            'Compras Totales': totales['compras'],
+            'Cliente Top %': float(motor.clientes_total[0])/total_facturado*100
+        }
+        
+        formatos = {
+            'Ranking': FormatoColumna.ENTERO,
+            'Compras': FormatoColumna.ENTERO,
+            'Total': FormatoColumna.MONEDA,
+            'Promedio/Compra': FormatoColumna.MONEDA,
+            'Frecuencia (días)': FormatoColumna.ENTERO,
+            'Total Clientes': FormatoColumna.ENTERO,
+            'Total Facturado': FormatoColumna.MONEDA,
+            'Promedio por Cliente': FormatoColumna.MONEDA,
+            'Compras Totales': FormatoColumna.ENTERO,
+            'Cliente Top %': FormatoColumna.PORCENTAJE
         }
         
         resumen = {
-            'cliente_premium': self.clientes_demo[0]['nombre'],
-            'cliente_mas_frecuente': max(self.clientes_demo, key=lambda x: x['compras'])['nombre']
+            'cliente_premium': motor.clientes_nombres[0],
+            'cliente_mas_frecuente': motor.clientes_nombres[motor.indice_extremo('clientes_compras')]
         }
         
         return DatosReporte(
@@ -331,46 +648,60 @@ class GeneradorReportes:
             periodo=f"{config.fecha_inicio.strftime('%d/%m/%Y')} - {config.fecha_fin.strftime('%d/%m/%Y')}",
             fecha_generacion=datetime.now(),
             resumen=resumen,
-            datos_tabla=datos_tabla,
+            columnas=columnas,
             metricas_kpi=kpis,
-            total_registros=len(datos_tabla)
+            formatos=formatos,
+            total_registros=num_clientes
         )
     
     def _generar_reporte_rentabilidad(self, config: ConfiguracionReporte) -> DatosReporte:
         """Generar reporte de análisis de rentabilidad"""
+        motor = self.motor
+        
         # Calcular métricas de rentabilidad
-        ventas_totales = sum(p['ingresos'] for p in self.productos_demo)
-        costo_estimado = sum(p['ingresos'] * (100 - p['margen']) / 100 for p in self.productos_demo)
+        totales = motor.totales_productos()
+        ventas_totales = totales['ingresos']
+        costo_estimado = totales['costo']
         utilidad_bruta = ventas_totales - costo_estimado
         margen_bruto = (utilidad_bruta / ventas_totales) * 100
         
-        # Datos por producto
-        datos_tabla = []
-        for producto in self.productos_demo:
-            costo_producto = producto['ingresos'] * (100 - producto['margen']) / 100
-            utilidad_producto = producto['ingresos'] - costo_producto
-            
-            datos_tabla.append({
-                'Producto': producto['nombre'],
-                'Ingresos': f"${producto['ingresos']:,.2f}",
-                'Costo Est.': f"${costo_producto:,.2f}",
-                'Utilidad': f"${utilidad_producto:,.2f}",
-                'Margen %': f"{producto['margen']:.1f}%",
-                'ROI': f"{(utilidad_producto/costo_producto*100):.1f}%"
-            })
+        # Columnas por producto
+        costos = motor.costos_productos()
+        utilidades = motor.diferencia(motor.productos_ingresos, costos)
+        columnas = {
+            'Producto': motor.productos_nombres,
+            'Ingresos': motor.productos_ingresos,
+            'Costo Est.': costos,
+            'Utilidad': utilidades,
+            'Margen %': motor.productos_margen,
+            'ROI': motor.cociente(utilidades, costos, escala=100.0)
+        }
         
         # KPIs de rentabilidad
         kpis = {
-            'Ventas Totales': f"${ventas_totales:,.2f}",
-            'Costo Total': f"${costo_estimado:,.2f}",
-            'Utilidad Bruta': f"${utilidad_bruta:,.2f}",
-            'Margen Bruto': f"{margen_bruto:.1f}%",
-            'ROI Promedio': f"{(utilidad_bruta/costo_estimado*100):.1f}%"
+            'Ventas Totales': ventas_totales,
+            'Costo Total': costo_estimado,
+            'Utilidad Bruta': utilidad_bruta,
+            'Margen Bruto': margen_bruto,
+            'ROI Promedio': utilidad_bruta/costo_estimado*100
+        }
+        
+        formatos = {
+            'Ingresos': FormatoColumna.MONEDA,
+            'Costo Est.': FormatoColumna.MONEDA,
+            'Utilidad': FormatoColumna.MONEDA,
+            'Margen %': FormatoColumna.PORCENTAJE,
+            'ROI': FormatoColumna.PORCENTAJE,
+            'Ventas Totales': FormatoColumna.MONEDA,
+            'Costo Total': FormatoColumna.MONEDA,
+            'Utilidad Bruta': FormatoColumna.MONEDA,
+            'Margen Bruto': FormatoColumna.PORCENTAJE,
+            'ROI Promedio': FormatoColumna.PORCENTAJE
         }
         
         resumen = {
-            'producto_mas_rentable': max(self.productos_demo, key=lambda x: x['margen'])['nombre'],
-            'producto_menos_rentable': min(self.productos_demo, key=lambda x: x['margen'])['nombre'],
+            'producto_mas_rentable': motor.productos_nombres[motor.indice_extremo('productos_margen')],
+            'producto_menos_rentable': motor.productos_nombres[motor.indice_extremo('productos_margen', mayor=False)],
             'rentabilidad_general': 'Buena' if margen_bruto > 25 else 'Regular' if margen_bruto > 15 else 'Baja'
         }
         
@@ -379,50 +710,54 @@ class GeneradorReportes:
             periodo=f"{config.fecha_inicio.strftime('%d/%m/%Y')} - {config.fecha_fin.strftime('%d/%m/%Y')}",
             fecha_generacion=datetime.now(),
             resumen=resumen,
-            datos_tabla=datos_tabla,
+            columnas=columnas,
             metricas_kpi=kpis,
-            total_registros=len(datos_tabla)
+            formatos=formatos,
+            total_registros=len(motor.productos_nombres)
         )
     
     def _generar_dashboard_ejecutivo(self, config: ConfiguracionReporte) -> DatosReporte:
         """Generar dashboard ejecutivo completo"""
-        # Métricas consolidadas
-        ventas_periodo = [
-            v for v in self.ventas_demo
-            if config.fecha_inicio <= v['fecha'] <= config.fecha_fin
-        ]
+        motor = self.motor
         
-        total_ventas = sum(v['total'] for v in ventas_periodo)
-        total_transacciones = sum(v['transacciones'] for v in ventas_periodo)
+        # Métricas consolidadas
+        periodo = motor.agregar_rango(config.fecha_inicio, config.fecha_fin)
+        total_ventas = periodo['total']
+        total_transacciones = periodo['transacciones']
         
         # KPIs ejecutivos
         kpis = {
-            'Ventas del Período': f"${total_ventas:,.2f}",
-            'Transacciones': f"{total_transacciones:,}",
-            'Ticket Promedio': f"${total_ventas/total_transacciones:.2f}" if total_transacciones > 0 else "$0.00",
-            'Productos Activos': len(self.productos_demo),
-            'Clientes Activos': len(self.clientes_demo),
-            'Margen Promedio': f"{statistics.mean(p['margen'] for p in self.productos_demo):.1f}%"
+            'Ventas del Período': total_ventas,
+            'Transacciones': total_transacciones,
+            'Ticket Promedio': total_ventas/total_transacciones if total_transacciones > 0 else 0.0,
+            'Productos Activos': len(motor.productos_nombres),
+            'Clientes Activos': len(motor.clientes_nombres),
+            'Margen Promedio': motor.totales_productos()['margen_promedio']
         }
         
-        # Top performers
-        datos_tabla = [
-            {
-                'Métrica': 'Producto Top',
-                'Valor': self.productos_demo[0]['nombre'],
-                'Cantidad': f"{self.productos_demo[0]['vendidos']} uds"
-            },
-            {
-                'Métrica': 'Cliente Top',
-                'Valor': self.clientes_demo[0]['nombre'],
-                'Cantidad': f"${self.clientes_demo[0]['total']:,.2f}"
-            },
-            {
-                'Métrica': 'Mejor Día',
-                'Valor': max(ventas_periodo, key=lambda x: x['total'])['fecha'].strftime('%d/%m/%Y'),
-                'Cantidad': f"${max(ventas_periodo, key=lambda x: x['total'])['total']:,.2f}"
-            }
-        ]
+        # Top performers (filas heterogéneas: la cantidad se presenta como texto)
+        columnas = {
+            'Métrica': ['Producto Top', 'Cliente Top', 'Mejor Día'],
+            'Valor': [
+                motor.productos_nombres[0],
+                motor.clientes_nombres[0],
+                periodo['dia_max'].strftime('%d/%m/%Y') if periodo['dia_max'] else '-'
+            ],
+            'Cantidad': [
+                f"{int(motor.productos_vendidos[0])} uds",
+                formatear_valor(motor.clientes_total[0], FormatoColumna.MONEDA),
+                formatear_valor(periodo['total_max'], FormatoColumna.MONEDA)
+            ]
+        }
+        
+        formatos = {
+            'Ventas del Período': FormatoColumna.MONEDA,
+            'Transacciones': FormatoColumna.ENTERO,
+            'Ticket Promedio': FormatoColumna.MONEDA,
+            'Productos Activos': FormatoColumna.ENTERO,
+            'Clientes Activos': FormatoColumna.ENTERO,
+            'Margen Promedio': FormatoColumna.PORCENTAJE
+        }
         
         resumen = {
             'estado_negocio': 'Excelente',
@@ -435,58 +770,67 @@ class GeneradorReportes:
             periodo=f"{config.fecha_inicio.strftime('%d/%m/%Y')} - {config.fecha_fin.strftime('%d/%m/%Y')}",
             fecha_generacion=datetime.now(),
             resumen=resumen,
-            datos_tabla=datos_tabla,
+            columnas=columnas,
             metricas_kpi=kpis,
-            total_registros=len(datos_tabla)
+            formatos=formatos,
+            total_registros=3
         )
     
     def _generar_proyeccion_ventas(self, config: ConfiguracionReporte) -> DatosReporte:
         """Generar proyección de ventas basada en histórico"""
-        # Análisis de tendencia
-        ventas_periodo = [
-            v for v in self.ventas_demo
-            if config.fecha_inicio <= v['fecha'] <= config.fecha_fin
-        ]
+        # Calcular tendencia simple (últimos vs primeros días)
+        num_dias, promedio_inicial, promedio_final = self.motor.promedios_mitades(
+            config.fecha_inicio, config.fecha_fin
+        )
         
-        if len(ventas_periodo) < 7:
+        if num_dias < 7:
             # No hay suficientes datos
             return self._generar_reporte_generico(config)
         
-        # Calcular tendencia simple (últimos vs primeros días)
-        mitad = len(ventas_periodo) // 2
-        primera_mitad = ventas_periodo[:mitad]
-        segunda_mitad = ventas_periodo[mitad:]
-        
-        promedio_inicial = statistics.mean(v['total'] for v in primera_mitad)
-        promedio_final = statistics.mean(v['total'] for v in segunda_mitad)
-        
         tasa_crecimiento = ((promedio_final - promedio_inicial) / promedio_inicial) * 100 if promedio_inicial > 0 else 0
         
         # Proyección para los próximos 30 días
-        proyecciones = []
         base_venta = promedio_final
+        factor = 1 + tasa_crecimiento/100/30
+        dia_inicial = self.motor.dia_ordinal(config.fecha_fin) + 1
+        if NUMPY_DISPONIBLE:
+            pasos = np.arange(30)
+            ventas_proyectadas = base_venta * np.power(factor, pasos)
+            confianza = np.maximum(50, 95 - pasos * 2)  # Confianza decrece con el tiempo
+            dias_proyeccion = dia_inicial + pasos
+        else:
+            ventas_proyectadas = [base_venta * factor ** i for i in range(30)]
+            confianza = [max(50, 95 - i * 2) for i in range(30)]
+            dias_proyeccion = [dia_inicial + i for i in range(30)]
         
-        for i in range(30):
-            fecha_proyeccion = config.fecha_fin + timedelta(days=i+1)
-            venta_proyectada = base_venta * (1 + tasa_crecimiento/100/30) ** i
-            
-            proyecciones.append({
-                'Fecha': fecha_proyeccion.strftime('%d/%m/%Y'),
-                'Venta Proyectada': f"${venta_proyectada:,.2f}",
-                'Confianza': f"{max(50, 95-i*2):.0f}%"  # Confianza decrece con el tiempo
-            })
-        
-        # KPIs de proyección
-        total_proyectado = sum(float(p['Venta Proyectada'].replace('$', '').replace(',', '')) for p in proyecciones)
+        # KPIs de proyección (sumados sobre los valores crudos)
+        total_proyectado = self.motor.suma(ventas_proyectadas)
         
         kpis = {
-            'Tasa Crecimiento': f"{tasa_crecimiento:+.2f}%",
-            'Venta Base': f"${promedio_final:,.2f}",
-            'Proyección 30 días': f"${total_proyectado:,.2f}",
-            'Confianza Promedio': "75%",
+            'Tasa Crecimiento': tasa_crecimiento,
+            'Venta Base': promedio_final,
+            'Proyección 30 días': total_proyectado,
+            'Confianza Promedio': 75.0,
             'Tendencia': 'Positiva' if tasa_crecimiento > 0 else 'Negativa'
         }
         
+        # Mostrar solo 15 días en tabla
+        columnas = {
+            'Fecha': dias_proyeccion[:15],
+            'Venta Proyectada': ventas_proyectadas[:15],
+            'Confianza': confianza[:15]
+        }
+        
+        formatos = {
+            'Fecha': FormatoColumna.FECHA,
+            'Venta Proyectada': FormatoColumna.MONEDA,
+            'Confianza': FormatoColumna.PORCENTAJE,
+            'Tasa Crecimiento': FormatoColumna.VARIACION,
+            'Venta Base': FormatoColumna.MONEDA,
+            'Proyección 30 días': FormatoColumna.MONEDA,
+            'Confianza Promedio': FormatoColumna.PORCENTAJE
+        }
+        
         resumen = {
             'modelo': 'Tendencia lineal',
             'precision_estimada': '75%',
@@ -499,9 +843,10 @@ class GeneradorReportes:
             periodo=f"Proyección para 30 días desde {config.fecha_fin.strftime('%d/%m/%Y')}",
             fecha_generacion=datetime.now(),
             resumen=resumen,
-            datos_tabla=proyecciones[:15],  # Mostrar solo 15 días en tabla
+            columnas=columnas,
             metricas_kpi=kpis,
-            total_registros=len(proyecciones)
+            formatos=formatos,
+            total_registros=len(ventas_proyectadas)
         )
     
     def _generar_reporte_generico(self, config: ConfiguracionReporte) -> DatosReporte:
@@ -511,7 +856,7 @@ class GeneradorReportes:
             periodo=f"{config.fecha_inicio.strftime('%d/%m/%Y')} - {config.fecha_fin.strftime('%d/%m/%Y')}",
             fecha_generacion=datetime.now(),
             resumen={'estado': 'En desarrollo'},
-            datos_tabla=[{'Información': 'Este reporte está en desarrollo'}],
+            columnas={'Información': ['Este reporte está en desarrollo']},
             metricas_kpi={'Estado': 'En desarrollo'},
             total_registros=0
         )
@@ -523,41 +868,133 @@ class GeneradorReportes:
                 return self._exportar_json(datos, ruta_archivo)
             elif formato == FormatoExporte.CSV:
                 return self._exportar_csv(datos, ruta_archivo)
+            elif formato == FormatoExporte.NDJSON:
+                self.exportar_filas(datos.iterar_filas(), formato, ruta_archivo)
+                return True
             elif formato == FormatoExporte.PDF:
                 return self._exportar_pdf_simulado(datos, ruta_archivo)
             else:
                 return False
         except Exception as e:
-            print(f"Error al exportar reporte: {e}")
+            get_logger().error(f"❌ Error al exportar reporte '{datos.titulo}' como "
+                               f"{formato.value} a {ruta_archivo}: {str(e)}", "reportes")
             return False
     
     def _exportar_json(self, datos: DatosReporte, ruta_archivo: str) -> bool:
-        """Exportar a JSON"""
-        with open(ruta_archivo, 'w', encoding='utf-8') as f:
-            json.dump(asdict(datos), f, indent=2, default=str, ensure_ascii=False)
+        """Exportar a JSON con valores crudos, escribiendo la tabla fila por fila"""
+        with self._destino_atomico(ruta_archivo) as f:
+            f.write('{\n')
+            for campo in fields(datos):
+                if campo.name == 'columnas':
+                    continue
+                valor = getattr(datos, campo.name)
+                if campo.name == 'formatos':
+                    valor = {nombre: formato.value for nombre, formato in valor.items()}
+                valor = json.dumps(valor, default=str, ensure_ascii=False)
+                f.write(f'  "{campo.name}": {valor},\n')
+            
+            f.write('  "datos_tabla": [')
+            for i, fila in enumerate(datos.iterar_filas()):
+                f.write(',\n    ' if i else '\n    ')
+                f.write(json.dumps(fila, default=str, ensure_ascii=False))
+            f.write('\n  ]\n}\n')
         return True
     
     def _exportar_csv(self, datos: DatosReporte, ruta_archivo: str) -> bool:
         """Exportar tabla de datos a CSV"""
-        if not datos.datos_tabla:
+        if not datos.num_filas:
             return False
-        
-        with open(ruta_archivo, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=datos.datos_tabla[0].keys())
-            writer.writeheader()
-            writer.writerows(datos.datos_tabla)
+        self.exportar_filas(datos.iterar_filas(), FormatoExporte.CSV, ruta_archivo)
         return True
     
+    # =================== EXPORTACIÓN EN STREAMING ===================
+    
+    @staticmethod
+    def _abrir_destino(ruta_archivo: str, comprimir: bool = False):
+        """Abre el archivo de salida en texto, con gzip si se pide o la ruta termina en .gz"""
+        if comprimir or ruta_archivo.endswith('.gz'):
+            return gzip.open(ruta_archivo, 'wt', newline='', encoding='utf-8')
+        return open(ruta_archivo, 'w', newline='', encoding='utf-8')
+    
+    @classmethod
+    @contextmanager
+    def _destino_atomico(cls, ruta_archivo: str, comprimir: bool = False):
+        """Abre un '.parcial' junto al destino y lo renombra sobre él solo si la escritura termina
+        
+        Si algo falla el temporal se elimina y la excepción se propaga, de
+        modo que nunca queda un exporte truncado en la ruta final.
+        """
+        comprimir = comprimir or ruta_archivo.endswith('.gz')
+        temporal = f"{ruta_archivo}.parcial"
+        try:
+            with cls._abrir_destino(temporal, comprimir) as f:
+                yield f
+            os.replace(temporal, ruta_archivo)
+        except BaseException:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+    
+    def exportar_filas(self, filas: Iterable[Dict], formato: FormatoExporte, ruta_archivo: str,
+                       comprimir: bool = False, progreso: Optional[Callable[[int], None]] = None,
+                       intervalo_progreso: int = 1000) -> int:
+        """Exportar filas a CSV o NDJSON a medida que se generan
+        
+        Solo mantiene en memoria la fila actual, por lo que sirve para
+        generadores respaldados por cursor de cualquier tamaño. Se escribe
+        en un archivo temporal junto al destino que se renombra al terminar,
+        así un fallo no deja un exporte a medias. Retorna el número de
+        filas escritas y propaga cualquier error.
+        """
+        if formato not in (FormatoExporte.CSV, FormatoExporte.NDJSON):
+            raise ValueError(f"Formato {formato.value} no soportado para exportar filas")
+        
+        escritas = 0
+        try:
+            with self._destino_atomico(ruta_archivo, comprimir) as f:
+                writer = None
+                for fila in filas:
+                    if formato == FormatoExporte.CSV:
+                        if writer is None:
+                            # Las columnas se toman de la primera fila
+                            writer = csv.DictWriter(f, fieldnames=list(fila.keys()), extrasaction='ignore')
+                            writer.writeheader()
+                        writer.writerow(fila)
+                    else:
+                        f.write(json.dumps(fila, default=str, ensure_ascii=False))
+                        f.write('\n')
+                    
+                    escritas += 1
+                    if progreso and escritas % intervalo_progreso == 0:
+                        progreso(escritas)
+        except Exception as e:
+            get_logger().error(f"❌ Error al exportar filas a {ruta_archivo} "
+                               f"({escritas} escritas): {str(e)}", "reportes")
+            raise
+        
+        if progreso:
+            progreso(escritas)
+        return escritas
+    
+    def exportar_consulta(self, db_manager, consulta, formato: FormatoExporte, ruta_archivo: str,
+                          comprimir: bool = False, progreso: Optional[Callable[[int], None]] = None,
+                          tamano_lote: int = 500) -> int:
+        """Exportar el resultado de una ConsultaPreparada leyendo el cursor por lotes"""
+        filas = db_manager.iterar_consulta(consulta, tamano_lote)
+        return self.exportar_filas(filas, formato, ruta_archivo, comprimir, progreso)
+    
     def _exportar_pdf_simulado(self, datos: DatosReporte, ruta_archivo: str) -> bool:
         """Simular exportación a PDF (requeriría reportlab)"""
         # En implementación real usaría reportlab
-        with open(ruta_archivo.replace('.pdf', '.txt'), 'w', encoding='utf-8') as f:
+        with self._destino_atomico(ruta_archivo.replace('.pdf', '.txt')) as f:
             f.write(f"REPORTE: {datos.titulo}\n")
             f.write(f"PERÍODO: {datos.periodo}\n")
             f.write(f"GENERADO: {datos.fecha_generacion}\n\n")
             
             f.write("KPIs:\n")
-            for kpi, valor in datos.metricas_kpi.items():
+            for kpi, valor in datos.kpis_formateados().items():
                 f.write(f"- {kpi}: {valor}\n")
             
             f.write(f"\nTOTAL REGISTROS: {datos.total_registros}\n")
@@ -867,7 +1304,7 @@ class InterfazReportes:
         kpis_container.pack(fill="x", padx=15, pady=(0, 15))
         
         # Mostrar KPIs en grid
-        kpi_items = list(datos.metricas_kpi.items())
+        kpi_items = list(datos.kpis_formateados().items())
         cols = 3 if len(kpi_items) > 6 else 2
         
         for i, (kpi, valor) in enumerate(kpi_items):
@@ -890,7 +1327,7 @@ class InterfazReportes:
             kpis_container.grid_columnconfigure(col, weight=1)
         
         # Tabla de datos (si hay datos)
-        if datos.datos_tabla and datos.incluir_tablas:
+        if datos.num_filas and self.incluir_tablas.get():
             tabla_frame = ctk.CTkFrame(self.preview_frame)
             tabla_frame.pack(fill="both", expand=True, pady=(0, 20))
             
@@ -906,8 +1343,8 @@ class InterfazReportes:
             tabla_scroll.pack(fill="both", expand=True, padx=15, pady=(0, 15))
             
             # Headers de la tabla
-            if datos.datos_tabla:
-                headers = list(datos.datos_tabla[0].keys())
+            if datos.columnas:
+                headers = list(datos.columnas.keys())
                 header_frame = ctk.CTkFrame(tabla_scroll)
                 header_frame.pack(fill="x", pady=(0, 5))
                 
@@ -919,8 +1356,8 @@ class InterfazReportes:
                     )
                     header_label.grid(row=0, column=i, padx=10, pady=8, sticky="w")
                 
-                # Filas de datos (mostrar máximo 10)
-                for row_idx, fila in enumerate(datos.datos_tabla[:10]):
+                # Filas de datos (mostrar máximo 10, formateadas solo aquí)
+                for row_idx, fila in enumerate(datos.iterar_filas(formatear=True, limite=10)):
                     row_frame = ctk.CTkFrame(tabla_scroll)
                     row_frame.pack(fill="x", pady=1)
                     
@@ -929,17 +1366,17 @@ class InterfazReportes:
                         cell_label.grid(row=0, column=col_idx, padx=10, pady=5, sticky="w")
                 
                 # Mostrar si hay más datos
-                if len(datos.datos_tabla) > 10:
+                if datos.num_filas > 10:
                     more_label = ctk.CTkLabel(
                         tabla_scroll,
-                        text=f"... y {len(datos.datos_tabla) - 10} filas más",
+                        text=f"... y {datos.num_filas - 10} filas más",
                         font=ctk.CTkFont(style="italic"),
                         text_color="gray"
                     )
                     more_label.pack(pady=10)
         
         # Resumen ejecutivo (si está habilitado)
-        if datos.incluir_resumen and datos.resumen:
+        if self.incluir_resumen.get() and datos.resumen:
             resumen_frame = ctk.CTkFrame(self.preview_frame)
             resumen_frame.pack(fill="x", pady=(0, 20))
             
@@ -996,6 +1433,7 @@ class InterfazReportes:
         formatos = {
             "JSON (*.json)": FormatoExporte.JSON,
             "CSV (*.csv)": FormatoExporte.CSV,
+            "NDJSON (*.ndjson)": FormatoExporte.NDJSON,
             "PDF (*.txt)": FormatoExporte.PDF  # Simulado como TXT
         }
         
@@ -1013,6 +1451,8 @@ class InterfazReportes:
                 formato = FormatoExporte.JSON
             elif extension == 'csv':
                 formato = FormatoExporte.CSV
+            elif extension == 'ndjson':
+                formato = FormatoExporte.NDJSON
             elif extension in ['pdf', 'txt']:
                 formato = FormatoExporte.PDF
             else:
@@ -0,0 +1,271 @@
+"""
+Motor de Reposición - VentaPro
+==============================
+
+Calcula para todos los productos con configuración de stock la demanda
+diaria, el stock de seguridad, el punto de reorden y el lote económico
+(EOQ) en una sola pasada por columnas sobre las salidas agregadas por
+producto y día. Las sugerencias se agrupan por proveedor y se emiten como
+órdenes de compra en borrador (modules.proveedores.OrdenCompra).
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import math
+from datetime import datetime, timedelta
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.inventario import GestorInventario
+from modules.proveedores import EstadoOrden, EstadoProveedor, OrdenCompra, Proveedor
+from utils.constantes import IVA_DEFAULT
+
+# Cálculo por columnas (NumPy si está disponible)
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    np = None
+    NUMPY_DISPONIBLE = False
+
+# stock_maximo por defecto de ConfiguracionStock: sin tope real
+SIN_TOPE = 999999
+
+ESTADOS_EN_TRANSITO = (EstadoOrden.ENVIADA, EstadoOrden.CONFIRMADA)
+ESTADOS_PROVEEDOR_VALIDOS = (EstadoProveedor.ACTIVO, EstadoProveedor.EVALUACION)
+
+
+def unidades_en_transito(ordenes: Iterable[OrdenCompra]) -> Dict[int, float]:
+    """Cantidades pedidas y aún no recibidas por producto"""
+    transito: Dict[int, float] = {}
+    for orden in ordenes:
+        if orden.estado in ESTADOS_EN_TRANSITO:
+            for linea in orden.productos:
+                producto_id = linea["producto_id"]
+                transito[producto_id] = transito.get(producto_id, 0.0) + linea["cantidad"]
+    return transito
+
+
+class MotorReposicion:
+    """Sugerencias de compra de todos los productos en una pasada
+
+    Por producto: demanda diaria d y su desviación σ en `dias_demanda`
+    días, stock de seguridad z·σ·√L, punto de reorden d·L + seguridad (no
+    menor al punto_reorden configurado) y EOQ √(2·D·S/H). Se pide cuando
+    stock + en tránsito <= punto de reorden, por max(EOQ, faltante al
+    punto de reorden), sin pasar de stock_maximo.
+
+    Args:
+        gestor: GestorInventario con configuraciones y movimientos
+        proveedores: Proveedores para agrupar y aplicar descuentos
+        config: ConfigManager opcional (sección [INVENTORY])
+    """
+
+    def __init__(self, gestor: GestorInventario, proveedores: Optional[Iterable[Proveedor]] = None,
+                 config=None):
+        self.gestor = gestor
+        self.proveedores: Dict[int, Proveedor] = {p.id: p for p in proveedores or []}
+
+        self.dias_demanda = config.getint('INVENTORY', 'reorder_demand_days', 90) if config else 90
+        self.nivel_servicio = config.getfloat('INVENTORY', 'reorder_service_level', 0.95) if config else 0.95
+        self.costo_pedido = config.getfloat('INVENTORY', 'reorder_order_cost', 50.0) if config else 50.0
+        self.tasa_mantenimiento = config.getfloat('INVENTORY', 'reorder_holding_rate', 0.25) if config else 0.25
+        self.dias_cobertura = config.getint('INVENTORY', 'reorder_coverage_days', 14) if config else 14
+
+        self.z = NormalDist().inv_cdf(min(max(self.nivel_servicio, 0.5), 0.9999))
+
+    # =================== CÁLCULO ===================
+
+    def calcular(self, en_transito: Optional[Dict[int, float]] = None) -> Dict[str, list]:
+        """Columnas de reposición de todos los productos configurados
+
+        Returns:
+            Dict[str, list]: Columnas paralelas (producto_id, proveedor_id,
+                stock, en_transito, demanda_diaria, stock_seguridad,
+                punto_reorden, eoq, cantidad, pedir, costo_unitario,
+                dias_entrega, prioridad)
+        """
+        en_transito = en_transito or {}
+        agregados = self.gestor.agregados_demanda(self.dias_demanda)
+        libro = self.gestor.libro
+
+        configuraciones = list(self.gestor.configuraciones.values())
+        columnas = {
+            'producto_id': [c.producto_id for c in configuraciones],
+            'proveedor_id': [c.proveedor_id for c in configuraciones],
+            'costo_unitario': [float(c.costo_unitario) for c in configuraciones],
+            'dias_entrega': [float(c.dias_entrega) for c in configuraciones],
+        }
+        ids = columnas['producto_id']
+        entradas = {
+            'stock': [float(libro.stock_actual(i)) for i in ids],
+            'en_transito': [float(en_transito.get(i, 0.0)) for i in ids],
+            'total': [agregados.get(i, (0.0, 0.0))[0] for i in ids],
+            'cuadrados': [agregados.get(i, (0.0, 0.0))[1] for i in ids],
+            'stock_minimo': [float(c.stock_minimo) for c in configuraciones],
+            'stock_maximo': [float(c.stock_maximo) for c in configuraciones],
+            'punto_reorden': [float(c.punto_reorden) for c in configuraciones],
+        }
+
+        if NUMPY_DISPONIBLE:
+            columnas.update(self._calcular_columnas(entradas, columnas))
+        else:
+            columnas.update(self._calcular_filas(entradas, columnas))
+
+        columnas['stock'] = entradas['stock']
+        columnas['en_transito'] = entradas['en_transito']
+        columnas['prioridad'] = [
+            "Alta" if stock <= minimo else "Media"
+            for stock, minimo in zip(entradas['stock'], entradas['stock_minimo'])
+        ]
+        return columnas
+
+    def _calcular_columnas(self, entradas: Dict[str, list], columnas: Dict[str, list]) -> Dict[str, list]:
+        """Fórmulas de reposición sobre arreglos NumPy"""
+        e = {clave: np.asarray(valores, dtype='float64') for clave, valores in entradas.items()}
+        plazo = np.asarray(columnas['dias_entrega'], dtype='float64')
+        costo = np.asarray(columnas['costo_unitario'], dtype='float64')
+
+        demanda = e['total'] / self.dias_demanda
+        desviacion = np.sqrt(np.maximum(e['cuadrados'] / self.dias_demanda - demanda * demanda, 0.0))
+        seguridad = self.z * desviacion * np.sqrt(plazo)
+        reorden = np.maximum(demanda * plazo + seguridad, e['punto_reorden'])
+
+        mantenimiento = costo * self.tasa_mantenimiento
+        con_costo = (mantenimiento > 0) & (demanda > 0)
+        eoq = np.where(
+            con_costo,
+            np.sqrt(2 * demanda * 365 * self.costo_pedido / np.where(con_costo, mantenimiento, 1.0)),
+            demanda * self.dias_cobertura
+        )
+
+        posicion = e['stock'] + e['en_transito']
+        cantidad = np.maximum(eoq, reorden - posicion)
+        tope = e['stock_maximo'] < SIN_TOPE
+        cantidad = np.where(tope, np.minimum(cantidad, e['stock_maximo'] - posicion), cantidad)
+        cantidad = np.ceil(np.maximum(cantidad, 0.0))
+        pedir = (posicion <= reorden) & (cantidad > 0)
+
+        return {
+            'demanda_diaria': demanda.tolist(),
+            'stock_seguridad': seguridad.tolist(),
+            'punto_reorden': reorden.tolist(),
+            'eoq': eoq.tolist(),
+            'cantidad': cantidad.astype('int64').tolist(),
+            'pedir': pedir.tolist(),
+        }
+
+    def _calcular_filas(self, entradas: Dict[str, list], columnas: Dict[str, list]) -> Dict[str, list]:
+        """Mismas fórmulas producto por producto (sin NumPy)"""
+        resultado = {clave: [] for clave in ('demanda_diaria', 'stock_seguridad', 'punto_reorden',
+                                             'eoq', 'cantidad', 'pedir')}
+        for i in range(len(columnas['producto_id'])):
+            plazo = columnas['dias_entrega'][i]
+            demanda = entradas['total'][i] / self.dias_demanda
+            desviacion = math.sqrt(max(entradas['cuadrados'][i] / self.dias_demanda - demanda * demanda, 0.0))
+            seguridad = self.z * desviacion * math.sqrt(plazo)
+            reorden = max(demanda * plazo + seguridad, entradas['punto_reorden'][i])
+
+            mantenimiento = columnas['costo_unitario'][i] * self.tasa_mantenimiento
+            if mantenimiento > 0 and demanda > 0:
+                eoq = math.sqrt(2 * demanda * 365 * self.costo_pedido / mantenimiento)
+            else:
+                eoq = demanda * self.dias_cobertura
+
+            posicion = entradas['stock'][i] + entradas['en_transito'][i]
+            cantidad = max(eoq, reorden - posicion)
+            if entradas['stock_maximo'][i] < SIN_TOPE:
+                cantidad = min(cantidad, entradas['stock_maximo'][i] - posicion)
+            cantidad = math.ceil(max(cantidad, 0.0))
+
+            resultado['demanda_diaria'].append(demanda)
+            resultado['stock_seguridad'].append(seguridad)
+            resultado['punto_reorden'].append(reorden)
+            resultado['eoq'].append(eoq)
+            resultado['cantidad'].append(cantidad)
+            resultado['pedir'].append(posicion <= reorden and cantidad > 0)
+        return resultado
+
+    # =================== ÓRDENES ===================
+
+    def generar_ordenes(self, ordenes_pendientes: Iterable[OrdenCompra] = (),
+                        primer_id: int = 1) -> Tuple[List[OrdenCompra], Dict]:
+        """Órdenes de compra en borrador agrupadas por proveedor
+
+        Las órdenes enviadas o confirmadas cuentan como stock en tránsito.
+        Los productos sin proveedor, o con uno inactivo o bloqueado, se
+        informan en el resumen y no generan orden.
+
+        Returns:
+            Tuple[List[OrdenCompra], Dict]: Órdenes y resumen del cálculo
+        """
+        columnas = self.calcular(unidades_en_transito(ordenes_pendientes))
+        ahora = datetime.now()
+
+        grupos: Dict[int, List[int]] = {}
+        sin_proveedor: List[int] = []
+        for i, pedir in enumerate(columnas['pedir']):
+            if not pedir:
+                continue
+            proveedor_id = columnas['proveedor_id'][i]
+            proveedor = self.proveedores.get(proveedor_id)
+            if proveedor_id is None or (proveedor and proveedor.estado not in ESTADOS_PROVEEDOR_VALIDOS):
+                sin_proveedor.append(columnas['producto_id'][i])
+            else:
+                grupos.setdefault(proveedor_id, []).append(i)
+
+        ordenes = [
+            self._crear_orden(primer_id + n, proveedor_id, indices, columnas, ahora)
+            for n, (proveedor_id, indices) in enumerate(sorted(grupos.items()))
+        ]
+
+        resumen = {
+            "fecha": ahora.isoformat(),
+            "productos_evaluados": len(columnas['producto_id']),
+            "productos_a_pedir": sum(len(indices) for indices in grupos.values()),
+            "ordenes": len(ordenes),
+            "sin_proveedor": sin_proveedor,
+            "total_estimado": round(sum(orden.total for orden in ordenes), 2),
+        }
+        return ordenes, resumen
+
+    def _crear_orden(self, orden_id: int, proveedor_id: int, indices: List[int],
+                     columnas: Dict[str, list], ahora: datetime) -> OrdenCompra:
+        """Orden en borrador con las líneas de un proveedor"""
+        productos = [
+            {
+                "producto_id": columnas['producto_id'][i],
+                "cantidad": columnas['cantidad'][i],
+                "precio_unitario": columnas['costo_unitario'][i],
+                "stock_actual": columnas['stock'][i],
+                "en_transito": columnas['en_transito'][i],
+                "punto_reorden": round(columnas['punto_reorden'][i], 2),
+                "stock_seguridad": round(columnas['stock_seguridad'][i], 2),
+                "eoq": round(columnas['eoq'][i], 2),
+                "demanda_diaria": round(columnas['demanda_diaria'][i], 3),
+                "prioridad": columnas['prioridad'][i],
+            }
+            for i in indices
+        ]
+
+        proveedor = self.proveedores.get(proveedor_id)
+        subtotal = round(sum(p["cantidad"] * p["precio_unitario"] for p in productos), 2)
+        descuento = round(subtotal * proveedor.descuento_general / 100, 2) if proveedor else 0.0
+        impuestos = round((subtotal - descuento) * IVA_DEFAULT, 2)
+        entrega = max(columnas['dias_entrega'][i] for i in indices)
+
+        return OrdenCompra(
+            id=orden_id,
+            numero_orden=f"OC-SUG-{ahora.strftime('%Y%m%d')}-{orden_id:03d}",
+            proveedor_id=proveedor_id,
+            fecha_orden=ahora,
+            fecha_entrega_esperada=ahora + timedelta(days=entrega),
+            productos=productos,
+            subtotal=subtotal,
+            impuestos=impuestos,
+            descuento=descuento,
+            total=round(subtotal - descuento + impuestos, 2),
+            estado=EstadoOrden.BORRADOR,
+            notas="Sugerencia automática de reposición"
+        )
@@ -0,0 +1,78 @@
+"""
+Pruebas del Gestor de Backups - VentaPro
+========================================
+
+Verifica el cierre del escritor en segundo plano: lo encolado se escribe
+aunque el hilo no termine dentro del tiempo de espera, el diario no se
+cierra con un lote en curso y después del cierre no se aceptan backups.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.backup_manager import BackupManager
+
+
+class TestCierreBackupManager(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio_original = os.getcwd()
+        self.directorio = tempfile.mkdtemp(prefix='ventapro_backups_')
+        os.chdir(self.directorio)
+
+    def tearDown(self):
+        os.chdir(self.directorio_original)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def evento(self, gestor: BackupManager, numero: int):
+        gestor.backup_reporte_generado("prueba", {"numero": numero})
+
+    def test_cierre_con_escritor_lento_no_pierde_eventos(self):
+        gestor = BackupManager(tamano_lote=1)
+        agregar_lote = gestor.diario.agregar_lote
+        liberar = threading.Event()
+
+        def agregar_lento(registros):
+            liberar.wait(2.0)
+            return agregar_lote(registros)
+
+        gestor.diario.agregar_lote = agregar_lento
+        for numero in range(5):
+            self.evento(gestor, numero)
+
+        gestor.cerrar(timeout=0.05)
+        liberar.set()
+        gestor._hilo.join(2.0)
+
+        self.assertFalse(gestor._hilo.is_alive())
+        self.assertEqual(len(gestor.diario.buscar(categoria="reportes")), 5)
+        self.assertEqual(gestor.obtener_metricas()['errores'], 0)
+        self.assertTrue(gestor.diario._archivo.closed)
+
+    def test_cierre_normal(self):
+        gestor = BackupManager()
+        for numero in range(3):
+            self.evento(gestor, numero)
+        gestor.cerrar()
+        gestor.cerrar()
+
+        self.assertEqual(len(gestor.diario.buscar(categoria="reportes")), 3)
+        self.assertTrue(gestor.diario._archivo.closed)
+
+    def test_backup_tras_cerrar_es_error_claro(self):
+        for asincrono in (True, False):
+            gestor = BackupManager(asincrono=asincrono)
+            gestor.cerrar()
+            with self.assertRaisesRegex(RuntimeError, "cerrado"):
+                self.evento(gestor, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Pruebas de Búsqueda de Texto Completo - VentaPro
+================================================
+
+Verifica que los índices FTS5 siguen a sus tablas de origen mediante
+triggers, que la búsqueda ignora acentos y mayúsculas y admite prefijos,
+y que el filtro de categoría se aplica antes del límite.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from database.db_manager import DatabaseManager
+
+
+class TestBusquedaTexto(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix='ventapro_busqueda_')
+        self.db = DatabaseManager()
+        self.db.db_path = os.path.join(self.directorio, 'erp.db')
+        self.assertTrue(self.db.inicializar_db())
+        self.ejecutar("INSERT INTO categorias (nombre) VALUES ('Bebidas')")
+        self.bebidas = self.ejecutar("SELECT id FROM categorias WHERE nombre = 'Bebidas'")[0][0]
+
+    def tearDown(self):
+        self.db.desconectar()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def ejecutar(self, sql: str, parametros: tuple = ()):
+        conexion = sqlite3.connect(self.db.db_path)
+        conexion.execute("PRAGMA foreign_keys = ON")
+        try:
+            filas = conexion.execute(sql, parametros).fetchall()
+            conexion.commit()
+            return filas
+        finally:
+            conexion.close()
+
+    def crear_producto(self, codigo: str, nombre: str, categoria_id=None) -> int:
+        self.ejecutar("INSERT INTO productos (codigo, nombre, precio_venta, stock_actual, activo, categoria_id) "
+                      "VALUES (?, ?, 10, 5, 1, ?)", (codigo, nombre, categoria_id))
+        return self.ejecutar("SELECT id FROM productos WHERE codigo = ?", (codigo,))[0][0]
+
+    def codigos(self, *args, **kwargs):
+        return sorted(fila['codigo'] for fila in self.db.buscar_productos(*args, **kwargs))
+
+    # =================== PRODUCTOS ===================
+
+    def test_prefijo_sin_acentos_ni_mayusculas(self):
+        self.crear_producto('CAF-1', 'Café Molido Orgánico')
+        self.crear_producto('TE-1', 'Té Verde')
+
+        self.assertEqual(self.codigos('cafe'), ['CAF-1'])
+        self.assertEqual(self.codigos('ORGAN mol'), ['CAF-1'])
+        self.assertEqual(self.codigos('caf-1'), ['CAF-1'])
+        self.assertEqual(self.codigos(''), [])
+        # La sintaxis de FTS5 se trata como texto: OR es un prefijo más
+        self.assertEqual(self.codigos('té") OR NOT *'), [])
+        self.assertEqual(self.codigos('") OR *'), ['CAF-1'])
+
+    def test_triggers_siguen_altas_cambios_y_bajas(self):
+        producto = self.crear_producto('JUG-1', 'Jugo de Naranja')
+        self.ejecutar("UPDATE productos SET nombre = 'Jugo de Mango' WHERE id = ?", (producto,))
+        self.assertEqual(self.codigos('naranja'), [])
+        self.assertEqual(self.codigos('mango'), ['JUG-1'])
+
+        self.ejecutar("UPDATE productos SET activo = 0 WHERE id = ?", (producto,))
+        self.assertEqual(self.codigos('mango'), [])
+
+        self.ejecutar("DELETE FROM productos WHERE id = ?", (producto,))
+        self.assertEqual(self.ejecutar("SELECT COUNT(*) FROM productos_fts WHERE productos_fts MATCH 'mango'"),
+                         [(0,)])
+
+    def test_filtro_de_categoria_antes_del_limite(self):
+        for numero in range(5):
+            self.crear_producto(f'AGU-S{numero}', f'Agua Natural {numero}')
+        self.crear_producto('AGU-B', 'Agua Mineral', self.bebidas)
+
+        self.assertEqual(self.codigos('agua', limite=2, categoria='Bebidas'), ['AGU-B'])
+        self.assertEqual(len(self.codigos('agua', limite=3, categoria='General')), 3)
+
+    def test_renombrar_categoria_actualiza_el_indice(self):
+        self.crear_producto('REF-1', 'Refresco de Cola', self.bebidas)
+        self.ejecutar("UPDATE categorias SET nombre = 'Refrescos' WHERE id = ?", (self.bebidas,))
+
+        filas = self.db.buscar_productos('refrescos')
+        self.assertEqual([(f['codigo'], f['categoria']) for f in filas], [('REF-1', 'Refrescos')])
+
+    def test_reconstruir_indices(self):
+        self.crear_producto('PAN-1', 'Pan Integral')
+        self.ejecutar("DELETE FROM productos_fts")
+        self.assertEqual(self.codigos('integral'), [])
+
+        self.assertTrue(self.db.reconstruir_indices_busqueda())
+        self.assertEqual(self.codigos('integral'), ['PAN-1'])
+
+    # =================== CLIENTES ===================
+
+    def test_buscar_clientes(self):
+        self.ejecutar("INSERT INTO clientes (codigo, nombre, apellidos, email) "
+                      "VALUES ('CLI-9', 'José', 'Núñez Pérez', 'jose@ejemplo.com')")
+
+        filas = self.db.buscar_clientes('nunez jos')
+        self.assertEqual([f['codigo'] for f in filas], ['CLI-9'])
+        self.assertEqual(self.db.buscar_clientes('zzz'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Pruebas del Diario de Backups Segmentado - VentaPro
+===================================================
+
+Verifica que el índice lateral sobrevive a categorías y tipos con
+tabuladores o saltos de línea, y la recuperación de la cola al reabrir:
+registros sin indexar se reindexan y un registro cortado se trunca.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.diario_backup import ARCHIVO_INDICE, CABECERA, DiarioSegmentado, EntradaDiario
+
+
+class BaseDiario(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix='ventapro_diario_')
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def abrir(self, **kwargs) -> DiarioSegmentado:
+        diario = DiarioSegmentado(self.directorio, **kwargs)
+        self.addCleanup(diario.cerrar)
+        return diario
+
+
+class TestIndiceEscapado(BaseDiario):
+
+    def test_linea_con_separadores_ida_y_vuelta(self):
+        entrada = EntradaDiario(1.5, "ventas\tcaja", "venta\nnueva\r\\x", 2, 40, 17)
+        linea = entrada.linea()
+
+        self.assertEqual(linea.count('\t'), 5)
+        self.assertEqual(linea.count('\n'), 1)
+        leida = EntradaDiario.desde_linea(linea)
+        self.assertEqual((leida.categoria, leida.tipo), (entrada.categoria, entrada.tipo))
+        self.assertEqual((leida.segmento, leida.posicion, leida.longitud), (2, 40, 17))
+
+    def test_escape_invalido_es_linea_incompleta(self):
+        self.assertIsNone(EntradaDiario.desde_linea("1.0\tventas\\q\ttipo\t1\t0\t10\n"))
+
+    def test_reabrir_conserva_todas_las_entradas(self):
+        diario = self.abrir()
+        diario.agregar("ventas\tcaja", "venta\nnueva", {"folio": 1})
+        diario.agregar("ventas", "venta", {"folio": 2})
+        diario.cerrar()
+
+        reabierto = self.abrir()
+        self.assertEqual(len(reabierto.entradas), 2)
+        self.assertEqual(reabierto.registros_recuperados, 0)
+        self.assertEqual(reabierto.entradas[0].categoria, "ventas\tcaja")
+        self.assertEqual(reabierto.entradas[0].tipo, "venta\nnueva")
+        self.assertEqual([r['datos']['folio'] for r in reabierto.reproducir()], [1, 2])
+
+
+class TestRecuperacionCola(BaseDiario):
+
+    def test_registros_sin_indexar_se_reindexan(self):
+        diario = self.abrir()
+        diario.agregar("ventas", "venta", {"folio": 1})
+        diario.agregar("ventas\tcaja", "venta", {"folio": 2})
+        diario.cerrar()
+
+        # Simula un corte entre escribir los datos y el índice
+        ruta_indice = os.path.join(self.directorio, ARCHIVO_INDICE)
+        with open(ruta_indice, 'rb') as f:
+            primera = f.readline()
+        with open(ruta_indice, 'wb') as f:
+            f.write(primera)
+
+        reabierto = self.abrir()
+        self.assertEqual(reabierto.registros_recuperados, 1)
+        self.assertEqual([e.categoria for e in reabierto.entradas], ["ventas", "ventas\tcaja"])
+        self.assertEqual(reabierto.verificar(), {'validos': 2, 'corruptos': 0})
+
+    def test_registro_cortado_se_trunca(self):
+        diario = self.abrir()
+        entrada = diario.agregar("ventas", "venta", {"folio": 1})
+        diario.cerrar()
+
+        ruta = diario._ruta_segmento(entrada.segmento)
+        with open(ruta, 'ab') as f:
+            f.write(CABECERA.pack(100, 0) + b'{"ts":')
+
+        reabierto = self.abrir()
+        self.assertEqual(reabierto.bytes_truncados, CABECERA.size + 6)
+        self.assertEqual(os.path.getsize(ruta), CABECERA.size + entrada.longitud)
+        reabierto.agregar("ventas", "venta", {"folio": 2})
+        self.assertEqual([r['datos']['folio'] for r in reabierto.reproducir()], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
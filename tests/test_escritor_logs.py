@@ -0,0 +1,90 @@
+"""
+Pruebas del Escritor Asíncrono de Logs - VentaPro
+=================================================
+
+Verifica que el hilo escritor por lotes sobrevive a un handler cuyo
+flush falla y que detenerlo no bloquea cuando el hilo ya murió con la
+cola llena.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import logging
+import queue
+import threading
+import time
+import unittest
+
+from utils.logger import EscritorLotes
+
+
+class HandlerPrueba(logging.Handler):
+    """Guarda los mensajes y cuenta los errores reportados"""
+
+    def __init__(self, fallar_flush: bool = False):
+        super().__init__()
+        self.fallar_flush = fallar_flush
+        self.mensajes = []
+        self.errores = 0
+
+    def emit(self, record):
+        self.mensajes.append(record.getMessage())
+
+    def flush(self):
+        if self.fallar_flush:
+            raise ValueError("I/O operation on closed file.")
+
+    def handleError(self, record):
+        self.errores += 1
+
+
+def registro(mensaje: str) -> logging.LogRecord:
+    return logging.makeLogRecord({'msg': mensaje, 'levelno': logging.INFO, 'levelname': 'INFO'})
+
+
+def esperar(condicion, limite: float = 2.0) -> bool:
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if condicion():
+            return True
+        time.sleep(0.01)
+    return condicion()
+
+
+class TestEscritorLotes(unittest.TestCase):
+
+    def test_flush_fallido_no_detiene_el_hilo(self):
+        handler = HandlerPrueba(fallar_flush=True)
+        cola = queue.Queue()
+        escritor = EscritorLotes(cola, handler, tamano_lote=1)
+        escritor.start()
+        try:
+            cola.put(registro("primero"))
+            self.assertTrue(esperar(lambda: handler.errores >= 1))
+            cola.put(registro("segundo"))
+            self.assertTrue(esperar(lambda: handler.mensajes == ["primero", "segundo"]))
+            self.assertTrue(escritor._thread.is_alive())
+        finally:
+            escritor.stop()
+        self.assertGreaterEqual(handler.errores, 2)
+
+    def test_detener_con_hilo_muerto_y_cola_llena_no_bloquea(self):
+        cola = queue.Queue(maxsize=2)
+        escritor = EscritorLotes(cola, HandlerPrueba(), espera_cierre=0.2)
+        escritor.start()
+        hilo = escritor._thread
+        # El hilo termina sin pasar por stop(), como tras un error fatal
+        cola.put(escritor._sentinel)
+        self.assertTrue(esperar(lambda: not hilo.is_alive()))
+        cola.put(registro("pendiente"))
+        cola.put(registro("pendiente"))
+        self.assertTrue(cola.full())
+
+        detenido = threading.Event()
+        threading.Thread(target=lambda: (escritor.stop(), detenido.set()), daemon=True).start()
+        self.assertTrue(detenido.wait(2.0), "stop() quedó bloqueado en put() del centinela")
+
+
+if __name__ == '__main__':
+    unittest.main()
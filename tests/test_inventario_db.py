@@ -0,0 +1,194 @@
+"""
+Pruebas de Inventario Persistido - VentaPro
+===========================================
+
+Verifica sobre una base temporal que el stock vigente
+(productos.stock_actual) y el libro de movimientos_inventario no
+divergen: saldo de apertura, ventas del punto de venta, ajustes del
+gestor de inventario, cortes de stock y stock a una fecha.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from database.db_manager import DatabaseManager
+from database.modelos import DetalleVenta, Venta
+from modules.inventario import (ALERTA_STOCK_BAJO, ConfiguracionStock, MovimientoStock,
+                                TipoMovimiento, crear_gestor_inventario)
+
+
+class BaseInventarioDB(unittest.TestCase):
+    """Base temporal recién inicializada por prueba"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix='ventapro_inventario_')
+        self.db = DatabaseManager()
+        self.db.db_path = os.path.join(self.directorio, 'erp.db')
+        self.assertTrue(self.db.inicializar_db())
+
+    def tearDown(self):
+        self.db.desconectar()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def ejecutar(self, sql: str, parametros: tuple = ()):
+        conexion = sqlite3.connect(self.db.db_path)
+        try:
+            filas = conexion.execute(sql, parametros).fetchall()
+            conexion.commit()
+            return filas
+        finally:
+            conexion.close()
+
+    def crear_producto(self, codigo: str, stock: float, stock_minimo: float = 0) -> int:
+        self.ejecutar(
+            "INSERT INTO productos (codigo, nombre, precio_venta, stock_actual, stock_minimo, activo) "
+            "VALUES (?, ?, 10, ?, ?, 1)", (codigo, f"Producto {codigo}", stock, stock_minimo)
+        )
+        return self.ejecutar("SELECT id FROM productos WHERE codigo = ?", (codigo,))[0][0]
+
+    def stock_productos(self, producto_id: int) -> float:
+        return self.ejecutar("SELECT stock_actual FROM productos WHERE id = ?", (producto_id,))[0][0]
+
+    def vender(self, producto_id: int, cantidad: int):
+        venta = Venta(total=Decimal('10') * cantidad, detalles=[
+            DetalleVenta(producto_id=producto_id, cantidad=cantidad,
+                         precio_unitario=Decimal('10'), subtotal_linea=Decimal('10') * cantidad)
+        ])
+        return self.db.registrar_venta(venta)
+
+
+class TestStockUnico(BaseInventarioDB):
+    """productos.stock_actual y el libro de movimientos suman lo mismo"""
+
+    def test_carga_parte_del_stock_del_producto(self):
+        producto_id = self.crear_producto('P1', 50)
+        gestor = crear_gestor_inventario(self.db)
+
+        self.assertEqual(gestor.obtener_stock_actual(producto_id), 50)
+        self.assertEqual(self.db.stock_a_fecha(producto_id), 50)
+
+    def test_conteo_correcto_no_genera_ajuste(self):
+        producto_id = self.crear_producto('P1', 50)
+        gestor = crear_gestor_inventario(self.db)
+
+        reporte = gestor.conciliar_inventario_fisico([(producto_id, 50)])
+        self.assertEqual(reporte['ajustes_generados'], 0)
+        self.assertEqual(self.stock_productos(producto_id), 50)
+
+    def test_ajuste_actualiza_stock_del_producto(self):
+        producto_id = self.crear_producto('P1', 50)
+        gestor = crear_gestor_inventario(self.db)
+
+        gestor.conciliar_inventario_fisico([(producto_id, 45)])
+        self.assertEqual(self.stock_productos(producto_id), 45)
+        self.assertEqual(self.db.stock_a_fecha(producto_id), 45)
+
+    def test_venta_registra_salida(self):
+        producto_id = self.crear_producto('P1', 50)
+        self.db.conciliar_saldos_inventario()
+
+        self.assertIsNotNone(self.vender(producto_id, 3))
+        self.assertEqual(self.stock_productos(producto_id), 47)
+        self.assertEqual(self.db.stock_a_fecha(producto_id), 47)
+        self.assertEqual(crear_gestor_inventario(self.db).obtener_stock_actual(producto_id), 47)
+
+        salidas = self.ejecutar(
+            "SELECT cantidad_anterior, cantidad_movimiento, cantidad_actual FROM movimientos_inventario "
+            "WHERE producto_id = ? AND tipo_movimiento = 'SALIDA'", (producto_id,)
+        )
+        self.assertEqual(salidas, [(50, -3, 47)])
+
+    def test_conciliar_saldos_es_idempotente(self):
+        self.crear_producto('P1', 50)
+        self.assertEqual(self.db.conciliar_saldos_inventario(), 1)
+        self.assertEqual(self.db.conciliar_saldos_inventario(), 0)
+
+
+
+class TestCargaInventario(BaseInventarioDB):
+    """Configuraciones y alertas al abrir el gestor sobre la base de datos"""
+
+    def test_productos_sin_configuracion_usan_su_minimo(self):
+        producto_id = self.crear_producto('P1', 3, stock_minimo=5)
+        gestor = crear_gestor_inventario(self.db)
+
+        config = gestor.configuraciones[producto_id]
+        self.assertEqual(config.stock_minimo, 5)
+        self.assertEqual(config.punto_reorden, 5)
+        alertas = gestor.obtener_alertas_activas()
+        self.assertEqual([(a.producto_id, a.tipo) for a in alertas], [(producto_id, ALERTA_STOCK_BAJO)])
+        self.assertEqual([p['producto_id'] for p in gestor.obtener_productos_criticos()], [producto_id])
+
+    def test_configuracion_guardada_se_recarga(self):
+        producto_id = self.crear_producto('P1', 30, stock_minimo=5)
+        gestor = crear_gestor_inventario(self.db)
+        self.assertTrue(gestor.guardar_configuracion(ConfiguracionStock(
+            producto_id=producto_id, stock_minimo=40, stock_optimo=80, punto_reorden=45,
+            permitir_stock_negativo=True, proveedor_id=3, dias_entrega=4, costo_unitario=6.5
+        )))
+        self.assertEqual(len(gestor.obtener_alertas_activas()), 1)
+
+        recargado = crear_gestor_inventario(self.db)
+        config = recargado.configuraciones[producto_id]
+        self.assertEqual((config.stock_minimo, config.punto_reorden, config.proveedor_id), (40, 45, 3))
+        self.assertIs(config.permitir_stock_negativo, True)
+        self.assertEqual(len(recargado.obtener_alertas_activas()), 1)
+
+    def test_sin_productos_no_usa_datos_demo(self):
+        gestor = crear_gestor_inventario(self.db)
+        self.assertEqual(gestor.configuraciones, {})
+        self.assertEqual(len(gestor.movimientos), 0)
+
+
+class TestStockAFecha(BaseInventarioDB):
+    """Cortes de stock y reproducción de movimientos posteriores"""
+
+    def registrar(self, gestor, producto_id: int, fecha: datetime, delta: float):
+        anterior = gestor.obtener_stock_actual(producto_id)
+        tipo = TipoMovimiento.ENTRADA if delta > 0 else TipoMovimiento.SALIDA
+        self.assertTrue(gestor.registrar_movimiento(MovimientoStock(
+            id=gestor.libro.siguiente_id(), producto_id=producto_id, fecha=fecha, tipo=tipo,
+            cantidad=abs(delta), stock_anterior=anterior, stock_nuevo=anterior + delta
+        )))
+
+    def test_stock_a_fecha_con_corte(self):
+        producto_id = self.crear_producto('P1', 10)
+        gestor = crear_gestor_inventario(self.db)
+        ahora = datetime.now()
+        self.registrar(gestor, producto_id, ahora + timedelta(minutes=1), 5)
+        self.assertEqual(self.db.crear_snapshots_stock(ahora + timedelta(minutes=2)), 1)
+        self.registrar(gestor, producto_id, ahora + timedelta(minutes=3), -4)
+
+        self.assertEqual(self.db.stock_a_fecha(producto_id, ahora + timedelta(seconds=30)), 10)
+        self.assertEqual(self.db.stock_a_fecha(producto_id, ahora + timedelta(minutes=2)), 15)
+        self.assertEqual(self.db.stock_a_fecha(producto_id, ahora + timedelta(minutes=5)), 11)
+        self.assertEqual(self.stock_productos(producto_id), 11)
+
+    def test_movimiento_con_fecha_pasada_invalida_el_corte(self):
+        producto_id = self.crear_producto('P1', 10)
+        gestor = crear_gestor_inventario(self.db)
+        ahora = datetime.now()
+        self.db.crear_snapshots_stock(ahora + timedelta(minutes=2))
+        self.registrar(gestor, producto_id, ahora + timedelta(minutes=1), 5)
+
+        self.assertEqual(self.db.stock_a_fecha(producto_id, ahora + timedelta(minutes=2)), 15)
+        self.assertEqual(
+            self.ejecutar("SELECT COUNT(*) FROM snapshots_stock WHERE producto_id = ?", (producto_id,))[0][0], 0
+        )
+
+    def test_stock_a_fecha_anterior_a_la_apertura(self):
+        producto_id = self.crear_producto('P1', 10)
+        self.db.conciliar_saldos_inventario()
+        self.assertEqual(self.db.stock_a_fecha(producto_id, datetime.now() - timedelta(days=1)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
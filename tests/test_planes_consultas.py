@@ -0,0 +1,108 @@
+"""
+Pruebas de Planes de Consulta - VentaPro
+========================================
+
+Verifica con EXPLAIN QUERY PLAN que las consultas de ventas reescritas
+con rangos semiabiertos de fecha buscan por índice (SEARCH) en lugar de
+recorrer las tablas de ventas, tanto sobre las tablas crudas como sobre
+el rollup ventas_diarias.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from database.consultas import ConsultasSQL
+from database.db_manager import DatabaseManager
+
+# Cobertura anterior a cualquier rango consultado: fuerza la lectura del rollup
+COBERTURA_TOTAL = '2000-01-01'
+
+TABLAS_VENTAS = ('v', 'dv', 'vd', 'ventas', 'detalle_ventas', 'ventas_diarias')
+
+
+class TestPlanesConsultas(unittest.TestCase):
+    """Planes de las consultas de ventas sobre una base recién migrada"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.mkdtemp(prefix='ventapro_planes_')
+        cls.db = DatabaseManager()
+        cls.db.db_path = os.path.join(cls.directorio, 'erp.db')
+        if not cls.db.inicializar_db():
+            raise unittest.SkipTest("No se pudo inicializar la base de datos de prueba")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.desconectar()
+        shutil.rmtree(cls.directorio, ignore_errors=True)
+
+    def assertBuscaPorIndice(self, nombre: str, *args, indices=(), **kwargs):
+        """Ninguna tabla de ventas se recorre completa y se usan los índices esperados"""
+        plan = self.db.explicar_consulta(ConsultasSQL.obtener(nombre, *args, **kwargs))
+        self.assertTrue(plan, f"{nombre}: plan vacío")
+
+        for detalle in plan:
+            partes = detalle.split()
+            if partes[0] == 'SCAN' and partes[1] in TABLAS_VENTAS:
+                self.fail(f"{nombre}: recorre la tabla completa ({detalle})")
+
+        texto = '\n'.join(plan)
+        for indice in indices:
+            self.assertIn(indice, texto, f"{nombre}: no usa {indice}\n{texto}")
+
+    # =================== TABLAS CRUDAS ===================
+
+    def test_ventas_por_dia(self):
+        self.assertBuscaPorIndice('ventas_por_dia', '2026-01-01', '2026-01-31',
+                                  indices=['idx_ventas_estado_fecha'])
+
+    def test_ventas_por_mes(self):
+        self.assertBuscaPorIndice('ventas_por_mes', 2026,
+                                  indices=['idx_ventas_estado_fecha', 'idx_detalle_venta_cantidad'])
+
+    def test_resumen_ventas_hoy(self):
+        self.assertBuscaPorIndice('resumen_ventas_hoy',
+                                  indices=['idx_ventas_estado_fecha', 'idx_detalle_venta_cantidad'])
+
+    def test_estadisticas_generales(self):
+        self.assertBuscaPorIndice('estadisticas_generales', indices=['idx_ventas_estado_fecha'])
+
+    # =================== ROLLUP ===================
+
+    def test_ventas_por_dia_rollup(self):
+        self.assertBuscaPorIndice('ventas_por_dia', '2026-01-01', '2026-01-31', cobertura=COBERTURA_TOTAL)
+
+    def test_ventas_por_mes_rollup(self):
+        self.assertBuscaPorIndice('ventas_por_mes', 2026, cobertura=COBERTURA_TOTAL)
+
+    def test_resumen_ventas_hoy_rollup(self):
+        self.assertBuscaPorIndice('resumen_ventas_hoy', cobertura=COBERTURA_TOTAL)
+
+    def test_estadisticas_generales_rollup(self):
+        self.assertBuscaPorIndice('estadisticas_generales', cobertura=COBERTURA_TOTAL)
+
+
+    # =================== ENRUTAMIENTO ===================
+
+    def test_preparar_consulta_usa_cobertura_de_rollups(self):
+        """Sin `cobertura` explícita se lee la del rollup y el rango cubierto va a ventas_diarias"""
+        self.assertIsNotNone(self.db.obtener_cobertura_rollups())
+        consulta = self.db.preparar_consulta('ventas_por_dia', '2026-01-01', '2026-01-31')
+        self.assertIn('ventas_diarias', consulta.sql)
+
+        cruda = self.db.preparar_consulta('ventas_por_dia', '2026-01-01', '2026-01-31', cobertura=None)
+        self.assertNotIn('ventas_diarias', cruda.sql)
+
+    def test_preparar_consulta_sin_rollup(self):
+        """Las consultas que no tienen rollup no reciben `cobertura`"""
+        consulta = self.db.preparar_consulta('productos_stock_bajo')
+        self.assertEqual(consulta, ConsultasSQL.productos_stock_bajo())
+
+
+if __name__ == '__main__':
+    unittest.main()
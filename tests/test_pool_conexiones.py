@@ -0,0 +1,110 @@
+"""
+Pruebas del Pool de Conexiones SQLite - VentaPro
+================================================
+
+Verifica el checkout de lectores y del escritor, la espera acotada
+cuando el pool se agota y que las métricas se puedan consultar mientras
+otros hilos crean lectores.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from database.pool_conexiones import PoolAgotadoError, PoolConexiones
+
+
+class TestPoolConexiones(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix='ventapro_pool_')
+        self.pool = PoolConexiones(os.path.join(self.directorio, 'erp.db'),
+                                   num_lectores=4, timeout_espera=0.2)
+        escritor = self.pool.abrir()
+        escritor.execute("CREATE TABLE t (x INTEGER)")
+        escritor.execute("INSERT INTO t VALUES (1)")
+        escritor.commit()
+
+    def tearDown(self):
+        self.pool.cerrar()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def test_lector_reentrante_y_solo_lectura(self):
+        with self.pool.lector() as conexion:
+            with self.pool.lector() as interna:
+                self.assertIs(interna, conexion)
+            self.assertEqual(conexion.execute("SELECT x FROM t").fetchone()[0], 1)
+            with self.assertRaises(Exception):
+                conexion.execute("INSERT INTO t VALUES (2)")
+
+        metricas = self.pool.obtener_metricas()
+        self.assertEqual(metricas['checkouts_lectura'], 1)
+        self.assertEqual(metricas['lectores_creados'], 1)
+        self.assertEqual(metricas['en_uso_lectura'], 0)
+
+    def test_pool_agotado(self):
+        pool = PoolConexiones(os.path.join(self.directorio, 'erp.db'),
+                              num_lectores=1, timeout_espera=0.05)
+        pool.abrir()
+        self.addCleanup(pool.cerrar)
+        ocupado, liberar = threading.Event(), threading.Event()
+
+        def ocupar():
+            with pool.lector():
+                ocupado.set()
+                liberar.wait(2.0)
+
+        hilo = threading.Thread(target=ocupar)
+        hilo.start()
+        ocupado.wait(2.0)
+        try:
+            with self.assertRaises(PoolAgotadoError):
+                with pool.lector():
+                    pass
+        finally:
+            liberar.set()
+            hilo.join()
+        self.assertEqual(pool.obtener_metricas()['timeouts'], 1)
+
+    def test_metricas_concurrentes_con_creacion_de_lectores(self):
+        errores = []
+        fin = threading.Event()
+
+        def leer():
+            try:
+                for _ in range(200):
+                    with self.pool.lector() as conexion:
+                        self.pool.ejecutar(conexion, "SELECT x FROM t").fetchall()
+            except Exception as e:
+                errores.append(e)
+
+        def consultar_metricas():
+            try:
+                while not fin.is_set():
+                    self.pool.obtener_metricas()
+            except Exception as e:
+                errores.append(e)
+
+        lectores = [threading.Thread(target=leer) for _ in range(4)]
+        monitor = threading.Thread(target=consultar_metricas)
+        monitor.start()
+        for hilo in lectores:
+            hilo.start()
+        for hilo in lectores:
+            hilo.join()
+        fin.set()
+        monitor.join()
+
+        self.assertEqual(errores, [])
+        metricas = self.pool.obtener_metricas()
+        self.assertLessEqual(metricas['lectores_creados'], 4)
+        self.assertEqual(metricas['cache_aciertos'] + metricas['cache_fallos'], 800)
+
+
+if __name__ == '__main__':
+    unittest.main()
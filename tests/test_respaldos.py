@@ -0,0 +1,176 @@
+"""
+Pruebas de Respaldos en Línea - VentaPro
+========================================
+
+Verifica los respaldos completos y diferenciales con manifiesto: la
+restauración reproduce la base byte a byte, un diferencial guarda solo
+las páginas cambiadas, una cadena corrupta se detecta al verificar y la
+retención elimina cadenas completas.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from database import respaldos
+
+# Páginas pequeñas para que un cambio puntual no abarque toda la base
+TAMANO_PAGINA = 4096
+
+
+class TestRespaldos(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix='ventapro_respaldos_')
+        self.respaldos = os.path.join(self.directorio, 'backups')
+        os.makedirs(self.respaldos)
+        self.db_path = os.path.join(self.directorio, 'erp.db')
+
+        self.conexion = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("CREATE TABLE datos (id INTEGER PRIMARY KEY, texto TEXT)")
+        self.conexion.executemany("INSERT INTO datos (texto) VALUES (?)",
+                                  [(f"registro {i:05d} " * 8,) for i in range(2000)])
+        self.conexion.commit()
+
+    def tearDown(self):
+        self.conexion.close()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def completo(self, comprimir: bool = True):
+        return respaldos.crear_respaldo_completo(self.db_path, self.respaldos, comprimir,
+                                                 tamano_pagina=TAMANO_PAGINA, pausa=0)
+
+    def diferencial(self, **kwargs):
+        return respaldos.crear_respaldo_diferencial(self.db_path, self.respaldos, True,
+                                                    tamano_pagina=TAMANO_PAGINA, pausa=0, **kwargs)
+
+    def manifiesto(self, creado) -> str:
+        nombre = creado['base'] if creado['tipo'] == 'completo' else \
+            os.path.basename(creado['ruta']).split('.', 1)[0]
+        return os.path.join(self.respaldos, nombre + respaldos.SUFIJO_MANIFIESTO)
+
+    def restaurar(self, creado) -> list:
+        destino = os.path.join(self.directorio, 'restaurada.db')
+        respaldos.restaurar_respaldo(self.manifiesto(creado), destino)
+        self.assertTrue(respaldos.verificar_respaldo(destino))
+        conexion = sqlite3.connect(destino)
+        try:
+            return conexion.execute("SELECT id, texto FROM datos ORDER BY id").fetchall()
+        finally:
+            conexion.close()
+            os.remove(destino)
+
+    def contenido(self) -> list:
+        return self.conexion.execute("SELECT id, texto FROM datos ORDER BY id").fetchall()
+
+    # =================== COMPLETOS ===================
+
+    def test_completo_se_restaura(self):
+        for comprimir in (True, False):
+            creado = self.completo(comprimir)
+            self.assertEqual(creado['tipo'], 'completo')
+            self.assertEqual(creado['ruta'].endswith('.db'), not comprimir)
+            self.assertEqual(self.restaurar(creado), self.contenido())
+
+    def test_copia_en_linea_con_escrituras_concurrentes(self):
+        escritor = sqlite3.connect(self.db_path, check_same_thread=False)
+        fin = threading.Event()
+
+        def escribir():
+            while not fin.is_set():
+                escritor.execute("INSERT INTO datos (texto) VALUES ('concurrente')")
+                escritor.commit()
+
+        hilo = threading.Thread(target=escribir)
+        hilo.start()
+        try:
+            creado = respaldos.crear_respaldo_completo(self.db_path, self.respaldos,
+                                                      tamano_pagina=TAMANO_PAGINA,
+                                                      paginas_por_paso=4, pausa=0.001)
+        finally:
+            fin.set()
+            hilo.join()
+            escritor.close()
+
+        restaurada = self.restaurar(creado)
+        self.assertGreaterEqual(len(restaurada), 2000)
+        self.assertEqual(restaurada[:2000], self.contenido()[:2000])
+
+    # =================== DIFERENCIALES ===================
+
+    def test_diferencial_guarda_solo_paginas_cambiadas(self):
+        self.completo()
+        self.conexion.execute("UPDATE datos SET texto = 'modificado' WHERE id = 1000")
+        self.conexion.commit()
+
+        creado = self.diferencial()
+        self.assertEqual(creado['tipo'], 'diferencial')
+        self.assertGreater(creado['paginas_cambiadas'], 0)
+        self.assertLess(creado['paginas_cambiadas'], creado['num_paginas'] // 4)
+        self.assertEqual(self.restaurar(creado), self.contenido())
+
+    def test_diferencial_con_base_que_crece(self):
+        self.completo()
+        self.conexion.executemany("INSERT INTO datos (texto) VALUES (?)",
+                                  [("nuevo " * 40,) for _ in range(500)])
+        self.conexion.commit()
+
+        self.assertEqual(self.restaurar(self.diferencial()), self.contenido())
+
+    def test_sin_completo_o_cadena_larga_crea_completo(self):
+        self.assertEqual(self.diferencial()['tipo'], 'completo')
+        self.assertEqual(self.diferencial(max_diferenciales=1)['tipo'], 'diferencial')
+        self.assertEqual(self.diferencial(max_diferenciales=1)['tipo'], 'completo')
+
+    def test_cadena_corrupta_se_detecta(self):
+        self.completo(comprimir=False)
+        self.conexion.execute("UPDATE datos SET texto = 'modificado' WHERE id = 5")
+        self.conexion.commit()
+        creado = self.diferencial()
+
+        base = respaldos.ultimo_completo(self.respaldos)
+        with open(os.path.join(self.respaldos, base['archivo']), 'r+b') as f:
+            f.seek(TAMANO_PAGINA * 3 + 100)
+            f.write(b'\xff' * 16)
+
+        with self.assertRaises(ValueError):
+            respaldos.restaurar_respaldo(self.manifiesto(creado), os.path.join(self.directorio, 'x.db'))
+        resultados = respaldos.verificar_cadenas(self.respaldos)
+        self.assertEqual(len(resultados), 2)
+        self.assertFalse(any(r['valido'] for r in resultados.values()))
+
+    # =================== RETENCIÓN ===================
+
+    def test_retencion_conserva_los_mas_recientes(self):
+        creados = [self.completo() for _ in range(3)]
+
+        eliminados = respaldos.aplicar_retencion(self.respaldos, 2)
+
+        self.assertTrue(eliminados)
+        self.assertTrue(all(os.path.basename(r).startswith(creados[0]['base']) for r in eliminados))
+        self.assertEqual(respaldos.listar_respaldos(self.respaldos), [c['ruta'] for c in creados[1:]])
+
+    def test_retencion_elimina_la_cadena_completa(self):
+        antiguo = self.completo()
+        self.diferencial()
+        reciente = self.completo()
+
+        eliminados = respaldos.aplicar_retencion(self.respaldos, 1)
+
+        nombres = [os.path.basename(ruta) for ruta in eliminados]
+        self.assertTrue(any(n.startswith(antiguo['base']) for n in nombres))
+        self.assertTrue(any(n.startswith(respaldos.PREFIJO_DIFERENCIAL) for n in nombres))
+        restantes = sorted(os.listdir(self.respaldos))
+        self.assertTrue(restantes)
+        self.assertTrue(all(n.startswith(reciente['base']) for n in restantes))
+
+
+if __name__ == '__main__':
+    unittest.main()
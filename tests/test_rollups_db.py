@@ -0,0 +1,140 @@
+"""
+Pruebas de Rollups de Ventas - VentaPro
+=======================================
+
+Verifica que los triggers mantienen las tablas de resumen al registrar,
+cancelar y modificar ventas, y que su contenido coincide con una
+reconstrucción completa desde las tablas crudas.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+from database import rollups
+from database.db_manager import DatabaseManager
+from database.modelos import DetalleVenta, Venta
+
+FECHA = datetime(2026, 3, 15, 12, 0, 0)
+
+
+def venta(cliente_id, *lineas, fecha: datetime = FECHA) -> Venta:
+    """Venta con líneas (producto_id, cantidad) a precio 10"""
+    detalles = [
+        DetalleVenta(producto_id=producto_id, cantidad=cantidad, precio_unitario=Decimal('10'),
+                     subtotal_linea=Decimal('10') * cantidad)
+        for producto_id, cantidad in lineas
+    ]
+    total = sum((d.subtotal_linea for d in detalles), Decimal('0'))
+    return Venta(cliente_id=cliente_id, subtotal=total, total=total, detalles=detalles,
+                 fecha_venta=fecha)
+
+
+class TestRollupsVentas(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix='ventapro_rollups_')
+        self.db = DatabaseManager()
+        self.db.db_path = os.path.join(self.directorio, 'erp.db')
+        self.assertTrue(self.db.inicializar_db())
+        self.a = self.crear_producto('A')
+        self.b = self.crear_producto('B')
+        self.ejecutar("INSERT INTO clientes (codigo, nombre) VALUES ('C1', 'Cliente')")
+        self.cliente = self.ejecutar("SELECT id FROM clientes WHERE codigo = 'C1'")[0][0]
+
+    def tearDown(self):
+        self.db.desconectar()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def ejecutar(self, sql: str, parametros: tuple = ()):
+        conexion = sqlite3.connect(self.db.db_path)
+        try:
+            filas = conexion.execute(sql, parametros).fetchall()
+            conexion.commit()
+            return filas
+        finally:
+            conexion.close()
+
+    def crear_producto(self, codigo: str) -> int:
+        self.ejecutar("INSERT INTO productos (codigo, nombre, precio_venta, stock_actual, activo) "
+                      "VALUES (?, ?, 10, 100, 1)", (codigo, f"Producto {codigo}"))
+        return self.ejecutar("SELECT id FROM productos WHERE codigo = ?", (codigo,))[0][0]
+
+    def resumen(self):
+        """Contenido de las tres tablas de resumen"""
+        return (
+            self.ejecutar("SELECT fecha, num_ventas, total, productos_vendidos, venta_mayor, venta_menor "
+                          "FROM ventas_diarias ORDER BY fecha"),
+            self.ejecutar("SELECT fecha, producto_id, cantidad, ingresos, num_ventas "
+                          "FROM ventas_producto_diarias ORDER BY fecha, producto_id"),
+            self.ejecutar("SELECT cliente_id, año_mes, num_compras, total_comprado "
+                          "FROM ventas_cliente_mensuales ORDER BY cliente_id, año_mes"),
+        )
+
+    def assertCoincideConReconstruccion(self):
+        por_triggers = self.resumen()
+        self.assertTrue(self.db.reconstruir_rollups())
+        self.assertEqual(self.resumen(), por_triggers)
+
+    # =================== TRIGGERS ===================
+
+    def test_altas_acumulan(self):
+        self.assertIsNotNone(self.db.registrar_ventas_lote([
+            venta(self.cliente, (self.a, 2), (self.b, 1)),
+            venta(self.cliente, (self.a, 5)),
+            venta(None, (self.b, 1), fecha=datetime(2026, 3, 16, 9, 0, 0)),
+        ]))
+
+        diarias, por_producto, por_cliente = self.resumen()
+        self.assertEqual(diarias, [('2026-03-15', 2, 80, 8, 50, 30), ('2026-03-16', 1, 10, 1, 10, 10)])
+        self.assertEqual(por_producto, [
+            ('2026-03-15', self.a, 7, 70, 2), ('2026-03-15', self.b, 1, 10, 1),
+            ('2026-03-16', self.b, 1, 10, 1),
+        ])
+        self.assertEqual(por_cliente, [(self.cliente, '2026-03', 2, 80)])
+        self.assertCoincideConReconstruccion()
+
+    def test_cancelacion_recalcula_el_dia(self):
+        primera = self.db.registrar_venta(venta(self.cliente, (self.a, 2)))
+        self.db.registrar_venta(venta(self.cliente, (self.a, 3)))
+
+        self.ejecutar("UPDATE ventas SET estado = 'cancelada' WHERE id = ?", (primera,))
+
+        diarias, por_producto, por_cliente = self.resumen()
+        self.assertEqual(diarias, [('2026-03-15', 1, 30, 3, 30, 30)])
+        self.assertEqual(por_producto, [('2026-03-15', self.a, 3, 30, 1)])
+        self.assertEqual(por_cliente, [(self.cliente, '2026-03', 1, 30)])
+        self.assertCoincideConReconstruccion()
+
+    def test_baja_de_detalle_y_venta(self):
+        venta_id = self.db.registrar_venta(venta(self.cliente, (self.a, 2), (self.b, 4)))
+
+        self.ejecutar("DELETE FROM detalle_ventas WHERE venta_id = ? AND producto_id = ?",
+                      (venta_id, self.b))
+        self.assertEqual(self.resumen()[1], [('2026-03-15', self.a, 2, 20, 1)])
+        self.assertCoincideConReconstruccion()
+
+        self.ejecutar("DELETE FROM detalle_ventas WHERE venta_id = ?", (venta_id,))
+        self.ejecutar("DELETE FROM ventas WHERE id = ?", (venta_id,))
+        self.assertEqual(self.resumen(), ([], [], []))
+
+    # =================== COBERTURA ===================
+
+    def test_reconstruccion_parcial_no_reduce_la_cobertura(self):
+        self.assertEqual(self.db.obtener_cobertura_rollups(), rollups.COBERTURA_TOTAL)
+        self.db.registrar_venta(venta(self.cliente, (self.a, 2), fecha=datetime(2026, 1, 10)))
+
+        self.assertTrue(self.db.reconstruir_rollups('2026-03-20'))
+        self.assertEqual(self.db.obtener_cobertura_rollups(), rollups.COBERTURA_TOTAL)
+        self.assertEqual(self.resumen()[0], [('2026-01-10', 1, 20, 2, 20, 20)])
+
+
+if __name__ == '__main__':
+    unittest.main()
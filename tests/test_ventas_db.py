@@ -0,0 +1,133 @@
+"""
+Pruebas de Registro de Ventas - VentaPro
+========================================
+
+Verifica la ruta central de escritura de ventas: cabecera, detalle,
+descuento de stock y salida en el libro de movimientos en una sola
+transacción, con reversión completa ante stock insuficiente.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from decimal import Decimal
+
+from database.db_manager import DatabaseManager
+from database.modelos import DetalleVenta, Venta
+
+
+def venta(*lineas) -> Venta:
+    """Venta con líneas (producto_id, cantidad) a precio 10"""
+    detalles = [
+        DetalleVenta(producto_id=producto_id, cantidad=cantidad, precio_unitario=Decimal('10'),
+                     subtotal_linea=Decimal('10') * cantidad)
+        for producto_id, cantidad in lineas
+    ]
+    total = sum((d.subtotal_linea for d in detalles), Decimal('0'))
+    return Venta(subtotal=total, total=total, detalles=detalles)
+
+
+class TestRegistrarVentas(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix='ventapro_ventas_')
+        self.db = DatabaseManager()
+        self.db.db_path = os.path.join(self.directorio, 'erp.db')
+        self.assertTrue(self.db.inicializar_db())
+        self.a = self.crear_producto('A', 10)
+        self.b = self.crear_producto('B', 2)
+
+    def tearDown(self):
+        self.db.desconectar()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def ejecutar(self, sql: str, parametros: tuple = ()):
+        conexion = sqlite3.connect(self.db.db_path)
+        try:
+            filas = conexion.execute(sql, parametros).fetchall()
+            conexion.commit()
+            return filas
+        finally:
+            conexion.close()
+
+    def crear_producto(self, codigo: str, stock: int) -> int:
+        self.ejecutar("INSERT INTO productos (codigo, nombre, precio_venta, stock_actual, activo) "
+                      "VALUES (?, ?, 10, ?, 1)", (codigo, f"Producto {codigo}", stock))
+        return self.ejecutar("SELECT id FROM productos WHERE codigo = ?", (codigo,))[0][0]
+
+    def stock(self, producto_id: int) -> int:
+        return self.ejecutar("SELECT stock_actual FROM productos WHERE id = ?", (producto_id,))[0][0]
+
+    def contar(self, tabla: str) -> int:
+        return self.ejecutar(f"SELECT COUNT(*) FROM {tabla}")[0][0]
+
+    def contar_salidas(self) -> int:
+        return self.ejecutar("SELECT COUNT(*) FROM movimientos_inventario WHERE tipo_movimiento = 'SALIDA'")[0][0]
+
+    # =================== CAMINO FELIZ ===================
+
+    def test_registrar_venta(self):
+        nueva = venta((self.a, 3), (self.b, 1))
+        venta_id = self.db.registrar_venta(nueva)
+
+        self.assertIsNotNone(venta_id)
+        self.assertEqual(nueva.id, venta_id)
+        self.assertTrue(nueva.folio)
+        self.assertTrue(all(d.venta_id == venta_id for d in nueva.detalles))
+        self.assertEqual(self.ejecutar("SELECT total, estado FROM ventas WHERE id = ?", (venta_id,)),
+                         [(40, 'completada')])
+        self.assertEqual(self.ejecutar(
+            "SELECT producto_id, cantidad FROM detalle_ventas WHERE venta_id = ? ORDER BY id", (venta_id,)
+        ), [(self.a, 3), (self.b, 1)])
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (7, 1))
+        self.assertEqual(self.contar_salidas(), 2)
+
+    def test_lote_acumula_stock_por_producto(self):
+        ids = self.db.registrar_ventas_lote([venta((self.a, 4)), venta((self.a, 5), (self.b, 2))])
+
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(len(set(ids)), 2)
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (1, 0))
+        self.assertEqual(self.ejecutar(
+            "SELECT cantidad_anterior, cantidad_actual FROM movimientos_inventario "
+            "WHERE producto_id = ? AND tipo_movimiento = 'SALIDA' ORDER BY id", (self.a,)
+        ), [(10, 6), (6, 1)])
+
+    def test_lote_vacio(self):
+        self.assertEqual(self.db.registrar_ventas_lote([]), [])
+
+    # =================== REVERSIÓN ===================
+
+    def test_stock_insuficiente_revierte_la_venta(self):
+        nueva = venta((self.a, 1), (self.b, 3))
+        self.assertIsNone(self.db.registrar_venta(nueva))
+
+        self.assertIsNone(nueva.id)
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (10, 2))
+        self.assertEqual((self.contar('ventas'), self.contar('detalle_ventas'), self.contar_salidas()), (0, 0, 0))
+
+    def test_lote_es_atomico(self):
+        """Una venta sin stock revierte también las válidas del mismo lote"""
+        buenas = venta((self.a, 2))
+        # B solo tiene 2: la segunda venta agota lo acumulado en el lote
+        lote = [buenas, venta((self.b, 2)), venta((self.b, 1))]
+        self.assertIsNone(self.db.registrar_ventas_lote(lote))
+
+        self.assertIsNone(buenas.id)
+        self.assertEqual(buenas.folio, '')
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (10, 2))
+        self.assertEqual((self.contar('ventas'), self.contar('detalle_ventas'), self.contar_salidas()), (0, 0, 0))
+
+    def test_producto_inexistente_revierte(self):
+        self.assertIsNone(self.db.registrar_venta(venta((self.a, 1), (9999, 1))))
+        self.assertEqual(self.stock(self.a), 10)
+        self.assertEqual(self.contar('ventas'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+"""
+Lista Virtual - VentaPro
+========================
+
+Lista desplazable virtualizada para CustomTkinter. Solo existen los
+widgets de las filas visibles: un pool de filas recicladas se reubica y
+se vuelve a vincular con los datos al desplazarse, de modo que el costo
+de redibujar depende del tamaño de la ventana y no del total de datos.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import customtkinter as ctk
+
+
+def rango_visible(desplazamiento: int, alto_vista: int, alto_fila: int,
+                  total: int) -> Tuple[int, int]:
+    """Calcula el rango [inicio, fin) de índices visibles
+
+    Args:
+        desplazamiento: Píxeles desplazados desde el inicio de la lista
+        alto_vista: Alto visible en píxeles
+        alto_fila: Alto fijo de cada fila
+        total: Cantidad total de elementos
+    """
+    if total <= 0 or alto_fila <= 0:
+        return 0, 0
+    inicio = max(0, min(desplazamiento // alto_fila, total - 1))
+    fin = min(total, math.ceil((desplazamiento + alto_vista) / alto_fila))
+    return inicio, max(inicio, fin)
+
+
+class ListaVirtual(ctk.CTkFrame):
+    """Lista virtualizada con filas recicladas de alto fijo
+
+    Args:
+        master: Widget contenedor
+        crear_fila: Construye una fila vacía dentro del frame recibido y
+            retorna sus widgets (cualquier objeto); se llama solo al crecer
+            el pool
+        vincular_fila: Actualiza los widgets de una fila con un elemento;
+            recibe (widgets, elemento, indice)
+        alto_fila: Alto fijo de cada fila en píxeles
+        mensaje_vacio: Texto mostrado cuando no hay elementos
+    """
+
+    def __init__(self, master, crear_fila: Callable[[ctk.CTkFrame], Any],
+                 vincular_fila: Callable[[Any, Any, int], None], alto_fila: int = 48,
+                 mensaje_vacio: str = "Sin elementos", **kwargs):
+        super().__init__(master, **kwargs)
+        self.crear_fila = crear_fila
+        self.vincular_fila = vincular_fila
+        self.alto_fila = alto_fila
+
+        self._elementos: Sequence = ()
+        self._desplazamiento = 0
+        self._alto_vista = 0
+
+        # Pool de filas: (frame, widgets) y el índice vinculado a cada una
+        self._pool: List[Tuple[ctk.CTkFrame, Any]] = []
+        self._vinculos: List[Optional[int]] = []
+        self._vinculaciones = 0
+
+        self.cuerpo = ctk.CTkFrame(self, fg_color="transparent")
+        self.cuerpo.pack(side="left", fill="both", expand=True)
+
+        self.barra = ctk.CTkScrollbar(self, command=self._al_desplazar_barra)
+        self.barra.pack(side="right", fill="y")
+
+        self.etiqueta_vacia = ctk.CTkLabel(self.cuerpo, text=mensaje_vacio, text_color="gray")
+
+        self.cuerpo.bind("<Configure>", self._al_redimensionar)
+        self._enlazar_rueda(self.cuerpo)
+
+    # =================== DATOS ===================
+
+    def establecer_datos(self, elementos: Sequence, mantener_posicion: bool = False):
+        """Reemplaza los elementos mostrados
+
+        Con mantener_posicion=True se conserva el desplazamiento (p. ej. al
+        refrescar el carrito); si no, la lista vuelve al inicio.
+        """
+        self._elementos = elementos
+        if not mantener_posicion:
+            self._desplazamiento = 0
+        self._limitar_desplazamiento()
+        self._redibujar(forzar=True)
+
+    def refrescar(self):
+        """Vuelve a vincular las filas visibles (datos modificados en sitio)"""
+        self._redibujar(forzar=True)
+
+    def redibujar(self):
+        """Redibuja vinculando solo las filas cuyo índice cambió
+
+        Sirve tras agregar elementos al final de la misma secuencia: las
+        filas ya vinculadas a índices existentes no se tocan.
+        """
+        self._limitar_desplazamiento()
+        self._redibujar()
+
+    def actualizar_elemento(self, indice: int):
+        """Vuelve a vincular solo la fila de un elemento, si está visible"""
+        for posicion, vinculado in enumerate(self._vinculos):
+            if vinculado == indice:
+                widgets = self._pool[posicion][1]
+                self.vincular_fila(widgets, self._elementos[indice], indice)
+                self._vinculaciones += 1
+                return
+
+    def desplazar_a(self, indice: int):
+        """Desplaza la lista para que el elemento quede visible"""
+        y = indice * self.alto_fila
+        if y < self._desplazamiento:
+            self._desplazamiento = y
+        elif y + self.alto_fila > self._desplazamiento + self._alto_vista:
+            self._desplazamiento = y + self.alto_fila - self._alto_vista
+        self._limitar_desplazamiento()
+        self._redibujar()
+
+    def __len__(self) -> int:
+        return len(self._elementos)
+
+    # =================== DESPLAZAMIENTO ===================
+
+    @property
+    def _alto_total(self) -> int:
+        return len(self._elementos) * self.alto_fila
+
+    def _limitar_desplazamiento(self):
+        maximo = max(0, self._alto_total - self._alto_vista)
+        self._desplazamiento = max(0, min(self._desplazamiento, maximo))
+
+    def _al_desplazar_barra(self, accion, cantidad, unidad=None):
+        """Protocolo yview de Tk: ('moveto', fracción) o ('scroll', n, unidad)"""
+        if accion == "moveto":
+            self._desplazamiento = int(float(cantidad) * self._alto_total)
+        elif accion == "scroll":
+            paso = self._alto_vista if unidad == "pages" else self.alto_fila
+            self._desplazamiento += int(cantidad) * max(paso, 1)
+        self._limitar_desplazamiento()
+        self._redibujar()
+
+    def _al_girar_rueda(self, evento):
+        """Desplaza tres filas por muesca de la rueda del ratón"""
+        if getattr(evento, 'num', None) == 4 or getattr(evento, 'delta', 0) > 0:
+            direccion = -1
+        else:
+            direccion = 1
+        self._desplazamiento += direccion * 3 * self.alto_fila
+        self._limitar_desplazamiento()
+        self._redibujar()
+
+    def _enlazar_rueda(self, widget):
+        """Enlaza la rueda del ratón en Windows/macOS (MouseWheel) y X11 (Button-4/5)"""
+        for secuencia in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(secuencia, self._al_girar_rueda, add="+")
+
+    def _al_redimensionar(self, evento):
+        self._alto_vista = evento.height
+        self._limitar_desplazamiento()
+        self._redibujar()
+
+    # =================== RENDERIZADO ===================
+
+    def _asegurar_pool(self, necesarias: int):
+        """Crea filas hasta tener las necesarias para cubrir la vista"""
+        while len(self._pool) < necesarias:
+            frame = ctk.CTkFrame(self.cuerpo, height=self.alto_fila)
+            widgets = self.crear_fila(frame)
+            self._enlazar_rueda(frame)
+            for hijo in frame.winfo_children():
+                self._enlazar_rueda(hijo)
+            self._pool.append((frame, widgets))
+            self._vinculos.append(None)
+
+    def _redibujar(self, forzar: bool = False):
+        """Ubica y vincula las filas del rango visible"""
+        total = len(self._elementos)
+        inicio, fin = rango_visible(self._desplazamiento, self._alto_vista, self.alto_fila, total)
+
+        if total == 0:
+            self.etiqueta_vacia.place(relx=0.5, y=30, anchor="n")
+        else:
+            self.etiqueta_vacia.place_forget()
+
+        # Una fila extra cubre la fila parcialmente visible al desplazar
+        self._asegurar_pool(fin - inicio + (1 if fin < total else 0))
+        desfase = self._desplazamiento - inicio * self.alto_fila
+
+        for posicion, (frame, widgets) in enumerate(self._pool):
+            indice = inicio + posicion
+            if indice >= total or posicion > fin - inicio:
+                if self._vinculos[posicion] is not None:
+                    frame.place_forget()
+                    self._vinculos[posicion] = None
+                continue
+
+            frame.place(x=0, y=posicion * self.alto_fila - desfase, relwidth=1.0,
+                        height=self.alto_fila - 2)
+            if forzar or self._vinculos[posicion] != indice:
+                self.vincular_fila(widgets, self._elementos[indice], indice)
+                self._vinculos[posicion] = indice
+                self._vinculaciones += 1
+
+        self._actualizar_barra()
+
+    def _actualizar_barra(self):
+        alto_total = self._alto_total
+        if alto_total <= self._alto_vista or alto_total == 0:
+            self.barra.set(0.0, 1.0)
+            return
+        primero = self._desplazamiento / alto_total
+        self.barra.set(primero, min(1.0, primero + self._alto_vista / alto_total))
+
+    def obtener_metricas(self) -> Dict[str, int]:
+        """Tamaño del pool y cantidad de vinculaciones realizadas"""
+        return {
+            'elementos': len(self._elementos),
+            'filas_pool': len(self._pool),
+            'filas_visibles': sum(1 for v in self._vinculos if v is not None),
+            'vinculaciones': self._vinculaciones,
+        }
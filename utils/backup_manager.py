@@ -2,27 +2,70 @@
 Sistema de Backup Automático - VentaPro Universal
 ================================================
 
-Gestiona backups automáticos de todos los datos del sistema en archivos JSON/CSV
-separados por tipo de información dentro de la carpeta backups.
+Gestiona backups automáticos de todos los datos del sistema: los eventos
+(ventas, productos, clientes, reportes, sesiones) se anexan a un diario
+segmentado con índice lateral y los logs CSV se separan por tipo de
+información dentro de la carpeta backups.
+
+Las escrituras se encolan en memoria y las realiza un hilo escritor en
+segundo plano (write-behind) agrupando lotes: el punto de venta no espera
+a disco. La cola es acotada; si se llena, la escritura se hace en el hilo
+que llama y se contabiliza como desborde.
 
 Autor: Sistema VentaPro
 Fecha: 2025-10-05
 """
 
-import json
+import atexit
 import csv
 import os
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
+from utils.diario_backup import DiarioSegmentado, EntradaDiario
+
 class BackupManager:
     """Gestor de backups automáticos del sistema"""
     
-    def __init__(self):
+    def __init__(self, asincrono: bool = True, capacidad_cola: int = 1000, tamano_lote: int = 64):
         self.backup_dir = "data/backups"
         self.ensure_backup_directory()
         
+        # Diario de eventos (reemplaza un JSON por evento)
+        self.diario = DiarioSegmentado(f"{self.backup_dir}/diario")
+        
+        # Escritor en segundo plano
+        self.asincrono = asincrono
+        self.tamano_lote = max(1, tamano_lote)
+        self._cola: "queue.Queue[Optional[Tuple]]" = queue.Queue(maxsize=capacidad_cola)
+        self._lock_escritura = threading.Lock()
+        self._csv_existentes = set()
+        self._hilo: Optional[threading.Thread] = None
+        self._cerrado = False
+        self._drenando = False
+        self._hilo_terminado = False
+        self._lock_estado = threading.Lock()
+        
+        self._lock_metricas = threading.Lock()
+        self._metricas = {
+            'encoladas': 0,
+            'escritas': 0,
+            'lotes': 0,
+            'desbordes': 0,
+            'errores': 0,
+            'max_pendientes': 0,
+        }
+        
+        if asincrono:
+            self._hilo = threading.Thread(target=self._bucle_escritor, name="backup-escritor", daemon=True)
+            self._hilo.start()
+            # Vaciar la cola aunque la aplicación termine sin llamar a cerrar()
+            atexit.register(self.cerrar)
+        
     def ensure_backup_directory(self):
         """Asegurar que existe el directorio de backups"""
         Path(self.backup_dir).mkdir(parents=True, exist_ok=True)
@@ -49,7 +92,6 @@ class BackupManager:
     def backup_producto_nuevo(self, producto_data: Dict[str, Any]) -> str:
         """Backup cuando se registra un nuevo producto"""
         timestamp = self.generar_timestamp()
-        filename = f"{self.backup_dir}/productos/producto_{timestamp}.json"
         
         backup_data = {
             "tipo": "nuevo_producto",
@@ -64,18 +106,16 @@ class BackupManager:
             }
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
+        referencia = self._encolar_evento("productos", backup_data)
         
         # También crear backup CSV
         self._backup_producto_csv(producto_data, "nuevo")
         
-        return filename
+        return referencia
     
     def backup_producto_modificado(self, producto_anterior: Dict, producto_nuevo: Dict) -> str:
         """Backup cuando se modifica un producto"""
         timestamp = self.generar_timestamp()
-        filename = f"{self.backup_dir}/productos/modificacion_{timestamp}.json"
         
         backup_data = {
             "tipo": "producto_modificado",
@@ -92,10 +132,9 @@ class BackupManager:
             }
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
+        referencia = self._encolar_evento("productos", backup_data)
         
-        return filename
+        return referencia
     
     def _backup_producto_csv(self, producto_data: Dict, accion: str):
         """Backup en formato CSV para productos"""
@@ -108,38 +147,27 @@ class BackupManager:
             'stock_minimo', 'activo'
         ]
         
-        # Verificar si el archivo existe
-        file_exists = os.path.exists(csv_file)
-        
-        with open(csv_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            # Escribir headers solo si es un archivo nuevo
-            if not file_exists:
-                writer.writerow(headers)
-            
-            # Escribir datos del producto
-            row = [
-                self.generar_timestamp(),
-                self.generar_fecha_legible(),
-                accion,
-                producto_data.get('codigo', ''),
-                producto_data.get('nombre', ''),
-                producto_data.get('categoria', ''),
-                producto_data.get('precio_compra', 0),
-                producto_data.get('precio_venta', 0),
-                producto_data.get('stock', 0),
-                producto_data.get('stock_minimo', 0),
-                producto_data.get('activo', True)
-            ]
-            writer.writerow(row)
+        # Datos del producto
+        row = [
+            self.generar_timestamp(),
+            self.generar_fecha_legible(),
+            accion,
+            producto_data.get('codigo', ''),
+            producto_data.get('nombre', ''),
+            producto_data.get('categoria', ''),
+            producto_data.get('precio_compra', 0),
+            producto_data.get('precio_venta', 0),
+            producto_data.get('stock', 0),
+            producto_data.get('stock_minimo', 0),
+            producto_data.get('activo', True)
+        ]
+        self._encolar(('csv', csv_file, headers, [row]))
     
     # =================== BACKUP DE CLIENTES ===================
     
     def backup_cliente_nuevo(self, cliente_data: Dict[str, Any]) -> str:
         """Backup cuando se registra un nuevo cliente"""
         timestamp = self.generar_timestamp()
-        filename = f"{self.backup_dir}/clientes/cliente_{timestamp}.json"
         
         backup_data = {
             "tipo": "nuevo_cliente",
@@ -154,13 +182,12 @@ class BackupManager:
             }
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
+        referencia = self._encolar_evento("clientes", backup_data)
         
         # También crear backup CSV
         self._backup_cliente_csv(cliente_data, "nuevo")
         
-        return filename
+        return referencia
     
     def _backup_cliente_csv(self, cliente_data: Dict, accion: str):
         """Backup en formato CSV para clientes"""
@@ -172,43 +199,34 @@ class BackupManager:
             'rfc', 'activo'
         ]
         
-        file_exists = os.path.exists(csv_file)
-        
-        with open(csv_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            if not file_exists:
-                writer.writerow(headers)
-            
-            row = [
-                self.generar_timestamp(),
-                self.generar_fecha_legible(),
-                accion,
-                cliente_data.get('codigo', ''),
-                cliente_data.get('nombre', ''),
-                cliente_data.get('apellidos', ''),
-                cliente_data.get('email', ''),
-                cliente_data.get('telefono', ''),
-                cliente_data.get('direccion', ''),
-                cliente_data.get('rfc', ''),
-                cliente_data.get('activo', True)
-            ]
-            writer.writerow(row)
+        row = [
+            self.generar_timestamp(),
+            self.generar_fecha_legible(),
+            accion,
+            cliente_data.get('codigo', ''),
+            cliente_data.get('nombre', ''),
+            cliente_data.get('apellidos', ''),
+            cliente_data.get('email', ''),
+            cliente_data.get('telefono', ''),
+            cliente_data.get('direccion', ''),
+            cliente_data.get('rfc', ''),
+            cliente_data.get('activo', True)
+        ]
+        self._encolar(('csv', csv_file, headers, [row]))
     
     # =================== BACKUP DE VENTAS ===================
     
     def backup_venta_procesada(self, venta_data: Dict[str, Any], carrito: List[Dict]) -> str:
         """Backup cuando se procesa una venta"""
         timestamp = self.generar_timestamp()
-        filename = f"{self.backup_dir}/ventas/venta_{timestamp}.json"
         
         backup_data = {
             "tipo": "venta_procesada",
             "timestamp": timestamp,
             "fecha_legible": self.generar_fecha_legible(),
             "accion": "Procesamiento de venta",
-            "venta": venta_data,
-            "productos_vendidos": carrito,
+            "venta": dict(venta_data),
+            "productos_vendidos": [dict(item) for item in carrito],
             "totales": {
                 "subtotal": sum(item.get('subtotal', 0) for item in carrito),
                 "total_items": len(carrito),
@@ -221,13 +239,12 @@ class BackupManager:
             }
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
+        referencia = self._encolar_evento("ventas", backup_data)
         
         # También crear backup CSV
         self._backup_venta_csv(venta_data, carrito)
         
-        return filename
+        return referencia
     
     def _backup_venta_csv(self, venta_data: Dict, carrito: List[Dict]):
         """Backup en formato CSV para ventas"""
@@ -238,24 +255,19 @@ class BackupManager:
             'cliente', 'metodo_pago'
         ]
         
-        file_exists = os.path.exists(ventas_csv)
-        
-        with open(ventas_csv, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            if not file_exists:
-                writer.writerow(headers_venta)
-            
-            row = [
-                self.generar_timestamp(),
-                self.generar_fecha_legible(),
-                venta_data.get('id', ''),
-                venta_data.get('total', 0),
-                venta_data.get('items', 0),
-                venta_data.get('cliente', 'Mostrador'),
-                venta_data.get('metodo_pago', 'efectivo')
-            ]
-            writer.writerow(row)
+        timestamp = self.generar_timestamp()
+        fecha = self.generar_fecha_legible()
+        
+        row = [
+            timestamp,
+            fecha,
+            venta_data.get('id', ''),
+            venta_data.get('total', 0),
+            venta_data.get('items', 0),
+            venta_data.get('cliente', 'Mostrador'),
+            venta_data.get('metodo_pago', 'efectivo')
+        ]
+        self._encolar(('csv', ventas_csv, headers_venta, [row]))
         
         # CSV de detalles de venta
         detalle_csv = f"{self.backup_dir}/ventas/detalle_ventas_log.csv"
@@ -264,33 +276,26 @@ class BackupManager:
             'producto_nombre', 'cantidad', 'precio_unitario', 'subtotal'
         ]
         
-        file_exists_detalle = os.path.exists(detalle_csv)
-        
-        with open(detalle_csv, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            if not file_exists_detalle:
-                writer.writerow(headers_detalle)
-            
-            for item in carrito:
-                row = [
-                    self.generar_timestamp(),
-                    self.generar_fecha_legible(),
-                    venta_data.get('id', ''),
-                    item.get('id', ''),
-                    item.get('nombre', ''),
-                    item.get('cantidad', 0),
-                    item.get('precio', 0),
-                    item.get('subtotal', 0)
-                ]
-                writer.writerow(row)
+        rows = [
+            [
+                timestamp,
+                fecha,
+                venta_data.get('id', ''),
+                item.get('id', ''),
+                item.get('nombre', ''),
+                item.get('cantidad', 0),
+                item.get('precio', 0),
+                item.get('subtotal', 0)
+            ]
+            for item in carrito
+        ]
+        self._encolar(('csv', detalle_csv, headers_detalle, rows))
     
     # =================== BACKUP DE REPORTES ===================
     
     def backup_reporte_generado(self, tipo_reporte: str, datos_reporte: Dict) -> str:
         """Backup cuando se genera un reporte"""
         timestamp = self.generar_timestamp()
-        filename = f"{self.backup_dir}/reportes/reporte_{tipo_reporte}_{timestamp}.json"
         
         backup_data = {
             "tipo": f"reporte_{tipo_reporte}",
@@ -305,17 +310,15 @@ class BackupManager:
             }
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
+        referencia = self._encolar_evento("reportes", backup_data)
         
-        return filename
+        return referencia
     
     # =================== BACKUP DE SESIONES ===================
     
     def backup_sesion_actividad(self, actividades: List[Dict]) -> str:
         """Backup de actividades de la sesión"""
         timestamp = self.generar_timestamp()
-        filename = f"{self.backup_dir}/sesiones/sesion_{timestamp}.json"
         
         backup_data = {
             "tipo": "sesion_actividad",
@@ -334,10 +337,197 @@ class BackupManager:
             }
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
+        referencia = self._encolar_evento("sesiones", backup_data)
+        
+        return referencia
+    
+    # =================== ESCRITOR EN SEGUNDO PLANO ===================
+    
+    def _encolar_evento(self, categoria: str, backup_data: Dict) -> str:
+        """Encola un evento para el diario y retorna su referencia lógica"""
+        self._encolar(('diario', categoria, backup_data['tipo'], backup_data, time.time()))
+        return f"{self.diario.directorio}/{categoria}/{backup_data['tipo']}_{backup_data['timestamp']}"
+    
+    def _encolar(self, tarea: Tuple):
+        """Encola una escritura; sin hilo o con la cola llena escribe directamente
+        
+        Tareas: ('diario', categoria, tipo, datos, timestamp) o
+        ('csv', ruta, headers, filas). Los datos encolados no deben
+        modificarse después de la llamada.
+        
+        Raises:
+            RuntimeError: Si el gestor ya se cerró (el diario no admite escrituras)
+        """
+        with self._lock_estado:
+            if self._cerrado:
+                raise RuntimeError("BackupManager cerrado: no se admiten más backups")
+            directo = self._hilo is None or not self._hilo.is_alive()
+            if not directo:
+                try:
+                    self._cola.put_nowait(tarea)
+                except queue.Full:
+                    # Desborde: se prefiere esperar a disco antes que perder el backup
+                    self._incrementar('desbordes')
+                    directo = True
+        
+        if directo:
+            self._escribir_lote([tarea])
+            return
+        
+        pendientes = self._cola.qsize()
+        with self._lock_metricas:
+            self._metricas['encoladas'] += 1
+            if pendientes > self._metricas['max_pendientes']:
+                self._metricas['max_pendientes'] = pendientes
+    
+    def _bucle_escritor(self):
+        """Hilo escritor: toma lotes de la cola hasta recibir None"""
+        while True:
+            lote = [self._cola.get()]
+            while len(lote) < self.tamano_lote:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            
+            tareas = [tarea for tarea in lote if tarea is not None]
+            try:
+                if tareas:
+                    self._escribir_lote(tareas)
+                    self._incrementar('lotes')
+            finally:
+                for _ in lote:
+                    self._cola.task_done()
+            
+            if len(tareas) < len(lote):
+                with self._lock_estado:
+                    self._hilo_terminado = True
+                    # Si cerrar() dejó de esperar, el diario se cierra tras este último lote
+                    cerrar_diario = self._cerrado and not self._drenando
+                if cerrar_diario:
+                    with self._lock_escritura:
+                        self.diario.cerrar()
+                return
+    
+    def _escribir_lote(self, tareas: List[Tuple]):
+        """Escribe un lote: una descarga del diario y una apertura por CSV"""
+        eventos = []
+        filas_csv: Dict[str, Tuple[List[str], List[List]]] = {}
+        
+        for tarea in tareas:
+            if tarea[0] == 'csv':
+                _, ruta, headers, filas = tarea
+                filas_csv.setdefault(ruta, (headers, []))[1].extend(filas)
+            else:
+                eventos.append(tarea[1:])
+        
+        with self._lock_escritura:
+            if eventos:
+                try:
+                    self.diario.agregar_lote(eventos)
+                    with self._lock_metricas:
+                        self._metricas['escritas'] += len(eventos)
+                except (OSError, TypeError, ValueError) as e:
+                    self._incrementar('errores')
+                    print(f"⚠️ Error escribiendo diario de backups: {e}")
+            
+            for ruta, (headers, filas) in filas_csv.items():
+                try:
+                    self._anexar_csv(ruta, headers, filas)
+                    self._incrementar('escritas')
+                except OSError as e:
+                    self._incrementar('errores')
+                    print(f"⚠️ Error escribiendo backup {ruta}: {e}")
+    
+    def _anexar_csv(self, ruta: str, headers: List[str], filas: List[List]):
+        """Anexa filas a un CSV, escribiendo headers solo si es nuevo"""
+        # La existencia se consulta una vez por archivo y proceso
+        nuevo = ruta not in self._csv_existentes and not os.path.exists(ruta)
+        
+        with open(ruta, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if nuevo:
+                writer.writerow(headers)
+            writer.writerows(filas)
         
-        return filename
+        self._csv_existentes.add(ruta)
+    
+    def vaciar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que se escriban las tareas pendientes
+        
+        Returns:
+            bool: True si la cola quedó vacía dentro del tiempo indicado
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._cola.unfinished_tasks:
+            if self._hilo is None or not self._hilo.is_alive():
+                break
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(0.01)
+        return self._cola.unfinished_tasks == 0
+    
+    def cerrar(self, timeout: float = 10.0):
+        """Escribe lo pendiente, detiene el hilo escritor y cierra el diario (idempotente)
+        
+        Si el hilo no termina dentro de `timeout`, lo que siga en la cola se
+        escribe en el hilo que llama; si el hilo aún tiene un lote en curso,
+        él mismo cierra el diario al terminarlo. Después de cerrar, _encolar
+        rechaza nuevas escrituras.
+        """
+        with self._lock_estado:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            self._drenando = True
+        
+        if self._hilo is not None and self._hilo.is_alive():
+            try:
+                self._cola.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._hilo.join(timeout)
+        
+        # Lo que el hilo no alcanzó a escribir
+        pendientes = []
+        centinela_tomado = False
+        while True:
+            try:
+                tarea = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if tarea is None:
+                centinela_tomado = True
+            else:
+                pendientes.append(tarea)
+            self._cola.task_done()
+        if pendientes:
+            self._escribir_lote(pendientes)
+        
+        with self._lock_estado:
+            self._drenando = False
+            hilo_activo = self._hilo is not None and not self._hilo_terminado
+        if hilo_activo:
+            if centinela_tomado:
+                # Se repone el centinela para que termine tras el lote en curso
+                self._cola.put_nowait(None)
+            return
+        
+        with self._lock_escritura:
+            self.diario.cerrar()
+    
+    def _incrementar(self, clave: str):
+        with self._lock_metricas:
+            self._metricas[clave] += 1
+    
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtener métricas del escritor en segundo plano"""
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+        metricas['pendientes'] = self._cola.qsize()
+        metricas['capacidad_cola'] = self._cola.maxsize
+        metricas['asincrono'] = self._hilo is not None and self._hilo.is_alive()
+        return metricas
     
     # =================== UTILIDADES ===================
     
@@ -354,33 +544,53 @@ class BackupManager:
         
         return cambios
     
-    def listar_backups_por_tipo(self, tipo: str) -> List[str]:
-        """Listar todos los backups de un tipo específico"""
-        tipo_dir = f"{self.backup_dir}/{tipo}"
-        
-        if os.path.exists(tipo_dir):
-            return [f for f in os.listdir(tipo_dir) if f.endswith('.json')]
+    def listar_backups_por_tipo(self, tipo: str) -> List[EntradaDiario]:
+        """Listar los backups de un tipo (categoría) desde el índice del diario
         
-        return []
+        Returns:
+            List[EntradaDiario]: Entradas del más reciente al más antiguo
+        """
+        return list(reversed(self.diario.buscar(categoria=tipo)))
+    
+    def leer_backup(self, entrada: EntradaDiario) -> Dict[str, Any]:
+        """Leer el contenido de un backup del diario"""
+        return self.diario.leer(entrada)['datos']
     
     def obtener_estadisticas_backups(self) -> Dict[str, Any]:
-        """Obtener estadísticas generales de backups"""
+        """Obtener estadísticas generales de backups (índice del diario, sin listar directorios)"""
+        # Incluir los eventos que aún estén en cola
+        self.vaciar(timeout=2.0)
+        
+        estadisticas_diario = self.diario.estadisticas()
         stats = {
             "fecha_consulta": self.generar_fecha_legible(),
             "directorio_backups": self.backup_dir,
+            "diario": {
+                "registros": estadisticas_diario['registros'],
+                "segmentos": estadisticas_diario['segmentos'],
+                "bytes": estadisticas_diario['bytes']
+            },
             "tipos_backup": {}
         }
         
+        logs_csv = {
+            "productos": ["productos_log.csv"],
+            "clientes": ["clientes_log.csv"],
+            "ventas": ["ventas_log.csv", "detalle_ventas_log.csv"]
+        }
+        
         subdirs = ["productos", "clientes", "ventas", "reportes", "configuracion", "sesiones"]
         
         for subdir in subdirs:
-            path = f"{self.backup_dir}/{subdir}"
-            if os.path.exists(path):
-                archivos = os.listdir(path)
-                stats["tipos_backup"][subdir] = {
-                    "total_archivos": len(archivos),
-                    "archivos_json": len([f for f in archivos if f.endswith('.json')]),
-                    "archivos_csv": len([f for f in archivos if f.endswith('.csv')])
-                }
-        
-        return stats
\ No newline at end of file
+            categoria = estadisticas_diario['categorias'].get(subdir, {})
+            stats["tipos_backup"][subdir] = {
+                "registros": categoria.get('registros', 0),
+                "bytes": categoria.get('bytes', 0),
+                "archivos_csv": len([
+                    f for f in logs_csv.get(subdir, [])
+                    if f"{self.backup_dir}/{subdir}/{f}" in self._csv_existentes
+                    or os.path.exists(f"{self.backup_dir}/{subdir}/{f}")
+                ])
+            }
+        
+        return stats
@@ -0,0 +1,257 @@
+"""
+Carrito de Venta - VentaPro
+===========================
+
+Modelo del carrito del punto de venta indexado por id de producto.
+Mantiene subtotal, descuentos, impuestos y cantidad de artículos como
+acumulados que se ajustan por diferencia en cada cambio (en centavos,
+sin error de redondeo), y notifica a los suscriptores qué línea cambió
+para que la vista actualice solo esa fila.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional
+
+from utils.constantes import IVA_DEFAULT
+
+
+# Eventos emitidos a los suscriptores: (evento, linea, indice)
+EVENTO_AGREGADA = 'agregada'
+EVENTO_ACTUALIZADA = 'actualizada'
+EVENTO_ELIMINADA = 'eliminada'
+EVENTO_VACIADO = 'vaciado'
+EVENTO_DESCUENTO = 'descuento'
+
+
+def _a_centavos(monto) -> int:
+    """Convierte un monto a centavos enteros"""
+    return int(round(float(monto) * 100))
+
+
+class Carrito:
+    """Carrito indexado por producto con totales acumulados y eventos
+
+    Cada línea es un diccionario con id, nombre, precio, cantidad,
+    descuento, subtotal y el stock del producto al agregarlo. Las líneas se conservan en orden de inserción
+    en `lineas`, una lista apta para vistas que la indexan directamente.
+
+    Args:
+        tasa_impuesto: Tasa de impuesto (0.16 = 16%)
+        precios_con_impuesto: Si los precios ya incluyen el impuesto; en
+            ese caso el impuesto se desglosa y no se suma al total
+    """
+
+    def __init__(self, tasa_impuesto: float = IVA_DEFAULT, precios_con_impuesto: bool = True):
+        self.tasa_impuesto = tasa_impuesto
+        self.precios_con_impuesto = precios_con_impuesto
+
+        self.lineas: List[Dict] = []
+        self._posiciones: Dict[int, int] = {}
+        self._suscriptores: List[Callable[[str, Optional[Dict], Optional[int]], None]] = []
+
+        # Acumulados en centavos
+        self._bruto = 0
+        self._descuento_lineas = 0
+        self._descuento_general = 0
+        self._articulos = 0
+
+    # =================== CONSULTA ===================
+
+    def __len__(self) -> int:
+        return len(self.lineas)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.lineas)
+
+    def __contains__(self, producto_id) -> bool:
+        return producto_id in self._posiciones
+
+    def obtener(self, producto_id: int) -> Optional[Dict]:
+        """Obtiene la línea de un producto"""
+        indice = self._posiciones.get(producto_id)
+        return self.lineas[indice] if indice is not None else None
+
+    def indice(self, producto_id: int) -> Optional[int]:
+        """Posición de la línea de un producto en `lineas`"""
+        return self._posiciones.get(producto_id)
+
+    # =================== TOTALES ===================
+
+    @property
+    def subtotal(self) -> float:
+        """Suma de precio × cantidad de todas las líneas"""
+        return self._bruto / 100
+
+    @property
+    def descuento(self) -> float:
+        """Descuentos de línea más descuento general"""
+        return (self._descuento_lineas + self._descuento_general) / 100
+
+    @property
+    def impuestos(self) -> float:
+        """Impuesto sobre la base con descuentos (incluido o agregado)"""
+        base = self._base()
+        if self.precios_con_impuesto:
+            impuesto = base - base / (1 + self.tasa_impuesto)
+        else:
+            impuesto = base * self.tasa_impuesto
+        return round(impuesto) / 100
+
+    @property
+    def total(self) -> float:
+        """Total a cobrar"""
+        if self.precios_con_impuesto:
+            return self._base() / 100
+        return self._base() / 100 + self.impuestos
+
+    @property
+    def articulos(self) -> int:
+        """Cantidad total de unidades en el carrito"""
+        return self._articulos
+
+    def _base(self) -> int:
+        """Base en centavos tras descuentos (nunca negativa)"""
+        return max(0, self._bruto - self._descuento_lineas - self._descuento_general)
+
+    def resumen(self) -> Dict[str, float]:
+        """Totales del carrito"""
+        return {
+            'subtotal': self.subtotal,
+            'descuento': self.descuento,
+            'impuestos': self.impuestos,
+            'total': self.total,
+            'articulos': self.articulos,
+            'lineas': len(self.lineas),
+        }
+
+    # =================== MODIFICACIÓN ===================
+
+    def agregar(self, producto: Dict, cantidad: int = 1) -> bool:
+        """Agrega unidades de un producto respetando su stock
+
+        Returns:
+            bool: False si el stock del producto no alcanza
+        """
+        linea = self.obtener(producto['id'])
+        actual = linea['cantidad'] if linea else 0
+        if actual + cantidad > producto.get('stock', 0):
+            return False
+
+        if linea:
+            linea['stock'] = producto.get('stock', 0)
+            return self.establecer_cantidad(producto['id'], actual + cantidad)
+
+        linea = {
+            'id': producto['id'],
+            'nombre': producto['nombre'],
+            'precio': producto['precio'],
+            'cantidad': cantidad,
+            'descuento': 0.0,
+            'subtotal': 0.0,
+            'stock': producto.get('stock', 0)
+        }
+        self._recalcular_linea(linea)
+        self._bruto += _a_centavos(linea['precio']) * cantidad
+        self._articulos += cantidad
+
+        self._posiciones[linea['id']] = len(self.lineas)
+        self.lineas.append(linea)
+        self._notificar(EVENTO_AGREGADA, linea, len(self.lineas) - 1)
+        return True
+
+    def establecer_cantidad(self, producto_id: int, cantidad: int) -> bool:
+        """Cambia la cantidad de una línea; con cantidad <= 0 la elimina
+
+        Returns:
+            bool: False si la línea no existe o un aumento supera el stock
+        """
+        if cantidad <= 0:
+            return self.eliminar(producto_id)
+
+        indice = self._posiciones.get(producto_id)
+        if indice is None:
+            return False
+
+        linea = self.lineas[indice]
+        diferencia = cantidad - linea['cantidad']
+        if diferencia == 0:
+            return True
+        # Igual que en agregar(); reducir siempre se permite
+        if diferencia > 0 and cantidad > linea.get('stock', 0):
+            return False
+
+        self._bruto += _a_centavos(linea['precio']) * diferencia
+        self._articulos += diferencia
+        linea['cantidad'] = cantidad
+        self._recalcular_linea(linea)
+        self._notificar(EVENTO_ACTUALIZADA, linea, indice)
+        return True
+
+    def establecer_descuento(self, producto_id: int, descuento: float) -> bool:
+        """Aplica un descuento en monto a una línea"""
+        indice = self._posiciones.get(producto_id)
+        if indice is None:
+            return False
+
+        linea = self.lineas[indice]
+        self._descuento_lineas += _a_centavos(descuento) - _a_centavos(linea['descuento'])
+        linea['descuento'] = descuento
+        self._recalcular_linea(linea)
+        self._notificar(EVENTO_ACTUALIZADA, linea, indice)
+        return True
+
+    def aplicar_descuento_general(self, descuento: float):
+        """Aplica un descuento en monto sobre todo el ticket"""
+        self._descuento_general = _a_centavos(descuento)
+        self._notificar(EVENTO_DESCUENTO, None, None)
+
+    def eliminar(self, producto_id: int) -> bool:
+        """Quita la línea de un producto"""
+        indice = self._posiciones.pop(producto_id, None)
+        if indice is None:
+            return False
+
+        linea = self.lineas.pop(indice)
+        self._bruto -= _a_centavos(linea['precio']) * linea['cantidad']
+        self._descuento_lineas -= _a_centavos(linea['descuento'])
+        self._articulos -= linea['cantidad']
+
+        # Las líneas posteriores se desplazan una posición
+        for posterior in self.lineas[indice:]:
+            self._posiciones[posterior['id']] -= 1
+
+        self._notificar(EVENTO_ELIMINADA, linea, indice)
+        return True
+
+    def vaciar(self):
+        """Elimina todas las líneas y descuentos"""
+        self.lineas = []
+        self._posiciones = {}
+        self._bruto = 0
+        self._descuento_lineas = 0
+        self._descuento_general = 0
+        self._articulos = 0
+        self._notificar(EVENTO_VACIADO, None, None)
+
+    @staticmethod
+    def _recalcular_linea(linea: Dict):
+        """Actualiza el subtotal de una línea"""
+        subtotal = _a_centavos(linea['precio']) * linea['cantidad'] - _a_centavos(linea['descuento'])
+        linea['subtotal'] = subtotal / 100
+
+    # =================== EVENTOS ===================
+
+    def suscribir(self, callback: Callable[[str, Optional[Dict], Optional[int]], None]):
+        """Registra un callback (evento, linea, indice) para cada cambio"""
+        self._suscriptores.append(callback)
+
+    def desuscribir(self, callback: Callable[[str, Optional[Dict], Optional[int]], None]):
+        """Quita un callback registrado"""
+        if callback in self._suscriptores:
+            self._suscriptores.remove(callback)
+
+    def _notificar(self, evento: str, linea: Optional[Dict], indice: Optional[int]):
+        for callback in list(self._suscriptores):
+            callback(evento, linea, indice)
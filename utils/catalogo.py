@@ -0,0 +1,350 @@
+"""
+Catálogo Indexado - VentaPro
+============================
+
+Índices en memoria sobre el catálogo de productos para búsquedas del
+punto de venta: mapas hash por id, código y código de barras, un índice
+ordenado de prefijos sobre palabras normalizadas (sin acentos ni
+mayúsculas), buckets por categoría y bitsets por estado de stock.
+Los índices se actualizan incrementalmente al agregar o editar productos.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Iterable, Set, Tuple
+
+
+# Estados de stock indexados como bitsets
+ESTADO_CON_STOCK = 'con_stock'
+ESTADO_SIN_STOCK = 'sin_stock'
+ESTADO_STOCK_BAJO = 'stock_bajo'
+ESTADOS_STOCK = (ESTADO_CON_STOCK, ESTADO_SIN_STOCK, ESTADO_STOCK_BAJO)
+
+
+def normalizar_texto(texto) -> str:
+    """Convierte a minúsculas y elimina acentos para comparar textos"""
+    if texto is None:
+        return ''
+    texto = str(texto)
+    if texto.isascii():
+        return texto.lower().strip()
+    descompuesto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).strip()
+
+
+class CatalogoIndexado:
+    """Catálogo de productos con índices para búsquedas O(1) / O(log n)
+
+    Los productos son los mismos diccionarios de la lista del sistema
+    (id, nombre, codigo, categoria, precio, stock y opcionalmente
+    codigo_barras); el catálogo guarda referencias, por lo que cualquier
+    cambio en un producto debe notificarse con actualizar() o
+    actualizar_stock() para mantener los índices al día.
+
+    Los métodos públicos toman un bloqueo: las búsquedas corren en el hilo
+    del programador de búsquedas mientras la interfaz edita el catálogo.
+    """
+
+    def __init__(self, productos: Iterable[Dict] = (), umbral_stock_bajo: int = 10):
+        self.umbral_stock_bajo = umbral_stock_bajo
+        self._lock = threading.RLock()
+
+        self._por_id: Dict[int, Dict] = {}
+        self._por_codigo: Dict[str, int] = {}
+        self._por_barras: Dict[str, int] = {}
+
+        # Índice de prefijos: lista ordenada de (palabra normalizada, id)
+        self._prefijos: List[Tuple[str, int]] = []
+
+        # Cada producto ocupa una posición fija en los bitsets
+        self._posicion: Dict[int, int] = {}
+        self._ids_por_posicion: List[Optional[int]] = []
+        self._categorias: Dict[str, int] = {}
+        self._estados: Dict[str, int] = {estado: 0 for estado in ESTADOS_STOCK}
+
+        # Claves indexadas de cada producto, para poder desindexarlo
+        self._claves: Dict[int, Tuple] = {}
+
+        self.cargar(productos)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._por_id)
+
+    def __contains__(self, producto_id) -> bool:
+        with self._lock:
+            return producto_id in self._por_id
+
+    # =================== MANTENIMIENTO ===================
+
+    def cargar(self, productos: Iterable[Dict]):
+        """Reconstruye todos los índices de una vez (ordenando una sola vez)"""
+        with self._lock:
+            self._por_id, self._por_codigo, self._por_barras = {}, {}, {}
+            self._posicion, self._ids_por_posicion, self._claves = {}, [], {}
+            self._prefijos = []
+
+            posiciones_categoria: Dict[str, List[int]] = {}
+            posiciones_estado: Dict[str, List[int]] = {estado: [] for estado in ESTADOS_STOCK}
+
+            for producto in productos:
+                producto_id = producto['id']
+                if producto_id in self._por_id:
+                    continue
+                posicion = len(self._ids_por_posicion)
+                self._posicion[producto_id] = posicion
+                self._ids_por_posicion.append(producto_id)
+                self._por_id[producto_id] = producto
+
+                claves = self._claves_producto(producto)
+                codigo, barras, categoria, palabras, _ = claves
+                if codigo:
+                    self._por_codigo[codigo] = producto_id
+                if barras:
+                    self._por_barras[barras] = producto_id
+                self._prefijos.extend((palabra, producto_id) for palabra in palabras)
+                self._claves[producto_id] = claves
+
+                posiciones_categoria.setdefault(categoria, []).append(posicion)
+                for estado in self._estados_de_stock(producto.get('stock', 0)):
+                    posiciones_estado[estado].append(posicion)
+
+            self._prefijos.sort()
+            self._categorias = {
+                categoria: self._bitset(posiciones) for categoria, posiciones in posiciones_categoria.items()
+            }
+            self._estados = {estado: self._bitset(posiciones) for estado, posiciones in posiciones_estado.items()}
+
+    def _bitset(self, posiciones: List[int]) -> int:
+        """Construye un bitset a partir de posiciones en tiempo lineal"""
+        mapa = bytearray((len(self._ids_por_posicion) + 7) // 8)
+        for posicion in posiciones:
+            mapa[posicion >> 3] |= 1 << (posicion & 7)
+        return int.from_bytes(mapa, 'little')
+
+    def agregar(self, producto: Dict):
+        """Indexa un producto nuevo (o reindexa uno existente)"""
+        with self._lock:
+            producto_id = producto['id']
+            if producto_id in self._por_id:
+                self._desindexar(producto_id)
+            else:
+                self._posicion[producto_id] = len(self._ids_por_posicion)
+                self._ids_por_posicion.append(producto_id)
+
+            self._por_id[producto_id] = producto
+            self._indexar(producto)
+
+    def actualizar(self, producto: Dict):
+        """Reindexa un producto tras editar nombre, código, categoría o stock"""
+        self.agregar(producto)
+
+    def actualizar_stock(self, producto_id: int, stock: Optional[int] = None):
+        """Actualiza solo los bitsets de stock de un producto
+
+        Si se indica stock, también se asigna al producto.
+        """
+        with self._lock:
+            producto = self._por_id.get(producto_id)
+            if producto is None:
+                return
+            if stock is not None:
+                producto['stock'] = stock
+            self._marcar_estados(producto_id, producto.get('stock', 0))
+
+    def eliminar(self, producto_id: int):
+        """Quita un producto del catálogo"""
+        with self._lock:
+            if producto_id not in self._por_id:
+                return
+            self._desindexar(producto_id)
+            del self._por_id[producto_id]
+            posicion = self._posicion.pop(producto_id)
+            self._ids_por_posicion[posicion] = None
+
+    def _indexar(self, producto: Dict):
+        """Registra un producto en todos los índices"""
+        producto_id = producto['id']
+        claves = self._claves_producto(producto)
+        codigo, barras, categoria, palabras, _ = claves
+
+        if codigo:
+            self._por_codigo[codigo] = producto_id
+        if barras:
+            self._por_barras[barras] = producto_id
+        for palabra in palabras:
+            insort(self._prefijos, (palabra, producto_id))
+
+        bit = 1 << self._posicion[producto_id]
+        self._categorias[categoria] = self._categorias.get(categoria, 0) | bit
+        self._marcar_estados(producto_id, producto.get('stock', 0))
+
+        self._claves[producto_id] = claves
+
+    def _desindexar(self, producto_id: int):
+        """Quita un producto de todos los índices usando las claves guardadas"""
+        codigo, barras, categoria, palabras, _ = self._claves.pop(producto_id)
+
+        if codigo and self._por_codigo.get(codigo) == producto_id:
+            del self._por_codigo[codigo]
+        if barras and self._por_barras.get(barras) == producto_id:
+            del self._por_barras[barras]
+        for palabra in palabras:
+            i = bisect_left(self._prefijos, (palabra, producto_id))
+            if i < len(self._prefijos) and self._prefijos[i] == (palabra, producto_id):
+                del self._prefijos[i]
+
+        mascara = ~(1 << self._posicion[producto_id])
+        self._categorias[categoria] &= mascara
+        if not self._categorias[categoria]:
+            del self._categorias[categoria]
+        for estado in ESTADOS_STOCK:
+            self._estados[estado] &= mascara
+
+    def _marcar_estados(self, producto_id: int, stock: int):
+        """Actualiza los bitsets de estado de stock de un producto"""
+        bit = 1 << self._posicion[producto_id]
+        activos = self._estados_de_stock(stock)
+        for estado in ESTADOS_STOCK:
+            if estado in activos:
+                self._estados[estado] |= bit
+            else:
+                self._estados[estado] &= ~bit
+
+    def _estados_de_stock(self, stock: int) -> List[str]:
+        """Estados de stock que aplican a una cantidad"""
+        estados = [ESTADO_CON_STOCK if stock > 0 else ESTADO_SIN_STOCK]
+        if stock <= self.umbral_stock_bajo:
+            estados.append(ESTADO_STOCK_BAJO)
+        return estados
+
+    @staticmethod
+    def _claves_producto(producto: Dict) -> Tuple[str, str, str, Set[str], str]:
+        """Código, código de barras, categoría, palabras y nombre normalizados de un producto"""
+        codigo = normalizar_texto(producto.get('codigo'))
+        barras = str(producto.get('codigo_barras') or '').strip()
+        categoria = producto.get('categoria') or 'General'
+        texto = ' '.join(
+            str(producto.get(campo) or '') for campo in ('nombre', 'codigo', 'categoria')
+        )
+        nombre = normalizar_texto(producto.get('nombre'))
+        return codigo, barras, categoria, set(normalizar_texto(texto).split()), nombre
+
+    # =================== CONSULTAS ===================
+
+    def obtener(self, producto_id) -> Optional[Dict]:
+        """Obtiene un producto por id"""
+        with self._lock:
+            return self._por_id.get(producto_id)
+
+    def por_codigo(self, codigo: str) -> Optional[Dict]:
+        """Obtiene un producto por código interno (sin distinguir mayúsculas)"""
+        with self._lock:
+            producto_id = self._por_codigo.get(normalizar_texto(codigo))
+            return self._por_id.get(producto_id) if producto_id is not None else None
+
+    def por_codigo_barras(self, codigo_barras: str) -> Optional[Dict]:
+        """Obtiene un producto por código de barras"""
+        with self._lock:
+            producto_id = self._por_barras.get(str(codigo_barras).strip())
+            return self._por_id.get(producto_id) if producto_id is not None else None
+
+    def buscar_exacto(self, termino: str) -> Optional[Dict]:
+        """Busca por código de barras o código interno exactos (lectores de código)"""
+        return self.por_codigo_barras(termino) or self.por_codigo(termino)
+
+    def _ids_con_prefijo(self, prefijo: str) -> Set[int]:
+        """Ids de productos con alguna palabra que empiece con el prefijo"""
+        ids = set()
+        i = bisect_left(self._prefijos, (prefijo,))
+        while i < len(self._prefijos) and self._prefijos[i][0].startswith(prefijo):
+            ids.add(self._prefijos[i][1])
+            i += 1
+        return ids
+
+    def buscar(self, termino: str = '', categoria: Optional[str] = None,
+               estado: Optional[str] = None, limite: Optional[int] = None) -> List[Dict]:
+        """Busca productos por prefijo de palabras, con filtros de categoría y stock
+
+        Cada palabra del término debe ser prefijo de alguna palabra del
+        nombre, código o categoría. Una coincidencia exacta de código o
+        código de barras aparece primero.
+        """
+        with self._lock:
+            palabras = normalizar_texto(termino).split()
+            if not palabras:
+                return self.filtrar(categoria, estado, limite)
+
+            # Intersección empezando por el prefijo más selectivo
+            candidatos = sorted((self._ids_con_prefijo(p) for p in palabras), key=len)
+            ids = set.intersection(*candidatos)
+
+            exacto = self.buscar_exacto(termino)
+            if exacto is not None:
+                ids.add(exacto['id'])
+
+            # Filtros evaluados sobre el producto: O(1) por candidato
+            if categoria:
+                ids = {i for i in ids if (self._por_id[i].get('categoria') or 'General') == categoria}
+            if estado:
+                ids = {i for i in ids if estado in self._estados_de_stock(self._por_id[i].get('stock', 0))}
+
+            # Orden: coincidencia exacta primero y luego por nombre normalizado
+            def clave(producto_id):
+                return (exacto is None or producto_id != exacto['id'], self._claves[producto_id][4])
+
+            if limite is not None:
+                orden = heapq.nsmallest(limite, ids, key=clave)
+            else:
+                orden = sorted(ids, key=clave)
+            return [self._por_id[i] for i in orden]
+
+    def filtrar(self, categoria: Optional[str] = None, estado: Optional[str] = None,
+                limite: Optional[int] = None) -> List[Dict]:
+        """Lista productos por categoría y/o estado de stock combinando bitsets"""
+        with self._lock:
+            mascara = self._mascara_filtros(categoria, estado)
+            if mascara is None:
+                productos = [self._por_id[i] for i in self._ids_por_posicion if i is not None]
+                return productos[:limite] if limite is not None else productos
+            return [self._por_id[i] for i in self._ids_de_mascara(mascara, limite)]
+
+    def contar(self, categoria: Optional[str] = None, estado: Optional[str] = None) -> int:
+        """Cuenta productos por categoría y/o estado de stock"""
+        with self._lock:
+            mascara = self._mascara_filtros(categoria, estado)
+            if mascara is None:
+                return len(self._por_id)
+            return bin(mascara).count('1')
+
+    def categorias(self) -> List[str]:
+        """Categorías con al menos un producto"""
+        with self._lock:
+            return sorted(self._categorias)
+
+    def _mascara_filtros(self, categoria: Optional[str], estado: Optional[str]) -> Optional[int]:
+        """Combina los bitsets de los filtros indicados (None si no hay filtros)"""
+        mascara = None
+        if categoria:
+            mascara = self._categorias.get(categoria, 0)
+        if estado:
+            if estado not in self._estados:
+                raise ValueError(f"Estado de stock desconocido: {estado}")
+            bits = self._estados[estado]
+            mascara = bits if mascara is None else mascara & bits
+        return mascara
+
+    def _ids_de_mascara(self, mascara: int, limite: Optional[int] = None) -> List[int]:
+        """Convierte un bitset en la lista de ids en orden de inserción"""
+        ids = []
+        bits = bin(mascara)[:1:-1]  # Bit menos significativo primero
+        posicion = bits.find('1')
+        while posicion != -1 and (limite is None or len(ids) < limite):
+            ids.append(self._ids_por_posicion[posicion])
+            posicion = bits.find('1', posicion + 1)
+        return ids
@@ -176,6 +176,27 @@ class ConfigManager:
         """Obtiene el número máximo de backups a mantener"""
         return self.getint('DATABASE', 'max_backups', 30)
     
+    def get_backup_path(self) -> str:
+        """Obtiene el directorio de backups de la base de datos"""
+        return self.get('BACKUP', 'backup_path', 'data/backups/')
+    
+    def compress_backups(self) -> bool:
+        """Verifica si los backups se comprimen"""
+        return self.getboolean('BACKUP', 'compress_backups', True)
+    
+    def get_auto_backup_time(self) -> tuple:
+        """Obtiene la hora del backup automático como (hora, minuto)"""
+        valor = self.get('BACKUP', 'auto_backup_time', '02:00')
+        try:
+            hora, minuto = (int(parte) for parte in valor.split(':'))
+            return (hora, minuto)
+        except ValueError:
+            return (2, 0)
+    
+    def backup_on_exit(self) -> bool:
+        """Verifica si se respalda la base de datos al salir"""
+        return self.getboolean('BACKUP', 'backup_on_exit', True)
+    
     def get_window_size(self) -> tuple:
         """Obtiene el tamaño de ventana por defecto"""
         width = self.getint('UI', 'window_width', 1200)
@@ -0,0 +1,398 @@
+"""
+Diario de Backups Segmentado - VentaPro
+=======================================
+
+Diario (journal) de solo anexado para los backups por evento. Cada
+registro se guarda con prefijo de longitud y CRC32 en archivos de
+segmento que rotan por tamaño, y un índice lateral (una línea por
+registro con fecha, categoría, tipo, segmento, posición y longitud; los
+tabuladores y saltos de línea de los campos de texto se escapan) permite listar, contar y reproducir sin recorrer directorios.
+
+Al abrir se recupera la cola de los segmentos posteriores a la última
+entrada indexada: los registros válidos que no llegaron al índice se
+reindexan y un registro incompleto por un corte de energía se trunca. El
+índice se lee y escribe en binario para que las posiciones sean bytes
+reales también en Windows.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Cabecera de registro: longitud del contenido y CRC32 (little-endian)
+CABECERA = struct.Struct('<II')
+
+ARCHIVO_INDICE = 'indice.tsv'
+PREFIJO_SEGMENTO = 'segmento_'
+EXTENSION_SEGMENTO = '.log'
+
+# Escapes de los campos de texto del índice: un tabulador o salto de línea
+# dentro de la categoría o el tipo rompería la línea y el resto del índice
+ESCAPES_INDICE = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'}
+DESESCAPES_INDICE = {'\\': '\\', 't': '\t', 'n': '\n', 'r': '\r'}
+
+
+def _escapar_campo(texto: str) -> str:
+    """Escapa barra invertida, tabulador y saltos de línea de un campo"""
+    return ''.join(ESCAPES_INDICE.get(c, c) for c in texto)
+
+
+def _desescapar_campo(texto: str) -> str:
+    """Revierte _escapar_campo; ValueError si hay un escape desconocido"""
+    if '\\' not in texto:
+        return texto
+    partes = []
+    i = 0
+    while i < len(texto):
+        c = texto[i]
+        if c == '\\':
+            siguiente = texto[i + 1:i + 2]
+            if siguiente not in DESESCAPES_INDICE:
+                raise ValueError(f"Escape inválido en el índice: {texto!r}")
+            partes.append(DESESCAPES_INDICE[siguiente])
+            i += 2
+        else:
+            partes.append(c)
+            i += 1
+    return ''.join(partes)
+
+
+class EntradaDiario:
+    """Entrada del índice: metadatos y ubicación de un registro"""
+
+    __slots__ = ('timestamp', 'categoria', 'tipo', 'segmento', 'posicion', 'longitud')
+
+    def __init__(self, timestamp: float, categoria: str, tipo: str,
+                 segmento: int, posicion: int, longitud: int):
+        self.timestamp = timestamp
+        self.categoria = categoria
+        self.tipo = tipo
+        self.segmento = segmento
+        self.posicion = posicion
+        self.longitud = longitud
+
+    def linea(self) -> str:
+        """Serializa la entrada como línea del índice"""
+        return (f"{self.timestamp:.6f}\t{_escapar_campo(self.categoria)}\t"
+                f"{_escapar_campo(self.tipo)}\t"
+                f"{self.segmento}\t{self.posicion}\t{self.longitud}\n")
+
+    @classmethod
+    def desde_linea(cls, linea: str) -> Optional['EntradaDiario']:
+        """Interpreta una línea del índice; None si está incompleta"""
+        partes = linea.rstrip('\r\n').split('\t')
+        if len(partes) != 6 or not linea.endswith('\n'):
+            return None
+        try:
+            return cls(float(partes[0]), _desescapar_campo(partes[1]),
+                       _desescapar_campo(partes[2]),
+                       int(partes[3]), int(partes[4]), int(partes[5]))
+        except ValueError:
+            return None
+
+    @property
+    def referencia(self) -> str:
+        """Identificador legible del registro (segmento:posición)"""
+        return f"{self.segmento:06d}:{self.posicion}"
+
+
+class DiarioSegmentado:
+    """Diario de solo anexado con segmentos rotativos e índice lateral
+
+    Args:
+        directorio: Carpeta de segmentos e índice
+        tamano_segmento: Tamaño a partir del cual se abre un segmento nuevo
+        sincronizar: Si se hace fsync tras cada escritura (más lento, más durable)
+    """
+
+    def __init__(self, directorio: str, tamano_segmento: int = 8 * 1024 * 1024,
+                 sincronizar: bool = False):
+        self.directorio = directorio
+        self.tamano_segmento = tamano_segmento
+        self.sincronizar = sincronizar
+        self._lock = threading.RLock()
+
+        Path(directorio).mkdir(parents=True, exist_ok=True)
+        self._ruta_indice = os.path.join(directorio, ARCHIVO_INDICE)
+
+        self.entradas: List[EntradaDiario] = []
+        self.registros_recuperados = 0
+        self.bytes_truncados = 0
+
+        self._cargar_indice()
+        self._segmento_actual = self._ultimo_segmento()
+        self._recuperar_cola()
+
+        self._archivo = open(self._ruta_segmento(self._segmento_actual), 'ab')
+        self._indice = open(self._ruta_indice, 'ab')
+
+    # =================== APERTURA Y RECUPERACIÓN ===================
+
+    def _ruta_segmento(self, numero: int) -> str:
+        return os.path.join(self.directorio, f"{PREFIJO_SEGMENTO}{numero:06d}{EXTENSION_SEGMENTO}")
+
+    def _cargar_indice(self):
+        """Carga el índice; descarta una última línea cortada"""
+        if not os.path.exists(self._ruta_indice):
+            return
+
+        with open(self._ruta_indice, 'rb') as f:
+            contenido = f.read()
+
+        # Se cuentan bytes crudos: índices escritos con CRLF conservan sus posiciones
+        validas = 0
+        for linea in contenido.splitlines(keepends=True):
+            try:
+                entrada = EntradaDiario.desde_linea(linea.decode('utf-8'))
+            except UnicodeDecodeError:
+                entrada = None
+            if entrada is None:
+                break
+            self.entradas.append(entrada)
+            validas += len(linea)
+
+        # Reescribir sin la línea incompleta para no dejar basura intermedia
+        if validas < len(contenido):
+            with open(self._ruta_indice, 'r+b') as f:
+                f.truncate(validas)
+
+    def _ultimo_segmento(self) -> int:
+        """Número del último segmento (el directorio solo tiene segmentos)"""
+        numeros = [
+            int(nombre[len(PREFIJO_SEGMENTO):-len(EXTENSION_SEGMENTO)])
+            for nombre in os.listdir(self.directorio)
+            if nombre.startswith(PREFIJO_SEGMENTO) and nombre.endswith(EXTENSION_SEGMENTO)
+        ]
+        if self.entradas:
+            numeros.append(self.entradas[-1].segmento)
+        return max(numeros) if numeros else 1
+
+    def _recuperar_cola(self):
+        """Reindexa registros válidos no indexados y trunca registros cortados
+
+        Recorre desde el final de la última entrada indexada hasta el último
+        segmento, de modo que también se recuperan segmentos completos que
+        se rotaron antes de actualizar el índice.
+        """
+        if self.entradas:
+            ultima = self.entradas[-1]
+            segmento, posicion = ultima.segmento, ultima.posicion + CABECERA.size + ultima.longitud
+        else:
+            segmento, posicion = 1, 0
+
+        nuevas = []
+        while segmento <= self._segmento_actual:
+            nuevas.extend(self._recuperar_segmento(segmento, posicion))
+            segmento, posicion = segmento + 1, 0
+
+        if nuevas:
+            with open(self._ruta_indice, 'ab') as f:
+                f.writelines(entrada.linea().encode('utf-8') for entrada in nuevas)
+            self.entradas.extend(nuevas)
+            self.registros_recuperados = len(nuevas)
+
+    def _recuperar_segmento(self, segmento: int, posicion: int) -> List[EntradaDiario]:
+        """Registros válidos de un segmento desde una posición; trunca un final cortado"""
+        ruta = self._ruta_segmento(segmento)
+        if not os.path.exists(ruta):
+            return []
+
+        tamano = os.path.getsize(ruta)
+        nuevas = []
+        with open(ruta, 'rb') as f:
+            while posicion < tamano:
+                f.seek(posicion)
+                cabecera = f.read(CABECERA.size)
+                if len(cabecera) < CABECERA.size:
+                    break
+                longitud, crc = CABECERA.unpack(cabecera)
+                contenido = f.read(longitud)
+                if len(contenido) < longitud or zlib.crc32(contenido) != crc:
+                    break
+                try:
+                    registro = json.loads(contenido)
+                except ValueError:
+                    break
+                nuevas.append(EntradaDiario(
+                    registro.get('ts', 0.0), registro.get('categoria', ''), registro.get('tipo', ''),
+                    segmento, posicion, longitud
+                ))
+                posicion += CABECERA.size + longitud
+
+        if posicion < tamano:
+            self.bytes_truncados += tamano - posicion
+            with open(ruta, 'r+b') as f:
+                f.truncate(posicion)
+        return nuevas
+
+    # =================== ESCRITURA ===================
+
+    def agregar(self, categoria: str, tipo: str, datos: Any,
+                timestamp: Optional[float] = None) -> EntradaDiario:
+        """Anexa un registro y retorna su entrada de índice"""
+        return self.agregar_lote([(categoria, tipo, datos, timestamp)])[0]
+
+    def agregar_lote(self, registros: List[Tuple[str, str, Any, Optional[float]]]) -> List[EntradaDiario]:
+        """Anexa varios registros con una sola descarga a disco
+
+        Args:
+            registros: Tuplas (categoria, tipo, datos, timestamp o None)
+        """
+        with self._lock:
+            nuevas = []
+            for categoria, tipo, datos, timestamp in registros:
+                timestamp = time.time() if timestamp is None else timestamp
+                contenido = json.dumps(
+                    {'ts': timestamp, 'categoria': categoria, 'tipo': tipo, 'datos': datos},
+                    ensure_ascii=False, separators=(',', ':'), default=str
+                ).encode('utf-8')
+
+                tamano_registro = CABECERA.size + len(contenido)
+                posicion = self._archivo.tell()
+                if posicion > 0 and posicion + tamano_registro > self.tamano_segmento:
+                    self._rotar()
+                    posicion = 0
+
+                self._archivo.write(CABECERA.pack(len(contenido), zlib.crc32(contenido)))
+                self._archivo.write(contenido)
+                nuevas.append(EntradaDiario(timestamp, categoria, tipo, self._segmento_actual,
+                                            posicion, len(contenido)))
+
+            # Primero los datos y luego el índice: un corte deja registros
+            # sin indexar (recuperables), nunca entradas sin datos
+            self._descargar(self._archivo)
+            self._indice.writelines(entrada.linea().encode('utf-8') for entrada in nuevas)
+            self._descargar(self._indice)
+
+            self.entradas.extend(nuevas)
+            return nuevas
+
+    def _rotar(self):
+        """Cierra el segmento actual y abre el siguiente"""
+        self._descargar(self._archivo)
+        self._archivo.close()
+        self._segmento_actual += 1
+        self._archivo = open(self._ruta_segmento(self._segmento_actual), 'ab')
+
+    def _descargar(self, archivo):
+        archivo.flush()
+        if self.sincronizar:
+            os.fsync(archivo.fileno())
+
+    def cerrar(self):
+        """Cierra los archivos abiertos"""
+        with self._lock:
+            for archivo in (self._archivo, self._indice):
+                if not archivo.closed:
+                    self._descargar(archivo)
+                    archivo.close()
+
+    # =================== LECTURA ===================
+
+    def buscar(self, categoria: Optional[str] = None, tipo: Optional[str] = None,
+               desde: Optional[float] = None, hasta: Optional[float] = None) -> List[EntradaDiario]:
+        """Filtra entradas del índice (sin leer los segmentos)"""
+        with self._lock:
+            entradas = list(self.entradas)
+        return [
+            e for e in entradas
+            if (categoria is None or e.categoria == categoria)
+            and (tipo is None or e.tipo == tipo)
+            and (desde is None or e.timestamp >= desde)
+            and (hasta is None or e.timestamp <= hasta)
+        ]
+
+    def leer(self, entrada: EntradaDiario) -> Dict[str, Any]:
+        """Lee y valida un registro
+
+        Raises:
+            ValueError: Si el registro está incompleto o su CRC no coincide
+        """
+        with self._lock:
+            if entrada.segmento == self._segmento_actual:
+                self._archivo.flush()
+
+        with open(self._ruta_segmento(entrada.segmento), 'rb') as f:
+            return self._leer_de(f, entrada)
+
+    @staticmethod
+    def _leer_de(archivo, entrada: EntradaDiario) -> Dict[str, Any]:
+        archivo.seek(entrada.posicion)
+        cabecera = archivo.read(CABECERA.size)
+        if len(cabecera) < CABECERA.size:
+            raise ValueError(f"Registro {entrada.referencia} incompleto")
+        longitud, crc = CABECERA.unpack(cabecera)
+        contenido = archivo.read(longitud)
+        if longitud != entrada.longitud or len(contenido) < longitud or zlib.crc32(contenido) != crc:
+            raise ValueError(f"Registro {entrada.referencia} corrupto (CRC)")
+        return json.loads(contenido)
+
+    def reproducir(self, categoria: Optional[str] = None, tipo: Optional[str] = None,
+                   desde: Optional[float] = None, hasta: Optional[float] = None,
+                   omitir_corruptos: bool = True) -> Iterator[Dict[str, Any]]:
+        """Recorre los registros en orden de escritura guiándose por el índice
+
+        Cada segmento se abre una sola vez; los registros con CRC inválido
+        se omiten (o lanzan ValueError con omitir_corruptos=False).
+        """
+        with self._lock:
+            self._archivo.flush()
+
+        abierto: Tuple[Optional[int], Any] = (None, None)
+        try:
+            for entrada in self.buscar(categoria, tipo, desde, hasta):
+                if abierto[0] != entrada.segmento:
+                    if abierto[1]:
+                        abierto[1].close()
+                    abierto = (entrada.segmento, open(self._ruta_segmento(entrada.segmento), 'rb'))
+                try:
+                    yield self._leer_de(abierto[1], entrada)
+                except ValueError:
+                    if not omitir_corruptos:
+                        raise
+        finally:
+            if abierto[1]:
+                abierto[1].close()
+
+    def verificar(self) -> Dict[str, int]:
+        """Valida el CRC de todos los registros indexados"""
+        resultado = {'validos': 0, 'corruptos': 0}
+        for entrada in self.buscar():
+            try:
+                self.leer(entrada)
+                resultado['validos'] += 1
+            except (ValueError, OSError):
+                resultado['corruptos'] += 1
+        return resultado
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Conteos y bytes por categoría calculados desde el índice"""
+        with self._lock:
+            entradas = list(self.entradas)
+            segmento_actual = self._segmento_actual
+
+        por_categoria: Dict[str, Dict[str, Any]] = {}
+        for entrada in entradas:
+            datos = por_categoria.setdefault(
+                entrada.categoria, {'registros': 0, 'bytes': 0, 'ultimo': None}
+            )
+            datos['registros'] += 1
+            datos['bytes'] += CABECERA.size + entrada.longitud
+            datos['ultimo'] = entrada.timestamp
+
+        return {
+            'registros': len(entradas),
+            'segmentos': segmento_actual,
+            'bytes': sum(d['bytes'] for d in por_categoria.values()),
+            'categorias': por_categoria,
+            'registros_recuperados': self.registros_recuperados,
+            'bytes_truncados': self.bytes_truncados,
+        }
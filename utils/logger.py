@@ -5,28 +5,91 @@ Sistema de Logging - VentaPro
 Maneja todos los logs del sistema con niveles, rotación y formateo.
 Registra actividades, errores y eventos importantes.
 
+En modo asíncrono el hilo que registra solo encola el registro: un hilo
+escritor (QueueListener) formatea y escribe por lotes, con un único flush
+por lote. Si la cola se llena, los registros se descartan o se espera un
+tiempo acotado según la política. El formato 'json' escribe una línea
+JSON por registro con campos estructurados (modulo, folio, ...).
+
 Autor: Sistema VentaPro
 Fecha: 2025-10-04
 """
 
+import atexit
+import copy
+import json
 import logging
 import logging.handlers
 import os
+import queue
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, Optional
 import colorama
 from colorama import Fore, Back, Style
 
 # Inicializar colorama para Windows
 colorama.init(autoreset=True)
 
+# Escritor en segundo plano compartido por todas las instancias de Logger
+_escritor: Optional["EscritorLotes"] = None
+
+POLITICA_DESCARTAR = 'descartar'
+POLITICA_BLOQUEAR = 'bloquear'
+
+_formateador_base = logging.Formatter()
+
+
+def _leer_configuracion() -> Dict[str, Any]:
+    """Opciones de [LOGGING] en config.ini (valores por defecto si no hay archivo)"""
+    opciones = {
+        'asincrono': True,
+        'formato': 'texto',
+        'capacidad_cola': 10000,
+        'politica': POLITICA_DESCARTAR,
+        'tamano_lote': 256,
+    }
+    try:
+        from utils.config_manager import ConfigManager
+        config = ConfigManager()
+        opciones.update(
+            asincrono=config.getboolean('LOGGING', 'log_async', True),
+            formato=config.get('LOGGING', 'log_format', 'texto'),
+            capacidad_cola=config.getint('LOGGING', 'log_queue_size', 10000),
+            politica=config.get('LOGGING', 'log_queue_policy', POLITICA_DESCARTAR),
+            tamano_lote=config.getint('LOGGING', 'log_batch_size', 256),
+        )
+    except Exception:
+        pass
+    return opciones
+
+
 class Logger:
-    """Sistema de logging avanzado para VentaPro"""
+    """Sistema de logging avanzado para VentaPro
     
-    def __init__(self, log_file: str = "logs/app.log", log_level: str = "INFO"):
+    Args:
+        log_file: Archivo de log con rotación
+        log_level: Nivel mínimo registrado
+        asincrono: Escribir desde un hilo en segundo plano (por defecto `log_async`)
+        formato: 'texto' o 'json' (JSON lines) para el archivo (por defecto `log_format`)
+    
+    Los handlers se configuran una sola vez para el logger 'VentaPro'; las
+    instancias posteriores comparten handlers y escritor.
+    """
+    
+    def __init__(self, log_file: str = "logs/app.log", log_level: str = "INFO",
+                 asincrono: Optional[bool] = None, formato: Optional[str] = None):
         self.log_file = log_file
         self.log_level = log_level.upper()
         
+        opciones = _leer_configuracion()
+        self.asincrono = opciones['asincrono'] if asincrono is None else asincrono
+        self.formato = formato or opciones['formato']
+        self.capacidad_cola = opciones['capacidad_cola']
+        self.politica = opciones['politica']
+        self.tamano_lote = opciones['tamano_lote']
+        
         # Crear directorio de logs si no existe
         os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
         
@@ -40,15 +103,19 @@ class Logger:
     
     def _configurar_handlers(self):
         """Configura los handlers para archivo y consola"""
+        global _escritor
         
         # Formatter para logs
-        formatter = logging.Formatter(
-            fmt='%(asctime)s | %(levelname)8s | %(module)15s | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
+        if self.formato == 'json':
+            formatter = FormateadorJSON()
+        else:
+            formatter = FormateadorTexto(
+                fmt='%(asctime)s | %(levelname)8s | %(module)15s | %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
         
         # Handler para archivo con rotación
-        file_handler = logging.handlers.RotatingFileHandler(
+        file_handler = ArchivoRotativoPorLotes(
             self.log_file,
             maxBytes=10*1024*1024,  # 10MB
             backupCount=5,
@@ -66,65 +133,297 @@ class Logger:
         console_handler.setFormatter(console_formatter)
         console_handler.setLevel(logging.INFO)
         
-        # Agregar handlers al logger
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        if not self.asincrono:
+            # Modo síncrono: cada registro se escribe y vacía en el hilo que llama
+            file_handler.diferir_flush = False
+            self.logger.addHandler(file_handler)
+            self.logger.addHandler(console_handler)
+            return
+        
+        # Modo asíncrono: el hilo que registra solo encola
+        cola: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=self.capacidad_cola)
+        _escritor = EscritorLotes(cola, file_handler, console_handler, tamano_lote=self.tamano_lote)
+        self.logger.addHandler(ManejadorCola(cola, self.politica, _escritor))
+        _escritor.start()
+        atexit.register(detener_escritor)
+    
+    def _registrar(self, nivel: int, mensaje: str, modulo: str, campos: Optional[Dict[str, Any]] = None):
+        """Registra con los campos estructurados como atributos del registro"""
+        if not self.logger.isEnabledFor(nivel):
+            return
+        extra = {'modulo': modulo or None, 'campos': campos or {}}
+        self.logger.log(nivel, mensaje, extra=extra, stacklevel=3)
     
     def debug(self, mensaje: str, modulo: str = ""):
         """Log nivel DEBUG"""
-        if modulo:
-            self.logger.debug(f"[{modulo}] {mensaje}")
-        else:
-            self.logger.debug(mensaje)
+        self._registrar(logging.DEBUG, mensaje, modulo)
     
     def info(self, mensaje: str, modulo: str = ""):
         """Log nivel INFO"""
-        if modulo:
-            self.logger.info(f"[{modulo}] {mensaje}")
-        else:
-            self.logger.info(mensaje)
+        self._registrar(logging.INFO, mensaje, modulo)
     
     def warning(self, mensaje: str, modulo: str = ""):
         """Log nivel WARNING"""
-        if modulo:
-            self.logger.warning(f"[{modulo}] {mensaje}")
-        else:
-            self.logger.warning(mensaje)
+        self._registrar(logging.WARNING, mensaje, modulo)
     
     def error(self, mensaje: str, modulo: str = ""):
         """Log nivel ERROR"""
-        if modulo:
-            self.logger.error(f"[{modulo}] {mensaje}")
-        else:
-            self.logger.error(mensaje)
+        self._registrar(logging.ERROR, mensaje, modulo)
     
     def critical(self, mensaje: str, modulo: str = ""):
         """Log nivel CRITICAL"""
-        if modulo:
-            self.logger.critical(f"[{modulo}] {mensaje}")
-        else:
-            self.logger.critical(mensaje)
+        self._registrar(logging.CRITICAL, mensaje, modulo)
     
     def log_venta(self, folio: str, total: float, cliente: str = ""):
         """Log específico para ventas"""
         mensaje = f"💰 VENTA {folio} - Total: ${total:.2f}"
         if cliente:
             mensaje += f" - Cliente: {cliente}"
-        self.info(mensaje, "VENTAS")
+        self._registrar(logging.INFO, mensaje, "VENTAS",
+                        {'folio': folio, 'total': round(total, 2), 'cliente': cliente or None})
     
     def log_producto(self, accion: str, codigo: str, nombre: str):
         """Log específico para productos"""
         mensaje = f"📦 {accion.upper()} - {codigo} - {nombre}"
-        self.info(mensaje, "PRODUCTOS")
+        self._registrar(logging.INFO, mensaje, "PRODUCTOS", {'accion': accion, 'codigo': codigo})
     
     def log_usuario(self, usuario: str, accion: str):
         """Log específico para usuarios"""
         mensaje = f"👤 {usuario} - {accion}"
-        self.info(mensaje, "USUARIOS")
+        self._registrar(logging.INFO, mensaje, "USUARIOS", {'usuario': usuario})
     
     def log_sistema(self, mensaje: str):
         """Log específico para eventos del sistema"""
-        self.info(f"⚙️ {mensaje}", "SISTEMA")
+        self._registrar(logging.INFO, f"⚙️ {mensaje}", "SISTEMA")
+    
+    def agregar_handler(self, handler: logging.Handler):
+        """Agrega un destino adicional (p. ej. la tabla logs)
+        
+        En modo asíncrono se conecta al hilo escritor para que el hilo
+        que registra siga limitándose a encolar.
+        """
+        if _escritor is not None:
+            if handler not in _escritor.handlers:
+                _escritor.handlers = _escritor.handlers + (handler,)
+        elif handler not in self.logger.handlers:
+            self.logger.addHandler(handler)
+    
+    def obtener_metricas(self) -> Dict[str, int]:
+        """Métricas del escritor asíncrono (vacío en modo síncrono)"""
+        return _escritor.obtener_metricas() if _escritor else {}
+
+# =================== ESCRITURA ASÍNCRONA ===================
+
+class ManejadorCola(logging.handlers.QueueHandler):
+    """QueueHandler con política ante cola llena
+    
+    'descartar' no espera nunca: los registros por debajo de WARNING se
+    descartan y se cuentan; los de WARNING o más esperan hasta
+    `espera_max` segundos para no perder errores. 'bloquear' espera
+    siempre hasta `espera_max`.
+    """
+    
+    def __init__(self, cola: queue.Queue, politica: str, escritor: "EscritorLotes",
+                 espera_max: float = 0.05):
+        super().__init__(cola)
+        self.politica = politica
+        self.escritor = escritor
+        self.espera_max = espera_max
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Fija el mensaje y el texto de la excepción sin formatear la línea
+        
+        El formato completo lo hace el hilo escritor; la excepción se
+        conserva aparte para el campo 'excepcion' del formato JSON.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formateador_base.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.politica != POLITICA_BLOQUEAR and record.levelno < logging.WARNING:
+                self.escritor.contar('descartados')
+                return
+            try:
+                self.queue.put(record, timeout=self.espera_max)
+            except queue.Full:
+                self.escritor.contar('descartados')
+                return
+        self.escritor.contar('encolados')
+
+class EscritorLotes(logging.handlers.QueueListener):
+    """QueueListener que drena la cola por lotes y vacía los handlers una vez por lote"""
+    
+    def __init__(self, cola: queue.Queue, *handlers: logging.Handler, tamano_lote: int = 256,
+                 espera_cierre: float = 5.0):
+        super().__init__(cola, *handlers, respect_handler_level=True)
+        self.tamano_lote = max(1, tamano_lote)
+        self.espera_cierre = espera_cierre
+        self._lock_metricas = threading.Lock()
+        self._metricas = {
+            'encolados': 0,
+            'escritos': 0,
+            'descartados': 0,
+            'lotes': 0,
+            'max_pendientes': 0,
+        }
+    
+    def contar(self, clave: str):
+        with self._lock_metricas:
+            self._metricas[clave] += 1
+    
+    def _monitor(self):
+        cola = self.queue
+        while True:
+            lote = [cola.get()]
+            while len(lote) < self.tamano_lote:
+                try:
+                    lote.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+            
+            fin = False
+            ultimo = None
+            for record in lote:
+                if record is self._sentinel:
+                    fin = True
+                else:
+                    ultimo = record
+                    self.handle(record)
+                cola.task_done()
+            
+            # Un solo flush por lote; un handler que falla no detiene el hilo
+            for handler in self.handlers:
+                try:
+                    if isinstance(handler, ArchivoRotativoPorLotes):
+                        handler.vaciar_lote()
+                    else:
+                        handler.flush()
+                except Exception:
+                    self._reportar_error(handler, ultimo)
+            
+            with self._lock_metricas:
+                self._metricas['escritos'] += len(lote) - (1 if fin else 0)
+                self._metricas['lotes'] += 1
+                self._metricas['max_pendientes'] = max(self._metricas['max_pendientes'], len(lote))
+            if fin:
+                break
+    
+    def handle(self, record: logging.LogRecord):
+        try:
+            super().handle(record)
+        except Exception:
+            # handleError del propio handler falló (p. ej. stderr ya cerrado)
+            pass
+    
+    @staticmethod
+    def _reportar_error(handler: logging.Handler, record: Optional[logging.LogRecord]):
+        """Entrega al handler el error de su flush sin propagarlo al hilo"""
+        try:
+            handler.handleError(record or logging.makeLogRecord({'msg': 'vaciado de lote'}))
+        except Exception:
+            # stderr cerrado al terminar el intérprete
+            pass
+    
+    def enqueue_sentinel(self):
+        # Con la cola llena, put_nowait fallaría y el hilo no se detendría;
+        # si el hilo ya murió nadie vaciará la cola y put() no volvería nunca
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self.queue.put(self._sentinel, timeout=self.espera_cierre)
+        except queue.Full:
+            pass
+    
+    def stop(self):
+        """Detiene el hilo sin bloquear indefinidamente si dejó de consumir la cola"""
+        if self._thread is None:
+            return
+        self.enqueue_sentinel()
+        self._thread.join(self.espera_cierre)
+        self._thread = None
+    
+    def obtener_metricas(self) -> Dict[str, int]:
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+        metricas['pendientes'] = self.queue.qsize()
+        return metricas
+
+class ArchivoRotativoPorLotes(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler que difiere el flush hasta el final del lote"""
+    
+    diferir_flush = True
+    
+    def flush(self):
+        if not self.diferir_flush:
+            super().flush()
+    
+    def vaciar_lote(self):
+        super().flush()
+    
+    def close(self):
+        self.vaciar_lote()
+        super().close()
+
+def detener_escritor():
+    """Escribe los registros pendientes y detiene el hilo escritor
+    
+    Los handlers vuelven a conectarse directamente al logger, de modo que
+    lo registrado después (p. ej. en otros hooks de salida) se escribe en
+    modo síncrono en lugar de quedar en una cola sin lector.
+    """
+    global _escritor
+    if _escritor is None:
+        return
+    escritor, _escritor = _escritor, None
+    
+    logger = logging.getLogger('VentaPro')
+    for handler in list(logger.handlers):
+        if isinstance(handler, ManejadorCola):
+            logger.removeHandler(handler)
+    escritor.stop()
+    
+    for handler in escritor.handlers:
+        if isinstance(handler, ArchivoRotativoPorLotes):
+            handler.diferir_flush = False
+        logger.addHandler(handler)
+
+# =================== FORMATOS ===================
+
+class FormateadorTexto(logging.Formatter):
+    """Formato de texto con el módulo funcional como prefijo '[MODULO]'"""
+    
+    def formatMessage(self, record):
+        modulo = getattr(record, 'modulo', None)
+        if modulo:
+            record.message = f"[{modulo}] {record.message}"
+        return super().formatMessage(record)
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por registro con campos estructurados"""
+    
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'modulo': getattr(record, 'modulo', None),
+            'mensaje': record.getMessage(),
+            'origen': f"{record.module}:{record.funcName}:{record.lineno}",
+            'hilo': record.threadName,
+        }
+        datos.update(getattr(record, 'campos', None) or {})
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            datos['excepcion'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
 
 class ColoredConsoleHandler(logging.StreamHandler):
     """Handler personalizado para mostrar logs con colores en consola"""
@@ -138,7 +437,7 @@ class ColoredConsoleHandler(logging.StreamHandler):
         except Exception:
             self.handleError(record)
 
-class ColoredFormatter(logging.Formatter):
+class ColoredFormatter(FormateadorTexto):
     """Formatter que agrega colores según el nivel de log"""
     
     COLORS = {
@@ -0,0 +1,214 @@
+"""
+Programador de Búsquedas - VentaPro
+===================================
+
+Debounce cancelable para búsquedas en tiempo real de la interfaz.
+Cada pulsación reprograma un único temporizador after(); al vencer, la
+consulta se ejecuta en un hilo de trabajo y el resultado se entrega en
+el hilo de Tk. Un contador de generación descarta los resultados que
+llegan después de que el usuario siguió escribiendo, y se registran las
+latencias de consulta y de entrega para ajustar el retardo.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ProgramadorBusqueda:
+    """Programa búsquedas con debounce, ejecución en segundo plano y
+    descarte de resultados obsoletos
+
+    Args:
+        widget: Widget de Tk usado para after()/after_cancel(); debe
+            sobrevivir a la vista (normalmente la ventana raíz)
+        buscar: Función de consulta; se ejecuta fuera del hilo de Tk y no
+            debe tocar widgets
+        mostrar: Función que pinta el resultado; se ejecuta en el hilo de Tk
+        retardo_ms: Tiempo de inactividad antes de lanzar la consulta
+        al_error: Función opcional que recibe la excepción de la consulta
+    """
+
+    def __init__(self, widget, buscar: Callable[..., Any], mostrar: Callable[[Any], None],
+                 retardo_ms: int = 250, intervalo_sondeo_ms: int = 15,
+                 al_error: Optional[Callable[[Exception], None]] = None):
+        self.widget = widget
+        self.buscar = buscar
+        self.mostrar = mostrar
+        self.retardo_ms = retardo_ms
+        self.intervalo_sondeo_ms = intervalo_sondeo_ms
+        self.al_error = al_error
+
+        # Un solo hilo: las consultas se sirven en orden y no compiten entre sí
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="busqueda")
+        self._id_pendiente = None
+        self._id_sondeo = None
+        self._generacion = 0
+        self._en_curso: Dict[int, tuple] = {}
+        self._cerrado = False
+
+        self._lock_metricas = threading.Lock()
+        self._metricas = {
+            'programadas': 0,
+            'canceladas': 0,
+            'ejecutadas': 0,
+            'entregadas': 0,
+            'descartadas': 0,
+            'errores': 0,
+            'latencia_consulta_ultima': 0.0,
+            'latencia_consulta_total': 0.0,
+            'latencia_consulta_max': 0.0,
+            'latencia_entrega_ultima': 0.0,
+            'latencia_entrega_total': 0.0,
+            'latencia_entrega_max': 0.0,
+        }
+
+    # =================== PROGRAMACIÓN ===================
+
+    def programar(self, *argumentos):
+        """Reprograma la búsqueda; cancela la que estuviera pendiente"""
+        if self._cerrado:
+            return
+        self._incrementar('programadas')
+        if self._cancelar_pendiente():
+            self._incrementar('canceladas')
+        self._id_pendiente = self.widget.after(
+            self.retardo_ms, lambda: self._lanzar(argumentos, time.perf_counter())
+        )
+
+    def ejecutar_ahora(self, *argumentos):
+        """Lanza la búsqueda sin esperar el retardo (Enter, botón Buscar)"""
+        if self._cerrado:
+            return
+        self._cancelar_pendiente()
+        self._lanzar(argumentos, time.perf_counter())
+
+    def cancelar(self):
+        """Cancela la búsqueda pendiente y descarta las que estén en curso
+
+        Se llama al salir de la vista, antes de destruir sus widgets.
+        """
+        self._cancelar_pendiente()
+        self._generacion += 1
+        if self._id_sondeo is not None:
+            self.widget.after_cancel(self._id_sondeo)
+            self._id_sondeo = None
+        # Las consultas que aún no empezaron no llegan a ejecutarse
+        for futuro, _ in self._en_curso.values():
+            futuro.cancel()
+        self._en_curso.clear()
+
+    def cerrar(self):
+        """Cancela todo y libera el hilo de trabajo"""
+        self.cancelar()
+        self._cerrado = True
+        # Sin cancel_futures (Python 3.9+): las pendientes ya se cancelaron arriba
+        self._ejecutor.shutdown(wait=False)
+
+    def _cancelar_pendiente(self) -> bool:
+        """Cancela el temporizador pendiente; retorna True si había uno"""
+        if self._id_pendiente is None:
+            return False
+        self.widget.after_cancel(self._id_pendiente)
+        self._id_pendiente = None
+        return True
+
+    # =================== EJECUCIÓN ===================
+
+    def _lanzar(self, argumentos: tuple, inicio: float):
+        """Envía la consulta al hilo de trabajo con una nueva generación"""
+        self._id_pendiente = None
+        self._generacion += 1
+        generacion = self._generacion
+
+        futuro = self._ejecutor.submit(self._consultar, argumentos)
+        self._en_curso[generacion] = (futuro, inicio)
+        if self._id_sondeo is None:
+            self._id_sondeo = self.widget.after(self.intervalo_sondeo_ms, self._sondear)
+
+    def _consultar(self, argumentos: tuple):
+        """Ejecuta la consulta midiendo su duración (hilo de trabajo)"""
+        inicio = time.perf_counter()
+        try:
+            return self.buscar(*argumentos)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._lock_metricas:
+                self._metricas['ejecutadas'] += 1
+                self._metricas['latencia_consulta_ultima'] = duracion
+                self._metricas['latencia_consulta_total'] += duracion
+                if duracion > self._metricas['latencia_consulta_max']:
+                    self._metricas['latencia_consulta_max'] = duracion
+
+    def _sondear(self):
+        """Recoge en el hilo de Tk las consultas terminadas"""
+        self._id_sondeo = None
+        for generacion, (futuro, inicio) in list(self._en_curso.items()):
+            if futuro.done():
+                del self._en_curso[generacion]
+                self._entregar(generacion, futuro, inicio)
+
+        if self._en_curso:
+            self._id_sondeo = self.widget.after(self.intervalo_sondeo_ms, self._sondear)
+
+    def _entregar(self, generacion: int, futuro: Future, inicio: float):
+        """Pinta el resultado si sigue siendo el más reciente"""
+        if generacion != self._generacion:
+            self._incrementar('descartadas')
+            return
+
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            self._incrementar('errores')
+            if self.al_error:
+                self.al_error(e)
+            return
+
+        self.mostrar(resultado)
+
+        latencia = time.perf_counter() - inicio
+        with self._lock_metricas:
+            self._metricas['entregadas'] += 1
+            self._metricas['latencia_entrega_ultima'] = latencia
+            self._metricas['latencia_entrega_total'] += latencia
+            if latencia > self._metricas['latencia_entrega_max']:
+                self._metricas['latencia_entrega_max'] = latencia
+
+    # =================== MÉTRICAS ===================
+
+    def _incrementar(self, clave: str):
+        with self._lock_metricas:
+            self._metricas[clave] += 1
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene contadores y latencias en milisegundos
+
+        La latencia de consulta mide solo la función de búsqueda; la de
+        entrega va desde que vence el retardo hasta que el resultado se pinta.
+        """
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+
+        ejecutadas = metricas['ejecutadas']
+        entregadas = metricas['entregadas']
+        resumen = {
+            'retardo_ms': self.retardo_ms,
+            'programadas': metricas['programadas'],
+            'canceladas': metricas['canceladas'],
+            'ejecutadas': ejecutadas,
+            'entregadas': entregadas,
+            'descartadas': metricas['descartadas'],
+            'errores': metricas['errores'],
+        }
+        for tipo, cantidad in (('consulta', ejecutadas), ('entrega', entregadas)):
+            resumen[f'latencia_{tipo}_ultima_ms'] = metricas[f'latencia_{tipo}_ultima'] * 1000
+            resumen[f'latencia_{tipo}_max_ms'] = metricas[f'latencia_{tipo}_max'] * 1000
+            resumen[f'latencia_{tipo}_promedio_ms'] = (
+                metricas[f'latencia_{tipo}_total'] * 1000 / cantidad if cantidad else 0.0
+            )
+        return resumen
@@ -0,0 +1,287 @@
+"""
+Programador de Respaldos - VentaPro
+===================================
+
+Servicio en segundo plano que ejecuta los respaldos de la base de datos
+definidos en la tabla `backup_config`. Un hilo propio revisa cada cierto
+tiempo qué destinos vencieron, alinea los respaldos diarios a la hora de
+`auto_backup_time`, los aplaza mientras haya escrituras frecuentes y
+registra `ultimo_backup` al terminar. La interfaz solo consulta el estado
+con obtener_estado(); nada de esto corre en el hilo de Tk.
+
+Autor: Sistema VentaPro
+Fecha: 2026-10-17
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Estados expuestos a la interfaz
+ESTADO_INACTIVO = 'inactivo'
+ESTADO_ESPERANDO = 'esperando'
+ESTADO_RESPALDANDO = 'respaldando'
+ESTADO_APLAZADO = 'aplazado'
+ESTADO_DETENIDO = 'detenido'
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+
+def proximo_respaldo(ultimo: Optional[datetime], frecuencia_horas: int,
+                     hora_auto: Tuple[int, int], ahora: datetime) -> datetime:
+    """Calcula cuándo vence el siguiente respaldo de un destino
+
+    Sin respaldo previo vence de inmediato. Las frecuencias de días
+    completos se alinean a la hora de poca actividad (`hora_auto`): vence
+    en el horario anterior al último respaldo más N días, de modo que un
+    respaldo manual a media tarde no desplaza el de la madrugada.
+    """
+    if ultimo is None:
+        return ahora
+
+    if frecuencia_horas <= 0 or frecuencia_horas % 24 != 0:
+        return ultimo + timedelta(hours=max(1, frecuencia_horas))
+
+    horario = ultimo.replace(hour=hora_auto[0], minute=hora_auto[1], second=0, microsecond=0)
+    if horario > ultimo:
+        horario -= timedelta(days=1)
+    return horario + timedelta(days=frecuencia_horas // 24)
+
+
+def _leer_fecha(valor) -> Optional[datetime]:
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+
+class ProgramadorRespaldos:
+    """Hilo programador de respaldos en línea de la base de datos
+
+    Args:
+        db_manager: DatabaseManager conectado; se usa su pool y crear_backup()
+        config: ConfigManager opcional (por defecto el del db_manager)
+    """
+
+    def __init__(self, db_manager, config=None):
+        self.db = db_manager
+        self.config = config if config is not None else getattr(db_manager, 'config', None)
+        self.logger = getattr(db_manager, 'logger', None)
+
+        self.hora_auto = self.config.get_auto_backup_time() if self.config else (2, 0)
+        self.respaldar_al_salir = self.config.backup_on_exit() if self.config else True
+        self.intervalo = self.config.getint('BACKUP', 'scheduler_check_seconds', 60) if self.config else 60
+        self.max_escrituras_reposo = self.config.getint('BACKUP', 'backup_idle_max_writes', 20) if self.config else 20
+        self.max_aplazamiento = timedelta(
+            minutes=self.config.getint('BACKUP', 'backup_max_delay_minutes', 120) if self.config else 120
+        )
+
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._despertar = threading.Event()
+        self._forzar = False
+        self._respaldo_final = False
+        self._escrituras_previas: Optional[int] = None
+
+        self._lock_estado = threading.Lock()
+        self._estado: Dict[str, Any] = {
+            'estado': ESTADO_INACTIVO,
+            'destino_actual': None,
+            'ultimo_respaldo': None,
+            'ultima_ruta': None,
+            'ultimo_error': None,
+            'proximos': {},
+            'realizados': 0,
+            'fallidos': 0,
+            'aplazamientos': 0,
+        }
+
+    # =================== CICLO DE VIDA ===================
+
+    def iniciar(self) -> bool:
+        """Inicia el hilo programador (no hace nada si ya está corriendo)"""
+        if self._hilo and self._hilo.is_alive():
+            return True
+        if self.config and not self.config.backup_enabled():
+            self._log_info("💤 Respaldos automáticos deshabilitados en la configuración")
+            return False
+
+        self._asegurar_configuracion()
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="programador-respaldos", daemon=True)
+        self._hilo.start()
+        return True
+
+    def solicitar_respaldo(self):
+        """Pide un respaldo inmediato de todos los destinos activos"""
+        self._forzar = True
+        self._despertar.set()
+
+    def cerrar(self, respaldo_final: Optional[bool] = None, timeout: Optional[float] = None):
+        """Detiene el programador y espera al hilo
+
+        Con respaldo_final (por defecto `backup_on_exit`) el hilo hace un
+        último respaldo antes de terminar. Llamar después de salir del
+        mainloop para no congelar la ventana.
+        """
+        if respaldo_final is None:
+            respaldo_final = self.respaldar_al_salir
+        self._respaldo_final = respaldo_final
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo:
+            self._hilo.join(timeout)
+        self._actualizar_estado(estado=ESTADO_DETENIDO)
+
+    # =================== ESTADO ===================
+
+    def obtener_estado(self) -> Dict[str, Any]:
+        """Copia del estado del programador para la interfaz"""
+        with self._lock_estado:
+            estado = dict(self._estado)
+            estado['proximos'] = dict(self._estado['proximos'])
+        return estado
+
+    def _actualizar_estado(self, **cambios):
+        with self._lock_estado:
+            self._estado.update(cambios)
+
+    def _incrementar(self, clave: str):
+        with self._lock_estado:
+            self._estado[clave] += 1
+
+    # =================== BUCLE ===================
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                self._revisar()
+            except Exception as e:
+                # El hilo sigue vivo: un error de un ciclo no detiene los siguientes
+                self._actualizar_estado(ultimo_error=str(e))
+                self._log_error(f"❌ Error en el programador de respaldos: {str(e)}")
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+        if self._respaldo_final:
+            for destino in self._destinos():
+                self._respaldar(destino)
+
+    def _revisar(self):
+        """Ejecuta los destinos vencidos (o todos si se forzó)"""
+        ahora = datetime.now()
+        forzar, self._forzar = self._forzar, False
+        ocupado = self._hay_actividad()
+
+        proximos = {}
+        aplazado = False
+        for destino in self._destinos():
+            vence = proximo_respaldo(destino['ultimo_backup'], destino['frecuencia'], self.hora_auto, ahora)
+            if forzar or vence <= ahora:
+                # Con actividad se espera a un momento de calma, hasta el máximo de aplazamiento
+                if not forzar and ocupado and ahora - vence < self.max_aplazamiento:
+                    aplazado = True
+                    proximos[destino['nombre']] = ahora.strftime(FORMATO_FECHA)
+                    continue
+                if self._respaldar(destino):
+                    vence = proximo_respaldo(datetime.now(), destino['frecuencia'], self.hora_auto, ahora)
+            proximos[destino['nombre']] = vence.strftime(FORMATO_FECHA)
+
+        if aplazado:
+            self._incrementar('aplazamientos')
+        self._actualizar_estado(
+            estado=ESTADO_APLAZADO if aplazado else ESTADO_ESPERANDO,
+            proximos=proximos
+        )
+
+    def _hay_actividad(self) -> bool:
+        """True si hubo más escrituras que el umbral desde la última revisión"""
+        escrituras = self.db.obtener_metricas_pool().get('checkouts_escritura', 0)
+        previas, self._escrituras_previas = self._escrituras_previas, escrituras
+        return previas is not None and escrituras - previas > self.max_escrituras_reposo
+
+    def _respaldar(self, destino: Dict[str, Any]) -> bool:
+        """Respalda un destino y registra ultimo_backup"""
+        self._actualizar_estado(estado=ESTADO_RESPALDANDO, destino_actual=destino['nombre'])
+        ruta = self.db.crear_backup(directorio=destino['ruta_destino'])
+        fin = datetime.now().strftime(FORMATO_FECHA)
+
+        if ruta is None:
+            self._incrementar('fallidos')
+            self._actualizar_estado(destino_actual=None, ultimo_error=f"Falló el respaldo de {destino['nombre']}")
+            return False
+
+        if destino['id'] is not None:
+            self.db.ejecutar_comando(
+                "UPDATE backup_config SET ultimo_backup = ? WHERE id = ?", (fin, destino['id'])
+            )
+        self._incrementar('realizados')
+        self._actualizar_estado(destino_actual=None, ultimo_respaldo=fin, ultima_ruta=ruta, ultimo_error=None)
+        return True
+
+    # =================== DESTINOS ===================
+
+    def _destinos(self) -> List[Dict[str, Any]]:
+        """Destinos activos de backup_config
+
+        Si la tabla no existe (migración pendiente) se usa un destino
+        derivado de config.ini, sin registro de ultimo_backup.
+        """
+        try:
+            with self.db.pool.lector() as conexion:
+                filas = conexion.execute("""
+                    SELECT id, nombre, ruta_destino, frecuencia, ultimo_backup
+                    FROM backup_config
+                    WHERE activo = 1
+                    ORDER BY id
+                """).fetchall()
+        except sqlite3.Error:
+            return [self._destino_por_defecto()]
+
+        return [
+            {
+                'id': fila['id'],
+                'nombre': fila['nombre'],
+                'ruta_destino': fila['ruta_destino'],
+                'frecuencia': fila['frecuencia'] or 24,
+                'ultimo_backup': _leer_fecha(fila['ultimo_backup']),
+            }
+            for fila in filas
+        ]
+
+    def _destino_por_defecto(self) -> Dict[str, Any]:
+        return {
+            'id': None,
+            'nombre': 'Automático',
+            'ruta_destino': self.config.get_backup_path() if self.config else 'data/backups/',
+            'frecuencia': self.config.get_backup_interval() if self.config else 24,
+            'ultimo_backup': _leer_fecha(self._estado['ultimo_respaldo']),
+        }
+
+    def _asegurar_configuracion(self):
+        """Registra el destino de config.ini si backup_config está vacía"""
+        destino = self._destino_por_defecto()
+        try:
+            with self.db.pool.escritor_conexion() as conexion:
+                if conexion.execute("SELECT COUNT(*) FROM backup_config").fetchone()[0] == 0:
+                    conexion.execute(
+                        "INSERT INTO backup_config (nombre, ruta_destino, frecuencia) VALUES (?, ?, ?)",
+                        (destino['nombre'], destino['ruta_destino'], destino['frecuencia'])
+                    )
+                    conexion.commit()
+        except sqlite3.Error as e:
+            self._log_error(f"❌ No se pudo registrar el destino de backup por defecto: {str(e)}")
+
+    # =================== LOG ===================
+
+    def _log_info(self, mensaje: str):
+        if self.logger:
+            self.logger.info(mensaje)
+
+    def _log_error(self, mensaje: str):
+        if self.logger:
+            self.logger.error(mensaje)